@@ -0,0 +1,82 @@
+"""
+コンパイル済みの仕様のキャッシュ (rtar_ddeps.validation.spec_cache) の効果.
+
+rtar_ddeps.testing.synthetic_spec で生成した文書について, 読み取り専用のコマンド (graph, impact, plan, prune) の
+読み込みにかかる時間 (中央値) を比較する.
+
+* yaml: キャッシュなし. YAML の読み込み, スキーマ検証, 仕様モデルとグラフ (トポロジカル順を含む) の構築.
+* miss: キャッシュにない場合. yaml に加えて, コンパイルしてキャッシュに書き込む.
+* graph: キャッシュから復元し, グラフのトポロジカル順を求める (graph, impact).
+* +spec: graph に加えて仕様モデルを復元する (plan, graph export).
+* +document: さらに文書を復元する (prune).
+
+エントリのサイズ (spec[MiB]) は YAML のファイル (yaml[MiB]) と比較する.
+
+実行例:
+    python benchmarks/bench_compiled_spec.py --entries 1000 10000 50000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from rtar_ddeps.testing.synthetic_spec import SpecShape, SyntheticSpec
+from rtar_ddeps.validation.spec_cache import SpecCache, load_spec
+
+
+def median_ms(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--yaml-backend", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'entries':>8} {'yaml[MiB]':>10} {'spec[MiB]':>10} {'yaml[ms]':>9} {'miss[ms]':>9}"
+        f" {'graph[ms]':>10} {'+spec[ms]':>10} {'+document[ms]':>14} {'speedup':>8}"
+    )
+    for n in args.entries:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "data_dependencies.yml"
+            SyntheticSpec(SpecShape(entries=n)).write(path)
+            cache = SpecCache(Path(tmp) / "cache")
+
+            def cold():
+                load_spec(path, args.yaml_backend)[0].graph.topological_order()
+
+            def miss():
+                cache.clear()
+                load_spec(path, args.yaml_backend, cache)[0].graph.topological_order()
+
+            def hit(*attributes):
+                def load():
+                    compiled = load_spec(path, args.yaml_backend, cache)[0]
+                    compiled.graph.topological_order()
+                    for attribute in attributes:
+                        getattr(compiled, attribute)
+                return load
+
+            yaml_ms = median_ms(cold, args.repeat)
+            miss_ms = median_ms(miss, args.repeat)
+            spec_bytes = sum(entry.stat().st_size for entry in cache.cache_dir.glob("*.spec"))
+            graph_ms = median_ms(hit(), args.repeat)
+            spec_ms = median_ms(hit("spec"), args.repeat)
+            document_ms = median_ms(hit("spec", "document"), args.repeat)
+            print(
+                f"{n:>8} {path.stat().st_size / 2**20:>10.1f} {spec_bytes / 2**20:>10.1f} {yaml_ms:>9.0f} {miss_ms:>9.0f}"
+                f" {graph_ms:>10.1f} {spec_ms:>10.1f} {document_ms:>14.1f} {yaml_ms / graph_ms:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
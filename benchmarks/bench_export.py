@@ -0,0 +1,74 @@
+"""
+依存関係グラフの出力 (rtar_ddeps.graph.export) の実行時間とメモリ.
+
+rtar_ddeps.testing.synthetic_spec の層状の DAG (YAML は経由しない) について, 次を計測する.
+
+* build: DependencyGraph の構築 (出力には推移閉包もトポロジカル順も使わない).
+* dot/mermaid: 書き込んだ文字数を数えるだけのストリームへの出力時間と, tracemalloc のピーク.
+  出力は行ごとに書き出して保持しないため, ピークは出力の文字数ではなくノード数 (ノード ID のリストと集合) に比例する.
+* us/edge: 辺 1 本あたりの出力時間. エントリ数によらずほぼ一定であれば線形時間.
+
+実行例:
+    python benchmarks/bench_export.py --entries 10000 50000 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from rtar_ddeps.graph.dependency_graph import DependencyGraph
+from rtar_ddeps.graph.export import export_graph
+from rtar_ddeps.testing.synthetic_spec import SpecShape, SyntheticSpec
+
+
+class CountingSink:
+    """書き込んだ文字数のみを数えるストリーム."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        return len(text)
+
+
+def measure(graph: DependencyGraph, export_format: str, formats):
+    # tracemalloc は実行を遅くするため, 時間とメモリは別々に計測する
+    sink = CountingSink()
+    start = time.perf_counter()
+    edges = export_graph(graph, sink, export_format, formats=formats)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    export_graph(graph, CountingSink(), export_format, formats=formats)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return edges, elapsed, peak, sink.chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--chain-depth", type=int, default=10)
+    parser.add_argument("--fan-in", type=int, default=2)
+    args = parser.parse_args()
+
+    print(
+        f"{'entries':>8} {'edges':>8} {'build[s]':>9} {'format':>8} {'export[s]':>10}"
+        f" {'us/edge':>8} {'output[MiB]':>12} {'peak[MiB]':>10}"
+    )
+    for n in args.entries:
+        spec = SyntheticSpec(SpecShape(entries=n, chain_depth=args.chain_depth, fan_in=args.fan_in))
+        ids = {name: i for i, name in enumerate(spec.names)}
+        start = time.perf_counter()
+        graph = DependencyGraph(spec.names, spec.required_data(), [ids[name] for name in spec.target])
+        build = time.perf_counter() - start
+        formats = spec.formats()
+        for export_format in ("dot", "mermaid"):
+            edges, elapsed, peak, chars = measure(graph, export_format, formats)
+            print(
+                f"{n:>8} {edges:>8} {build:>9.2f} {export_format:>8} {elapsed:>10.3f}"
+                f" {elapsed / max(edges, 1) * 1e6:>8.2f} {chars / 2**20:>12.1f} {peak / 2**20:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+依存関係グラフ (rtar_ddeps.graph.dependency_graph) の構築時間, 索引のメモリ, 問い合わせのレイテンシ.
+
+rtar_ddeps.testing.synthetic_spec の層状の DAG (YAML は経由しない) について, 次を計測する.
+
+* build: DependencyGraph の構築 (隣接リスト, トポロジカル順).
+* upstream/downstream index: 上流/下流の推移閉包 (ビット集合) の構築時間と, ビット集合の合計サイズ.
+* reaches: 索引による到達判定 1 回 (ランダムなノードの組).
+* BFS reaches: 索引を使わず, 上流を幅優先探索して判定する場合 (比較用).
+* upstream(): 最終層のノードの上流の一覧 (出力の大きさに比例する).
+* impact(): 最初の層のノードを変更した場合の再計算が必要なノード (索引を使わず, 影響の範囲のみを走査する).
+* plan: --jobs のワーカーへのリストスケジューリング (rtar_ddeps.graph.schedule) と, その速度向上率.
+
+実行例:
+    python benchmarks/bench_graph.py --entries 10000 100000
+"""
+import argparse
+import random
+import sys
+import time
+from collections import deque
+
+from rtar_ddeps.graph.dependency_graph import DependencyGraph
+from rtar_ddeps.graph.schedule import plan_schedule
+from rtar_ddeps.testing.synthetic_spec import SpecShape, SyntheticSpec
+
+
+def bfs_reaches(graph: DependencyGraph, source: int, target: int) -> bool:
+    """target から上流を幅優先探索して source を探す."""
+    seen = {target}
+    queue = deque([target])
+    while queue:
+        for u in graph.predecessors[queue.popleft()]:
+            if u == source:
+                return True
+            if u not in seen:
+                seen.add(u)
+                queue.append(u)
+    return False
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def per_query_us(func, pairs) -> float:
+    start = time.perf_counter()
+    for source, target in pairs:
+        func(source, target)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--chain-depth", type=int, default=10)
+    parser.add_argument("--fan-in", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=8)
+    args = parser.parse_args()
+
+    print(
+        f"{'entries':>8} {'build[s]':>9} {'up idx[s]':>10} {'up idx[MiB]':>12} {'down idx[s]':>12} {'down idx[MiB]':>14}"
+        f" {'reaches[us]':>12} {'BFS[us]':>9} {'upstream()[ms]':>15} {'impact()[ms]':>13} {'impacted':>9} {'plan[s]':>8} {'speedup':>8}"
+    )
+    for n in args.entries:
+        spec = SyntheticSpec(SpecShape(entries=n, chain_depth=args.chain_depth, fan_in=args.fan_in))
+        ids = {name: i for i, name in enumerate(spec.names)}
+        graph, build = timed(DependencyGraph, spec.names, spec.required_data(), [ids[name] for name in spec.target])
+        (_, up_masks), up_build = timed(graph._closure, 'upstream')
+        (_, down_masks), down_build = timed(graph._closure, 'downstream')
+        up_mib = sum(map(sys.getsizeof, up_masks)) / 2**20
+        down_mib = sum(map(sys.getsizeof, down_masks)) / 2**20
+
+        rng = random.Random(0)
+        pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(args.queries)]
+        reaches = per_query_us(graph.reaches, pairs)
+        # 幅優先探索は遅いため問い合わせ数を減らす
+        bfs = per_query_us(lambda s, t: bfs_reaches(graph, s, t), pairs[:max(1, args.queries // 100)])
+        _, listing = timed(graph.upstream, n - 1)
+        impacted, impact = timed(graph.impact, [0])
+        plan, planning = timed(plan_schedule, graph, args.jobs)
+        print(
+            f"{n:>8} {build:>9.2f} {up_build:>10.2f} {up_mib:>12.1f} {down_build:>12.2f} {down_mib:>14.1f}"
+            f" {reaches:>12.2f} {bfs:>9.0f} {listing * 1000:>15.2f} {impact * 1000:>13.2f} {len(impacted):>9} {planning:>8.2f} {plan.speedup:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+!include で分割した文書の読み込み時間 (rtar_ddeps.validation.includes).
+
+rtar_ddeps.testing.synthetic_spec で生成した文書の data を --fragments 個のファイルに分け,
+`data: !include data/` で取り込む文書を作る. 読み込み (重複キー検出と取り込みを含む) の時間 (中央値) を次の場合で比較する.
+
+* single: 分割しない文書.
+* cold: 空のフラグメントのキャッシュで読み込む (すべてのファイルを読み込んで組み立てる).
+* warm: 同じキャッシュで再度読み込む (ファイルは stat のみ).
+* one changed: 毎回 1 ファイルの末尾に空行を追加してから読み込む (変更したファイルのみ組み立てる).
+
+cold と one changed はスレッド数 (--jobs) ごとに計測する. 組み立ては GIL のため並列にならず,
+並列化で短くなるのはファイルの読み込みとハッシュの計算のみである.
+
+実行例:
+    python benchmarks/bench_includes.py --entries 2000 10000 --fragments 50 --jobs 1 8
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from rtar_ddeps.validation.custom_yaml_loader import load_with_duplicate_check
+from rtar_ddeps.validation.includes import FragmentCache, IncludeResolver
+from rtar_ddeps.testing.synthetic_spec import SpecShape, SyntheticSpec
+
+
+def write_split(spec: SyntheticSpec, directory: Path, fragments: int) -> Path:
+    """data の各エントリを fragments 個のファイルに順に振り分け, 取り込む側の文書のパスを返す."""
+    head, entries, tail = [], [], []
+    section = head
+    for line in spec.lines():
+        if line == "data:":
+            section = entries
+            continue
+        if section is entries and not line.startswith(" "):
+            section = tail
+        if section is entries and not line.startswith("   "):
+            entries.append([]) # エントリの先頭の行
+        (section[-1] if section is entries else section).append(line[2:] if section is entries else line)
+    (directory / "data").mkdir()
+    per_file = -(-len(entries) // fragments)
+    for i in range(0, len(entries), per_file):
+        with open(directory / "data" / f"{i // per_file:04d}.yml", "w", encoding="utf-8") as f:
+            for block in entries[i:i + per_file]:
+                f.write("\n".join(block) + "\n")
+    path = directory / "data_dependencies.yml"
+    path.write_text("\n".join(head + ["data: !include data/"] + tail) + "\n", encoding="utf-8")
+    return path
+
+
+def load(path: Path, cache: FragmentCache | None = None, jobs: int = 1) -> float:
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        includes = IncludeResolver(path, cache=cache, jobs=jobs) if cache is not None else None
+        load_with_duplicate_check(f, includes=includes)
+    return time.perf_counter() - start
+
+
+def median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[2000, 10000])
+    parser.add_argument("--fragments", type=int, default=50)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'files':>6} {'jobs':>5} {'single[ms]':>11} {'cold[ms]':>9} {'warm[ms]':>9} {'one changed[ms]':>16}")
+    for n in args.entries:
+        spec = SyntheticSpec(SpecShape(entries=n))
+        with tempfile.TemporaryDirectory() as tmp:
+            single = Path(tmp) / "single.yml"
+            spec.write(single)
+            split_dir = Path(tmp) / "split"
+            split_dir.mkdir()
+            path = write_split(spec, split_dir, args.fragments)
+            files = sorted((split_dir / "data").iterdir())
+            single_ms = median_ms([load(single) for _ in range(args.repeat)])
+            for jobs in args.jobs:
+                cold_ms = median_ms([load(path, FragmentCache(), jobs) for _ in range(args.repeat)])
+                cache = FragmentCache()
+                load(path, cache, jobs)
+                warm_ms = median_ms([load(path, cache, jobs) for _ in range(args.repeat)])
+                changed = []
+                for i in range(args.repeat):
+                    with open(files[i % len(files)], "a", encoding="utf-8") as f:
+                        f.write("\n")
+                    changed.append(load(path, cache, jobs))
+                print(
+                    f"{n:>8} {len(files):>6} {jobs:>5} {single_ms:>11.1f} {cold_ms:>9.1f}"
+                    f" {warm_ms:>9.1f} {median_ms(changed):>16.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+YAML 読み込みのベンチマーク.
+
+従来の 2 パス読み込み (yaml.safe_load + CustomDuplicateKeyLoader による再パース) と,
+1 パスでデータ構築と重複キー検出を同時に行う load_with_duplicate_check の
+実行時間 (wall-clock) を比較する.
+1 パス読み込みは pure-Python と libyaml (利用可能な場合) の両バックエンドで計測する.
+
+実行例:
+    python benchmarks/bench_load_yaml.py --entries 2000 --repeat 3
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from rtar_ddeps.validation.custom_yaml_loader import CustomDuplicateKeyLoader, load_with_duplicate_check
+
+
+def generate_spec(n_entries: int, n_columns: int = 8) -> str:
+    """ベンチマーク用に n_entries 件の data を持つ data_dependencies.yml を生成する."""
+    lines = [
+        "metadata:",
+        "  title: benchmark",
+        "  purposes:",
+        "    - benchmark",
+        "target:",
+        f"  - data_{n_entries - 1}",
+        "data:",
+    ]
+    for i in range(n_entries):
+        lines += [
+            f"  data_{i}:",
+            "    descriptions:",
+            f"      - \"generated entry {i}\"",
+            "    format: table",
+            "    unit: \"-\"",
+        ]
+        if i > 0:
+            lines += ["    required_data:", f"      - data_{i - 1}"]
+            lines += ["    process:", f"      - \"derive from data_{i - 1}\""]
+        lines.append("    columns:")
+        for c in range(n_columns):
+            lines += [f"      - name: col_{c}", f"        description: \"column {c}\""]
+    return "\n".join(lines) + "\n"
+
+
+def load_two_pass(path: Path):
+    """変更前の実装と同じ 2 パス読み込み."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        yaml.load(f, Loader=CustomDuplicateKeyLoader)
+    return data
+
+
+def load_single_pass(path: Path, backend: str = "python"):
+    """1 パス読み込み."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data, _ = load_with_duplicate_check(f, backend=backend)
+    return data
+
+
+def measure(func, path: Path, repeat: int, **kwargs) -> float:
+    """repeat 回実行した中で最小の実行時間 (秒) を返す."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'size[MB]':>9} {'two-pass[s]':>12} {'single[s]':>10} {'speedup':>8} {'single-c[s]':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.entries:
+            path = Path(tmp) / f"spec_{n}.yml"
+            path.write_text(generate_spec(n), encoding='utf-8')
+            size_mb = path.stat().st_size / 1e6
+            two = measure(load_two_pass, path, args.repeat)
+            one = measure(load_single_pass, path, args.repeat, backend="python")
+            line = f"{n:>8} {size_mb:>9.2f} {two:>12.3f} {one:>10.3f} {two / one:>7.2f}x"
+            if yaml.__with_libyaml__:
+                one_c = measure(load_single_pass, path, args.repeat, backend="c")
+                line += f" {one_c:>12.3f} {two / one_c:>7.2f}x"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
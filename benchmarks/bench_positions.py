@@ -0,0 +1,81 @@
+"""
+位置の索引 (rtar_ddeps.validation.positions) のコストのベンチマーク.
+
+rtar_ddeps.testing.synthetic_spec で生成した文書を, 位置の索引を有効/無効にして検証し,
+YAML 読み込みの実行時間, 検証全体の実行時間, 索引のメモリ使用量 (tracemalloc で計測した索引の作成前後の差分)
+を比較する. 索引のメモリはパス 1 件あたりの値も出力する.
+
+実行例:
+    python benchmarks/bench_positions.py --entries 1000 10000
+"""
+import argparse
+import contextlib
+import gc
+import io
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from rtar_ddeps.testing.synthetic_spec import SpecShape, SyntheticSpec
+from rtar_ddeps.validation.custom_yaml_loader import get_loader_class
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.positions import PositionIndex
+from rtar_ddeps.validation.profiling import Profiler
+
+
+def measure_time(path: Path, positions: bool, repeat: int, yaml_backend: str | None):
+    """(YAML 読み込みの最小時間, 検証全体の最小時間) (秒)."""
+    best_load = best_total = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        profiler = Profiler(memory=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            DataDependenciesValidator(path, yaml_backend=yaml_backend, positions=positions).validate(profiler=profiler)
+        best_load = min(best_load, profiler.stats["load_yaml"].total_ns / 1e9)
+        best_total = min(best_total, profiler.stats["validate"].total_ns / 1e9)
+    return best_load, best_total
+
+
+def measure_index_memory(path: Path, yaml_backend: str | None):
+    """(索引のバイト数, パスの数). 組み立てたノードから索引を作る前後の差分を計測する."""
+    with open(path, 'r', encoding='utf-8') as f:
+        loader = get_loader_class(yaml_backend)(f)
+        try:
+            node = loader.get_single_node()
+        finally:
+            loader.dispose()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        index = PositionIndex()
+        index.add(node)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return after - before, len(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--columns", type=int, default=SpecShape.columns)
+    parser.add_argument("--yaml-backend", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'load off[ms]':>13} {'load on[ms]':>12} {'total off[ms]':>14} {'total on[ms]':>13}"
+          f" {'paths':>9} {'index[MiB]':>11} {'B/path':>7}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in args.entries:
+            path = Path(tmpdir) / f"data_dependencies_{n}.yml"
+            SyntheticSpec(SpecShape(entries=n, columns=args.columns)).write(path)
+            load_off, total_off = measure_time(path, False, args.repeat, args.yaml_backend)
+            load_on, total_on = measure_time(path, True, args.repeat, args.yaml_backend)
+            index_bytes, paths = measure_index_memory(path, args.yaml_backend)
+            print(f"{n:>8} {load_off * 1000:>13.1f} {load_on * 1000:>12.1f} {total_off * 1000:>14.1f} {total_on * 1000:>13.1f}"
+                  f" {paths:>9} {index_bytes / 2**20:>11.2f} {index_bytes / paths:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+多数のファイルを一括検証するときの, 出力形式 (--format) ごとのピークメモリ, 実行時間, 出力サイズのベンチマーク.
+
+rtar_ddeps.testing.synthetic_spec で生成した小さな文書 (不正な定義を含む) を指定数だけ作成し,
+形式ごとに別のプロセスで `validate data-dependencies --format ...` を 1 回実行して,
+実行時間, 出力の文字数, プロセスのピーク RSS (ワーカーを除く親プロセス) を比較する.
+レポーターは結果を届いた順に書き出して捨てるため, ファイル数を増やしてもピーク RSS はほぼ一定になる.
+
+実行例:
+    python benchmarks/bench_reporters.py --files 1000 5000 --jobs 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rtar_ddeps.cli import cli
+from rtar_ddeps.testing.synthetic_spec import BROKEN_FAULTS, SpecShape, SyntheticSpec
+from rtar_ddeps.validation.reporters import REPORT_FORMATS
+
+
+class CountingOutput(io.TextIOBase):
+    """書き込まれた文字数のみを数える標準出力の代わり."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        return len(text)
+
+
+def peak_rss_bytes() -> int:
+    """このプロセスのピーク RSS (Linux は KiB, macOS はバイト単位で返る)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def child(report_format: str, directory: Path, jobs: int):
+    """子プロセス: CLI を 1 回実行し, 結果を JSON で標準出力に書き出す."""
+    output = CountingOutput()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+        cli.main(["validate", "data-dependencies", "--format", report_format, "--jobs", str(jobs), str(directory)],
+                 standalone_mode=False)
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'chars': output.chars, 'peak_rss': peak_rss_bytes()}))
+
+
+def run_child(report_format: str, directory: Path, jobs: int) -> dict:
+    command = [sys.executable, __file__, "--child", report_format, str(directory), "--jobs", str(jobs)]
+    completed = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--entries", type=int, default=20, help="Data entries per file.")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--child", nargs=2, metavar=("FORMAT", "DIRECTORY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], Path(args.child[1]), args.jobs)
+        return
+
+    print(f"{'files':>7} {'format':>7} {'time[s]':>8} {'output[MiB]':>12} {'rss[MiB]':>9}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # 内容は同じでよいため, 1 つ生成してコピーする
+        source = SyntheticSpec(SpecShape(entries=args.entries), BROKEN_FAULTS).text()
+        for n in sorted(set(args.files)):
+            directory = Path(tmpdir) / f"n{n}"
+            for i in range(n):
+                path = directory / f"{i:06d}" / "data_dependencies.yml"
+                path.parent.mkdir(parents=True)
+                path.write_text(source, encoding='utf-8')
+            for report_format in REPORT_FORMATS:
+                result = run_child(report_format, directory, args.jobs)
+                print(f"{n:>7} {report_format:>7} {result['seconds']:>8.2f} {result['chars'] / 2**20:>12.2f}"
+                      f" {result['peak_rss'] / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
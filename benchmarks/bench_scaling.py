@@ -0,0 +1,103 @@
+"""
+規模に対する検証時間のスケーリングのベンチマーク.
+
+rtar_ddeps.testing.synthetic_spec で生成した文書をエントリ数を変えて検証し,
+フェーズ (YAML 読み込み, 重複キーチェック, スキーマ検証, モデル構築) とカスタムルールごとの
+実行時間を Profiler で計測する. 区間ごとに両対数でのスケーリング指数 (最小二乗法による傾き,
+線形なら 1, 二乗なら 2) を求め, --max-exponent を超えた区間があれば終了コード 1 で終了する.
+CPU キャッシュに収まらなくなる規模では線形の処理でも指数が 1.2-1.4 程度になるため,
+デフォルトの閾値は 1.5 とする. 短すぎる区間は計測誤差が大きいため, 最大の規模で --min-ms 未満の場合は判定しない.
+
+実行例:
+    python benchmarks/bench_scaling.py --entries 1000 10000 100000
+    python benchmarks/bench_scaling.py --broken --fan-in 4 --variable-column-density 0.3
+"""
+import argparse
+import contextlib
+import gc
+import io
+import math
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from rtar_ddeps.testing.synthetic_spec import BROKEN_FAULTS, SpecShape, SyntheticSpec
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.profiling import Profiler
+
+
+def measure(path: Path, repeat: int, yaml_backend: str | None) -> Dict[str, float]:
+    """区間名 -> repeat 回の中で最小の実行時間 (秒). 1 回の検証内で複数回呼ばれる区間は合計する."""
+    best: Dict[str, float] = {}
+    for _ in range(repeat):
+        profiler = Profiler(memory=False)
+        # 前回の検証のごみを回収し, 循環 GC の実行位置を実行ごとに揃える
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            DataDependenciesValidator(path, yaml_backend=yaml_backend).validate(profiler=profiler)
+        for name, stats in profiler.stats.items():
+            best[name] = min(best.get(name, math.inf), stats.total_ns / 1e9)
+    return best
+
+
+def fit_exponent(sizes: List[int], times: List[float]) -> float:
+    """log(times) = a * log(sizes) + b の傾き a (最小二乗法)."""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if t > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / sum((x - mean_x) ** 2 for x, _ in points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--fan-in", type=int, default=SpecShape.fan_in)
+    parser.add_argument("--chain-depth", type=int, default=SpecShape.chain_depth)
+    parser.add_argument("--columns", type=int, default=SpecShape.columns)
+    parser.add_argument("--variable-column-density", type=float, default=SpecShape.variable_column_density)
+    parser.add_argument("--parameters", type=int, default=SpecShape.parameters)
+    parser.add_argument("--seed", type=int, default=SpecShape.seed)
+    parser.add_argument("--broken", action="store_true", help="Inject faults that every custom rule reports.")
+    parser.add_argument("--yaml-backend", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-exponent", type=float, default=1.5)
+    parser.add_argument("--min-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    sizes = sorted(set(args.entries))
+    if len(sizes) < 2:
+        parser.error("--entries needs at least two sizes.")
+    results: List[Dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in sizes:
+            shape = SpecShape(
+                entries=n, fan_in=args.fan_in, chain_depth=args.chain_depth, columns=args.columns,
+                variable_column_density=args.variable_column_density, parameters=args.parameters, seed=args.seed,
+            )
+            path = Path(tmpdir) / f"data_dependencies_{n}.yml"
+            SyntheticSpec(shape, BROKEN_FAULTS if args.broken else ()).write(path)
+            results.append(measure(path, args.repeat, args.yaml_backend))
+
+    names = [name for name in results[-1] if all(name in result for result in results)]
+    width = max(len(name) for name in names)
+    header = f"{'span':<{width}} " + " ".join(f"{f'{n}[ms]':>12}" for n in sizes) + f" {'exponent':>9}"
+    print(header)
+    failures = []
+    for name in names:
+        times = [result[name] for result in results]
+        exponent = fit_exponent(sizes, times)
+        failed = times[-1] * 1000 >= args.min_ms and exponent > args.max_exponent
+        print(f"{name:<{width}} " + " ".join(f"{t * 1000:>12.2f}" for t in times) + f" {exponent:>9.2f}{' !' if failed else ''}")
+        if failed:
+            failures.append(name)
+
+    if failures:
+        print(f"\nSuper-linear scaling (exponent > {args.max_exponent}): {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
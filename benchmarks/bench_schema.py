@@ -0,0 +1,47 @@
+"""
+スキーマ検証のベンチマーク.
+
+voluptuous の DataDependenciesSchema と, 同じ検証を手で展開した
+CompiledDataDependenciesSchema の実行時間 (wall-clock) を比較する.
+YAML の読み込みは計測に含めない.
+
+実行例:
+    python benchmarks/bench_schema.py --entries 2000 10000 --repeat 5
+"""
+import argparse
+import time
+
+import yaml
+
+from bench_load_yaml import generate_spec
+from rtar_ddeps.validation.schemas.compiled_data_dependencies_schema import CompiledDataDependenciesSchema
+from rtar_ddeps.validation.schemas.data_dependencies_schema import DataDependenciesSchema
+
+
+def measure(schema, doc, repeat: int) -> float:
+    """repeat 回実行した中で最小の実行時間 (秒) を返す."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        schema(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[500, 2000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    print(f"{'entries':>8} {'voluptuous[ms]':>15} {'compiled[ms]':>13} {'speedup':>8}")
+    for n in args.entries:
+        doc = yaml.load(generate_spec(n), Loader=loader)
+        reference = measure(DataDependenciesSchema, doc, args.repeat)
+        compiled = measure(CompiledDataDependenciesSchema, doc, args.repeat)
+        print(f"{n:>8} {reference * 1000:>15.1f} {compiled * 1000:>13.1f} {reference / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
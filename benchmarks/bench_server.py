@@ -0,0 +1,97 @@
+"""
+検証サーバー (rtar-ddeps serve) の要求のレイテンシと, CLI を毎回起動する場合の比較.
+
+rtar_ddeps.testing.synthetic_spec で生成した文書を対象に, 次の時間 (中央値) を計測する.
+
+* cold CLI: `rtar-ddeps validate data-dependencies --no-server` をプロセスとして起動する (インタプリタ起動, import を含む).
+* CLI -> server: サーバーを起動した状態で CLI を起動する (検証はサーバーに転送される).
+* request (unchanged): 接続済みのクライアントから validate を要求する. ファイルは変更しない (前回の結果を返す).
+* request (changed): 毎回ファイルの 1 エントリを書き換えてから要求する (インクリメンタル検証).
+
+実行例:
+    python benchmarks/bench_server.py --entries 100 2000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rtar_ddeps.server.client import ServerClient
+from rtar_ddeps.server.protocol import SOCKET_ENV
+from rtar_ddeps.testing.synthetic_spec import SpecShape, SyntheticSpec
+
+CLI = [sys.executable, "-m", "rtar_ddeps.cli"]
+
+
+def median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+
+def time_process(command, env, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return median_ms(samples)
+
+
+def time_requests(client: ServerClient, path: Path, repeat: int, change: bool) -> float:
+    text = path.read_text(encoding='utf-8')
+    samples = []
+    for i in range(repeat):
+        if change:
+            # 内容 (とサイズ) を変えて, 変更として検出されるようにする
+            path.write_text(text.replace("title:", f"title: v{i} #", 1), encoding='utf-8')
+        start = time.perf_counter()
+        client.call("validate", {"paths": [str(path)], "format": "text"})
+        samples.append(time.perf_counter() - start)
+    path.write_text(text, encoding='utf-8')
+    return median_ms(samples)
+
+
+def start_server(socket_path: Path, env) -> subprocess.Popen:
+    process = subprocess.Popen([*CLI, "serve", "--socket", str(socket_path)], env=env, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while not socket_path.exists():
+        if time.monotonic() > deadline or process.poll() is not None:
+            process.kill()
+            raise RuntimeError("The server did not start.")
+        time.sleep(0.05)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[100, 2000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'cold CLI[ms]':>13} {'CLI->server[ms]':>16} {'unchanged[ms]':>14} {'changed[ms]':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = Path(tmpdir) / "server.sock"
+        env = {**os.environ, SOCKET_ENV: str(socket_path)}
+        server = start_server(socket_path, env)
+        try:
+            for n in args.entries:
+                path = Path(tmpdir) / f"data_dependencies_{n}.yml"
+                SyntheticSpec(SpecShape(entries=n)).write(path)
+                command = [*CLI, "validate", "data-dependencies", str(path)]
+                cold = time_process([*command, "--no-server"], env, args.repeat)
+                forwarded = time_process(command, env, args.repeat)
+                with ServerClient(socket_path) as client:
+                    unchanged = time_requests(client, path, args.repeat, change=False)
+                    changed = time_requests(client, path, args.repeat, change=True)
+                print(f"{n:>8} {cold:>13.1f} {forwarded:>16.1f} {unchanged:>14.2f} {changed:>12.1f}")
+        finally:
+            with ServerClient(socket_path) as client:
+                client.call("shutdown")
+            server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+仕様モデル (rtar_ddeps.model.spec) のベンチマーク.
+
+YAML から読み込んだ生の辞書と, build_spec で構築した __slots__ のモデルについて,
+data エントリ 1 件あたりのメモリ使用量 (tracemalloc) と構築時間を比較する.
+生の辞書のメモリは文書の deepcopy で計測する (文字列は共有されるため, どちらもコンテナ分の比較になる).
+
+実行例:
+    python benchmarks/bench_spec_model.py --entries 2000 10000
+"""
+import argparse
+import copy
+import time
+import tracemalloc
+
+import yaml
+
+from bench_load_yaml import generate_spec
+from rtar_ddeps.model.spec import build_spec
+
+
+def measure_memory(func, doc) -> int:
+    """func(doc) が確保して保持しているメモリ (バイト) を返す."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(doc)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def measure_time(func, doc, repeat: int) -> float:
+    """repeat 回実行した中で最小の実行時間 (秒) を返す."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[2000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    print(f"{'entries':>8} {'dict[B/entry]':>14} {'model[B/entry]':>15} {'ratio':>6} {'deepcopy[ms]':>13} {'build[ms]':>10}")
+    for n in args.entries:
+        doc = yaml.load(generate_spec(n), Loader=loader)
+        raw_bytes = measure_memory(copy.deepcopy, doc)
+        model_bytes = measure_memory(build_spec, doc)
+        copy_time = measure_time(copy.deepcopy, doc, args.repeat)
+        build_time = measure_time(build_spec, doc, args.repeat)
+        print(
+            f"{n:>8} {raw_bytes / n:>14.0f} {model_bytes / n:>15.0f} {model_bytes / raw_bytes:>6.2f}"
+            f" {copy_time * 1000:>13.1f} {build_time * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
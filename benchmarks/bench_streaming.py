@@ -0,0 +1,105 @@
+"""
+通常の検証とストリーミング検証 (--streaming) のピークメモリと実行時間のベンチマーク.
+
+rtar_ddeps.testing.synthetic_spec で生成した文書を, 検証方法ごとに別のプロセスで 1 回ずつ検証し,
+実行時間とプロセスのピーク RSS (resource.getrusage の ru_maxrss) を比較する.
+ピーク RSS はインタープリターとモジュールの分を含むため, 検証を行わない (import のみの) プロセスの値も
+基準として出力し, 差分 (検証による増分) も表示する. 両者のエラー/警告が一致しない場合は終了コード 1 で終了する.
+
+実行例:
+    python benchmarks/bench_streaming.py --entries 10000 100000
+    python benchmarks/bench_streaming.py --broken --columns 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rtar_ddeps.testing.synthetic_spec import BROKEN_FAULTS, SpecShape, SyntheticSpec
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.streaming import StreamingDataDependenciesValidator
+
+MODES = {
+    'baseline': None, # import のみ
+    'in-memory': DataDependenciesValidator,
+    'streaming': StreamingDataDependenciesValidator,
+}
+
+
+def peak_rss_bytes() -> int:
+    """このプロセスのピーク RSS (Linux は KiB, macOS はバイト単位で返る)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def child(mode: str, path: Path, yaml_backend: str | None):
+    """子プロセス: 1 回検証し, 結果を JSON で標準出力に書き出す."""
+    validator_class = MODES[mode]
+    result = {'seconds': 0.0, 'errors': [], 'warnings': []}
+    if validator_class is not None:
+        validator = validator_class(path, yaml_backend=yaml_backend)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            validator.validate()
+        result.update(seconds=time.perf_counter() - start, errors=validator.errors, warnings=validator.warnings)
+    result['peak_rss'] = peak_rss_bytes()
+    print(json.dumps(result))
+
+
+def run_child(mode: str, path: Path, yaml_backend: str | None) -> dict:
+    command = [sys.executable, __file__, "--child", mode, str(path)]
+    if yaml_backend is not None:
+        command += ["--yaml-backend", yaml_backend]
+    completed = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--columns", type=int, default=SpecShape.columns)
+    parser.add_argument("--variable-column-density", type=float, default=SpecShape.variable_column_density)
+    parser.add_argument("--parameters", type=int, default=SpecShape.parameters)
+    parser.add_argument("--seed", type=int, default=SpecShape.seed)
+    parser.add_argument("--broken", action="store_true", help="Inject faults that every custom rule reports.")
+    parser.add_argument("--yaml-backend", default=None)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], Path(args.child[1]), args.yaml_backend)
+        return
+
+    print(f"{'entries':>8} {'size[MiB]':>10} {'mode':>10} {'time[s]':>8} {'rss[MiB]':>9} {'+rss[MiB]':>10}")
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in sorted(set(args.entries)):
+            shape = SpecShape(
+                entries=n, columns=args.columns, variable_column_density=args.variable_column_density,
+                parameters=args.parameters, seed=args.seed,
+            )
+            path = Path(tmpdir) / f"data_dependencies_{n}.yml"
+            SyntheticSpec(shape, BROKEN_FAULTS if args.broken else ()).write(path)
+            size = path.stat().st_size / 2**20
+            results = {mode: run_child(mode, path, args.yaml_backend) for mode in MODES}
+            baseline = results['baseline']['peak_rss']
+            for mode in ('in-memory', 'streaming'):
+                result = results[mode]
+                rss = result['peak_rss'] / 2**20
+                print(f"{n:>8} {size:>10.1f} {mode:>10} {result['seconds']:>8.2f} {rss:>9.1f} {rss - baseline / 2**20:>10.1f}")
+            if [results['in-memory'][key] for key in ('errors', 'warnings')] != [results['streaming'][key] for key in ('errors', 'warnings')]:
+                mismatches.append(n)
+
+    if mismatches:
+        print(f"\nStreaming results differ from in-memory validation: entries={mismatches}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
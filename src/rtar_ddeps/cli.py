@@ -1,7 +1,20 @@
+import os
+import sys
 import click
 from pathlib import Path
-# バリデータークラスをインポート (相対インポート)
-from .validation.data_dependencies_validator import DataDependenciesValidator
+from typing import TYPE_CHECKING
+# コマンドの定義 (オプションの選択肢, ヘルプ) に使う定数のみをインポートする (相対インポート).
+# --help やシェル補完 (Tab を押すたびに起動する) では yaml や voluptuous などの読み込みを省くため,
+# バリデーションなどの実装のモジュールは各コマンドの関数内でインポートする
+# (tests/test_cli_startup.py で検査する).
+from .settings import (
+    CACHE_DIR_ENV, DEFAULT_MAX_DOCUMENTS, EXPORT_FORMATS, REPORT_FORMATS, SOCKET_ENV, YAML_BACKEND_ENV, YAML_BACKENDS,
+)
+
+if TYPE_CHECKING:
+    from .graph.dependency_graph import DependencyGraph
+    from .model.compiled import CompiledSpec
+    from .server.client import ServerClient
 
 # --- click を使ったコマンド定義 ---
 
@@ -28,45 +41,553 @@ def validate():
 # 明示的に "data-dependencies" と指定.
 @validate.command("data-dependencies")
 # @click.argument() でコマンドライン引数を定義.
-# 'filepath' という名前の必須引数を定義.
-# type=click.Path(...) で引数の型を指定し、検証ルールを設定.
-#   - exists=True: ファイル/ディレクトリが存在する必要がある.
-#   - file_okay=True: ファイルを許可.
-#   - dir_okay=False: ディレクトリを不許可.
-#   - readable=True: 読み取り可能である必要がある.
-#   - resolve_path=True: 相対パスを絶対パスに解決.
-#   - path_type=Path: 受け取った値を pathlib.Path オブジェクトに変換.
-@click.argument(
-    "filepath",
-    type=click.Path(
-        exists=True,
-        file_okay=True,
-        dir_okay=False,
-        readable=True,
-        resolve_path=True,
-        path_type=Path,
+# 'filepaths' という名前の引数を 1 つ以上受け取る (nargs=-1, required=True).
+# ファイルパスのほか, ディレクトリ (配下の data_dependencies.yml を再帰的に探索) や
+# glob パターン (例: 'projects/**/data_dependencies.yml') も指定できる.
+# glob を展開するため, ここでは存在チェックを行わず文字列として受け取る.
+@click.argument("filepaths", nargs=-1, required=True)
+# @click.option() でオプションを定義.
+# YAML ローダーのバックエンド (libyaml / pure-Python) を切り替える.
+# 省略時は環境変数 RTAR_DDEPS_YAML_BACKEND, それもなければ auto (libyaml があれば使用).
+@click.option(
+    "--yaml-backend",
+    type=click.Choice(YAML_BACKENDS, case_sensitive=False),
+    default=None,
+    help=(
+        f"YAML loader backend. Defaults to ${YAML_BACKEND_ENV} or 'auto'."
+        " Results are the same for every backend, except for the wording of YAML syntax errors (their position is the same)."
+    ),
+)
+# 並列実行するプロセス数. 0 は利用可能な CPU 数.
+@click.option(
+    "--jobs", "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of worker processes (0 = number of CPUs).",
+)
+# 検証結果のキャッシュ (opt-in).
+# --cache または --cache-dir の指定, もしくは環境変数 RTAR_DDEPS_CACHE_DIR の設定で有効になり,
+# --no-cache で常に無効にできる.
+@click.option(
+    "--cache/--no-cache",
+    default=None,
+    help=f"Reuse results for files whose content was validated before. Enabled by --cache-dir or ${CACHE_DIR_ENV}.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help=f"Cache directory. Defaults to ${CACHE_DIR_ENV} or ~/.cache/rtar-ddeps.",
+)
+# watch モード: プロセスを起動したままファイルを監視し, 保存のたびに再検証する.
+@click.option("--watch", is_flag=True, help="Keep running and revalidate files when they change.")
+@click.option(
+    "--debounce",
+    type=click.IntRange(min=0),
+    default=100,
+    show_default=True,
+    help="Milliseconds to wait for a burst of saves to settle (--watch).",
+)
+@click.option("--poll", is_flag=True, help="Use polling instead of inotify (--watch).")
+# プロファイル: フェーズ/ルールごとの実行時間とピークメモリを標準エラー出力に表として出力する.
+# --profile-trace を指定すると Chrome のトレースイベント形式の JSON も書き出す (--profile を含む).
+@click.option("--profile", is_flag=True, help="Print time and peak memory per phase and rule to stderr.")
+@click.option(
+    "--profile-trace",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write a Chrome trace-event JSON file (implies --profile).",
+)
+# ストリーミング検証: data / parameter のエントリを 1 件ずつ読み込み, 大きなファイルのピークメモリを抑える.
+# 結果は通常の検証と同じ.
+@click.option(
+    "--streaming",
+    is_flag=True,
+    help=(
+        "Validate entries one at a time to bound peak memory on large files."
+        " Diagnostics inside a data/parameter entry point at the entry name, not the field."
     ),
 )
-def validate_data_dependencies(filepath: Path):
+# 出力形式: text (人が読む形式), jsonl (診断ごとの JSON Lines), sarif (SARIF 2.1.0).
+# jsonl / sarif では標準出力に結果のみを出力し, キャッシュの集計行は標準エラー出力に出力する.
+@click.option(
+    "--format", "report_format",
+    type=click.Choice(REPORT_FORMATS, case_sensitive=False),
+    default="text",
+    show_default=True,
+    help="Output format. jsonl and sarif write machine-readable diagnostics to stdout.",
+)
+# 検証サーバー (rtar-ddeps serve) への転送.
+# 省略時はサーバーが起動していれば転送し, 起動していなければこのプロセスで検証する.
+# --server はサーバーが起動していなければエラー, --no-server は常にこのプロセスで検証する.
+# --jobs, --cache, --profile, --watch を指定した場合は転送しない.
+@click.option(
+    "--server/--no-server", "use_server",
+    default=None,
+    help=f"Forward to a running 'rtar-ddeps serve' (default: when one is listening on ${SOCKET_ENV} or the default socket).",
+)
+def validate_data_dependencies(
+    filepaths: tuple[str, ...],
+    yaml_backend: str | None,
+    jobs: int,
+    cache: bool | None,
+    cache_dir: Path | None,
+    watch: bool,
+    debounce: int,
+    poll: bool,
+    profile: bool,
+    profile_trace: Path | None,
+    streaming: bool,
+    report_format: str,
+    use_server: bool | None,
+):
     """
     data_dependencies.yml ファイルを検証する.
+
+    複数のファイルが指定された場合はプロセスプールで並列に検証し,
+    ファイルごとの結果を指定順に出力した後, 集計行を出力する.
     """
-    # click.echo() は print() と似ているが, click アプリケーションでの
-    # 出力に適した関数.
-    click.echo(f"Validating data dependencies file: {filepath}")
-    validator = DataDependenciesValidator(filepath)
-    is_valid = validator.validate() # validate() はエラーがあれば False を返す
-
-    # バリデーションに失敗した場合 (エラーがあった場合)
-    if not is_valid:
-        # validator.validate() 内の _print_results でエラーメッセージは
-        # 表示されているはず.
+    profile = profile or profile_trace is not None
+    if watch and profile:
+        raise click.UsageError("--profile cannot be used with --watch.")
+    if watch and streaming:
+        raise click.UsageError("--streaming cannot be used with --watch.")
+    report_format = report_format.lower()
+    if watch and report_format != "text":
+        raise click.UsageError("--format cannot be used with --watch.")
+
+    if cache is None:
+        cache = cache_dir is not None or bool(os.environ.get(CACHE_DIR_ENV))
+
+    # ファイルの収集もサーバーで行う (このプロセスではファイルを読まない)
+    forwardable = not (watch or profile or cache or jobs != 1)
+    if use_server and not forwardable:
+        raise click.UsageError(f"--server cannot be used with --jobs, --cache (or ${CACHE_DIR_ENV}), --profile or --watch.")
+    if use_server is not False and forwardable:
+        # 転送する場合はクライアント (標準ライブラリのみ) だけを読み込む
+        from .server import client as server_client
+        from .validation.result_cache import package_version
+        client = server_client.connect(version=package_version())
+        if client is not None:
+            with client:
+                exit_code = _validate_on_server(client, filepaths, yaml_backend, streaming, report_format)
+            if exit_code is not None:
+                raise click.exceptions.Exit(code=exit_code)
+        elif use_server:
+            raise click.UsageError("No validation server is running. Start one with 'rtar-ddeps serve'.")
+
+    from .validation.batch import collect_spec_files, default_jobs, validate_files
+    from .validation.custom_yaml_loader import resolve_yaml_backend
+    from .validation.profiling import Profiler
+    from .validation.reporters import create_reporter
+    from .validation.result_cache import ResultCache
+    try:
+        # 環境変数の値が不正, または libyaml が利用できない場合はここで検出する
+        resolve_yaml_backend(yaml_backend)
+        files = collect_spec_files(filepaths)
+    except (ValueError, FileNotFoundError) as e:
+        raise click.UsageError(str(e))
+
+    if watch:
+        # watch モードでは同じプロセス内で順に再検証する (--jobs, キャッシュは使用しない)
+        from .validation.watch import run_watch
+        run_watch(files, yaml_backend=yaml_backend, debounce=debounce / 1000, polling=poll, echo=click.echo)
+        return
+
+    if jobs == 0:
+        jobs = default_jobs()
+
+    result_cache = ResultCache(cache_dir) if cache else None
+
+    # 結果はファイル順に届いた時点で出力し, 保持しない (reporters.py 参照)
+    reporter = create_reporter(report_format, sys.stdout)
+    # ファイルごとの計測結果を集約する
+    profiler = Profiler() if profile else None
+    reporter.start()
+    for result in validate_files(
+        files, jobs=jobs, yaml_backend=yaml_backend, cache=result_cache, profile=profile, streaming=streaming,
+        capture_output=reporter.captures_output,
+    ):
+        reporter.report(result)
+        if profiler is not None and result.profile is not None:
+            profiler.merge(result.profile)
+    summary = reporter.finish()
+
+    if result_cache is not None:
+        # 機械可読な形式では標準出力を結果のみにする
+        click.echo(
+            f"Cache: {summary.cache_hits} hits, {summary.files - summary.cache_hits} misses ({result_cache.cache_dir})",
+            err=report_format != "text",
+        )
+    if profiler is not None:
+        click.echo(profiler.format_table(), err=True)
+        if profile_trace is not None:
+            profiler.write_chrome_trace(profile_trace)
+            click.echo(f"Profile trace written to {profile_trace}", err=True)
+
+    # バリデーションに失敗したファイルがあった場合
+    if summary.failed:
         # click.exceptions.Exit(code=1) を発生させ、
         # 終了コード 1 (エラーを示す) でプログラムを終了させる.
         raise click.exceptions.Exit(code=1)
-    # is_valid が True の場合、関数は正常に終了し、
+    # すべて成功した場合、関数は正常に終了し、
     # 暗黙的に終了コード 0 (成功) となる.
 
+def _validate_on_server(
+    client: 'ServerClient',
+    filepaths: tuple[str, ...],
+    yaml_backend: str | None,
+    streaming: bool,
+    report_format: str,
+) -> int | None:
+    """
+    サーバーで検証し, 出力を書き出して終了コードを返す.
+    通信に失敗した場合は None (呼び出し元がこのプロセスで検証する).
+    """
+    from .server.protocol import INVALID_PARAMS, RpcError
+    params = {
+        "paths": list(filepaths),
+        "cwd": os.getcwd(),
+        # 省略時の環境変数はクライアント側の値を使用する
+        "yaml_backend": yaml_backend if yaml_backend is not None else os.environ.get(YAML_BACKEND_ENV),
+        "streaming": streaming,
+        "format": report_format,
+    }
+    try:
+        result = client.call("validate", params)
+    except RpcError as e:
+        if e.code == INVALID_PARAMS:
+            raise click.UsageError(e.message)
+        return None
+    except (OSError, ValueError):
+        return None
+    click.echo(result["report"], nl=False)
+    return 1 if result["summary"]["failed"] else 0
+
+# 4. 'serve' コマンド: 検証サーバーを起動する.
+# プロセスを起動したままにして, 検証の要求ごとのインタプリタ起動とモジュールの読み込みを省く.
+# 要求は改行区切りの JSON-RPC 2.0 で, Unix ソケット (デフォルト) または標準入出力 (--stdio) で受け付ける.
+@cli.command("serve", help="Run a validation server that keeps modules and documents loaded.")
+@click.option(
+    "--socket", "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=f"Unix socket to listen on. Defaults to ${SOCKET_ENV} or a per-user socket.",
+)
+@click.option("--stdio", is_flag=True, help="Read JSON-RPC requests from stdin and write responses to stdout.")
+@click.option(
+    "--max-documents",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_DOCUMENTS,
+    show_default=True,
+    help="Number of files whose parsed state is kept in memory.",
+)
+def serve(socket_path: Path | None, stdio: bool, max_documents: int):
+    """検証サーバーを起動する. shutdown の要求, 入力の終わり (--stdio), Ctrl+C, または SIGTERM で終了する."""
+    from .server.protocol import default_socket_path
+    from .server.server import Server, ValidationSession, serve_stdio, serve_unix
+    server = Server(ValidationSession(max_documents))
+    if stdio:
+        serve_stdio(server, sys.stdin.buffer, sys.stdout.buffer)
+        return
+    socket_path = socket_path if socket_path is not None else default_socket_path()
+    try:
+        serve_unix(server, socket_path, ready=lambda: click.echo(f"Listening on {socket_path}", err=True))
+    except (FileExistsError, PermissionError) as e:
+        raise click.ClickException(str(e))
+
+# 5. 'graph' サブコマンドグループ: data_dependencies.yml の依存関係グラフを問い合わせる.
+# 各コマンドは 1 ファイルを読み込み, 結果のデータ名を 1 行に 1 つ出力する.
+@cli.group(help="Query the data dependency graph of a data_dependencies.yml file.")
+def graph():
+    """依存関係グラフを問い合わせるコマンドグループ."""
+    pass
+
+# graph の各コマンドに共通の引数とオプション
+_graph_filepath_argument = click.argument("filepath", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+_graph_yaml_backend_option = click.option(
+    "--yaml-backend",
+    type=click.Choice(YAML_BACKENDS, case_sensitive=False),
+    default=None,
+    help=(
+        f"YAML loader backend. Defaults to ${YAML_BACKEND_ENV} or 'auto'."
+        " Results are the same for every backend, except for the wording of YAML syntax errors (their position is the same)."
+    ),
+)
+
+# コンパイル済みの仕様のキャッシュ (opt-in). validate data-dependencies の --cache と同じく,
+# --cache または --cache-dir の指定, もしくは環境変数 RTAR_DDEPS_CACHE_DIR の設定で有効になる.
+_graph_cache_option = click.option(
+    "--cache/--no-cache",
+    default=None,
+    help=f"Reuse the compiled form of files loaded before instead of parsing the YAML. Enabled by --cache-dir or ${CACHE_DIR_ENV}.",
+)
+_graph_cache_dir_option = click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help=f"Cache directory. Defaults to ${CACHE_DIR_ENV} or ~/.cache/rtar-ddeps.",
+)
+
+def _load_spec(
+    filepath: Path,
+    yaml_backend: str | None,
+    cache: bool | None,
+    cache_dir: Path | None,
+    streaming: bool = False,
+) -> 'CompiledSpec':
+    """
+    ファイルを読み込み, 文書, 仕様モデル, 依存関係グラフを返す.
+
+    スキーマ検証のみを行い, カスタムルールは実行しない (未定義の名前への参照はそのまま残る).
+    キャッシュが有効な場合, 内容が同じファイルはコンパイル済みの形式から復元する (spec_cache.py 参照).
+    streaming が True の場合 (キャッシュが無効な場合のみ) はエントリを 1 件ずつ読み込み,
+    文書は data / parameter 以外のみ, 仕様モデルの data は DataEntrySummary になる (streaming.py 参照).
+    読み込みまたはスキーマ検証に失敗した場合は ClickException.
+    """
+    from .validation.custom_yaml_loader import resolve_yaml_backend
+    from .validation.spec_cache import SpecCache, load_spec
+    try:
+        resolve_yaml_backend(yaml_backend)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    if cache is None:
+        cache = cache_dir is not None or bool(os.environ.get(CACHE_DIR_ENV))
+    spec_cache = SpecCache(cache_dir) if cache else None
+    compiled, errors = load_spec(filepath, yaml_backend, spec_cache, streaming=streaming and spec_cache is None)
+    if compiled is None:
+        errors = "\n".join(f"- {error}" for error in errors)
+        raise click.ClickException(f"Could not load {filepath}:\n{errors}")
+    return compiled
+
+def _load_graph(filepath: Path, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None) -> 'DependencyGraph':
+    """ファイルを読み込み, 依存関係グラフを返す (未定義のデータへの参照はグラフに含めない)."""
+    return _load_spec(filepath, yaml_backend, cache, cache_dir).graph
+
+def _graph_node(graph: 'DependencyGraph', name: str) -> int:
+    """データ名をノード ID にする. 定義されていない場合は UsageError."""
+    try:
+        return graph.id(name)
+    except KeyError as e:
+        raise click.UsageError(e.args[0])
+
+@graph.command("upstream", help="List the data NAME depends on, directly or indirectly, in topological order.")
+@_graph_filepath_argument
+@click.argument("name")
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def graph_upstream(filepath: Path, name: str, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """NAME の上流 (required_data と可変長列の参照先を推移的に辿ったデータ) を出力する."""
+    graph = _load_graph(filepath, yaml_backend, cache, cache_dir)
+    for node in graph.upstream(_graph_node(graph, name)):
+        click.echo(graph.names[node])
+
+@graph.command("downstream", help="List the data that depend on NAME, directly or indirectly, in topological order.")
+@_graph_filepath_argument
+@click.argument("name")
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def graph_downstream(filepath: Path, name: str, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """NAME の下流 (NAME を推移的に使用するデータ) を出力する."""
+    graph = _load_graph(filepath, yaml_backend, cache, cache_dir)
+    for node in graph.downstream(_graph_node(graph, name)):
+        click.echo(graph.names[node])
+
+@graph.command("topo", help="List all data so that every data comes after the data it requires.")
+@_graph_filepath_argument
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def graph_topo(filepath: Path, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """すべてのデータをトポロジカル順 (上流が先, 制約がなければ定義順) に出力する. 循環参照がある場合はエラー."""
+    from .graph.dependency_graph import CyclicGraphError
+    graph = _load_graph(filepath, yaml_backend, cache, cache_dir)
+    try:
+        order = graph.topological_order()
+    except CyclicGraphError as e:
+        raise click.ClickException(str(e))
+    for node in order:
+        click.echo(graph.names[node])
+
+@graph.command("path", help="Show a shortest dependency chain from SOURCE down to TARGET.")
+@_graph_filepath_argument
+@click.argument("source")
+@click.argument("target")
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def graph_path(filepath: Path, source: str, target: str, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """SOURCE から TARGET に至る最短の依存経路を出力する. 経路がない場合は終了コード 1."""
+    graph = _load_graph(filepath, yaml_backend, cache, cache_dir)
+    path = graph.path(_graph_node(graph, source), _graph_node(graph, target))
+    if path is None:
+        click.echo(f"'{target}' does not depend on '{source}'.", err=True)
+        raise click.exceptions.Exit(code=1)
+    click.echo(" -> ".join(graph.names[node] for node in path))
+
+# graph export: DOT / Mermaid 形式でグラフを出力する. ノードと辺は 1 行ずつ書き出し, 出力全体を保持しない.
+@graph.command("export", help="Write the dependency graph in DOT or Mermaid format.")
+@_graph_filepath_argument
+@click.option(
+    "--format", "export_format",
+    type=click.Choice(EXPORT_FORMATS, case_sensitive=False),
+    default="dot",
+    show_default=True,
+    help="Output format.",
+)
+# 出力の対象の制限: 指定した data (省略時は target) の上流のみ, または上流へ --depth 段まで
+@click.option("--target", "targets", multiple=True, metavar="NAME", help="Only export NAME and the data it depends on (repeatable).")
+@click.option(
+    "--depth",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Only export data within this many steps upstream of the targets (--target or the file's targets).",
+)
+@click.option("--cluster/--no-cluster", default=True, show_default=True, help="Group nodes by their 'format'.")
+@click.option(
+    "--output", "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write to this file instead of stdout.",
+)
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def graph_export(
+    filepath: Path,
+    export_format: str,
+    targets: tuple[str, ...],
+    depth: int | None,
+    cluster: bool,
+    output: Path | None,
+    yaml_backend: str | None,
+    cache: bool | None,
+    cache_dir: Path | None,
+):
+    """依存関係グラフを出力する. 文書は (キャッシュが無効な場合) ストリーミングで読み込み, 出力は 1 行ずつ書き出す."""
+    from .graph.export import export_graph, formats_from_spec, select_nodes
+    compiled = _load_spec(filepath, yaml_backend, cache, cache_dir, streaming=True)
+    graph = compiled.graph
+    roots = [_graph_node(graph, name) for name in targets] if targets else None
+    nodes = select_nodes(graph, roots, depth)
+    formats = formats_from_spec(compiled.spec) if cluster else None
+    del compiled
+    if output is not None:
+        with open(output, 'w', encoding='utf-8') as stream:
+            export_graph(graph, stream, export_format.lower(), nodes, formats)
+    else:
+        export_graph(graph, sys.stdout, export_format.lower(), nodes, formats)
+
+# 6. 'impact' コマンド: data / parameter を変更した場合に, target を更新するために再計算が必要な data を出力する.
+@cli.command("impact", help="List the data that must be recomputed to refresh the targets after changing data or parameters.")
+@_graph_filepath_argument
+# 変更した data / parameter の名前. 複数回指定でき, カンマ区切りでも指定できる.
+@click.option(
+    "--changed",
+    multiple=True,
+    required=True,
+    metavar="NAMES",
+    help="Changed data or parameter names (repeatable, comma-separated).",
+)
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def impact(filepath: Path, changed: tuple[str, ...], yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """
+    変更したデータ自身とその下流のうち, target に到達できるデータをトポロジカル順に出力する.
+    パラメータの変更は, そのパラメータを required_parameter に持つデータの変更として扱う.
+    """
+    graph = _load_graph(filepath, yaml_backend, cache, cache_dir)
+    nodes = []
+    for name in (name.strip() for names in changed for name in names.split(",")):
+        if not name:
+            continue
+        if name not in graph.ids and name not in graph.parameter_consumers:
+            raise click.UsageError(f"'{name}' is not defined in the 'data' or 'parameter' section.")
+        if name in graph.ids:
+            nodes.append(graph.ids[name])
+        nodes.extend(graph.parameter_consumers.get(name, ()))
+    recompute = graph.impact(nodes)
+    for node in recompute:
+        click.echo(graph.names[node])
+    click.echo(f"{len(recompute)} of {len(graph)} data entries need to be recomputed.", err=True)
+
+# 7. 'plan' コマンド: data エントリの処理を N 個のワーカーで並列に実行する計画を出力する.
+# 処理のコストは data エントリの cost フィールド (未指定の場合 1) を使用する.
+@cli.command("plan", help="Schedule the data entries onto parallel workers and report the critical path.")
+@_graph_filepath_argument
+@click.option(
+    "--jobs", "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of workers to schedule on (0 = number of CPUs).",
+)
+# 出力形式: text (人が読む形式), json (実行するための計画).
+@click.option(
+    "--format", "plan_format",
+    type=click.Choice(("text", "json"), case_sensitive=False),
+    default="text",
+    show_default=True,
+    help="Output format. json writes the schedule for a parallel runner.",
+)
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def plan(filepath: Path, jobs: int, plan_format: str, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """レベル, ワーカーへの割り当て, クリティカルパスと速度向上率を出力する. 循環参照がある場合はエラー."""
+    import json
+    from .graph.dependency_graph import CyclicGraphError
+    from .graph.schedule import costs_from_spec, format_plan, plan_schedule
+    from .validation.batch import default_jobs
+    compiled = _load_spec(filepath, yaml_backend, cache, cache_dir)
+    spec, graph = compiled.spec, compiled.graph
+    if jobs == 0:
+        jobs = default_jobs()
+    try:
+        execution_plan = plan_schedule(graph, jobs, costs_from_spec(spec, graph))
+    except (CyclicGraphError, ValueError) as e:
+        raise click.ClickException(str(e))
+    if plan_format.lower() == "json":
+        click.echo(json.dumps(execution_plan.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        click.echo(format_plan(execution_plan))
+
+# 8. 'prune' コマンド: target に寄与しない data / parameter を除いた data_dependencies.yml を出力する.
+@cli.command("prune", help="Write a copy of the file without data and parameters that no target needs.")
+@_graph_filepath_argument
+@click.option(
+    "--output", "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write to this file instead of stdout.",
+)
+@_graph_yaml_backend_option
+@_graph_cache_option
+@_graph_cache_dir_option
+def prune(filepath: Path, output: Path | None, yaml_backend: str | None, cache: bool | None, cache_dir: Path | None):
+    """
+    target から required_data と可変長列の参照先をたどって到達できる data と,
+    それらの required_parameter のみを残した文書を YAML で出力する.
+    除いた件数は標準エラー出力に出力する. コメントと書式は保持しない.
+    """
+    import yaml
+    from .graph.pruning import prune_document
+    compiled = _load_spec(filepath, yaml_backend, cache, cache_dir)
+    document = compiled.document
+    pruned = prune_document(document, compiled.spec)
+    text = yaml.safe_dump(pruned, allow_unicode=True, sort_keys=False, default_flow_style=False)
+    if output is not None:
+        output.write_text(text, encoding='utf-8')
+    else:
+        click.echo(text, nl=False)
+    removed_data = len(document['data']) - len(pruned['data'])
+    removed_parameters = len(document.get('parameter') or {}) - len(pruned.get('parameter') or {})
+    click.echo(f"Removed {removed_data} data entries and {removed_parameters} parameters.", err=True)
+
 # スクリプトが直接実行された場合にメインの cli グループを実行
 if __name__ == "__main__":
     cli()
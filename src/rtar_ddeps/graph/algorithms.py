@@ -0,0 +1,158 @@
+# 依存関係グラフに対する汎用アルゴリズム
+#
+# いずれも再帰を使わない反復実装で, 数十万ノードの深いグラフでも
+# RecursionError を起こさず O(V+E) で動作する.
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Mapping, NamedTuple, Sequence, Set
+
+class Cycle(NamedTuple):
+    """循環参照を構成する強連結成分."""
+    members: List[Hashable] # 成分に含まれるノード (入力ノードの順序)
+    path: List[Hashable] # 代表的な循環経路 (先頭と末尾が同じノード)
+
+def strongly_connected_components(
+    nodes: Iterable[Hashable],
+    successors: Mapping[Hashable, Sequence[Hashable]],
+) -> List[List[Hashable]]:
+    """
+    Tarjan のアルゴリズムで強連結成分を求める (反復版).
+
+    Args:
+        nodes: グラフのノード.
+        successors: ノードから後続ノードへの隣接リスト. nodes に含まれないノードへの辺は無視する.
+
+    Returns:
+        強連結成分のリスト (逆トポロジカル順).
+    """
+    nodes = list(nodes)
+    node_set = set(nodes)
+    index: Dict[Hashable, int] = {}
+    low: Dict[Hashable, int] = {}
+    on_stack = set()
+    stack: List[Hashable] = []
+    components: List[List[Hashable]] = []
+    counter = 0
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        # 再帰呼び出しの代わりに (ノード, 未処理の後続ノードのイテレータ) を積む
+        work = [(root, iter(successors.get(root, ())))]
+        while work:
+            node, neighbors = work[-1]
+            descended = False
+            for neighbor in neighbors:
+                if neighbor not in node_set:
+                    continue
+                if neighbor not in index:
+                    index[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(successors.get(neighbor, ()))))
+                    descended = True
+                    break
+                if neighbor in on_stack and index[neighbor] < low[node]:
+                    low[node] = index[neighbor]
+            if descended:
+                continue
+
+            # node の後続ノードをすべて処理し終えた
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+def reachable(
+    starts: Iterable[Hashable],
+    successors: Mapping[Hashable, Iterable[Hashable]],
+) -> Set[Hashable]:
+    """
+    starts から辺をたどって到達できるノード (starts を含む) を O(V+E) で求める.
+
+    Args:
+        starts: 探索を始めるノード.
+        successors: ノードから後続ノードへの隣接リスト.
+
+    Returns:
+        到達できるノードの集合.
+    """
+    seen = set(starts)
+    stack = list(seen)
+    while stack:
+        for neighbor in successors.get(stack.pop(), ()):
+            if neighbor not in seen:
+                seen.add(neighbor)
+                stack.append(neighbor)
+    return seen
+
+def find_cycles(
+    nodes: Iterable[Hashable],
+    successors: Mapping[Hashable, Sequence[Hashable]],
+) -> List[Cycle]:
+    """
+    グラフ中のすべての循環 (2 ノード以上の強連結成分, または自己ループ) を求める.
+
+    結果は成分内で最も先に現れるノードの nodes 内の順序で並べ,
+    各成分の members も nodes の順序で並べる (出力を決定的にするため).
+
+    Args:
+        nodes: グラフのノード.
+        successors: ノードから後続ノードへの隣接リスト.
+
+    Returns:
+        Cycle のリスト.
+    """
+    nodes = list(nodes)
+    order = {node: i for i, node in enumerate(nodes)}
+    cycles: List[Cycle] = []
+    for component in strongly_connected_components(nodes, successors):
+        if len(component) == 1:
+            node = component[0]
+            if node not in successors.get(node, ()):
+                continue # 自己ループのない単独ノードは循環ではない
+        members = sorted(component, key=order.__getitem__)
+        cycles.append(Cycle(members, _shortest_cycle_path(members, successors)))
+    cycles.sort(key=lambda cycle: order[cycle.members[0]])
+    return cycles
+
+def _shortest_cycle_path(
+    members: List[Hashable],
+    successors: Mapping[Hashable, Sequence[Hashable]],
+) -> List[Hashable]:
+    """強連結成分の先頭ノードから始まり先頭ノードに戻る最短経路を幅優先探索で求める."""
+    start = members[0]
+    member_set = set(members)
+    parent: Dict[Hashable, Hashable] = {}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbor in successors.get(node, ()):
+            if neighbor == start:
+                # start に戻る辺が見つかったら経路を復元する
+                path = [node]
+                while path[-1] != start:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                path.append(start)
+                return path
+            if neighbor in member_set and neighbor not in parent:
+                parent[neighbor] = node
+                queue.append(neighbor)
+    return [start] # 強連結成分であれば到達しない
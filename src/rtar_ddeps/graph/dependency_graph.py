@@ -0,0 +1,396 @@
+# データの依存関係グラフと到達可能性の索引
+#
+# ノードは data セクションのエントリ (名前 ID 0..data_count-1) で, 辺は required_data と可変長列 (name*) の参照を表す.
+# 可変長列の参照先は列の構成を決めるため, required_data と同じく上流として扱う (pruning.py と同じ).
+# 「上流」は参照先 (辺を辿った先), 「下流」は参照元 (そのデータを使用するデータ) とする.
+#
+# 推移閉包は強連結成分を縮約した DAG の上でトポロジカル順に 1 回ずつ計算し,
+# 成分ごとにビット集合 (Python の int) として保持する. ビットの位置はノードのトポロジカル順の位置で,
+# 成分の閉包は (最下位のビット位置, その位置で右シフトした int) の組で保持する (下位の 0 を保持しない).
+# 構築後は「X のすべての上流」「Y から X に到達できるか」をビット演算 1 回で求められる.
+# 閉包は上流/下流それぞれ最初の問い合わせで構築する.
+# 縮約 (トポロジカル順) も最初に必要になったときに行うため, 隣接リストのみを使う処理 (export など) は O(V+E) で済む.
+#
+# 変更の影響 (impact) は索引を使わず, 変更されたノードの下流のみを走査して求める.
+
+import heapq
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Mapping, Sequence, Tuple
+
+from .algorithms import strongly_connected_components
+from ..model.spec import DataEntry
+
+# _condense で設定する属性 (state の順序)
+_CONDENSED_STATE = (
+    '_order', '_position', '_component', '_starts', '_cyclic', '_component_predecessors', '_component_successors',
+)
+_CONDENSED_ATTRIBUTES = frozenset(_CONDENSED_STATE)
+
+def data_references(spec, entry) -> List[int]:
+    """
+    data エントリが参照する data (required_data, 可変長列 name* の参照先) の名前 ID を記述順に返す.
+
+    ストリーミング検証の Spec (data の要素が DataEntrySummary) でも同じ結果になる.
+    未定義の名前と parameter への参照は含めない.
+    """
+    refs = [ref for ref in entry.required_data or () if spec.is_data(ref)]
+    if isinstance(entry, DataEntry):
+        refs.extend(column.ref_id for column in entry.columns or () if column.is_variable and spec.is_data(column.ref_id))
+    else:
+        # DataEntrySummary は列名のみを持つ
+        for column_name in entry.column_names:
+            if column_name.endswith('*'):
+                ref = spec.ids.get(column_name[:-1])
+                if ref is not None and spec.is_data(ref):
+                    refs.append(ref)
+    return refs
+
+class CyclicGraphError(ValueError):
+    """循環参照があるためトポロジカル順を決められない."""
+
+    def __init__(self, message: str, cycles: List[List[int]]):
+        super().__init__(message)
+        self.cycles = cycles # 循環を構成するノードのリスト (各リストはノード ID 順)
+
+class DependencyGraph:
+    """
+    データの依存関係グラフ.
+
+        graph = DependencyGraph.from_spec(spec)
+        graph.upstream(graph.id('result'))  # result が (間接的に) 使用するデータ
+        graph.reaches(graph.id('raw'), graph.id('result'))  # raw が result の上流か
+
+    ノードはすべて整数 (ノード ID) で扱い, 名前は names で参照する.
+    """
+    __slots__ = (
+        'names', 'ids', 'predecessors', 'successors', 'targets', 'parameter_consumers',
+        '_order', '_position', '_component', '_starts', '_cyclic',
+        '_component_predecessors', '_component_successors', '_closures',
+    )
+
+    def __init__(
+        self,
+        names: Sequence[Hashable],
+        required: Sequence[Iterable[int] | None],
+        targets: Iterable[int] = (),
+        parameter_consumers: Mapping[Hashable, Iterable[int]] | None = None,
+    ):
+        """
+        Args:
+            names: ノード ID -> 名前.
+            required: ノード ID -> 上流のノード ID (None は参照なし).
+                範囲外の ID (未定義のデータへの参照) は無視する.
+            targets: 最終的に必要なノード (target セクション).
+            parameter_consumers: パラメータ名 -> そのパラメータを使用するノード (required_parameter の逆引き).
+        """
+        n = len(names)
+        self.names: List[Hashable] = list(names)
+        self.ids: Dict[Hashable, int] = {name: i for i, name in enumerate(self.names)}
+        # 直接の上流/下流 (重複を除き, 参照の記述順)
+        self.predecessors: List[Tuple[int, ...]] = [
+            tuple(dict.fromkeys(u for u in refs if 0 <= u < n)) if refs else () for refs in required
+        ]
+        successors: List[List[int]] = [[] for _ in range(n)]
+        for v, preds in enumerate(self.predecessors):
+            for u in preds:
+                successors[u].append(v)
+        self.successors: List[Tuple[int, ...]] = [tuple(s) for s in successors]
+        self.targets: Tuple[int, ...] = tuple(dict.fromkeys(v for v in targets if 0 <= v < n))
+        self.parameter_consumers: Dict[Hashable, Tuple[int, ...]] = {
+            name: tuple(dict.fromkeys(consumers)) for name, consumers in (parameter_consumers or {}).items()
+        }
+        self._closures: Dict[str, Tuple[List[int], List[int]]] = {}
+
+    @classmethod
+    def from_spec(cls, spec) -> 'DependencyGraph':
+        """
+        Spec (model.spec) の data セクションからグラフを構築する. 未定義のデータへの参照は無視する.
+
+        上流は required_data と可変長列の参照先 (data_references).
+
+        parameter_consumers には parameter セクションで定義されたパラメータと
+        required_parameter で参照されたパラメータをすべて含める.
+        """
+        required: List[List[int] | None] = [None] * spec.data_count
+        consumers: Dict[Hashable, List[int]] = {spec.names[i]: [] for i in sorted(spec.parameter_ids)}
+        for entry in spec.data:
+            required[entry.id] = data_references(spec, entry)
+            for parameter_id in entry.required_parameter or ():
+                consumers.setdefault(spec.names[parameter_id], []).append(entry.id)
+        targets = [v for v in spec.target if spec.is_data(v)]
+        return cls(spec.names[:spec.data_count], required, targets, consumers)
+
+    def state(self) -> tuple:
+        """
+        グラフを marshal で直列化できる値にする. from_state で復元する.
+
+        縮約 (トポロジカル順) を含め, 未計算であれば計算する.
+        推移閉包は大きさが最悪でノード数の 2 乗に比例するため含めず, 復元後の最初の問い合わせで構築する.
+        """
+        condensed = tuple(getattr(self, name) for name in _CONDENSED_STATE)
+        return (self.names, self.predecessors, self.successors, self.targets, self.parameter_consumers, condensed)
+
+    @classmethod
+    def from_state(cls, state: tuple) -> 'DependencyGraph':
+        """state の値からグラフを復元する (隣接リストと縮約を再計算しない)."""
+        graph = cls.__new__(cls)
+        graph.names, graph.predecessors, graph.successors, graph.targets, graph.parameter_consumers, condensed = state
+        graph.ids = {name: i for i, name in enumerate(graph.names)}
+        for name, value in zip(_CONDENSED_STATE, condensed):
+            setattr(graph, name, value)
+        graph._closures = {}
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, name: Hashable) -> int:
+        """
+        名前に対応するノード ID を返す.
+
+        Raises:
+            KeyError: ノードとして定義されていない場合.
+        """
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise KeyError(f"'{name}' is not defined in the 'data' section.") from None
+
+    # --- 強連結成分の縮約 ---
+
+    def __getattr__(self, name: str):
+        # 縮約の結果の属性 (__slots__ の未設定の属性) を最初に参照したときに縮約する
+        if name in _CONDENSED_ATTRIBUTES:
+            self._condense()
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _condense(self):
+        """
+        強連結成分を縮約し, 成分をトポロジカル順 (上流が先) に並べる.
+
+        依存関係の制約がない成分どうしは, 成分内の最小のノード ID (定義順) の順にする.
+        循環がなければ各ノードが成分になるため, 強連結成分は循環が見つかった場合のみ求める.
+        """
+        n = len(self.names)
+        components = [[v] for v in range(n)]
+        preds: List[Sequence[int]] = self.predecessors
+        ordered, succs = _topological_sort(components, preds)
+        if len(ordered) < n:
+            components = [sorted(c) for c in strongly_connected_components(range(n), dict(enumerate(self.predecessors)))]
+            component_of = [0] * n
+            for c, members in enumerate(components):
+                for v in members:
+                    component_of[v] = c
+            preds = [
+                list(dict.fromkeys(component_of[u] for v in members for u in self.predecessors[v] if component_of[u] != c))
+                for c, members in enumerate(components)
+            ]
+            ordered, succs = _topological_sort(components, preds)
+        else:
+            component_of = list(range(n))
+        rank = [0] * len(components)
+        for i, c in enumerate(ordered):
+            rank[c] = i
+
+        self._order: List[int] = [] # トポロジカル順の位置 -> ノード ID
+        self._starts: List[int] = [] # 成分 (トポロジカル順) -> 先頭の位置 (末尾に番兵 n)
+        self._cyclic: List[bool] = [] # 成分が循環かどうか (2 ノード以上, または自己ループ)
+        for c in ordered:
+            members = components[c]
+            self._starts.append(len(self._order))
+            self._order.extend(members)
+            self._cyclic.append(len(members) > 1 or members[0] in self.predecessors[members[0]])
+        self._starts.append(n)
+        self._position = [0] * n # ノード ID -> トポロジカル順の位置
+        for i, v in enumerate(self._order):
+            self._position[v] = i
+        self._component = [rank[c] for c in component_of] # ノード ID -> 成分 (トポロジカル順)
+        self._component_predecessors = [[rank[p] for p in preds[c]] for c in ordered]
+        self._component_successors = [[rank[s] for s in succs[c]] for c in ordered]
+
+    @property
+    def has_cycles(self) -> bool:
+        return any(self._cyclic)
+
+    def cycles(self) -> List[List[int]]:
+        """循環を構成するノードのリスト (トポロジカル順)."""
+        starts = self._starts
+        return [sorted(self._order[starts[c]:starts[c + 1]]) for c, cyclic in enumerate(self._cyclic) if cyclic]
+
+    def topological_order(self) -> List[int]:
+        """
+        上流が先になるノードの順序. 依存関係の制約がないノードどうしは定義順.
+
+        Raises:
+            CyclicGraphError: 循環参照がある場合.
+        """
+        if self.has_cycles:
+            cycles = self.cycles()
+            described = "; ".join(", ".join(f"'{self.names[v]}'" for v in cycle) for cycle in cycles)
+            raise CyclicGraphError(f"The dependency graph has circular dependencies: {described}.", cycles)
+        return list(self._order)
+
+    # --- 推移閉包 ---
+
+    def _closure(self, direction: str) -> Tuple[List[int], List[int]]:
+        """
+        成分ごとの上流 ('upstream') / 下流 ('downstream') の推移閉包を返す (初回のみ構築する).
+
+        Returns:
+            (成分 -> 最下位のビット位置, 成分 -> 右シフトしたビット集合).
+            循環の成分の閉包は成分自身を含む.
+        """
+        closure = self._closures.get(direction)
+        if closure is not None:
+            return closure
+        starts = self._starts
+        count = len(self._cyclic)
+        if direction == 'upstream':
+            neighbors, components = self._component_predecessors, range(count)
+        else:
+            neighbors, components = self._component_successors, range(count - 1, -1, -1)
+        lows = [0] * count
+        masks = [0] * count
+        for c in components:
+            bits = 0
+            for d in neighbors[c]:
+                # 隣接成分の閉包と隣接成分自身
+                bits |= (masks[d] << lows[d]) | (((1 << (starts[d + 1] - starts[d])) - 1) << starts[d])
+            if self._cyclic[c]:
+                bits |= ((1 << (starts[c + 1] - starts[c])) - 1) << starts[c]
+            if bits:
+                low = (bits & -bits).bit_length() - 1
+                lows[c] = low
+                masks[c] = bits >> low
+        closure = self._closures[direction] = (lows, masks)
+        return closure
+
+    def _members(self, low: int, mask: int) -> List[int]:
+        """ビット集合のノード ID をトポロジカル順に返す."""
+        order = self._order
+        # 下位のビットから順に調べるため, 2 進表記を反転する
+        digits = bin(mask)[:1:-1]
+        members = []
+        i = digits.find('1')
+        while i >= 0:
+            members.append(order[low + i])
+            i = digits.find('1', i + 1)
+        return members
+
+    def upstream(self, node: int) -> List[int]:
+        """node が直接または間接的に使用するノード (トポロジカル順). 循環に含まれる場合は node 自身を含む."""
+        lows, masks = self._closure('upstream')
+        c = self._component[node]
+        return self._members(lows[c], masks[c])
+
+    def downstream(self, node: int) -> List[int]:
+        """node を直接または間接的に使用するノード (トポロジカル順). 循環に含まれる場合は node 自身を含む."""
+        lows, masks = self._closure('downstream')
+        c = self._component[node]
+        return self._members(lows[c], masks[c])
+
+    def upstream_count(self, node: int) -> int:
+        """upstream(node) の要素数."""
+        lows, masks = self._closure('upstream')
+        return masks[self._component[node]].bit_count()
+
+    def downstream_count(self, node: int) -> int:
+        """downstream(node) の要素数."""
+        lows, masks = self._closure('downstream')
+        return masks[self._component[node]].bit_count()
+
+    def reaches(self, source: int, target: int) -> bool:
+        """source から下流に辿って target に到達できるか (source が target の上流か). source == target は循環の場合のみ True."""
+        lows, masks = self._closure('upstream')
+        c = self._component[target]
+        offset = self._position[source] - lows[c]
+        return offset >= 0 and (masks[c] >> offset) & 1 == 1
+
+    def path(self, source: int, target: int) -> List[int] | None:
+        """
+        source から下流に辿って target に至る最短の経路 (source と target を含む).
+
+        target の上流の閉包に含まれるノードのみを探索する.
+        source == target の場合は [source]. 到達できない場合は None.
+        """
+        if source == target:
+            return [source]
+        if not self.reaches(source, target):
+            return None
+        lows, masks = self._closure('upstream')
+        c = self._component[target]
+        low, mask = lows[c], masks[c]
+        position = self._position
+        parent: Dict[int, int] = {source: source}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for s in self.successors[node]:
+                if s in parent:
+                    continue
+                if s == target:
+                    path = [target, node]
+                    while path[-1] != source:
+                        path.append(parent[path[-1]])
+                    path.reverse()
+                    return path
+                offset = position[s] - low
+                if offset >= 0 and (mask >> offset) & 1:
+                    parent[s] = node
+                    queue.append(s)
+        return None # reaches が True であれば到達しない
+
+    # --- 変更の影響 ---
+
+    def impact(self, changed: Iterable[int]) -> List[int]:
+        """
+        changed のノードが変更された場合に, targets を更新するために再計算が必要なノード (トポロジカル順).
+
+        changed とその下流のうち, いずれかの target に到達できる (target 自身を含む) ノードを返す.
+        changed の下流のみを 2 回 (下流へ, target から上流へ) 走査するため, 影響の範囲の大きさに比例する時間で済む.
+        パラメータの変更は, parameter_consumers で得たノードを changed に指定する.
+        """
+        # changed とその下流
+        affected = set(changed)
+        stack = list(affected)
+        successors = self.successors
+        while stack:
+            for s in successors[stack.pop()]:
+                if s not in affected:
+                    affected.add(s)
+                    stack.append(s)
+        # target から上流へ. target に至る経路上のノードはすべて changed の下流にあるため, affected の中のみを辿る
+        needed = {v for v in self.targets if v in affected}
+        stack = list(needed)
+        predecessors = self.predecessors
+        while stack:
+            for u in predecessors[stack.pop()]:
+                if u in affected and u not in needed:
+                    needed.add(u)
+                    stack.append(u)
+        return sorted(needed, key=self._position.__getitem__)
+
+def _topological_sort(components: List[List[int]], predecessors: Sequence[Sequence[int]]) -> Tuple[List[int], List[List[int]]]:
+    """
+    Kahn のアルゴリズムで成分をトポロジカル順に並べる (入次数 0 の成分のうち, 先頭のノード ID が最小のものを優先).
+
+    Returns:
+        (並べた成分, 成分 -> 後続の成分). 循環がある場合, 循環とその下流の成分は並べた成分に含まれない.
+    """
+    successors: List[List[int]] = [[] for _ in components]
+    indegree = [len(ps) for ps in predecessors]
+    for c, ps in enumerate(predecessors):
+        for p in ps:
+            successors[p].append(c)
+    heap = [(members[0], c) for c, members in enumerate(components) if not indegree[c]]
+    heapq.heapify(heap)
+    ordered: List[int] = []
+    while heap:
+        _, c = heapq.heappop(heap)
+        ordered.append(c)
+        for s in successors[c]:
+            indegree[s] -= 1
+            if not indegree[s]:
+                heapq.heappush(heap, (components[s][0], s))
+    return ordered, successors
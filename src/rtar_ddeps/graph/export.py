@@ -0,0 +1,167 @@
+# 依存関係グラフの DOT (Graphviz) / Mermaid 形式での出力
+#
+# ノードと辺を 1 行ずつ出力先に書き出し, 出力全体を文字列として保持しない.
+# 出力の対象の選択 (target からの距離の制限) とノードの format ごとのグループ化は O(V+E) で行い,
+# 保持するのはノード ID のリストと集合のみとする.
+#
+# 辺はデータの流れの向き (参照先 -> 参照元) で出力する.
+
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, TextIO
+
+from .dependency_graph import DependencyGraph
+from ..settings import EXPORT_FORMATS
+
+def formats_from_spec(spec) -> List[str | None]:
+    """Spec (model.spec) の data の名前 ID -> format (スキーマで検証されないエントリは None)."""
+    formats: List[str | None] = [None] * spec.data_count
+    for entry in spec.data:
+        formats[entry.id] = entry.format
+    return formats
+
+def select_nodes(graph: DependencyGraph, roots: Iterable[int] | None = None, depth: int | None = None) -> List[int]:
+    """
+    出力するノードをノード ID 順 (定義順) に返す.
+
+    Args:
+        graph: 依存関係グラフ.
+        roots: 指定した場合, roots とその上流のみを対象とする.
+        depth: 指定した場合, roots から上流へ depth 段 (0 は roots のみ) までを対象とする.
+            roots を省略した場合は graph.targets を roots とする.
+    """
+    if roots is None and depth is None:
+        return list(range(len(graph)))
+    if roots is None:
+        roots = graph.targets
+    # 幅優先探索で root からの段数を求める
+    distance: Dict[int, int] = {}
+    queue = deque()
+    for root in roots:
+        if root not in distance:
+            distance[root] = 0
+            queue.append(root)
+    predecessors = graph.predecessors
+    while queue:
+        node = queue.popleft()
+        if depth is not None and distance[node] >= depth:
+            continue
+        for u in predecessors[node]:
+            if u not in distance:
+                distance[u] = distance[node] + 1
+                queue.append(u)
+    return sorted(distance)
+
+def export_graph(
+    graph: DependencyGraph,
+    stream: TextIO,
+    export_format: str = 'dot',
+    nodes: Sequence[int] | None = None,
+    formats: Sequence[str | None] | None = None,
+) -> int:
+    """
+    グラフを出力先に書き出す.
+
+    Args:
+        graph: 依存関係グラフ.
+        stream: 出力先 (テキスト).
+        export_format: EXPORT_FORMATS のいずれか.
+        nodes: 出力するノード (select_nodes). 省略時はすべて.
+        formats: ノード ID -> format. 指定した場合, format ごとにノードをまとめる (DOT の cluster, Mermaid の subgraph).
+            None の要素のノードはまとめない.
+
+    Returns:
+        出力した辺の数.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Allowed values are: {', '.join(EXPORT_FORMATS)}")
+    nodes = list(range(len(graph))) if nodes is None else nodes
+    writer = _DotWriter(graph, stream) if export_format == 'dot' else _MermaidWriter(graph, stream)
+    selected = set(nodes)
+    targets = set(graph.targets)
+
+    writer.begin()
+    # format ごとのノード (format の初出順). まとめないノードは None にまとめる
+    groups: Dict[str | None, List[int]] = {}
+    for node in nodes:
+        groups.setdefault(formats[node] if formats is not None else None, []).append(node)
+    for group, members in groups.items():
+        if group is not None:
+            writer.begin_group(group)
+        for node in members:
+            writer.node(node, node in targets, indent=2 if group is not None else 1)
+        if group is not None:
+            writer.end_group()
+    edges = 0
+    predecessors = graph.predecessors
+    for node in nodes:
+        for u in predecessors[node]:
+            if u in selected:
+                writer.edge(u, node)
+                edges += 1
+    writer.end()
+    return edges
+
+class _DotWriter:
+    """DOT 形式 (Graphviz)."""
+
+    def __init__(self, graph: DependencyGraph, stream: TextIO):
+        self.names = graph.names
+        self.write = stream.write
+
+    def _id(self, node: int) -> str:
+        return f'"{self._label(self.names[node])}"'
+
+    @staticmethod
+    def _label(text) -> str:
+        return str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+    def begin(self):
+        self.write("digraph data_dependencies {\n  rankdir=LR;\n  node [shape=box];\n")
+
+    def begin_group(self, group: str):
+        label = self._label(group)
+        self.write(f"  subgraph \"cluster_{label}\" {{\n    label=\"{label}\";\n")
+
+    def end_group(self):
+        self.write("  }\n")
+
+    def node(self, node: int, is_target: bool, indent: int):
+        # target は二重枠で表示する
+        self.write(f"{'  ' * indent}{self._id(node)}{' [peripheries=2]' if is_target else ''};\n")
+
+    def edge(self, source: int, target: int):
+        self.write(f"  {self._id(source)} -> {self._id(target)};\n")
+
+    def end(self):
+        self.write("}\n")
+
+class _MermaidWriter:
+    """Mermaid 形式 (flowchart). ノードの ID は d<ノード ID>, 表示名はデータ名とする."""
+
+    def __init__(self, graph: DependencyGraph, stream: TextIO):
+        self.names = graph.names
+        self.write = stream.write
+        self._groups = 0
+
+    @staticmethod
+    def _label(text) -> str:
+        return str(text).replace('"', '#quot;')
+
+    def begin(self):
+        self.write("flowchart LR\n  classDef target stroke-width:3px;\n")
+
+    def begin_group(self, group: str):
+        self.write(f"  subgraph format_{self._groups}[\"{self._label(group)}\"]\n")
+        self._groups += 1
+
+    def end_group(self):
+        self.write("  end\n")
+
+    def node(self, node: int, is_target: bool, indent: int):
+        self.write(f"{'  ' * indent}d{node}[\"{self._label(self.names[node])}\"]{':::target' if is_target else ''}\n")
+
+    def edge(self, source: int, target: int):
+        self.write(f"  d{source} --> d{target}\n")
+
+    def end(self):
+        pass
@@ -0,0 +1,57 @@
+# target に寄与するエントリの判定と, 寄与しないエントリを除いた文書の作成
+#
+# target から required_data と可変長列 (name*) の参照先を逆にたどり (O(V+E)),
+# 到達した data と, それらの required_parameter を「必要」とする.
+# 可変長列の参照先は列の構成を決めるため, 参照する data が必要であれば参照先も必要とする.
+# 参照は依存関係グラフの辺 (dependency_graph.data_references) と同じ.
+
+from typing import Dict, FrozenSet, List, NamedTuple
+
+from .algorithms import reachable
+from .dependency_graph import data_references
+
+class NeededEntries(NamedTuple):
+    """target のために必要なエントリ (名前 ID)."""
+    data: FrozenSet[int]
+    parameters: FrozenSet[int]
+
+def needed_by_targets(spec) -> NeededEntries:
+    """
+    Spec (model.spec) の target に寄与する data と parameter を求める.
+
+    ストリーミング検証の Spec (data の要素が DataEntrySummary) でも同じ結果になる.
+    未定義の名前 (target, 参照先) は含めない.
+    """
+    references: Dict[int, List[int]] = {entry.id: data_references(spec, entry) for entry in spec.data}
+    data = reachable((target for target in spec.target if spec.is_data(target)), references)
+    parameters = {
+        parameter
+        for entry in spec.data if entry.id in data
+        for parameter in entry.required_parameter or ()
+        if parameter in spec.parameter_ids
+    }
+    return NeededEntries(frozenset(data), frozenset(parameters))
+
+def prune_document(document: dict, spec) -> dict:
+    """
+    target に寄与しない data と parameter を除いた文書を返す (元の文書は変更しない).
+
+    キーの順序と, data / parameter 以外のセクションはそのまま保持する.
+    必要な parameter がなくなった場合は parameter セクションを除く.
+
+    Args:
+        document: スキーマ検証に成功した文書.
+        spec: document から構築した Spec.
+    """
+    needed = needed_by_targets(spec)
+    pruned = dict(document)
+    pruned['data'] = {name: definition for name, definition in document['data'].items() if spec.ids[name] in needed.data}
+    if isinstance(document.get('parameter'), dict):
+        parameters = {
+            name: definition for name, definition in document['parameter'].items() if spec.ids[name] in needed.parameters
+        }
+        if parameters:
+            pruned['parameter'] = parameters
+        else:
+            del pruned['parameter']
+    return pruned
@@ -0,0 +1,217 @@
+# 依存関係グラフの並列実行計画
+#
+# data エントリの処理を N 個のワーカーに割り当てる.
+# * レベル (ウェーブ): 上流がすべて前のレベルにあるエントリの集まり. 同じレベルのエントリは互いに独立に実行できる.
+# * 割り当て: リストスケジューリング (HLFET). 上流がすべて終わったエントリのうち,
+#   そのエントリから下流の末端までの最長のコスト (bottom level) が大きいものを, 空いたワーカーに順に割り当てる.
+# * クリティカルパス: コストの合計が最大の依存経路. ワーカーが無制限でも実行時間はこの長さより短くならない.
+#
+# コストは data エントリの cost フィールド (未指定の場合 1) を使用する.
+
+import heapq
+import math
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+from .dependency_graph import DependencyGraph
+
+# 実行計画の JSON の形式のバージョン. 互換性なく変更した場合は更新する
+PLAN_FORMAT_VERSION = 1
+
+# cost フィールドを指定しないエントリのコスト
+DEFAULT_COST = 1
+
+class ScheduledStep(NamedTuple):
+    """ワーカーに割り当てた 1 エントリの処理."""
+    node: int
+    worker: int # 0 始まり
+    start: float
+    finish: float
+
+class ExecutionPlan:
+    """
+    並列実行計画.
+
+    steps は開始時刻, ワーカーの順に並ぶ. 時刻はコストの単位で, 各エントリの処理が
+    コストどおりの時間で終わると仮定した見積もりである. 実行時は requires の完了を待って開始する.
+    """
+    __slots__ = ('graph', 'jobs', 'costs', 'levels', 'steps', 'critical_path')
+
+    def __init__(
+        self,
+        graph: DependencyGraph,
+        jobs: int,
+        costs: Sequence[float],
+        levels: List[List[int]],
+        steps: List[ScheduledStep],
+        critical_path: List[int],
+    ):
+        self.graph = graph
+        self.jobs = jobs
+        self.costs = costs
+        self.levels = levels # レベル -> ノード (トポロジカル順)
+        self.steps = steps
+        self.critical_path = critical_path # 上流が先
+
+    @property
+    def total_cost(self) -> float:
+        """すべてのエントリのコストの合計 (1 ワーカーでの実行時間)."""
+        return sum(self.costs)
+
+    @property
+    def makespan(self) -> float:
+        """N ワーカーでの実行時間."""
+        return max((step.finish for step in self.steps), default=0)
+
+    @property
+    def critical_path_cost(self) -> float:
+        """クリティカルパスのコストの合計 (ワーカーが無制限の場合の実行時間)."""
+        return sum(self.costs[v] for v in self.critical_path)
+
+    @property
+    def speedup(self) -> float:
+        """N ワーカーでの速度向上率 (total_cost / makespan)."""
+        return _ratio(self.total_cost, self.makespan)
+
+    @property
+    def max_speedup(self) -> float:
+        """ワーカーが無制限の場合の速度向上率の上限 (total_cost / critical_path_cost)."""
+        return _ratio(self.total_cost, self.critical_path_cost)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON にできる辞書 (ノードは名前で表す)."""
+        names = self.graph.names
+        level_of = {v: level for level, nodes in enumerate(self.levels) for v in nodes}
+        return {
+            'version': PLAN_FORMAT_VERSION,
+            'jobs': self.jobs,
+            'total_cost': self.total_cost,
+            'makespan': self.makespan,
+            'critical_path_cost': self.critical_path_cost,
+            'speedup': self.speedup,
+            'max_speedup': self.max_speedup,
+            'critical_path': [names[v] for v in self.critical_path],
+            'levels': [[names[v] for v in nodes] for nodes in self.levels],
+            'steps': [
+                {
+                    'name': names[step.node],
+                    'worker': step.worker,
+                    'start': step.start,
+                    'finish': step.finish,
+                    'cost': self.costs[step.node],
+                    'level': level_of[step.node],
+                    'requires': [names[u] for u in self.graph.predecessors[step.node]],
+                }
+                for step in self.steps
+            ],
+        }
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 1.0
+
+def costs_from_spec(spec, graph: DependencyGraph) -> List[float]:
+    """
+    graph のノード順に各 data エントリの cost を返す (未指定の場合は DEFAULT_COST).
+
+    Raises:
+        ValueError: cost が 0 以上の有限の数でない場合.
+    """
+    costs: List[float] = [DEFAULT_COST] * len(graph)
+    for entry in spec.data:
+        cost = entry.cost
+        if cost is None:
+            continue
+        if isinstance(cost, bool) or not isinstance(cost, (int, float)) or not math.isfinite(cost) or cost < 0:
+            raise ValueError(f"Invalid cost for data '{entry.name}': {cost!r} (expected a non-negative number).")
+        costs[entry.id] = cost
+    return costs
+
+def plan_schedule(graph: DependencyGraph, jobs: int, costs: Sequence[float] | None = None) -> ExecutionPlan:
+    """
+    すべてのノードを jobs 個のワーカーに割り当てる.
+
+    Args:
+        graph: 依存関係グラフ.
+        jobs: ワーカー数 (1 以上).
+        costs: ノード -> コスト. 省略時はすべて DEFAULT_COST.
+
+    Returns:
+        ExecutionPlan.
+    Raises:
+        CyclicGraphError: 循環参照がある場合.
+    """
+    if jobs < 1:
+        raise ValueError(f"jobs must be at least 1 (got {jobs}).")
+    order = graph.topological_order()
+    n = len(graph)
+    costs = list(costs) if costs is not None else [DEFAULT_COST] * n
+    predecessors, successors = graph.predecessors, graph.successors
+
+    # レベルと, 上流からのコストが最大の経路 (クリティカルパスの復元用)
+    level = [0] * n
+    top = [0] * n # ノードの完了までの最長のコスト
+    parent = [-1] * n
+    for v in order:
+        for u in predecessors[v]:
+            if level[u] + 1 > level[v]:
+                level[v] = level[u] + 1
+            if parent[v] < 0 or top[u] > top[parent[v]]:
+                parent[v] = u
+        top[v] = costs[v] + (top[parent[v]] if parent[v] >= 0 else 0)
+    levels: List[List[int]] = [[] for _ in range(max(level, default=-1) + 1)]
+    for v in order:
+        levels[level[v]].append(v)
+    critical_path: List[int] = []
+    if n:
+        v = max(order, key=top.__getitem__)
+        while v >= 0:
+            critical_path.append(v)
+            v = parent[v]
+        critical_path.reverse()
+
+    # 優先度: 下流の末端までの最長のコスト (大きいほど先), 同じならトポロジカル順
+    bottom = [0] * n
+    for v in reversed(order):
+        bottom[v] = costs[v] + max((bottom[s] for s in successors[v]), default=0)
+    position = {v: i for i, v in enumerate(order)}
+
+    # イベント駆動のシミュレーション
+    waiting = [len(predecessors[v]) for v in range(n)]
+    ready = [(-bottom[v], position[v], v) for v in order if not waiting[v]]
+    heapq.heapify(ready)
+    idle = list(range(jobs)) # 空いているワーカー (番号の小さい順に使う)
+    running: List[tuple] = [] # (終了時刻, ワーカー, ノード)
+    steps: List[ScheduledStep] = []
+    now = 0
+    while ready or running:
+        while ready and idle:
+            _, _, v = heapq.heappop(ready)
+            worker = heapq.heappop(idle)
+            steps.append(ScheduledStep(v, worker, now, now + costs[v]))
+            heapq.heappush(running, (now + costs[v], worker, v))
+        # 次に終わる時刻までに終わる処理をすべて完了させる
+        now = running[0][0]
+        while running and running[0][0] == now:
+            _, worker, v = heapq.heappop(running)
+            heapq.heappush(idle, worker)
+            for s in successors[v]:
+                waiting[s] -= 1
+                if not waiting[s]:
+                    heapq.heappush(ready, (-bottom[s], position[s], s))
+    steps.sort(key=lambda step: (step.start, step.worker))
+    return ExecutionPlan(graph, jobs, costs, levels, steps, critical_path)
+
+def format_plan(plan: ExecutionPlan) -> str:
+    """実行計画を人が読む形式にする (CLI の出力)."""
+    names = plan.graph.names
+    widest = max((len(nodes) for nodes in plan.levels), default=0)
+    lines = [
+        f"Levels: {len(plan.levels)} (widest: {widest} data entries)",
+        f"Critical path (cost {plan.critical_path_cost:g}): {' -> '.join(str(names[v]) for v in plan.critical_path)}",
+        f"Total cost {plan.total_cost:g}, makespan {plan.makespan:g} on {plan.jobs} workers: "
+        f"speedup {plan.speedup:.2f}x (at most {plan.max_speedup:.2f}x with unlimited workers)",
+        "",
+        f"{'worker':>6}  {'start':>8}  {'finish':>8}  data",
+    ]
+    for step in plan.steps:
+        lines.append(f"{step.worker:>6}  {step.start:>8g}  {step.finish:>8g}  {names[step.node]}")
+    return "\n".join(lines)
@@ -0,0 +1,96 @@
+# 検証済みの data_dependencies.yml のコンパイル済み形式
+#
+# 文書 (スキーマ検証済みの辞書), 仕様モデル (Spec), 依存関係グラフ (縮約を含む) を
+# marshal のバイト列にまとめ, YAML の読み込みとスキーマ検証を省いて復元できるようにする.
+#
+# * marshal は組, リスト, 辞書, 文字列, 数値のみを扱い, 読み込みでコードを実行しない (pickle と異なる).
+#   形式は Python のバージョンに依存するため, 保存側 (spec_cache.py) のキーに marshal のバージョンを含める.
+# * 同じ文字列 (名前表と参照) は 1 回だけ書き出され, sys.intern した文字列は復元後も intern される.
+# * グラフは読み込み時に復元し, Spec と文書は最初に参照したときに復元する.
+#   Spec と文書はそれぞれ別のバイト列として保持するため, 使わないコマンド (graph, impact など) は復号もしない.
+
+import marshal
+
+from .spec import Spec, spec_from_state, spec_state
+from ..graph.dependency_graph import DependencyGraph
+
+# 形式のバージョン. 保存内容を変更した場合は更新する
+COMPILED_FORMAT_VERSION = 1
+
+class CompiledSpec:
+    """
+    検証済みの文書, 仕様モデル, 依存関係グラフ.
+
+        compiled = CompiledSpec(document, spec)
+        data = compiled.to_bytes()
+        CompiledSpec.from_bytes(data).graph.topological_order()
+
+    from_bytes で作った場合, spec と document は最初に参照したときに復元する.
+    """
+    __slots__ = ('_document', '_spec', '_graph', '_document_bytes', '_spec_bytes')
+
+    def __init__(self, document: dict, spec: Spec, graph: DependencyGraph | None = None):
+        """
+        Args:
+            document: スキーマ検証に成功した文書.
+            spec: document から構築した Spec (ストリーミング検証の Spec は直列化できない).
+            graph: spec から構築したグラフ. None の場合は最初に参照したときに構築する.
+        """
+        self._document: dict | None = document
+        self._spec: Spec | None = spec
+        self._graph = graph
+        self._document_bytes: bytes | None = None
+        self._spec_bytes: bytes | None = None
+
+    @property
+    def document(self) -> dict:
+        if self._document is None:
+            self._document = marshal.loads(self._document_bytes)
+            self._document_bytes = None
+        return self._document
+
+    @property
+    def spec(self) -> Spec:
+        if self._spec is None:
+            self._spec = spec_from_state(marshal.loads(self._spec_bytes))
+            self._spec_bytes = None
+        return self._spec
+
+    @property
+    def graph(self) -> DependencyGraph:
+        if self._graph is None:
+            self._graph = DependencyGraph.from_spec(self.spec)
+        return self._graph
+
+    def to_bytes(self) -> bytes:
+        """
+        バイト列にする.
+
+        Raises:
+            ValueError: 文書に marshal で扱えない値 (YAML の日付など) が含まれる場合.
+        """
+        document_bytes = self._document_bytes if self._document is None else marshal.dumps(self._document)
+        spec_bytes = self._spec_bytes if self._spec is None else marshal.dumps(spec_state(self._spec))
+        return marshal.dumps((COMPILED_FORMAT_VERSION, self.graph.state(), spec_bytes, document_bytes))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompiledSpec':
+        """
+        to_bytes のバイト列から復元する.
+
+        Raises:
+            ValueError: 形式のバージョンが異なる, またはバイト列が壊れている場合.
+        """
+        try:
+            version, graph_state, spec_bytes, document_bytes = marshal.loads(data)
+        except (EOFError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid compiled spec: {e}") from None
+        if version != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled spec format {version!r}")
+        compiled = cls.__new__(cls)
+        compiled._document = None
+        compiled._spec = None
+        compiled._graph = DependencyGraph.from_state(graph_state)
+        compiled._document_bytes = document_bytes
+        compiled._spec_bytes = spec_bytes
+        return compiled
@@ -0,0 +1,292 @@
+# data_dependencies.yml のコンパクトな型付きモデル
+#
+# スキーマ検証に成功した文書から一度だけ構築し, 各ルールやグラフ処理は
+# 生の入れ子の辞書を isinstance / get で辿る代わりにこのモデルを参照する.
+#
+# * クラスはすべて __slots__ を使い, インスタンスごとの属性辞書を持たない.
+# * data / parameter の名前と参照される名前は sys.intern した上で名前表 (Spec.names) に登録し,
+#   required_data / required_parameter / target は名前表の整数 ID のタプルで保持する.
+# * 名前表の先頭 data_count 個は data セクションのキー (定義順) であり,
+#   ID が data_count 未満かどうかで data として定義されているかを判定できる.
+
+import sys
+from typing import Any, Dict, FrozenSet, Hashable, List, Tuple
+
+def _intern(name: Any) -> Any:
+    return sys.intern(name) if type(name) is str else name
+
+class Column:
+    """columns の 1 要素."""
+    __slots__ = ('index', 'name', 'description', 'key_source', 'ref_id')
+
+    def __init__(self, index: int, name: str, description: str, key_source: str | None, ref_id: int | None):
+        self.index = index # columns 内の位置
+        self.name = name
+        self.description = description
+        self.key_source = key_source # 未指定の場合は None
+        self.ref_id = ref_id # 可変長列 (name*) の場合は参照先の名前 ID, それ以外は None
+
+    @property
+    def is_variable(self) -> bool:
+        """可変長列 (名前が * で終わる) かどうか."""
+        return self.ref_id is not None
+
+class Key:
+    """keys の 1 要素."""
+    __slots__ = ('index', 'name', 'description')
+
+    def __init__(self, index: int, name: str, description: str):
+        self.index = index # keys 内の位置
+        self.name = name
+        self.description = description
+
+class DataEntry:
+    """data セクションの 1 エントリ."""
+    __slots__ = (
+        'id', 'name', 'descriptions', 'format', 'unit', 'columns', 'keys', 'process',
+        'required_data', 'required_parameter', 'cost', '_column_names', '_key_names',
+    )
+
+    def __init__(self, id: int, name: str, definition: dict, spec: 'Spec'):
+        self.id = id
+        self.name = name
+        self.descriptions: Tuple[str, ...] = tuple(definition['descriptions'])
+        self.format: str = definition['format']
+        self.unit: str = definition['unit']
+        # 以下は未指定の場合 None (空リストの場合は空のタプル)
+        self.columns: Tuple[Column, ...] | None = None
+        self.keys: Tuple[Key, ...] | None = None
+        self.process: Tuple[str, ...] | None = None
+        self.required_data: Tuple[int, ...] | None = None # 名前 ID
+        self.required_parameter: Tuple[int, ...] | None = None # 名前 ID
+        columns = definition.get('columns')
+        if columns is not None:
+            self.columns = tuple(
+                Column(
+                    i, _intern(c['name']), c['description'], c.get('key_source'),
+                    spec.intern(c['name'][:-1]) if c['name'].endswith('*') else None,
+                )
+                for i, c in enumerate(columns)
+            )
+        keys = definition.get('keys')
+        if keys is not None:
+            self.keys = tuple(Key(i, _intern(k['name']), k['description']) for i, k in enumerate(keys))
+        if 'process' in definition:
+            self.process = tuple(definition['process'])
+        if 'required_data' in definition:
+            self.required_data = tuple(spec.intern(name) for name in definition['required_data'])
+        if 'required_parameter' in definition:
+            self.required_parameter = tuple(spec.intern(name) for name in definition['required_parameter'])
+        # 処理の相対的なコスト (実行計画の重み). スキーマは検証しないため, 文書の値をそのまま保持する (未指定の場合 None)
+        self.cost: Any = definition.get('cost')
+        # 名前の集合は可変長列から参照されたエントリについてのみ必要になるため, 初回参照時に作る
+        self._column_names: FrozenSet[str] | None = None
+        self._key_names: FrozenSet[str] | None = None
+
+    @property
+    def column_names(self) -> FrozenSet[str]:
+        """columns に定義された列名の集合 (key_source の解決用)."""
+        if self._column_names is None:
+            self._column_names = frozenset(c.name for c in self.columns or ())
+        return self._column_names
+
+    @property
+    def key_names(self) -> FrozenSet[str]:
+        """keys に定義されたキー名の集合."""
+        if self._key_names is None:
+            self._key_names = frozenset(k.name for k in self.keys or ())
+        return self._key_names
+
+class DataEntrySummary:
+    """
+    data エントリの要約 (ストリーミング検証で, 破棄した DataEntry の代わりに保持する).
+
+    他のエントリのルールや文書全体のルールが参照する情報 (名前, format, 参照, 列/キー名) のみを持ち,
+    descriptions, process, columns, keys は持たない.
+    作成時は参照を名前のまま保持し, 名前表が確定した後に resolve で名前 ID に変換する.
+    """
+    __slots__ = ('id', 'name', 'format', 'required_data', 'required_parameter', '_variable_refs', '_column_names', '_key_names')
+
+    def __init__(self, definition: dict):
+        self.id = -1
+        self.name: str = ''
+        self.format: str = definition['format']
+        columns = definition.get('columns')
+        keys = definition.get('keys')
+        # 列/キー名は初回参照時まで (frozenset より小さい) タプルで保持する
+        self._column_names: Tuple[str, ...] | FrozenSet[str] = tuple(_intern(c['name']) for c in columns) if columns else ()
+        self._key_names: Tuple[str, ...] | FrozenSet[str] = tuple(_intern(k['name']) for k in keys) if keys else ()
+        self._variable_refs: Tuple[str, ...] | None = tuple(
+            name[:-1] for name in self._column_names if name.endswith('*')
+        )
+        # resolve までは名前, 以降は名前 ID (未指定の場合 None)
+        self.required_data: Tuple[Any, ...] | None = tuple(definition['required_data']) if 'required_data' in definition else None
+        self.required_parameter: Tuple[Any, ...] | None = (
+            tuple(definition['required_parameter']) if 'required_parameter' in definition else None
+        )
+
+    def resolve(self, id: int, spec: 'Spec'):
+        """名前 ID を設定し, 参照を名前表に登録する (DataEntry と同じ順序で登録する)."""
+        self.id = id
+        self.name = spec.names[id]
+        for ref in self._variable_refs:
+            spec.intern(ref)
+        self._variable_refs = None
+        if self.required_data is not None:
+            self.required_data = tuple(spec.intern(name) for name in self.required_data)
+        if self.required_parameter is not None:
+            self.required_parameter = tuple(spec.intern(name) for name in self.required_parameter)
+
+    @property
+    def column_names(self) -> FrozenSet[str]:
+        """columns に定義された列名の集合."""
+        if type(self._column_names) is not frozenset:
+            self._column_names = frozenset(self._column_names)
+        return self._column_names
+
+    @property
+    def key_names(self) -> FrozenSet[str]:
+        """keys に定義されたキー名の集合."""
+        if type(self._key_names) is not frozenset:
+            self._key_names = frozenset(self._key_names)
+        return self._key_names
+
+class Parameter:
+    """parameter セクションの 1 エントリ."""
+    __slots__ = ('id', 'name', 'descriptions', 'unit')
+
+    def __init__(self, id: int, name: str, definition: dict):
+        self.id = id
+        self.name = name
+        self.descriptions: Tuple[str, ...] = tuple(definition['descriptions'])
+        self.unit: str = definition['unit']
+
+class Spec:
+    """data_dependencies.yml 全体."""
+    __slots__ = (
+        'names', 'ids', 'data_count', 'data', 'parameters', 'parameter_ids',
+        'has_parameter_section', 'target', 'metadata', '_data_by_id',
+    )
+
+    def __init__(self):
+        self.names: List[Hashable] = [] # 名前 ID -> 名前
+        self.ids: Dict[Hashable, int] = {} # 名前 -> 名前 ID
+        self.data_count = 0 # data セクションのキーの数 (名前 ID 0..data_count-1 が data)
+        self.data: List[DataEntry] = [] # 定義順 (ストリーミング検証では DataEntrySummary)
+        self.parameters: List[Parameter] = [] # 定義順
+        self.parameter_ids: FrozenSet[int] = frozenset() # parameter セクションのキーの名前 ID
+        self.has_parameter_section = False
+        self.target: Tuple[int, ...] = () # 名前 ID
+        self.metadata: dict = {} # metadata セクション (文書の値をそのまま保持する)
+        self._data_by_id: List[DataEntry | None] = []
+
+    def intern(self, name: Hashable) -> int:
+        """名前を名前表に登録し, 名前 ID を返す."""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(_intern(name))
+        return name_id
+
+    def is_data(self, name_id: int) -> bool:
+        """名前 ID が data セクションのキーかどうか."""
+        return name_id < self.data_count
+
+    def data_entry(self, name_id: int) -> DataEntry | None:
+        """名前 ID に対応する DataEntry (data として定義されていない場合は None)."""
+        return self._data_by_id[name_id] if name_id < self.data_count else None
+
+def build_spec(document: dict) -> Spec:
+    """
+    スキーマ検証に成功した文書から Spec を構築する.
+
+    スキーマが検証しないエントリ (名前が空または文字列でないもの, 定義が辞書でないもの) は
+    エントリとしては含めず, キーのみを名前表に登録する.
+
+    Args:
+        document: DataDependenciesSchema の検証に成功した文書.
+
+    Returns:
+        Spec.
+    """
+    spec = Spec()
+    data_section = document['data']
+    for name in data_section:
+        spec.intern(name)
+    spec.data_count = len(spec.names)
+    spec._data_by_id = [None] * spec.data_count
+
+    parameter_section = document.get('parameter')
+    spec.has_parameter_section = isinstance(parameter_section, dict)
+    if spec.has_parameter_section:
+        spec.parameter_ids = frozenset(spec.intern(name) for name in parameter_section)
+        spec.parameters = [
+            Parameter(spec.ids[name], spec.names[spec.ids[name]], definition)
+            for name, definition in parameter_section.items()
+            if is_schema_entry(name, definition)
+        ]
+
+    spec.target = tuple(spec.intern(name) for name in document['target'])
+    spec.metadata = document['metadata']
+    for name_id, (name, definition) in enumerate(data_section.items()):
+        if is_schema_entry(name, definition):
+            entry = DataEntry(name_id, spec.names[name_id], definition, spec)
+            spec.data.append(entry)
+            spec._data_by_id[name_id] = entry
+    return spec
+
+def is_schema_entry(name: Any, definition: Any) -> bool:
+    """スキーマ ({NonEmptyString: ...}) で検証されたエントリかどうか."""
+    return isinstance(name, str) and bool(name) and isinstance(definition, dict)
+
+def spec_state(spec: Spec) -> tuple:
+    """
+    Spec を marshal で直列化できる値 (組, リスト, 文字列, 数値など) にする. spec_from_state で復元する.
+
+    ストリーミング検証の Spec (data の要素が DataEntrySummary) は扱わない.
+    metadata と cost は文書の値をそのまま含めるため, marshal で扱えない値 (日付など) があれば直列化に失敗する.
+    """
+    data = tuple(
+        (
+            entry.id, entry.name, entry.descriptions, entry.format, entry.unit,
+            None if entry.columns is None else tuple((c.name, c.description, c.key_source, c.ref_id) for c in entry.columns),
+            None if entry.keys is None else tuple((k.name, k.description) for k in entry.keys),
+            entry.process, entry.required_data, entry.required_parameter, entry.cost,
+        )
+        for entry in spec.data
+    )
+    parameters = tuple((p.id, p.descriptions, p.unit) for p in spec.parameters)
+    return (
+        spec.names, spec.data_count, spec.parameter_ids, spec.has_parameter_section, spec.target, spec.metadata,
+        data, parameters,
+    )
+
+def spec_from_state(state: tuple) -> Spec:
+    """spec_state の値から Spec を復元する. 文書を参照せず, エントリの定義の解釈と名前の登録をやり直さない."""
+    names, data_count, parameter_ids, has_parameter_section, target, metadata, data, parameters = state
+    spec = Spec()
+    spec.names = list(names)
+    spec.ids = {name: i for i, name in enumerate(spec.names)}
+    spec.data_count = data_count
+    spec.parameter_ids = frozenset(parameter_ids)
+    spec.has_parameter_section = has_parameter_section
+    spec.target = tuple(target)
+    spec.metadata = metadata
+    spec._data_by_id = [None] * data_count
+    for values in data:
+        entry = DataEntry.__new__(DataEntry)
+        (
+            entry.id, entry.name, entry.descriptions, entry.format, entry.unit, columns, keys,
+            entry.process, entry.required_data, entry.required_parameter, entry.cost,
+        ) = values
+        entry.columns = None if columns is None else tuple(Column(i, *column) for i, column in enumerate(columns))
+        entry.keys = None if keys is None else tuple(Key(i, *key) for i, key in enumerate(keys))
+        entry._column_names = None
+        entry._key_names = None
+        spec.data.append(entry)
+        spec._data_by_id[entry.id] = entry
+    for parameter_id, descriptions, unit in parameters:
+        parameter = Parameter.__new__(Parameter)
+        parameter.id, parameter.name, parameter.descriptions, parameter.unit = parameter_id, spec.names[parameter_id], descriptions, unit
+        spec.parameters.append(parameter)
+    return spec
@@ -0,0 +1,115 @@
+# 検証サーバーのクライアント
+#
+# CLI はサーバーが起動していれば検証を転送する (cli.py 参照).
+# 転送時に読み込むのはこのモジュールと protocol.py (標準ライブラリと settings のみ) だけにする.
+
+import itertools
+import os
+import socket
+import stat
+from pathlib import Path
+from typing import Any, Dict
+
+from .protocol import PROTOCOL_VERSION, RpcError, decode, default_socket_path, encode
+
+# 接続と応答の待ち時間 (秒). 応答は検証の完了を待つため長めにする
+CONNECT_TIMEOUT = 0.5
+DEFAULT_TIMEOUT = 300.0
+
+class ServerClient:
+    """
+    サーバーへの接続. 同じ接続で複数の要求を順に送れる.
+
+        with ServerClient(path) as client:
+            result = client.call("validate", {"paths": ["data_dependencies.yml"]})
+    """
+
+    def __init__(self, socket_path: Path | str, timeout: float = DEFAULT_TIMEOUT, connect_timeout: float = CONNECT_TIMEOUT):
+        self.socket_path = Path(socket_path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.settimeout(connect_timeout)
+            self._socket.connect(str(self.socket_path))
+            self._socket.settimeout(timeout)
+        except OSError:
+            self._socket.close()
+            raise
+        self._file = self._socket.makefile('rwb')
+        self._ids = itertools.count(1)
+
+    def call(self, method: str, params: Dict[str, Any] | None = None) -> Any:
+        """
+        要求を送り, 応答の result を返す.
+
+        Raises:
+            RpcError: サーバーがエラーを返した場合.
+            OSError: 接続が切れた場合.
+        """
+        request_id = next(self._ids)
+        request: Dict[str, Any] = {'jsonrpc': '2.0', 'id': request_id, 'method': method}
+        if params is not None:
+            request['params'] = params
+        self._file.write(encode(request))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection.")
+        response = decode(line)
+        if 'error' in response:
+            error = response['error']
+            raise RpcError(error.get('code', 0), error.get('message', ''))
+        return response.get('result')
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'ServerClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _is_private_socket(socket_path: Path) -> bool:
+    """
+    現在のユーザーが所有し, 他のユーザーが読み書きできないソケットか.
+
+    他のユーザーが同じパスに置いたソケットに検証対象のパスを送らず, その結果も使わないために確かめる.
+    """
+    try:
+        st = os.lstat(socket_path)
+    except OSError:
+        return False
+    if not stat.S_ISSOCK(st.st_mode) or st.st_mode & 0o077:
+        return False
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
+
+def connect(socket_path: Path | str | None = None, version: str | None = None) -> ServerClient | None:
+    """
+    起動しているサーバーに接続する.
+
+    Args:
+        socket_path: ソケットのパス. 省略時は default_socket_path().
+        version: 指定した場合, サーバーのパッケージのバージョンが異なれば接続しない
+            (更新後に古いサーバーの結果を使わないため).
+
+    Returns:
+        接続. サーバーが起動していない場合, ソケットが現在のユーザーの所有でない場合
+        (または他のユーザーが読み書きできる場合), 通信形式/バージョンが異なる場合は None.
+    """
+    socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+    if not hasattr(socket, "AF_UNIX") or not _is_private_socket(socket_path):
+        return None
+    try:
+        client = ServerClient(socket_path)
+    except OSError:
+        return None
+    try:
+        info = client.call("ping")
+    except (OSError, RpcError, ValueError):
+        client.close()
+        return None
+    if info.get('protocol') != PROTOCOL_VERSION or (version is not None and info.get('version') != version):
+        client.close()
+        return None
+    return client
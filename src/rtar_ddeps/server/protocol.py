@@ -0,0 +1,72 @@
+# 検証サーバー (rtar-ddeps serve) とクライアントの通信形式
+#
+# JSON-RPC 2.0 のメッセージを 1 行に 1 つ (改行区切りの JSON) で送受信する.
+# Unix ソケットと標準入出力 (--stdio) のいずれでも同じ形式を使用する.
+#
+#     -> {"jsonrpc": "2.0", "id": 1, "method": "validate", "params": {"paths": ["a/data_dependencies.yml"]}}
+#     <- {"jsonrpc": "2.0", "id": 1, "result": {"summary": {...}, "files": [...]}}
+#
+# クライアントが軽量に保てるよう, このモジュールは標準ライブラリと settings のみを使用する.
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from ..settings import SOCKET_ENV
+
+# 通信形式のバージョン. メソッドや結果の形式を互換性なく変更した場合は更新する
+PROTOCOL_VERSION = 1
+
+# JSON-RPC 2.0 のエラーコード
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+class RpcError(Exception):
+    """JSON-RPC のエラー応答 (サーバーでは送信するエラー, クライアントでは受信したエラー)."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'code': self.code, 'message': self.message}
+
+def default_socket_path() -> Path:
+    """
+    サーバーのソケットのパスを返す.
+
+    環境変数 RTAR_DDEPS_SOCKET, $XDG_RUNTIME_DIR/rtar-ddeps.sock,
+    一時ディレクトリのユーザーごとのディレクトリ rtar-ddeps-<uid>/rtar-ddeps.sock の順に決定する.
+    一時ディレクトリは他のユーザーも書き込めるため, ソケットを直接置かずにサーバーが 0700 で作るディレクトリに置く.
+    """
+    if os.environ.get(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(os.environ["XDG_RUNTIME_DIR"]) / "rtar-ddeps.sock"
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return Path(tempfile.gettempdir()) / f"rtar-ddeps-{uid}" / "rtar-ddeps.sock"
+
+def encode(message: Dict[str, Any]) -> bytes:
+    """メッセージを 1 行の JSON (改行を含む) にする."""
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+def decode(line: bytes) -> Dict[str, Any]:
+    """
+    1 行の JSON をメッセージにする.
+
+    Raises:
+        RpcError: JSON として不正な場合 (PARSE_ERROR), オブジェクトでない場合 (INVALID_REQUEST).
+    """
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        raise RpcError(PARSE_ERROR, f"Parse error: {e}") from None
+    if not isinstance(message, dict):
+        raise RpcError(INVALID_REQUEST, "Invalid request: a message must be a JSON object.")
+    return message
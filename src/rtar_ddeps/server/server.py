@@ -0,0 +1,369 @@
+# 検証サーバー (rtar-ddeps serve)
+#
+# プロセスを起動したままにし, 検証の要求を JSON-RPC (protocol.py) で受け付ける.
+# 要求ごとのインタプリタ起動とモジュールの読み込みを省くほか, ファイルごとに
+# IncrementalDataDependenciesValidator を保持するため,
+#
+# * 前回から変更のないファイル (更新時刻, サイズ, inode が同じ. !include で取り込んだファイルを含む) は
+#   前回の結果をそのまま返し,
+# * 変更されたファイルは変更の影響を受けるルールのみを再実行する.
+#   取り込んだファイルは変更のあったもののみを読み込み直す (includes.FragmentCache).
+#
+# メソッドは Server.register で追加できる (検証以外の問い合わせ用).
+
+import io
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Tuple
+
+from ..settings import DEFAULT_MAX_DOCUMENTS
+from ..validation.batch import FileResult, collect_spec_files, run_validator
+from ..validation.custom_yaml_loader import resolve_yaml_backend
+from ..validation.includes import FragmentCache
+from ..validation.incremental import IncrementalDataDependenciesValidator
+from ..validation.reporters import REPORT_FORMATS, BatchSummary, create_reporter
+from ..validation.result_cache import package_version
+from ..validation.streaming import StreamingDataDependenciesValidator
+from .protocol import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PROTOCOL_VERSION,
+    RpcError,
+    decode,
+    encode,
+)
+
+Signature = Tuple[int, int, int] # (更新時刻 [ns], サイズ, inode)
+Handler = Callable[[Dict[str, Any]], Any]
+
+def _signature(path: Path) -> Signature | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def _document_signature(file_path: Path, included: Iterable[Path]) -> Tuple[Signature, ...] | None:
+    """ファイルと, !include で指定したファイル/ディレクトリの状態. いずれかが存在しない場合は None."""
+    signatures = tuple(_signature(path) for path in (file_path, *included))
+    return None if None in signatures else signatures
+
+@dataclass
+class _Document:
+    """保持しているファイルの状態."""
+    validator: IncrementalDataDependenciesValidator | StreamingDataDependenciesValidator
+    signature: Tuple[Signature, ...] | None = None # 直前の検証時のファイル (と取り込んだファイル) の状態
+    result: FileResult | None = None # 直前の検証結果
+
+class ValidationSession:
+    """
+    ファイルごとのバリデーターと直前の結果を保持し, 要求に応じて検証する.
+
+    スレッドセーフではない (Server がロックを取って呼び出す).
+    """
+
+    def __init__(self, max_documents: int = DEFAULT_MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._documents: OrderedDict[Tuple[Path, str | None, bool], _Document] = OrderedDict()
+        self.reused = 0 # 変更がなく, 前回の結果を返した回数
+        self.validated = 0 # 検証を実行した回数
+        self.fragments = FragmentCache() # すべてのファイルで共有する, 取り込んだファイルのキャッシュ
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def validate(self, file_path: Path, yaml_backend: str | None = None, streaming: bool = False) -> Tuple[FileResult, bool]:
+        """
+        1 ファイルを検証する.
+
+        Returns:
+            (結果, 前回の結果を再利用したか).
+        """
+        key = (file_path, yaml_backend, streaming)
+        document = self._documents.get(key)
+        if document is None:
+            validator_class = StreamingDataDependenciesValidator if streaming else IncrementalDataDependenciesValidator
+            validator = validator_class(file_path, yaml_backend=yaml_backend, fragment_cache=self.fragments)
+            document = self._documents[key] = _Document(validator)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        else:
+            self._documents.move_to_end(key)
+
+        included = document.validator.included_paths
+        signature = _document_signature(file_path, included)
+        if document.result is not None and signature is not None and signature == document.signature:
+            self.reused += 1
+            return document.result, True
+        self.validated += 1
+        document.result = run_validator(document.validator)
+        # 検証中に変更された場合に古い結果を再利用しないよう, 検証前の状態を記録する.
+        # 取り込むファイルが変わった場合は検証前の状態が新しいファイルを含まないため, 次回も検証する
+        unchanged = included == document.validator.included_paths
+        document.signature = signature if unchanged else None
+        return document.result, False
+
+    def clear(self):
+        self._documents.clear()
+        self.fragments.clear()
+
+class Server:
+    """
+    JSON-RPC の要求を処理する. 通信 (Unix ソケット, 標準入出力) とは独立している.
+
+    組み込みのメソッド:
+
+    * ping: {name, version, protocol, pid} を返す.
+    * validate: ファイルを検証する (_validate 参照).
+    * stats: 保持しているファイル数, 再利用/検証の回数, 起動からの秒数を返す.
+    * clear: 保持しているファイルをすべて破棄する.
+    * shutdown: 応答の後にサーバーを終了する.
+    """
+
+    def __init__(self, session: ValidationSession | None = None):
+        self.session = session if session is not None else ValidationSession()
+        self.started = time.monotonic()
+        self.shutdown_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Handler] = {}
+        self.register("ping", self._ping)
+        self.register("validate", self._validate)
+        self.register("stats", self._stats)
+        self.register("clear", self._clear)
+        self.register("shutdown", self._shutdown)
+
+    def register(self, method: str, handler: Handler):
+        """メソッドを追加する. handler は params (辞書) を受け取り, JSON にできる結果を返す."""
+        self._methods[method] = handler
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any] | None:
+        """
+        1 つの要求を処理し, 応答を返す. id のない要求 (通知) には応答しない (None).
+        要求の処理はロックを取って 1 つずつ行う.
+        """
+        request_id = request.get('id')
+        try:
+            method = request.get('method')
+            params = request.get('params', {})
+            if request.get('jsonrpc') != '2.0' or not isinstance(method, str):
+                raise RpcError(INVALID_REQUEST, "Invalid request: 'jsonrpc' must be '2.0' and 'method' must be a string.")
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "Invalid params: 'params' must be an object.")
+            handler = self._methods.get(method)
+            if handler is None:
+                raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+            with self._lock:
+                result = handler(params)
+        except RpcError as e:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': e.to_dict()}
+        except Exception as e:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': RpcError(INTERNAL_ERROR, f"{type(e).__name__}: {e}").to_dict()}
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        return response if 'id' in request else None
+
+    def handle_line(self, line: bytes) -> bytes | None:
+        """1 行の要求を処理し, 1 行の応答 (改行を含む) を返す."""
+        try:
+            request = decode(line)
+        except RpcError as e:
+            return encode({'jsonrpc': '2.0', 'id': None, 'error': e.to_dict()})
+        response = self.handle(request)
+        return encode(response) if response is not None else None
+
+    def serve_stream(self, reader: BinaryIO, writer: BinaryIO):
+        """reader から 1 行ずつ要求を読み, 応答を writer に書く. 入力の終わり, または shutdown で終了する."""
+        for line in reader:
+            if not line.strip():
+                continue
+            response = self.handle_line(line)
+            if response is not None:
+                writer.write(response)
+                writer.flush()
+            if self.shutdown_requested.is_set():
+                break
+
+    def _ping(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'name': 'rtar-ddeps', 'version': package_version(), 'protocol': PROTOCOL_VERSION, 'pid': os.getpid()}
+
+    def _validate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        params:
+            paths: ファイル, ディレクトリ, glob パターンのリスト (CLI の引数と同じ).
+            cwd: 相対パスの基準のディレクトリ (省略時はサーバーのカレントディレクトリ).
+            yaml_backend: YAML ローダーのバックエンド.
+            streaming: True の場合はストリーミング検証を使用する.
+            format: 指定した場合 (text, jsonl, sarif), その形式の出力を report として返し, files は返さない.
+
+        Returns:
+            summary (files, passed, failed, warned), files (ファイルごとの file, valid, reused,
+            errors, warnings. 診断は Diagnostic.to_dict の形式), または report.
+        """
+        paths = params.get('paths')
+        if not isinstance(paths, list) or not paths or not all(isinstance(p, str) for p in paths):
+            raise RpcError(INVALID_PARAMS, "Invalid params: 'paths' must be a non-empty list of strings.")
+        cwd = params.get('cwd') or os.getcwd()
+        yaml_backend = params.get('yaml_backend')
+        streaming = bool(params.get('streaming', False))
+        report_format = params.get('format')
+        if report_format is not None and report_format not in REPORT_FORMATS:
+            raise RpcError(INVALID_PARAMS, f"Unknown report format '{report_format}'. Allowed values are: {', '.join(REPORT_FORMATS)}")
+        try:
+            resolve_yaml_backend(yaml_backend)
+            files = collect_spec_files(paths, base_dir=cwd)
+        except (ValueError, FileNotFoundError) as e:
+            raise RpcError(INVALID_PARAMS, str(e)) from None
+
+        results = (self.session.validate(file_path, yaml_backend, streaming) for file_path in files)
+        if report_format is not None:
+            report = io.StringIO()
+            reporter = create_reporter(report_format, report)
+            reporter.start()
+            for result, _ in results:
+                reporter.report(result)
+            summary = reporter.finish()
+            return {'summary': _summary_dict(summary), 'report': report.getvalue()}
+
+        summary = BatchSummary()
+        file_results = []
+        for result, reused in results:
+            summary.add(result)
+            file_results.append({
+                'file': str(result.file_path),
+                'valid': result.is_valid,
+                'reused': reused,
+                'errors': _diagnostic_dicts(result.errors),
+                'warnings': _diagnostic_dicts(result.warnings),
+            })
+        return {'summary': _summary_dict(summary), 'files': file_results}
+
+    def _stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'documents': len(self.session),
+            'reused': self.session.reused,
+            'validated': self.session.validated,
+            'uptime': time.monotonic() - self.started,
+        }
+
+    def _clear(self, params: Dict[str, Any]) -> None:
+        self.session.clear()
+
+    def _shutdown(self, params: Dict[str, Any]) -> None:
+        self.shutdown_requested.set()
+
+def _summary_dict(summary: BatchSummary) -> Dict[str, int]:
+    return {'files': summary.files, 'passed': summary.passed, 'failed': summary.failed, 'warned': summary.warned}
+
+def _diagnostic_dicts(diagnostics: Iterable[str]) -> List[Dict[str, Any]]:
+    return [d.to_dict() if hasattr(d, 'to_dict') else {'text': str(d)} for d in diagnostics]
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: Server = self.server.rpc_server
+        server.serve_stream(self.rfile, self.wfile)
+        if server.shutdown_requested.is_set():
+            # serve_forever のスレッド以外から停止する
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # bind の後に chmod すると, その間は他のユーザーも接続できるため, ソケットを 0600 で作成する
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+def _socket_in_use(socket_path: Path) -> bool:
+    """ソケットのパスで既にサーバーが応答するか (応答しなければ残ったファイル)."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+def _prepare_socket_directory(directory: Path):
+    """
+    ソケットを置くディレクトリを作成し (0700), 他のユーザーがソケットを差し替えられないことを確かめる.
+
+    Raises:
+        PermissionError: ディレクトリが他のユーザーの所有, またはスティッキービットなしで他のユーザーが書き込める場合.
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    st = directory.stat()
+    if st.st_uid not in (os.getuid(), 0) or (st.st_mode & 0o022 and not st.st_mode & stat.S_ISVTX):
+        raise PermissionError(f"The socket directory {directory} is not private to the current user.")
+
+def _handle_sigterm(unix_server: _UnixServer):
+    """
+    SIGTERM (サービスマネージャーなどからの停止) で serve_forever を終了するハンドラを設定する.
+
+    Returns:
+        元のハンドラ. メインスレッド以外, または SIGTERM のない環境では設定せず None.
+    """
+    if not hasattr(signal, "SIGTERM") or threading.current_thread() is not threading.main_thread():
+        return None
+    # ハンドラは serve_forever のスレッドで呼ばれるため, shutdown は別のスレッドから呼ぶ
+    return signal.signal(
+        signal.SIGTERM, lambda signum, frame: threading.Thread(target=unix_server.shutdown, daemon=True).start()
+    )
+
+def serve_unix(server: Server, socket_path: Path, ready: Callable[[], None] | None = None):
+    """
+    Unix ソケットで要求を受け付ける. shutdown の要求, KeyboardInterrupt, または SIGTERM で終了し, ソケットを削除する.
+
+    接続ごとにスレッドで処理するが, 要求の処理は Server のロックで 1 つずつ行う.
+    SIGTERM のハンドラはメインスレッドから呼び出した場合のみ設定する.
+
+    Raises:
+        FileExistsError: 既に同じパスでサーバーが起動している場合, またはパスにソケット以外のファイルがある場合.
+        PermissionError: ソケットのディレクトリが他のユーザーの所有, または他のユーザーが書き込める場合.
+    """
+    socket_path = Path(socket_path)
+    if socket_path.exists() or socket_path.is_symlink():
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            raise FileExistsError(f"{socket_path} exists and is not a socket.")
+        if _socket_in_use(socket_path):
+            raise FileExistsError(f"A server is already listening on {socket_path}.")
+        socket_path.unlink()
+    _prepare_socket_directory(socket_path.parent)
+    with _UnixServer(str(socket_path), _ConnectionHandler) as unix_server:
+        unix_server.rpc_server = server
+        previous_handler = _handle_sigterm(unix_server)
+        if ready is not None:
+            ready()
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if previous_handler is not None:
+                signal.signal(signal.SIGTERM, previous_handler)
+            try:
+                socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+def serve_stdio(server: Server, reader: BinaryIO, writer: BinaryIO):
+    """標準入出力で要求を受け付ける (エディタなどから子プロセスとして起動する場合). 入力の終わりで終了する."""
+    try:
+        server.serve_stream(reader, writer)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,27 @@
+# CLI のオプションで使用する定数 (選択肢, 環境変数名, デフォルト値)
+#
+# cli.py はコマンドの定義 (--help, シェル補完) のためにこれらを参照する.
+# CLI の起動を軽くするため, このモジュールは他のモジュールを import しない.
+# 各定数は実装のモジュール (custom_yaml_loader など) からも同じ名前で参照できる.
+
+# YAML ローダーのバックエンド選択
+# - "auto": libyaml (C 実装) が利用可能なら C, そうでなければ pure-Python
+# - "c": libyaml を使用 (利用できない場合はエラー)
+# - "python": pure-Python 実装を使用
+YAML_BACKENDS = ("auto", "c", "python")
+# バックエンドを上書きする環境変数 (引数で明示された場合は引数を優先する)
+YAML_BACKEND_ENV = "RTAR_DDEPS_YAML_BACKEND"
+
+# キャッシュディレクトリを指定する環境変数
+CACHE_DIR_ENV = "RTAR_DDEPS_CACHE_DIR"
+
+# 複数ファイルの検証結果の出力形式 (reporters.py)
+REPORT_FORMATS = ('text', 'jsonl', 'sarif')
+
+# 依存関係グラフの出力形式 (graph/export.py)
+EXPORT_FORMATS = ('dot', 'mermaid')
+
+# 検証サーバーのソケットのパスを指定する環境変数
+SOCKET_ENV = "RTAR_DDEPS_SOCKET"
+# 検証サーバーが保持するファイル (バリデーターと直前の結果) の数の上限
+DEFAULT_MAX_DOCUMENTS = 256
@@ -0,0 +1,265 @@
+# ベンチマーク/テスト用の data_dependencies.yml の生成
+#
+# エントリ数, ファン・イン, 依存の深さ, 列数, 可変長列の割合, パラメータ数を指定して,
+# 決定的 (同じ設定と seed なら同じ内容) な data_dependencies.yml を生成する.
+# 不正な定義 (未定義の参照, 循環参照など) を意図的に混入させることもできる.
+#
+# 生成される依存関係は層状の DAG になる.
+# * data_0 .. data_{n-1} を chain_depth 個の層に順に分け, 層 k のエントリは層 k-1 のエントリに依存する.
+#   そのため最長の依存経路はちょうど chain_depth 個のエントリになる.
+# * 層 k-1 のすべてのエントリは層 k のいずれかから参照され, 最終層が target になる.
+#   パラメータもすべていずれかのエントリから参照される (未使用のデータ/パラメータはない).
+# * 不正な定義を混入させない場合, 検証結果はエラー/警告ともに 0 件になる.
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# 混入できる不正な定義の種類 -> 説明
+FAULT_KINDS: Dict[str, str] = {
+    'unknown_reference': "required_data references data that is not defined",
+    'unknown_parameter': "required_parameter references a parameter that is not defined",
+    'unknown_target': "target references data that is not defined",
+    'cycle': "two data entries require each other",
+    'invalid_format': "format is not one of the allowed values",
+    'duplicate_key': "a data entry is defined twice",
+    'missing_key_source': "a variable column referencing a table has no key_source",
+    'bad_key_source': "key_source names a column that does not exist",
+    'missing_field': "a data entry has no unit (schema error, custom rules are not run)",
+}
+
+# 不正な文書の既定の混入内容 (スキーマエラーはカスタムルールを止めるため含めない)
+BROKEN_FAULTS: Tuple[str, ...] = tuple(kind for kind in FAULT_KINDS if kind != 'missing_field')
+
+# format の割合 (list は可変長列の参照先にもなる. single は可変長列から参照しない)
+_FORMAT_WEIGHTS = (('table', 70), ('dictionary', 15), ('list', 10), ('single', 5))
+
+@dataclass(frozen=True)
+class SpecShape:
+    """生成する文書の形."""
+    entries: int = 1000 # data エントリ数
+    fan_in: int = 2 # 1 エントリあたりの required_data の数 (前の層のエントリ数が上限)
+    chain_depth: int = 10 # 最長の依存経路に含まれるエントリ数 (層の数)
+    columns: int = 8 # table の列数 (dictionary のキー数)
+    variable_column_density: float = 0.1 # table の列のうち可変長列にする割合
+    parameters: int = 20 # parameter エントリ数
+    seed: int = 0
+
+@dataclass(frozen=True)
+class InjectedFault:
+    """混入させた不正な定義."""
+    kind: str # FAULT_KINDS のキー
+    name: str # 対象の data 名 (unknown_target の場合は target に追加した名前)
+
+@dataclass
+class _Entry:
+    format: str
+    required_data: List[int] = field(default_factory=list) # 依存先のエントリの位置
+    undefined_data: List[str] = field(default_factory=list) # 定義されていない依存先の名前
+    required_parameter: List[str] = field(default_factory=list)
+    columns: List[Tuple[str, str | None]] = field(default_factory=list) # (列名, key_source)
+    duplicated: bool = False
+    missing_unit: bool = False
+
+class SyntheticSpec:
+    """
+    生成した data_dependencies.yml.
+
+    内容は行単位で生成するため, 大きな文書も write で文字列全体を保持せずに書き出せる.
+
+        spec = SyntheticSpec(SpecShape(entries=10000), faults=BROKEN_FAULTS)
+        spec.write(tmp_path / "data_dependencies.yml")
+        spec.faults # 混入させた不正な定義
+    """
+
+    def __init__(self, shape: SpecShape = SpecShape(), faults: Sequence[str] = ()):
+        """
+        Args:
+            shape: 文書の形.
+            faults: 混入させる不正な定義の種類 (FAULT_KINDS のキー). 同じ種類を複数回指定すると, その回数だけ混入させる.
+        Raises:
+            ValueError: 形の指定が不正な場合, または不明な種類が指定された場合.
+        """
+        if shape.entries < 1 or shape.chain_depth < 1 or shape.fan_in < 1 or shape.columns < 1 or shape.parameters < 0:
+            raise ValueError(f"Invalid spec shape: {shape}")
+        if not 0 <= shape.variable_column_density <= 1:
+            raise ValueError(f"variable_column_density must be between 0 and 1: {shape.variable_column_density}")
+        unknown = sorted(set(faults) - FAULT_KINDS.keys())
+        if unknown:
+            raise ValueError(f"Unknown fault kinds: {', '.join(unknown)}. Allowed values are: {', '.join(FAULT_KINDS)}")
+        self.shape = shape
+        self.names = [f"data_{i}" for i in range(shape.entries)]
+        self.parameter_names = [f"param_{i}" for i in range(shape.parameters)]
+        self._extra_targets: List[str] = []
+        self._entries = self._build_entries(random.Random(shape.seed))
+        self.target = self.names[self._level_start(self.depth - 1):]
+        self.faults: List[InjectedFault] = self._inject_faults(random.Random(f"{shape.seed}:faults"), faults)
+
+    @property
+    def depth(self) -> int:
+        """層の数."""
+        return min(self.shape.chain_depth, self.shape.entries)
+
+    def _level_start(self, level: int) -> int:
+        """層の最初のエントリの位置 (エントリ i は層 i * depth // entries に属する)."""
+        n, depth = self.shape.entries, self.depth
+        return -(-level * n // depth)
+
+    def _build_entries(self, rng: random.Random) -> List[_Entry]:
+        shape = self.shape
+        names = self.names
+        formats, weights = zip(*_FORMAT_WEIGHTS)
+        entries = [_Entry(fmt) for fmt in rng.choices(formats, weights, k=shape.entries)]
+        for level in range(1, self.depth):
+            prev_start, start, end = self._level_start(level - 1), self._level_start(level), self._level_start(level + 1)
+            prev_size, size = start - prev_start, end - start
+            fan_in = min(shape.fan_in, prev_size)
+            deps: List[set] = [set() for _ in range(size)]
+            # 前の層のすべてのエントリが参照されるように, まず順に割り当てる
+            for offset in range(prev_size):
+                deps[offset % size].add(prev_start + offset)
+            for i, dep_set in enumerate(deps):
+                while len(dep_set) < fan_in:
+                    dep_set.add(rng.randrange(prev_start, start))
+                entries[start + i].required_data = sorted(dep_set)
+        # パラメータ j はエントリ j * entries // parameters から参照する
+        for j, parameter_name in enumerate(self.parameter_names):
+            entries[j * shape.entries // shape.parameters].required_parameter.append(parameter_name)
+
+        for entry in entries:
+            if entry.format != 'table':
+                continue
+            # 可変長列の参照先は依存先のうち table / dictionary / list のもの
+            refs = [dep for dep in entry.required_data if entries[dep].format in ('table', 'dictionary', 'list')]
+            # 先頭の列は key_source の参照先として常に通常の列にする
+            entry.columns.append(("col_0", None))
+            for c in range(1, shape.columns):
+                if refs and rng.random() < shape.variable_column_density:
+                    ref = refs[rng.randrange(len(refs))]
+                    entry.columns.append((f"{names[ref]}*", "col_0" if entries[ref].format == 'table' else None))
+                else:
+                    entry.columns.append((f"col_{c}", None))
+        return entries
+
+    def _inject_faults(self, rng: random.Random, kinds: Sequence[str]) -> List[InjectedFault]:
+        entries = self._entries
+        names = self.names
+        faults = []
+        for n, kind in enumerate(kinds):
+            index = rng.randrange(len(entries))
+            entry = entries[index]
+            if kind == 'unknown_reference':
+                entry.undefined_data.append(f"missing_data_{n}")
+            elif kind == 'unknown_parameter':
+                entry.required_parameter.append(f"missing_param_{n}")
+            elif kind == 'unknown_target':
+                name = f"missing_target_{n}"
+                self._extra_targets.append(name)
+                faults.append(InjectedFault(kind, name))
+                continue
+            elif kind == 'cycle':
+                # 依存先の 1 つが自身に依存するようにする (依存先がなければ自己参照)
+                dep = entry.required_data[0] if entry.required_data else index
+                entries[dep].required_data.append(index)
+            elif kind == 'invalid_format':
+                # 他のルールのエラーを誘発しないよう, 列/キーを持たない list のエントリを選ぶ
+                candidates = [i for i, e in enumerate(entries) if e.format == 'list']
+                if candidates:
+                    index = candidates[rng.randrange(len(candidates))]
+                    entry = entries[index]
+                entry.format = 'lists'
+            elif kind == 'duplicate_key':
+                entry.duplicated = True
+            elif kind in ('missing_key_source', 'bad_key_source'):
+                # table のエントリに, table を参照する可変長列を追加する
+                candidates = [i for i, e in enumerate(entries) if e.format == 'table']
+                if candidates:
+                    index = candidates[rng.randrange(len(candidates))]
+                    entry = entries[index]
+                ref = next((i for i, e in enumerate(entries) if e.format == 'table' and i != index), index)
+                entry.format = 'table'
+                if not entry.columns:
+                    entry.columns.append(("col_0", None))
+                entry.columns.append((f"{names[ref]}*", None if kind == 'missing_key_source' else "no_such_column"))
+            elif kind == 'missing_field':
+                entry.missing_unit = True
+            faults.append(InjectedFault(kind, names[index]))
+        return faults
+
+    def lines(self) -> Iterator[str]:
+        """文書を 1 行ずつ (改行なしで) 返す."""
+        shape = self.shape
+        yield "# generated by rtar_ddeps.testing.synthetic_spec"
+        yield "metadata:"
+        yield f"  title: \"synthetic spec ({shape.entries} entries, seed {shape.seed})\""
+        yield "  purposes:"
+        yield "    - \"benchmark\""
+        yield "target:"
+        for name in self.target + self._extra_targets:
+            yield f"  - {name}"
+        yield "data:"
+        for name, entry in zip(self.names, self._entries):
+            block = list(self._data_lines(name, entry))
+            yield from block
+            if entry.duplicated:
+                yield from block
+        if self.parameter_names:
+            yield "parameter:"
+            for name in self.parameter_names:
+                yield f"  {name}:"
+                yield "    descriptions:"
+                yield f"      - \"parameter {name}\""
+                yield "    unit: \"-\""
+
+    def _data_lines(self, name: str, entry: _Entry) -> Iterator[str]:
+        yield f"  {name}:"
+        yield "    descriptions:"
+        yield f"      - \"generated entry {name}\""
+        yield f"    format: {entry.format}"
+        if not entry.missing_unit:
+            yield "    unit: \"-\""
+        if entry.required_data or entry.undefined_data:
+            yield "    required_data:"
+            for dep in entry.required_data:
+                yield f"      - {self.names[dep]}"
+            for dep_name in entry.undefined_data:
+                yield f"      - {dep_name}"
+        if entry.required_parameter:
+            yield "    required_parameter:"
+            for parameter in entry.required_parameter:
+                yield f"      - {parameter}"
+        if entry.required_data or entry.undefined_data or entry.required_parameter:
+            yield "    process:"
+            yield f"      - \"derive {name}\""
+        if entry.columns:
+            yield "    columns:"
+            for column_name, key_source in entry.columns:
+                yield f"      - name: {column_name}"
+                yield f"        description: \"column {column_name}\""
+                if key_source is not None:
+                    yield f"        key_source: {key_source}"
+        elif entry.format == 'dictionary':
+            yield "    keys:"
+            for k in range(self.shape.columns):
+                yield f"      - name: key_{k}"
+                yield f"        description: \"key {k}\""
+
+    def required_data(self) -> List[List[int]]:
+        """エントリの位置 -> required_data のエントリの位置 (未定義のデータへの参照を除く). 文書を読み込まずにグラフを作る場合に使う."""
+        return [list(entry.required_data) for entry in self._entries]
+
+    def formats(self) -> List[str]:
+        """エントリの位置 -> format."""
+        return [entry.format for entry in self._entries]
+
+    def text(self) -> str:
+        """文書全体の文字列."""
+        return "\n".join(self.lines()) + "\n"
+
+    def write(self, path: Path | str):
+        """文書をファイルに書き出す."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.lines():
+                f.write(line)
+                f.write("\n")
@@ -1,8 +1,24 @@
 import abc
+import io
 from pathlib import Path
 import yaml
 from typing import List
-from .custom_yaml_loader import CustomDuplicateKeyLoader, DuplicateKeyError
+from .custom_yaml_loader import INCLUDE_TAG, DuplicateKeyError, load_with_duplicate_check, resolve_yaml_backend
+from .diagnostics import DUPLICATE_KEY_RULE_ID, INCLUDE_RULE_ID, YAML_SYNTAX_RULE_ID, Diagnostic
+from .includes import FragmentCache, IncludedFile, IncludeError, IncludeResolver
+from .positions import Position, PositionIndex
+from .profiling import NULL_PROFILER, NullProfiler, Profiler
+from .result_cache import ResultCache
+
+def format_error(message: str, path: List[str] | None = None, rule_id: str | None = None) -> Diagnostic:
+    """エラーメッセージを "Error at a.b: ..." の形式にする."""
+    text = (f"Error at {'.'.join(path)}: " if path else "Error: ") + message
+    return Diagnostic(text, 'error', message, path or None, rule_id=rule_id)
+
+def format_warning(message: str, path: List[str] | None = None, rule_id: str | None = None) -> Diagnostic:
+    """警告メッセージを "Warning at a.b: ..." の形式にする."""
+    text = (f"Warning at {'.'.join(path)}: " if path else "Warning: ") + message
+    return Diagnostic(text, 'warning', message, path or None, rule_id=rule_id)
 
 class BaseValidator(abc.ABC):
     """
@@ -11,24 +27,56 @@ class BaseValidator(abc.ABC):
     共通のファイル読み込み機能, エラー/警告管理機能,
     および具象クラスで実装されるべき `validate` メソッドのインターフェースを定義する.
     """
-    def __init__(self, file_path: Path):
+    def __init__(
+        self,
+        file_path: Path,
+        yaml_backend: str | None = None,
+        cache: ResultCache | None = None,
+        positions: bool = True,
+        fragment_cache: FragmentCache | None = None,
+    ):
         """
         バリデーターを初期化する.
 
         Args:
             file_path: バリデーション対象のファイルパス.
+            yaml_backend: YAML ローダーのバックエンド ("auto", "c", "python").
+                None の場合は環境変数 RTAR_DDEPS_YAML_BACKEND, それもなければ "auto".
+            cache: バリデーション結果のキャッシュ. None の場合はキャッシュを使用しない.
+            positions: True の場合, 読み込み時に位置の索引 (positions.py) を作り,
+                エラー/警告に位置 (Diagnostic.line, Diagnostic.column) を付加する.
+                False の場合は索引のメモリと時間を節約する (重複キーと構文エラー以外の位置は None).
+            fragment_cache: !include で取り込むファイルのキャッシュ (includes.py 参照).
+                None の場合は毎回すべてのファイルを読み込む.
+        Raises:
+            ValueError: yaml_backend が不正, または指定されたバックエンドが利用できない場合.
         """
         if not isinstance(file_path, Path):
             raise TypeError("file_path must be a Path object.")
         self.file_path = file_path
+        self.yaml_backend = resolve_yaml_backend(yaml_backend) # 実際に使用するバックエンド ("c" / "python")
+        self.cache = cache
+        self.cache_hit = False # 直前の validate() でキャッシュを使用したか
         self.data = None # 読み込んだデータを保持
         self.errors: List[str] = [] # エラーメッセージを格納するリスト
         self.warnings: List[str] = [] # 警告メッセージを格納するリスト
+        self.duplicate_key_errors: List[DuplicateKeyError] = [] # 読み込み時に検出したキー重複
+        self.record_positions = positions
+        self.positions: PositionIndex | None = None # 直前に読み込んだ文書の位置の索引
+        self.fragment_cache = fragment_cache
+        self.included_files: List[IncludedFile] = [] # 直前に読み込んだ文書が !include で取り込んだファイル
+        # 直前に読み込んだ文書が !include で指定したファイルとディレクトリ (読み込みに失敗したものを含む).
+        # watch モードなどはこれらの変更も監視する
+        self.included_paths: List[Path] = []
+        self.profiler: Profiler | NullProfiler = NULL_PROFILER # validate() 中の計測先
 
     def load_yaml(self) -> dict | list | None:
         """
         指定されたパスからYAMLファイルを読み込む.
 
+        読み込みと同時にキーの重複も検出し, self.duplicate_key_errors に記録する
+        (ファイルのパースは一度だけ行う). !include を含む場合は取り込んだファイルを self.included_files に記録する.
+
         Returns:
             読み込んだデータ (辞書またはリスト), 読み込み失敗時はNone.
         Raises:
@@ -37,34 +85,65 @@ class BaseValidator(abc.ABC):
         """
         self.errors = [] # 読み込み前にエラーリストをクリア
         self.warnings = [] # 読み込み前に警告リストをクリア
+        self.duplicate_key_errors = []
+        self.included_files = []
+        self.included_paths = []
+        self.positions = PositionIndex() if self.record_positions else None
         if not self.file_path.exists():
             # FileNotFoundError を raise する代わりにエラーリストに追加することも検討可能
             # ここでは raise する元の実装を踏襲
             raise FileNotFoundError(f"File not found: {self.file_path}")
         try:
             with open(self.file_path, 'r', encoding='utf-8') as f:
-                self.data = yaml.safe_load(f)
+                stream = io.StringIO(f.read())
+                stream.name = f.name # ノードの Mark.name (取り込んだファイルのノードと区別する)
+            # !include を含まない文書では, 取り込む位置を探す走査を省く
+            includes = None
+            if INCLUDE_TAG in stream.getvalue():
+                includes = IncludeResolver(self.file_path, self.yaml_backend, self.fragment_cache)
+            try:
+                self.data, self.duplicate_key_errors = load_with_duplicate_check(stream, self.yaml_backend, self.positions, includes)
+            finally:
+                if includes is not None:
+                    self.included_files = includes.files
+                    self.included_paths = includes.paths
             return self.data
         except yaml.YAMLError as e:
-            self.errors.append(f"Error parsing YAML file {self.file_path}: {e}")
+            text = f"Error parsing YAML file {self.file_path}: {e}"
+            mark = getattr(e, 'problem_mark', None)
+            position = (mark.line + 1, mark.column + 1) if mark is not None else (None, None)
+            # 取り込んだファイルの構文エラーの場合は, そのファイルを記録する (メッセージにも含まれる)
+            file = mark.name if mark is not None and mark.name != str(self.file_path) else None
+            rule_id = INCLUDE_RULE_ID if isinstance(e, IncludeError) else YAML_SYNTAX_RULE_ID
+            self.errors.append(Diagnostic(text, 'error', text, None, *position, rule_id=rule_id, file=file))
             # print(f"Error parsing YAML file {self.file_path}: {e}") # print は _print_results に任せる
             # raise # エラーを再送出せず、エラーリストに追加して None を返す方針に変更も可
             return None # パースエラー時は None を返し、呼び出し元でエラーリストを確認
         except Exception as e:
-            self.errors.append(f"An unexpected error occurred while loading {self.file_path}: {e}")
+            self.errors.append(Diagnostic(f"An unexpected error occurred while loading {self.file_path}: {e}", rule_id=YAML_SYNTAX_RULE_ID))
             # print(f"An unexpected error occurred while loading {self.file_path}: {e}")
             # raise
             return None # 予期せぬエラー時も None を返す
 
-    def _add_error(self, message: str, path: List[str] | None = None):
-        """エラーメッセージをリストに追加する."""
-        prefix = f"Error at {'.'.join(path)}: " if path else "Error: "
-        self.errors.append(prefix + message)
+    def _add_error(
+        self,
+        message: str,
+        path: List[str] | None = None,
+        position: Position | None = None,
+        rule_id: str | None = None,
+        file: str | None = None,
+    ):
+        """
+        エラーメッセージをリストに追加する (position を指定しない場合, 位置は検証の最後にパスから求める).
+
+        file は position が !include で取り込んだファイル内の場合のそのファイル.
+        """
+        error = format_error(message, path, rule_id)
+        self.errors.append(error.with_position(*position, file) if position is not None else error)
 
-    def _add_warning(self, message: str, path: List[str] | None = None):
+    def _add_warning(self, message: str, path: List[str] | None = None, rule_id: str | None = None):
         """警告メッセージをリストに追加する."""
-        prefix = f"Warning at {'.'.join(path)}: " if path else "Warning: "
-        self.warnings.append(prefix + message)
+        self.warnings.append(format_warning(message, path, rule_id))
 
     def _print_results(self):
         """バリデーション結果を標準出力/エラー出力に出力する."""
@@ -87,36 +166,16 @@ class BaseValidator(abc.ABC):
 
     def check_duplicate_keys(self) -> bool:
         """
-        カスタムローダーを使用してキーの重複のみをチェックする.
-        self.data は変更せず、エラーがあれば self.errors に追加する.
+        load_yaml で検出したキーの重複を self.errors に追加する.
+        ファイルの再パースは行わないため, 事前に load_yaml を呼び出しておく必要がある.
 
         Returns:
-            True: 重複なし, False: 重複ありまたは読み込みエラー.
+            True: 重複なし, False: 重複あり.
         """
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                # このメソッド内でのみカスタムローダーを使用
-                yaml.load(f, Loader=CustomDuplicateKeyLoader)
-            return True # 重複なければ True
-        except FileNotFoundError:
-            # load_yaml で既にチェックされているはずだが念のため
-            self._add_error(f"File not found during duplicate check: {self.file_path}")
-            return False
-        except DuplicateKeyError as e:
+        for e in self.duplicate_key_errors:
             # 重複エラーを self.errors に追加
-            self._add_error(f"YAML parsing error: {e}")
-            return False
-        except yaml.YAMLError as e:
-            # その他の構文エラーもエラーとして記録
-            mark_info = ""
-            mark = getattr(e, 'problem_mark', None)
-            if mark:
-                mark_info = f" at line {mark.line + 1}, column {mark.column + 1}"
-            self._add_error(f"YAML parsing error during duplicate check{mark_info}: {e}")
-            return False
-        except Exception as e:
-            self._add_error(f"Unexpected error during duplicate check: {e}")
-            return False
+            self._add_error(f"YAML parsing error: {e}", position=(e.line, e.column), rule_id=DUPLICATE_KEY_RULE_ID, file=e.file)
+        return not self.duplicate_key_errors
 
     @abc.abstractmethod
     def _perform_validation(self) -> bool:
@@ -134,35 +193,106 @@ class BaseValidator(abc.ABC):
         """
         pass # 実装はサブクラスで行う
 
-    def validate(self) -> bool:
+    def validate(self, profiler: Profiler | None = None) -> bool:
         """
         バリデーションプロセス全体を実行する (テンプレートメソッド).
 
-        1. YAMLファイルを読み込む.
-        2. キーの重複をチェックする.
+        0. キャッシュが有効で, 同じ内容のファイル (取り込んだファイルを含む) の結果があれば 1-3 を省略する.
+        1. YAMLファイルを読み込む (キーの重複も同時に検出する).
+        2. 検出したキーの重複をエラーとして記録する.
         3. サブクラス固有のバリデーションを実行する.
         4. 結果を表示する.
 
+        Args:
+            profiler: 指定した場合, 各フェーズ (とサブクラスが記録する区間) の
+                実行時間とメモリを記録する (profiling.Profiler 参照).
+
         Returns:
             バリデーション全体でエラーがなければ True, あれば False.
+        Raises:
+            FileNotFoundError: ファイルが存在しない場合.
         """
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        try:
+            with self.profiler, self.profiler.span("validate", file=str(self.file_path)):
+                return self._validate()
+        finally:
+            self.profiler = NULL_PROFILER
+
+    def _validate(self) -> bool:
+        """validate の本体."""
+        profiler = self.profiler
+        # 0. キャッシュ参照
+        self.cache_hit = False
+        cache_key = None
+        if self.cache is not None:
+            with profiler.span("cache_lookup"):
+                if not self.file_path.exists():
+                    raise FileNotFoundError(f"File not found: {self.file_path}")
+                content = self.file_path.read_bytes()
+                namespace = self._cache_namespace()
+                # !include のパスはこのファイルからの相対パスのため, 取り込む文書はファイルの場所もキーに含める
+                if INCLUDE_TAG.encode() in content:
+                    namespace += f":{self.file_path.resolve()}"
+                cache_key = self.cache.make_key(content, namespace)
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.errors, self.warnings = cached
+                self.cache_hit = True
+                self._print_results()
+                return not self.errors
+
         # 1. YAML 読み込み
-        self.data = self.load_yaml()
+        with profiler.span("load_yaml"):
+            self.data = self.load_yaml()
         if self.data is None:
             # 読み込み失敗 (エラーは load_yaml 内で記録済み)
+            # メッセージにファイルパスが含まれるため, 内容をキーとするキャッシュには保存しない
             self._print_results()
             return False
 
         # 2. キー重複チェック
-        # check_duplicate_keys はエラーがあれば self.errors に追加する
-        self.check_duplicate_keys()
+        # load_yaml で検出済みの重複を self.errors に追加する (再パースはしない)
+        with profiler.span("check_duplicate_keys"):
+            self.check_duplicate_keys()
         # 重複キーエラーがあっても、スキーマチェック等は試みる場合があるため、
         # ここでは即座に return False しない (最終的に self.errors で判断)
 
         # 3. サブクラス固有のバリデーション実行
         # _perform_validation はエラーがあれば False を返し、self.errors にも追加する
-        self._perform_validation()
+        with profiler.span("perform_validation"):
+            self._perform_validation()
 
-        # 4. 結果表示と最終結果判定
+        # 4. 位置の付加, 結果表示と最終結果判定
+        self._locate_diagnostics()
+        self._store_cache(cache_key)
         self._print_results()
         return not self.errors # エラーリストが空なら True
+
+    def _locate_diagnostics(self):
+        """位置の索引から, パスを持つエラー/警告に位置を付加する."""
+        positions = self.positions
+        if positions is None:
+            return
+        for diagnostics in (self.errors, self.warnings):
+            for i, diagnostic in enumerate(diagnostics):
+                if isinstance(diagnostic, Diagnostic) and diagnostic.line is None and diagnostic.path is not None:
+                    location = positions.locate(diagnostic.path)
+                    if location is not None:
+                        file, line, column = location
+                        diagnostics[i] = diagnostic.with_position(line, column, file)
+
+    def _cache_namespace(self) -> str:
+        """キャッシュキーに含める, 結果に影響する設定 (バリデーターの種類, YAML バックエンド, 位置の付加)."""
+        return f"{type(self).__qualname__}:{self.yaml_backend}:positions={self.record_positions}"
+
+    def _store_cache(self, cache_key: str | None):
+        """
+        キャッシュが有効な場合, 現在のエラー/警告を保存する.
+
+        キーはこのファイルの内容のみから作るため, 取り込んだファイルの内容のハッシュを共に保存し,
+        参照時に変更がないことを確かめる.
+        """
+        if self.cache is not None and cache_key is not None:
+            dependencies = [(file.path, file.digest) for file in self.included_files]
+            self.cache.put(cache_key, self.errors, self.warnings, dependencies)
@@ -0,0 +1,199 @@
+# 複数の data_dependencies.yml をまとめて検証する
+#
+# ファイルごとの検証ロジックは DataDependenciesValidator をそのまま使用し,
+# ここでは対象ファイルの収集, プロセスプールによる並列実行, 結果の集約のみを行う.
+
+import glob
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from .data_dependencies_validator import DataDependenciesValidator
+from .diagnostics import FILE_NOT_FOUND_RULE_ID
+from .profiling import Profiler
+from .result_cache import ResultCache
+from .streaming import StreamingDataDependenciesValidator
+
+# ディレクトリが指定された場合に検索するファイル名
+SPEC_FILE_NAMES = ("data_dependencies.yml", "data_dependencies.yaml")
+
+# 並列実行時, 1 回にワーカーへ渡すファイル数の上限と, ワーカー 1 つあたりの未回収のチャンク数.
+# 完了したが出力されていない結果が溜まらないよう, 提出するチャンクの数を制限する.
+_MAX_CHUNK_SIZE = 32
+_PENDING_CHUNKS_PER_JOB = 2
+
+@dataclass
+class FileResult:
+    """1 ファイル分の検証結果."""
+    file_path: Path
+    is_valid: bool
+    output: str = "" # バリデーターが標準出力に出力した内容 (capture_output が False の場合は空)
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    cache_hit: bool | None = None # キャッシュ無効時は None
+    profile: Profiler | None = None # プロファイル無効時は None
+
+def collect_spec_files(patterns: Iterable[str], base_dir: Path | str | None = None) -> List[Path]:
+    """
+    パス, ディレクトリ, glob パターンから検証対象のファイル一覧を作成する.
+
+    * ファイル: そのまま対象とする.
+    * ディレクトリ: 配下を再帰的に探索し, SPEC_FILE_NAMES に一致するファイルを対象とする.
+    * glob パターン (`**` 可): 一致したファイル (ディレクトリの場合は上記と同様に探索) を対象とする.
+
+    結果は絶対パスで, 指定順 (ディレクトリ/glob 内はパス順) に並び, 重複は除く.
+
+    Args:
+        patterns: パス, ディレクトリ, glob パターン.
+        base_dir: 相対パスの基準のディレクトリ. 省略時はカレントディレクトリ.
+
+    Returns:
+        検証対象のファイルパスのリスト.
+    Raises:
+        FileNotFoundError: いずれのファイルにも一致しないパターンがある場合.
+    """
+    files: List[Path] = []
+    seen = set()
+
+    def add(path: Path):
+        path = path.resolve()
+        if path not in seen:
+            seen.add(path)
+            files.append(path)
+
+    for pattern in patterns:
+        # エラーメッセージには指定されたパターンをそのまま使用する
+        resolved_pattern = os.path.join(base_dir, pattern) if base_dir is not None else pattern
+        path = Path(resolved_pattern)
+        if path.is_file():
+            candidates = [path]
+        elif path.is_dir():
+            candidates = _find_spec_files(path)
+        else:
+            candidates = []
+            for match in sorted(glob.glob(resolved_pattern, recursive=True)):
+                match_path = Path(match)
+                if match_path.is_file():
+                    candidates.append(match_path)
+                elif match_path.is_dir():
+                    candidates.extend(_find_spec_files(match_path))
+        if not candidates:
+            raise FileNotFoundError(f"No data dependencies file matches '{pattern}'.")
+        for candidate in candidates:
+            add(candidate)
+    return files
+
+def _find_spec_files(directory: Path) -> List[Path]:
+    """ディレクトリ配下の data_dependencies.yml をパス順に返す."""
+    return sorted(p for name in SPEC_FILE_NAMES for p in directory.rglob(name) if p.is_file())
+
+def validate_file(
+    file_path: Path,
+    yaml_backend: str | None = None,
+    cache: ResultCache | None = None,
+    profile: bool = False,
+    streaming: bool = False,
+    capture_output: bool = True,
+) -> FileResult:
+    """
+    1 ファイルを検証し, 出力を含む結果を返す.
+
+    プロセスプールのワーカーからも呼び出されるため, モジュールのトップレベルに定義する.
+    profile が True の場合はファイルごとの Profiler を FileResult.profile に格納する.
+    streaming が True の場合はエントリを 1 件ずつ読み込んで検証する (結果は同じ. streaming.py 参照).
+    """
+    validator_class = StreamingDataDependenciesValidator if streaming else DataDependenciesValidator
+    validator = validator_class(file_path, yaml_backend=yaml_backend, cache=cache)
+    return run_validator(validator, Profiler() if profile else None, capture_output)
+
+class _DiscardOutput(io.TextIOBase):
+    """書き込まれた内容を捨てる標準出力の代わり."""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+def run_validator(validator: DataDependenciesValidator, profiler: Profiler | None = None, capture_output: bool = True) -> FileResult:
+    """
+    バリデーターを実行し, 出力を含む結果を返す.
+
+    バリデーターが print する結果は捕捉して FileResult.output に格納し,
+    呼び出し元がファイル順に出力できるようにする.
+    capture_output が False の場合は出力を捨てる (エラー/警告のみを使用する機械可読なレポート用).
+    """
+    buffer = io.StringIO() if capture_output else _DiscardOutput()
+    with redirect_stdout(buffer):
+        try:
+            is_valid = validator.validate(profiler=profiler)
+        except FileNotFoundError as e:
+            # 収集後に削除された場合など
+            validator.errors = []
+            validator.warnings = []
+            validator._add_error(str(e), rule_id=FILE_NOT_FOUND_RULE_ID)
+            validator._print_results()
+            is_valid = False
+    cache_hit = validator.cache_hit if validator.cache is not None else None
+    output = buffer.getvalue() if capture_output else ""
+    return FileResult(validator.file_path, is_valid, output, validator.errors, validator.warnings, cache_hit, profiler)
+
+def _validate_chunk(file_paths: List[Path], *args) -> List[FileResult]:
+    """ワーカーで複数ファイルを順に検証する (引数は validate_file と同じ)."""
+    return [validate_file(file_path, *args) for file_path in file_paths]
+
+def validate_files(
+    file_paths: List[Path],
+    jobs: int = 1,
+    yaml_backend: str | None = None,
+    cache: ResultCache | None = None,
+    profile: bool = False,
+    streaming: bool = False,
+    capture_output: bool = True,
+) -> Iterator[FileResult]:
+    """
+    複数ファイルを検証し, 結果を入力と同じ順序で返す.
+
+    Args:
+        file_paths: 検証対象のファイルパス.
+        jobs: 並列実行するプロセス数. 1 以下の場合は現在のプロセスで順に実行する.
+        yaml_backend: YAML ローダーのバックエンド (BaseValidator 参照).
+        cache: バリデーション結果のキャッシュ. 並列実行時は各ワーカーにコピーが渡されるため,
+            ヒット/ミスの集計には FileResult.cache_hit を使用する.
+        profile: True の場合はファイルごとに計測し, FileResult.profile に格納する.
+        streaming: True の場合はメモリ使用量を抑えるストリーミング検証を使用する.
+        capture_output: False の場合はバリデーターの出力を捕捉しない (FileResult.output は空).
+
+    Yields:
+        ファイルごとの FileResult (file_paths の順).
+        並列実行時も未回収の結果はワーカー数に比例する件数までしか保持しないため,
+        ファイル数が多くてもメモリ使用量は一定に保たれる (結果を順に処理して捨てる場合).
+    """
+    args = (yaml_backend, cache, profile, streaming, capture_output)
+    jobs = min(jobs, len(file_paths))
+    if jobs <= 1:
+        for file_path in file_paths:
+            yield validate_file(file_path, *args)
+        return
+    chunksize = max(1, min(len(file_paths) // (jobs * 4), _MAX_CHUNK_SIZE))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # Executor.map はすべてのファイルを最初に提出するため, 完了した結果が呼び出し元の処理を待って溜まる.
+        # 提出済みのチャンクを入力順のキューで管理し, 先頭を回収してから次を提出する
+        pending = deque()
+        for start in range(0, len(file_paths), chunksize):
+            pending.append(executor.submit(_validate_chunk, file_paths[start:start + chunksize], *args))
+            if len(pending) >= jobs * _PENDING_CHUNKS_PER_JOB:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def default_jobs() -> int:
+    """--jobs 0 のときに使用するプロセス数 (利用可能な CPU 数)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -0,0 +1,271 @@
+# data_dependencies.yml の組み込みカスタムルール
+#
+# いずれも RuleEngine の 1 回の走査で実行される (rule_engine.py 参照).
+# BUILTIN_RULES の順序がエラー/警告の出力順になる.
+
+from typing import Dict, Tuple
+
+from .rule_engine import Rule, RuleContext, RuleRegistry
+from ..graph.algorithms import find_cycles
+from ..graph.pruning import needed_by_targets
+from ..model.spec import Column, DataEntry, Parameter
+
+class FormatSpecificFieldsRule(Rule):
+    """
+    data エントリの format と、それに応じたフィールド (columns/keys) の関連性をチェックする.
+    - format が許可された値かチェック.
+    - format が 'table' の場合, columns が必須で keys は不可.
+    - format が 'dictionary' の場合, keys が必須で columns は不可.
+    """
+    rule_id = 'format_specific_fields'
+
+    # 許可する format の値
+    ALLOWED_FORMATS = {"table", "dictionary", "list", "single", "binary", "document"}
+
+    def visit_data(self, ctx: RuleContext, entry: DataEntry):
+        data_path = ['data', entry.name]
+        fmt = entry.format
+        columns_exist = entry.columns is not None
+        keys_exist = entry.keys is not None
+
+        # format が許可された値かチェック
+        if fmt not in self.ALLOWED_FORMATS:
+            ctx.error(f"Invalid 'format' value '{fmt}'. Allowed values are: {', '.join(sorted(self.ALLOWED_FORMATS))}", data_path + ['format'])
+            return # 不正な format の場合、以降のチェックはスキップ
+
+        # format に応じたフィールドのチェック
+        if fmt == 'table':
+            if not columns_exist:
+                ctx.error("'columns' key is required when 'format' is 'table'", data_path)
+            if keys_exist:
+                ctx.error("'keys' key cannot be specified when 'format' is 'table'", data_path)
+        elif fmt == 'dictionary':
+            if not keys_exist:
+                ctx.error("'keys' key is required when 'format' is 'dictionary'", data_path)
+            if columns_exist:
+                ctx.error("'columns' key cannot be specified when 'format' is 'dictionary'", data_path)
+        # 他の format ('list', 'single', 'binary', 'document') では columns/keys の存在有無は問わない
+
+class EmptinessRule(Rule):
+    """致命的な空の定義をチェックする."""
+    rule_id = 'emptiness'
+
+    def visit_data(self, ctx: RuleContext, entry: DataEntry):
+        # スキーマで NonEmptyListOfStrings や Length(min=1) が指定されているため、
+        # target, data, process の空リスト/辞書チェックはスキーマ検証に任せる.
+        path = ['data', entry.name]
+        fmt = entry.format
+
+        # format: table で columns が空リスト
+        if fmt == 'table' and entry.columns == ():
+            ctx.error("`columns` list cannot be empty when format is 'table'.", path + ['columns'])
+        # format: dictionary で keys が空リスト
+        elif fmt == 'dictionary' and entry.keys == ():
+            ctx.error("`keys` list cannot be empty when format is 'dictionary'.", path + ['keys'])
+
+class TargetReferencesRule(Rule):
+    """target の参照先が data に定義されているかチェックする."""
+    rule_id = 'target_references'
+
+    def finish(self, ctx: RuleContext):
+        spec = ctx.spec
+        for target_id in spec.target:
+            if not spec.is_data(target_id):
+                ctx.error(f"Target data '{spec.names[target_id]}' is not defined in the 'data' section.", ['target'])
+
+class ReferencesRule(Rule):
+    """data エントリ内の参照 (required_data, required_parameter) の整合性をチェックする."""
+    rule_id = 'references'
+
+    def visit_data(self, ctx: RuleContext, entry: DataEntry):
+        spec = ctx.spec
+        path_base = ['data', entry.name]
+        # required_data の参照先チェック
+        if entry.required_data is not None:
+            for req_id in entry.required_data:
+                if not spec.is_data(req_id):
+                    ctx.error(f"Required data '{spec.names[req_id]}' is not defined in the 'data' section.", path_base + ['required_data'])
+
+        # required_parameter の参照先チェック
+        if entry.required_parameter is not None:
+            if not spec.has_parameter_section:
+                ctx.error("`required_parameter` is specified, but the 'parameter' section is missing.", path_base + ['required_parameter'])
+            else:
+                for req_id in entry.required_parameter:
+                    if req_id not in spec.parameter_ids:
+                        ctx.error(f"Required parameter '{spec.names[req_id]}' is not defined in the 'parameter' section.", path_base + ['required_parameter'])
+
+class UniquenessRule(Rule):
+    """キーの一意性 (data と parameter で同じ名前を使っていないか) をチェックする."""
+    rule_id = 'uniqueness'
+
+    def finish(self, ctx: RuleContext):
+        # 出力順を決定的にするため data の定義順に走査する
+        spec = ctx.spec
+        for name_id in range(spec.data_count):
+            if name_id in spec.parameter_ids:
+                ctx.error(f"Key '{spec.names[name_id]}' is defined in both 'data' and 'parameter' sections.")
+
+class CircularDependenciesRule(Rule):
+    """
+    データ間の循環参照を検出する.
+
+    強連結成分 (Tarjan のアルゴリズム, 反復版) を求め, 循環ごとに
+    構成するデータの一覧と代表的な循環経路をエラーとして報告する.
+    """
+    rule_id = 'circular_dependencies'
+
+    def finish(self, ctx: RuleContext):
+        spec = ctx.spec
+        adj: Dict[int, Tuple[int, ...]] = {entry.id: entry.required_data for entry in spec.data if entry.required_data is not None}
+        names = spec.names
+        for cycle in find_cycles(range(spec.data_count), adj):
+            members = ", ".join(f"'{names[member]}'" for member in cycle.members)
+            ctx.error(f"Circular dependency detected involving {members}: {' -> '.join(names[node] for node in cycle.path)}.", ['data'])
+
+class VariableColumnsRule(Rule):
+    """可変長列定義 (*付き列名) のバリデーションルールをチェックする (Error)."""
+    rule_id = 'variable_columns'
+
+    def visit_column(self, ctx: RuleContext, entry: DataEntry, column: Column):
+        spec = ctx.spec
+        # パス要素はすべて文字列にする (列の位置を str に変換)
+        col_path = ['data', entry.name, 'columns', str(column.index)]
+        col_name = column.name
+        key_source = column.key_source
+
+        if not column.is_variable:
+            # Rule 4: name が * で終わらないなら key_source は指定できない
+            if key_source is not None:
+                ctx.error(f"'key_source' is specified, but the column name '{col_name}' does not end with '*'.", col_path + ['name'])
+            return
+
+        ref_data_name = col_name[:-1]
+        # Rule 1: 参照先データが存在するか
+        if not spec.is_data(column.ref_id):
+            ctx.error(f"Referenced data '{ref_data_name}' for variable column '{col_name}' is not defined in the 'data' section.", col_path + ['name'])
+            return # 参照先がないと以降のチェックは無意味
+
+        ref_entry = spec.data_entry(column.ref_id)
+        if ref_entry is None:
+            # 定義が辞書でない場合など. 通常は起こらないはず (data に定義されているので)
+            return
+
+        ref_format = ref_entry.format
+        if ref_format == 'table':
+            # Rule 2: 参照先 format が table なら key_source が必須
+            if key_source is None:
+                ctx.error(f"'key_source' is required for variable column '{col_name}' because referenced data '{ref_data_name}' has format 'table'.", col_path)
+            # Rule 3: key_source で指定された列が参照先テーブルに存在するか
+            elif key_source not in ref_entry.column_names:
+                ctx.error(f"The column '{key_source}' specified by 'key_source' for variable column '{col_name}' does not exist in the referenced data '{ref_data_name}'.", col_path + ['key_source'])
+        # Rule 5: 参照先 format が table 以外なら key_source は指定できない
+        elif key_source is not None:
+            ctx.error(f"'key_source' cannot be specified for variable column '{col_name}' because referenced data '{ref_data_name}' has format '{ref_format}' (must be 'table').", col_path + ['key_source'])
+
+class MetadataWarningsRule(Rule):
+    """metadata で修正が推奨される項目 (Warning) をチェックする."""
+    rule_id = 'metadata_warnings'
+
+    def visit_metadata(self, ctx: RuleContext, metadata: dict):
+        # metadata の空リストチェック
+        if 'purposes' in metadata and isinstance(metadata['purposes'], list) and not metadata['purposes']:
+            ctx.warning("`purposes` list is empty. Consider describing the purpose.", ['metadata', 'purposes'])
+        if 'terms' in metadata and isinstance(metadata['terms'], list) and not metadata['terms']: # terms 自体が空リスト
+            ctx.warning("`terms` list is empty. If there are no terms, consider removing the key.", ['metadata', 'terms'])
+        if 'note' in metadata and isinstance(metadata['note'], list) and not metadata['note']:
+            ctx.warning("`note` list is empty.", ['metadata', 'note'])
+
+        # metadata.terms 内の descriptions 空チェック
+        if 'terms' in metadata and isinstance(metadata['terms'], list):
+            for term_index, term_def in enumerate(metadata['terms']):
+                if isinstance(term_def, dict) and 'descriptions' in term_def and isinstance(term_def['descriptions'], list) and not term_def['descriptions']:
+                    term_name = term_def.get('name', f'index {term_index}')
+                    ctx.warning(f"Term '{term_name}' has an empty `descriptions` list.", ['metadata', 'terms', str(term_index), 'descriptions'])
+
+class DataWarningsRule(Rule):
+    """data エントリで修正が推奨される項目 (Warning) をチェックする."""
+    rule_id = 'data_warnings'
+
+    # 可変長列の参照先として不適切な format
+    UNKEYED_FORMATS = {'single', 'binary', 'document'}
+
+    def visit_data(self, ctx: RuleContext, entry: DataEntry):
+        # data の空リストチェック
+        path_base = ['data', entry.name]
+        if not entry.descriptions:
+            ctx.warning("`descriptions` list is empty. Consider adding a description.", path_base + ['descriptions'])
+        if entry.required_data == ():
+            ctx.warning("`required_data` list is empty. If there are no dependencies, consider removing the key.", path_base + ['required_data'])
+        if entry.required_parameter == ():
+            ctx.warning("`required_parameter` list is empty. If there are no dependencies, consider removing the key.", path_base + ['required_parameter'])
+
+    def visit_column(self, ctx: RuleContext, entry: DataEntry, column: Column):
+        # Rule 6 (Warning): 可変長列の参照先 format が不適切
+        if not column.is_variable:
+            return
+        ref_entry = ctx.spec.data_entry(column.ref_id)
+        if ref_entry is not None and ref_entry.format in self.UNKEYED_FORMATS:
+            # 列の位置を str() で文字列に変換する
+            col_path = ['data', entry.name, 'columns', str(column.index)]
+            message = f"Variable column '{column.name}' references data '{column.name[:-1]}' with format '{ref_entry.format}', which might be inappropriate for key-based referencing."
+            ctx.warning(message, col_path + ['name'])
+
+class ParameterWarningsRule(Rule):
+    """parameter エントリで修正が推奨される項目 (Warning) をチェックする."""
+    rule_id = 'parameter_warnings'
+
+    def visit_parameter(self, ctx: RuleContext, parameter: Parameter):
+        # parameter の空リストチェック
+        if not parameter.descriptions:
+            ctx.warning("`descriptions` list is empty. Consider adding a description.", ['parameter', parameter.name, 'descriptions'])
+
+class UnreachableEntriesRule(Rule):
+    """
+    target に寄与しない data と, 使用されない parameter (Warning) を検出する.
+
+    target から required_data と可変長列の参照先を逆にたどり (O(V+E)), 到達しなかった data を報告する.
+    parameter は到達した data の required_parameter になければ報告する.
+    未定義の target しかない場合 (TargetReferencesRule のエラー) は検査しない.
+    """
+    rule_id = 'unreachable'
+
+    def finish(self, ctx: RuleContext):
+        spec = ctx.spec
+        if not any(spec.is_data(target) for target in spec.target):
+            return
+        needed = needed_by_targets(spec)
+        for entry in spec.data:
+            if entry.id not in needed.data:
+                ctx.warning(f"Data '{entry.name}' does not contribute to any target. Consider removing it (see 'rtar-ddeps prune').", ['data', entry.name])
+        unused = spec.parameter_ids - needed.parameters
+        if not unused:
+            return
+        referenced = {parameter for entry in spec.data for parameter in entry.required_parameter or ()}
+        # parameter の名前 ID は data の名前の後に定義順に登録されている
+        for parameter in sorted(unused):
+            name = spec.names[parameter]
+            if parameter in referenced:
+                ctx.warning(f"Parameter '{name}' is only required by data that do not contribute to any target.", ['parameter', name])
+            else:
+                ctx.warning(f"Parameter '{name}' is not required by any data.", ['parameter', name])
+
+# 組み込みルール (この順序でエラー/警告を出力する)
+BUILTIN_RULES: Tuple[Rule, ...] = (
+    FormatSpecificFieldsRule(),
+    EmptinessRule(),
+    TargetReferencesRule(),
+    ReferencesRule(),
+    UniquenessRule(),
+    CircularDependenciesRule(),
+    VariableColumnsRule(),
+    MetadataWarningsRule(),
+    DataWarningsRule(),
+    ParameterWarningsRule(),
+    UnreachableEntriesRule(),
+)
+
+# DataDependenciesValidator がデフォルトで使用するレジストリ.
+# サードパーティのルールは register_rule で追加する (組み込みルールの後に実行される).
+default_registry = RuleRegistry(BUILTIN_RULES)
+register_rule = default_registry.register
@@ -1,22 +1,77 @@
 # YAML 読み込み時にキーの重複を検出するカスタムローダー
+import gc
+import os
 import yaml
-from yaml.loader import SafeLoader
-from collections.abc import Mapping # Mapping 型のインポート
+from yaml.reader import Reader
+from yaml.scanner import Scanner
+from yaml.parser import Parser
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+from yaml.nodes import MappingNode
+from typing import TYPE_CHECKING, Any, List, Tuple, Type
+
+from .positions import PositionIndex
+from ..settings import YAML_BACKEND_ENV, YAML_BACKENDS
+
+if TYPE_CHECKING:
+    from .includes import IncludeResolver
+
+# 別のファイルを取り込むタグ (includes.py)
+INCLUDE_TAG = '!include'
 
 class DuplicateKeyError(yaml.YAMLError):
     """キー重複エラーを表すカスタム例外"""
-    pass
 
-class CustomDuplicateKeyLoader(SafeLoader):
-    """YAML 読み込み時にキーの重複を検出するカスタムローダー"""
+    def __init__(self, message: str, line: int | None = None, column: int | None = None, file: str | None = None):
+        super().__init__(message)
+        self.line = line # 重複したキーの位置 (1 始まり)
+        self.column = column
+        self.file = file # 重複したキーが !include で取り込んだファイルにある場合, そのパス
+
+class DuplicateKeyConstructor(SafeConstructor):
+    """
+    マッピング構築時にキーの重複を検出するコンストラクタ.
+
+    パーサー (pure-Python / libyaml) に依存しない部分をここにまとめ,
+    どちらのバックエンドでも同じエラーが得られるようにする.
+
+    デフォルトでは最初の重複キーで DuplicateKeyError を送出する.
+    collect_duplicates を True にすると例外を送出せずに読み込みを続行し,
+    検出した重複を duplicate_key_errors に記録する.
+    この場合, 重複キーは yaml.safe_load と同様に後勝ちで辞書に格納される.
+    """
+
+    def __init__(self, collect_duplicates: bool = False):
+        super().__init__()
+        self.collect_duplicates = collect_duplicates
+        self.duplicate_key_errors: List[DuplicateKeyError] = []
+        self.included_files: frozenset = frozenset() # !include で取り込んだファイル (ノードの Mark.name)
+
+    def construct_unresolved_include(self, node):
+        """取り込まれなかった !include (ファイルを指定せずに読み込んだ場合など)."""
+        raise yaml.constructor.ConstructorError(
+            None, None,
+            "found an unresolved !include (includes are resolved only when loading a file)",
+            node.start_mark,
+        )
 
     def construct_mapping(self, node, deep=False):
         """
         マッピング (辞書) を構築する際にキーの重複をチェックする.
         """
-        mapping = {}
+        if not isinstance(node, MappingNode):
+            raise yaml.constructor.ConstructorError(
+                None, None,
+                f"expected a mapping node, but found {node.id}",
+                node.start_mark,
+            )
+        # 重複チェックはマージキー (<<) 展開前の, このマッピング自身のキーに対してのみ行う.
+        # マージで取り込んだキーを上書きするのは YAML の仕様上正当なため.
         keys_seen = set() # このマッピング内で既出のキーを記録
-        for key_node, value_node in node.value:
+        for key_node, _ in node.value:
+            if key_node.tag == 'tag:yaml.org,2002:merge':
+                continue
             key = self.construct_object(key_node, deep=deep)
             # キーがハッシュ可能かチェック (辞書のキーとして使えるか)
             try:
@@ -31,11 +86,123 @@ class CustomDuplicateKeyLoader(SafeLoader):
 
             # キーの重複チェック
             if key in keys_seen:
-                # 重複が見つかったらカスタムエラーを発生
-                raise DuplicateKeyError(
-                    f"Duplicate key '{key}' found at line {key_node.start_mark.line + 1}, column {key_node.start_mark.column + 1}"
-                )
+                mark = key_node.start_mark
+                line, column = mark.line + 1, mark.column + 1
+                file = mark.name if mark.name in self.included_files else None
+                error = DuplicateKeyError(f"Duplicate key '{key}' found at line {line}, column {column}", line, column, file)
+                if not self.collect_duplicates:
+                    # 重複が見つかったらカスタムエラーを発生
+                    raise error
+                self.duplicate_key_errors.append(error)
             keys_seen.add(key)
+
+        # マージキーの展開と辞書の構築は SafeLoader と同じ処理に任せる
+        self.flatten_mapping(node)
+        mapping = {}
+        for key_node, value_node in node.value:
+            key = self.construct_object(key_node, deep=deep)
             value = self.construct_object(value_node, deep=deep)
             mapping[key] = value
         return mapping
+
+DuplicateKeyConstructor.add_constructor(INCLUDE_TAG, DuplicateKeyConstructor.construct_unresolved_include)
+
+class CustomDuplicateKeyLoader(Reader, Scanner, Parser, Composer, DuplicateKeyConstructor, Resolver):
+    """YAML 読み込み時にキーの重複を検出するカスタムローダー (pure-Python 実装)"""
+
+    def __init__(self, stream, collect_duplicates: bool = False):
+        Reader.__init__(self, stream)
+        Scanner.__init__(self)
+        Parser.__init__(self)
+        Composer.__init__(self)
+        DuplicateKeyConstructor.__init__(self, collect_duplicates)
+        Resolver.__init__(self)
+
+if yaml.__with_libyaml__:
+    from yaml.cyaml import CParser
+
+    class CustomDuplicateKeyCLoader(CParser, DuplicateKeyConstructor, Resolver):
+        """YAML 読み込み時にキーの重複を検出するカスタムローダー (libyaml による C 実装)"""
+
+        def __init__(self, stream, collect_duplicates: bool = False):
+            CParser.__init__(self, stream)
+            DuplicateKeyConstructor.__init__(self, collect_duplicates)
+            Resolver.__init__(self)
+else:
+    CustomDuplicateKeyCLoader = None
+
+def resolve_yaml_backend(backend: str | None = None) -> str:
+    """
+    使用するローダーのバックエンドを決定する.
+
+    どちらのバックエンドでも検証のエラー/警告は同じになる. ただし YAML の構文エラーは libyaml と PyYAML で
+    問題の文言が異なる (例: "did not find expected key" と "expected <block end>, but found '-'").
+    構文エラーであること (rule_id), 行と列は同じになる.
+
+    Args:
+        backend: "auto", "c", "python" のいずれか.
+            None の場合は環境変数 RTAR_DDEPS_YAML_BACKEND を参照し, それもなければ "auto".
+
+    Returns:
+        実際に使用するバックエンド ("c" または "python").
+    Raises:
+        ValueError: 不明なバックエンドが指定された場合, または libyaml が利用できないのに "c" が指定された場合.
+    """
+    if backend is None:
+        backend = os.environ.get(YAML_BACKEND_ENV) or "auto"
+    backend = backend.lower()
+    if backend not in YAML_BACKENDS:
+        raise ValueError(f"Unknown YAML backend '{backend}'. Allowed values are: {', '.join(YAML_BACKENDS)}")
+    if backend == "auto":
+        return "c" if CustomDuplicateKeyCLoader is not None else "python"
+    if backend == "c" and CustomDuplicateKeyCLoader is None:
+        raise ValueError("YAML backend 'c' was requested, but PyYAML is not built with libyaml.")
+    return backend
+
+def get_loader_class(backend: str | None = None) -> Type[DuplicateKeyConstructor]:
+    """指定されたバックエンドに対応する重複キー検出ローダーのクラスを返す."""
+    if resolve_yaml_backend(backend) == "c":
+        return CustomDuplicateKeyCLoader
+    return CustomDuplicateKeyLoader
+
+def load_with_duplicate_check(
+    stream,
+    backend: str | None = None,
+    positions: PositionIndex | None = None,
+    includes: 'IncludeResolver | None' = None,
+) -> Tuple[Any, List[DuplicateKeyError]]:
+    """
+    YAML を一度だけパースし, データと重複キーエラーの一覧を同時に返す.
+
+    Args:
+        stream: YAML 文字列またはファイルオブジェクト.
+        backend: ローダーのバックエンド (resolve_yaml_backend 参照).
+        positions: 指定した場合, 組み立てたノードから文書内のパスの位置を登録する.
+        includes: 指定した場合, !include を取り込む (includes.py 参照). 取り込んだファイルは includes.files.
+
+    Returns:
+        (読み込んだデータ, 検出した DuplicateKeyError のリスト).
+    Raises:
+        yaml.YAMLError: 重複キー以外の YAML 構文エラーの場合 (!include を取り込めない場合の includes.IncludeError を含む).
+    """
+    loader = get_loader_class(backend)(stream, collect_duplicates=True)
+    # 構築中のコンテナが増えるたびに循環 GC が構築済みの木全体を走査し,
+    # 大きな文書では読み込み時間が線形より大きく増えるため, 構築中は GC を止める
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        node = loader.get_single_node()
+        if node is not None and includes is not None:
+            node = includes.expand(node)
+            names = [file.name for file in includes.files]
+            loader.included_files = frozenset(names)
+            if positions is not None:
+                positions.add_files(names)
+        if node is not None and positions is not None:
+            positions.add(node)
+        data = loader.construct_document(node) if node is not None else None
+    finally:
+        loader.dispose()
+        if gc_enabled:
+            gc.enable()
+    return data, loader.duplicate_key_errors
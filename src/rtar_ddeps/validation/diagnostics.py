@@ -0,0 +1,77 @@
+# バリデーションのエラー/警告 (診断)
+
+from typing import Any, Dict, Iterable, Tuple
+
+# カスタムルール以外の検査の rule_id
+SCHEMA_RULE_ID = 'schema' # スキーマ検証
+DUPLICATE_KEY_RULE_ID = 'duplicate_key' # キーの重複
+YAML_SYNTAX_RULE_ID = 'yaml_syntax' # YAML の構文エラー, 読み込みの失敗
+INCLUDE_RULE_ID = 'include' # !include の取り込みの失敗 (ファイルがない, 循環など)
+FILE_NOT_FOUND_RULE_ID = 'file_not_found' # 検証中にファイルが削除された場合など
+
+class Diagnostic(str):
+    """
+    1 件のエラー/警告.
+
+    文字列としては従来どおりの形式 ("Error at a.b: ..." など. format_error / format_warning 参照) で,
+    比較, 出力, キャッシュは文字列として行う. 加えて次の属性を持つ.
+
+    * severity: 'error' または 'warning'.
+    * message: 重大度とパスを含まないメッセージ.
+    * path: 文書内のパス (文字列のタプル). 文書全体に対する診断は None.
+    * line, column: 位置 (1 始まり). 位置を特定できない場合, または位置の索引が無効な場合は None.
+    * rule_id: 診断を報告したルールの ID (カスタムルールの rule_id, または SCHEMA_RULE_ID などの組み込みの検査).
+    * file: 位置が !include で取り込んだファイル内の場合, そのファイルのパス. 検証したファイル自身の場合は None.
+    """
+
+    def __new__(
+        cls,
+        text: str,
+        severity: str = 'error',
+        message: str | None = None,
+        path: Iterable[str] | None = None,
+        line: int | None = None,
+        column: int | None = None,
+        rule_id: str | None = None,
+        file: str | None = None,
+    ):
+        self = super().__new__(cls, text)
+        self.severity = severity
+        self.message = text if message is None else message
+        self.path: Tuple[str, ...] | None = tuple(path) if path is not None else None
+        self.line = line
+        self.column = column
+        self.rule_id = rule_id
+        self.file = file
+        return self
+
+    def with_position(self, line: int | None, column: int | None, file: str | None = None) -> 'Diagnostic':
+        """
+        位置を付加した診断を返す.
+
+        file (取り込んだファイル) を指定した場合は, 文字列の末尾に " (in <file>)" を付ける.
+        """
+        text = f"{self} (in {file})" if file is not None else str(self)
+        return Diagnostic(text, self.severity, self.message, self.path, line, column, self.rule_id, file)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON にできる辞書 (キャッシュ, レポート用)."""
+        return {
+            'text': str(self),
+            'severity': self.severity,
+            'message': self.message,
+            'path': list(self.path) if self.path is not None else None,
+            'line': self.line,
+            'column': self.column,
+            'rule_id': self.rule_id,
+            'file': self.file,
+        }
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> 'Diagnostic':
+        """to_dict の逆変換."""
+        return cls(value['text'], value['severity'], value['message'], value['path'], value['line'], value['column'], value['rule_id'], value['file'])
+
+def as_diagnostic(value: str, severity: str = 'error') -> Diagnostic:
+    """文字列のエラー/警告を Diagnostic にする (既に Diagnostic の場合はそのまま返す)."""
+    return value if isinstance(value, Diagnostic) else Diagnostic(value, severity)
@@ -0,0 +1,354 @@
+# data_dependencies.yml を複数のファイルに分割する (!include)
+#
+# 値を `!include <パス>` とすると, そのファイル (フラグメント) の内容で置き換える.
+# パスは !include を書いたファイルのディレクトリからの相対パス (絶対パスも可).
+# ディレクトリを指定した場合は, 直下の *.yml / *.yaml をファイル名の順に読み込み,
+# 各ファイルのマッピングを 1 つのマッピングにまとめる (チームごとに data エントリのファイルを分ける場合など).
+#
+#     data: !include data/             # data/*.yml の各ファイルに data エントリを書く
+#     parameter: !include parameters.yml
+#
+# 取り込みは組み立てたノード (yaml.nodes) の段階で行い, 辞書の構築とキーの重複の検出は文書全体で一度だけ行う.
+# フラグメントのノードの Mark.name はそのファイルのパスのため, キーの重複 (ファイルをまたぐ重複を含む) と
+# 位置の索引 (positions.py) は取り込んだファイルと行を報告できる.
+#
+# * ある文書が取り込むファイルは, まとめてスレッドで並列に読み込む (ファイルの読み込みとハッシュの計算が重なる.
+#   ノードの組み立ては GIL を取るため, 並列には実行されない).
+# * FragmentCache を指定した場合, 組み立てたノードを更新時刻とサイズ, 内容のハッシュで管理し,
+#   変更のあったファイルのみを再び読み込む (watch モード, 検証サーバーなど同じプロセスで繰り返し検証する場合).
+# * 同じファイルを複数回取り込んだ場合, 構築した値はエイリアスと同じく共有される.
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import yaml
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+from .custom_yaml_loader import INCLUDE_TAG, get_loader_class, resolve_yaml_backend
+
+# ディレクトリを取り込む場合に読み込むファイルの拡張子
+FRAGMENT_SUFFIXES = ('.yml', '.yaml')
+# FragmentCache が保持するフラグメントの合計サイズ (ファイルのバイト数) の上限.
+# ノードはファイルサイズの数十倍のメモリを使用する
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+# 並列に読み込むファイル数の上限
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
+_MAP_TAG = 'tag:yaml.org,2002:map'
+_NULL_TAG = 'tag:yaml.org,2002:null'
+_MERGE_TAG = 'tag:yaml.org,2002:merge'
+
+# 文書内の !include の位置: ルートからの子の番号 (マッピングは値の番号) の列と, !include のノード
+Site = Tuple[Tuple[int, ...], ScalarNode]
+
+class IncludeError(yaml.MarkedYAMLError):
+    """!include を取り込めない場合のエラー (ファイルがない, 循環している, ディレクトリのフラグメントがマッピングでない)."""
+
+@dataclass(frozen=True)
+class IncludedFile:
+    """取り込んだファイル."""
+    name: str # 表示するパス (ノードの Mark.name). 取り込んだファイルのディレクトリと !include のパスをつなげたもの
+    path: Path # 絶対パス
+    digest: str # 内容の SHA-256 (16 進数)
+
+class _Fragment:
+    """組み立てたフラグメント."""
+    __slots__ = ('file', 'node', 'sites', 'cacheable')
+
+    def __init__(self, file: IncludedFile, node: Node | None, sites: List[Site], cacheable: bool):
+        self.file = file
+        self.node = node # 空のファイルは None
+        self.sites = sites
+        # マージキー (<<) を含むノードは構築時に書き換えられる (SafeConstructor.flatten_mapping) ため, 再利用しない
+        self.cacheable = cacheable
+
+def find_include_sites(root: Node) -> Tuple[List[Site], bool]:
+    """
+    ノードの木から !include の位置を探す.
+
+    Returns:
+        (文書の順の !include の位置, マージキーを含むか).
+        エイリアスで複数の位置に現れるノードは最初の位置でのみ探す.
+    """
+    sites: List[Site] = []
+    has_merge_keys = False
+    seen = set()
+    stack: List[Tuple[Node, Tuple[int, ...]]] = [(root, ())]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, ScalarNode):
+            if node.tag == INCLUDE_TAG:
+                sites.append((path, node))
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, MappingNode):
+            children = []
+            for i, (key_node, value_node) in enumerate(node.value):
+                has_merge_keys |= key_node.tag == _MERGE_TAG
+                children.append((value_node, path + (i,)))
+        elif isinstance(node, SequenceNode):
+            children = [(item, path + (i,)) for i, item in enumerate(node.value)]
+        else:
+            continue
+        stack.extend(reversed(children))
+    return sites, has_merge_keys
+
+class FragmentCache:
+    """
+    組み立てたフラグメントのキャッシュ (ファイルの絶対パス, YAML バックエンド -> フラグメント).
+
+    更新時刻とサイズが前回と同じファイルは読み込まずに再利用する. 異なる場合も内容のハッシュが同じであれば再利用する.
+    合計サイズが max_bytes を超えた場合は, 最後に使用した時刻の古いものから破棄する. スレッドセーフ.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0 # 組み立てた (読み込んだ) 回数
+        self._entries: OrderedDict[Tuple[Path, str], Tuple[Tuple[int, int], int, _Fragment]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[Path, str], signature: Tuple[int, int], digest: str | None = None) -> _Fragment | None:
+        """
+        キャッシュしたフラグメントを返す.
+
+        Args:
+            key: (絶対パス, バックエンド).
+            signature: ファイルの (更新時刻 [ns], サイズ).
+            digest: 指定した場合, signature が異なっても内容のハッシュが同じであれば返す.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_signature, size, fragment = entry
+            if cached_signature != signature:
+                if digest is None or digest != fragment.file.digest:
+                    return None
+                self._entries[key] = (signature, size, fragment)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def put(self, key: Tuple[Path, str], signature: Tuple[int, int], size: int, fragment: _Fragment):
+        """フラグメントを保存する (再利用できないフラグメントは保存しない)."""
+        with self._lock:
+            self.misses += 1
+            if not fragment.cacheable or size > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (signature, size, fragment)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+def _load_fragment(name: str, path: Path, backend: str, cache: FragmentCache | None) -> _Fragment:
+    """1 ファイルを読み込んで組み立てる (キャッシュにあれば再利用する)."""
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = (path, backend)
+    if cache is not None:
+        fragment = cache.get(key, signature)
+        if fragment is not None:
+            return fragment
+    content = path.read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    if cache is not None:
+        fragment = cache.get(key, signature, digest)
+        if fragment is not None:
+            return fragment
+    stream = io.StringIO(content.decode('utf-8'))
+    stream.name = name # ノードの Mark.name
+    loader = get_loader_class(backend)(stream)
+    try:
+        node = loader.get_single_node()
+    finally:
+        loader.dispose()
+    sites, has_merge_keys = find_include_sites(node) if node is not None else ([], False)
+    fragment = _Fragment(IncludedFile(name, path, digest), node, sites, not has_merge_keys)
+    if cache is not None:
+        cache.put(key, signature, len(content), fragment)
+    return fragment
+
+class IncludeResolver:
+    """
+    1 つの文書の !include を取り込む.
+
+        resolver = IncludeResolver(Path('data_dependencies.yml'))
+        root = resolver.expand(root) # 組み立てたルートのノード
+        resolver.files # 取り込んだファイル
+        resolver.paths # 読み込もうとしたファイルとディレクトリ (変更の監視用)
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        yaml_backend: str | None = None,
+        cache: FragmentCache | None = None,
+        jobs: int = DEFAULT_JOBS,
+    ):
+        """
+        Args:
+            file_path: 文書のファイルパス (相対パスの基準).
+            yaml_backend: YAML ローダーのバックエンド (custom_yaml_loader.resolve_yaml_backend 参照).
+            cache: フラグメントのキャッシュ. None の場合は毎回読み込む.
+            jobs: 並列に読み込むファイル数の上限.
+        """
+        self.file_path = Path(file_path)
+        self.yaml_backend = resolve_yaml_backend(yaml_backend)
+        self.cache = cache
+        self.jobs = max(1, jobs)
+        self.files: List[IncludedFile] = [] # 取り込んだファイル (取り込んだ順, 重複なし)
+        self._paths: Dict[Path, None] = {}
+        self._fragments: Dict[Path, _Fragment] = {}
+
+    @property
+    def paths(self) -> List[Path]:
+        """
+        !include で指定されたファイルとディレクトリの絶対パス (存在しないものを含む).
+
+        expand が例外を送出した場合も, それまでに指定されたものを返す. これらが変更されなければ結果は変わらない.
+        """
+        return list(self._paths)
+
+    def expand(self, root: Node) -> Node:
+        """
+        root 以下の !include をフラグメントのノードで置き換えたノードを返す.
+
+        root と, キャッシュしたフラグメントのノードは変更しない (置き換える位置までのコンテナは複製する).
+
+        Raises:
+            IncludeError: 取り込めない !include がある場合.
+            yaml.YAMLError: フラグメントが YAML として不正な場合.
+        """
+        self.files = []
+        self._paths = {}
+        self._fragments = {}
+        sites, _ = find_include_sites(root)
+        if not sites:
+            return root
+        base = os.path.dirname(str(self.file_path))
+        self._prefetch(sites, base)
+        return self._replace(root, sites, base, ((self.file_path.resolve(), str(self.file_path)),))
+
+    def _prefetch(self, sites: List[Site], base: str):
+        """取り込むファイルを, 文書からの段階ごとに並列に読み込む."""
+        pending = [(base, sites)]
+        while pending:
+            targets: Dict[Path, str] = {}
+            for fragment_base, fragment_sites in pending:
+                for _, include_node in fragment_sites:
+                    try:
+                        _, files = self._targets(include_node, fragment_base)
+                    except IncludeError:
+                        continue # 置き換えるときに報告する (エラーを文書の順に報告するため)
+                    for name, path in files:
+                        if path not in self._fragments:
+                            targets.setdefault(path, name)
+            loaded = self._load_all([(name, path) for path, name in targets.items()])
+            self._fragments.update(loaded)
+            pending = [(os.path.dirname(fragment.file.name), fragment.sites) for fragment in loaded.values() if fragment.sites]
+
+    def _load_all(self, targets: Sequence[Tuple[str, Path]]) -> Dict[Path, _Fragment]:
+        backend, cache = self.yaml_backend, self.cache
+        if len(targets) <= 1 or self.jobs == 1:
+            return {path: _load_fragment(name, path, backend, cache) for name, path in targets}
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(targets))) as executor:
+            futures = [(path, executor.submit(_load_fragment, name, path, backend, cache)) for name, path in targets]
+            return {path: future.result() for path, future in futures}
+
+    def _targets(self, include_node: ScalarNode, base: str) -> Tuple[str | None, List[Tuple[str, Path]]]:
+        """
+        !include が取り込むファイル.
+
+        Returns:
+            (ディレクトリの場合はその表示するパス, ファイルの (表示するパス, 絶対パス) のリスト).
+            ディレクトリの場合, ファイルはファイル名の順.
+        """
+        value = include_node.value
+        if not value:
+            raise IncludeError(None, None, "!include requires a file or directory path", include_node.start_mark)
+        name = os.path.normpath(os.path.join(base, value))
+        path = Path(name).resolve()
+        self._paths[path] = None
+        if path.is_dir():
+            files = sorted(p for p in path.iterdir() if p.suffix in FRAGMENT_SUFFIXES and p.is_file())
+            self._paths.update(dict.fromkeys(files))
+            return name, [(os.path.join(name, p.name), p) for p in files]
+        if not path.is_file():
+            raise IncludeError(None, None, f"Included file not found: {name}", include_node.start_mark)
+        return None, [(name, path)]
+
+    def _replace(self, node: Node, sites: List[Site], base: str, stack: Tuple[Tuple[Path, str], ...]) -> Node:
+        """node 以下の sites (node からの位置) を置き換えたノードを返す."""
+        children: Dict[int, List[Site]] = {}
+        for path, include_node in sites:
+            if not path:
+                return self._include(include_node, base, stack)
+            children.setdefault(path[0], []).append((path[1:], include_node))
+        value = list(node.value)
+        for index, child_sites in children.items():
+            if isinstance(node, MappingNode):
+                key_node, value_node = value[index]
+                value[index] = (key_node, self._replace(value_node, child_sites, base, stack))
+            else:
+                value[index] = self._replace(value[index], child_sites, base, stack)
+        return type(node)(node.tag, value, node.start_mark, node.end_mark, flow_style=node.flow_style)
+
+    def _include(self, include_node: ScalarNode, base: str, stack: Tuple[Tuple[Path, str], ...]) -> Node:
+        """
+        !include のノードを, 取り込むファイルのノードにする.
+
+        Args:
+            stack: 取り込みの経路 (文書から順の (絶対パス, 表示するパス)). 循環の検出に使用する.
+        """
+        directory, targets = self._targets(include_node, base)
+        nodes = []
+        for name, path in targets:
+            ancestors = [ancestor for ancestor, _ in stack]
+            if path in ancestors:
+                chain = ' -> '.join([*(ancestor_name for _, ancestor_name in stack[ancestors.index(path):]), name])
+                raise IncludeError(None, None, f"Circular !include: {chain}", include_node.start_mark)
+            fragment = self._fragments.get(path)
+            if fragment is None:
+                # 先読みの後に作成されたファイルなど
+                fragment = self._fragments[path] = _load_fragment(name, path, self.yaml_backend, self.cache)
+            if fragment.file not in self.files:
+                self.files.append(fragment.file)
+            node = fragment.node
+            if node is not None and fragment.sites:
+                node = self._replace(node, fragment.sites, os.path.dirname(fragment.file.name), stack + ((path, name),))
+            if directory is not None and node is not None and not isinstance(node, MappingNode):
+                raise IncludeError(
+                    f"while including the directory {directory}", include_node.start_mark,
+                    f"expected a mapping, but found {node.id}", node.start_mark,
+                )
+            nodes.append(node)
+        if directory is not None:
+            # 各ファイルのキーを 1 つのマッピングにまとめる (ファイルをまたぐ重複は構築時に検出される)
+            value = [pair for node in nodes if node is not None for pair in node.value]
+            return MappingNode(_MAP_TAG, value, include_node.start_mark, include_node.end_mark)
+        if nodes[0] is None:
+            return ScalarNode(_NULL_TAG, '', include_node.start_mark, include_node.end_mark)
+        return nodes[0]
@@ -0,0 +1,185 @@
+# 差分のあったエントリに関係するルールのみを再実行するインクリメンタルバリデーター
+#
+# 同じファイルを繰り返し検証する場合 (watch モードなど) に使用する.
+# 前回読み込んだ文書とエントリ単位で比較し, 次のものだけを再実行する.
+#
+# * エントリ単位のイベント (Rule.visit_data など): 変更されたエントリ, および変更されたエントリを
+#   required_data / required_parameter / 可変長列 (name*) で参照しているエントリ.
+# * 文書全体のイベント (Rule.visit_metadata, Rule.finish): そのルールの入力
+#   (キー集合, 依存関係の辺集合など) が変化した場合.
+#
+# 結果 (エラー/警告とその順序) は DataDependenciesValidator の全体実行と一致する.
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence, Set, Tuple
+
+from .data_dependencies_validator import DataDependenciesValidator
+from .rule_engine import RuleContext, RuleEngine, RuleResult, RuleResults
+
+_MISSING = object()
+
+def _data_references(data_def: dict) -> Set[str]:
+    """data エントリが参照している名前 (required_data, required_parameter, 可変長列の参照先) を返す."""
+    refs = set()
+    for key in ('required_data', 'required_parameter'):
+        values = data_def.get(key)
+        if isinstance(values, list):
+            refs.update(v for v in values if isinstance(v, str))
+    columns = data_def.get('columns')
+    if isinstance(columns, list):
+        for column in columns:
+            name = column.get('name') if isinstance(column, dict) else None
+            if isinstance(name, str) and name.endswith('*'):
+                refs.add(name[:-1])
+    return refs
+
+def _dependency_edges(validator: DataDependenciesValidator) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """
+    required_data による依存関係の辺を返す.
+
+    循環経路の探索順が required_data の並びに依存するため, 集合ではなく順序付きで比較する.
+    """
+    return tuple(
+        (name, tuple(data_def['required_data']))
+        for name, data_def in validator._section_items('data')
+        if isinstance(data_def.get('required_data'), list)
+    )
+
+@dataclass
+class IncrementalStats:
+    """直前のカスタムルール実行で再実行した対象の内訳."""
+    full_run: bool = True # 前回の結果を使用せずにすべて実行したか
+    rerun_data: Set[str] = field(default_factory=set) # エントリ単位のルールを再実行した data
+    rerun_parameters: Set[str] = field(default_factory=set) # 同 parameter
+    rerun_global_rules: List[str] = field(default_factory=list) # 再実行した文書全体のルール ID
+
+@dataclass
+class _Snapshot:
+    """前回のカスタムルール実行時の文書と結果."""
+    data: Dict[str, Any]
+    parameters: Dict[str, Any]
+    param_section_exists: bool
+    global_inputs: Dict[str, Any] # ルール ID -> 文書全体のイベントの入力
+    results: RuleResults
+    engine: RuleEngine # 結果を得たときのエンジン (ルールの登録内容が変わった場合は再利用しない)
+
+class IncrementalDataDependenciesValidator(DataDependenciesValidator):
+    """
+    前回の検証結果を再利用し, 変更の影響を受けるルールのみを再実行するバリデーター.
+
+    同じインスタンスで validate() を繰り返し呼び出すことで差分検証が行われる.
+    YAML の読み込みとスキーマ検証は毎回全体に対して行う.
+    """
+
+    # 文書全体のルールの入力を返す関数. 前回と値が等しければ前回の結果を再利用する.
+    # ここにないルール (register_rule で追加したものなど) は毎回実行する.
+    GLOBAL_RULE_INPUTS: Dict[str, Callable[[DataDependenciesValidator], Any]] = {
+        'target_references': lambda v: (v.data.get('target'), frozenset(v._data_keys)),
+        'uniqueness': lambda v: (tuple(v.data['data']), frozenset(v._param_keys)),
+        'circular_dependencies': lambda v: (tuple(v.data['data']), _dependency_edges(v)),
+        'metadata_warnings': lambda v: v.data.get('metadata'),
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 前回カスタムルールを実行した文書とその結果. 文書と結果の組で保持するため,
+        # 途中でスキーマエラー等により実行されない回があっても差分の基準として使える
+        self._previous: _Snapshot | None = None
+        self.stats = IncrementalStats()
+
+    def reset(self):
+        """前回の結果を破棄する (次回の validate() は全体を実行する)."""
+        self._previous = None
+
+    def _run_custom_rules(self):
+        """前回の結果を再利用しながら, 変更の影響を受けるエントリとルールのみを実行する."""
+        previous = self._previous
+        engine = self.rules.engine()
+        if previous is not None and previous.engine is not engine:
+            previous = None # ルールの登録内容が変わった
+        data_items = self._section_items('data')
+        param_items = self._section_items('parameter')
+        data = dict(data_items)
+        parameters = dict(param_items)
+        param_section_exists = isinstance(self.data.get('parameter'), dict)
+
+        # --- 再実行が必要なエントリの決定 ---
+        if previous is None or previous.param_section_exists != param_section_exists:
+            # 初回, または parameter セクションの有無が変わった (全 data の参照チェックに影響する)
+            dirty_data = set(data)
+            dirty_params = set(parameters)
+            full_run = True
+        else:
+            changed = {name for name, d in data_items if previous.data.get(name, _MISSING) != d}
+            changed |= previous.data.keys() - data.keys()
+            changed_params = {name for name, p in param_items if previous.parameters.get(name, _MISSING) != p}
+            changed_params |= previous.parameters.keys() - parameters.keys()
+            changed_names = changed | changed_params
+            dirty_data = {
+                name for name, d in data_items
+                if name in changed or not _data_references(d).isdisjoint(changed_names)
+            } if changed_names else set()
+            dirty_params = changed_params & parameters.keys()
+            full_run = False
+
+        self.stats = IncrementalStats(full_run, dirty_data, dirty_params)
+        spec = self.spec
+        ctx = RuleContext(spec, self.data, self.profiler)
+
+        # --- エントリ単位のイベント: 再実行が必要なエントリのみを走査する ---
+        if full_run:
+            data_results, param_results = engine.visit_entries(ctx, spec.data, spec.parameters)
+        else:
+            fresh_data, fresh_params = engine.visit_entries(
+                ctx,
+                [entry for entry in spec.data if entry.name in dirty_data],
+                [param for param in spec.parameters if param.name in dirty_params],
+            )
+            data_results = {
+                rule_id: _merge(spec.data, dirty_data, fresh_data[rule_id], previous.results.data.get(rule_id, {}))
+                for rule_id in engine.rule_ids
+            }
+            param_results = {
+                rule_id: _merge(spec.parameters, dirty_params, fresh_params[rule_id], previous.results.parameter.get(rule_id, {}))
+                for rule_id in engine.rule_ids
+            }
+
+        # --- 文書全体のイベント: 入力が変化したルールのみを実行する ---
+        global_inputs: Dict[str, Any] = {}
+        document_results = {}
+        for rule in engine.rules:
+            if not engine.has_document_events(rule.rule_id):
+                continue
+            input_fn = self.GLOBAL_RULE_INPUTS.get(rule.rule_id)
+            rule_input = input_fn(self) if input_fn is not None else _MISSING
+            global_inputs[rule.rule_id] = rule_input
+            if (
+                rule_input is not _MISSING
+                and previous is not None
+                and previous.global_inputs.get(rule.rule_id, _MISSING) == rule_input
+            ):
+                if rule.rule_id in previous.results.document:
+                    document_results[rule.rule_id] = previous.results.document[rule.rule_id]
+            else:
+                self.stats.rerun_global_rules.append(rule.rule_id)
+        document_results.update(engine.visit_document(ctx, self.stats.rerun_global_rules))
+
+        results = RuleResults(data_results, param_results, document_results)
+        errors, warnings = engine.collect(results)
+        self.errors.extend(errors)
+        self.warnings.extend(warnings)
+        self._previous = _Snapshot(data, parameters, param_section_exists, global_inputs, results, engine)
+
+def _merge(
+    entries: Sequence[Any],
+    dirty: Set[str],
+    fresh: Dict[str, RuleResult],
+    previous: Dict[str, RuleResult],
+) -> Dict[str, RuleResult]:
+    """再実行したエントリの結果と前回の結果を, エントリの順に合わせる."""
+    merged = {}
+    for entry in entries:
+        result = (fresh if entry.name in dirty else previous).get(entry.name)
+        if result is not None:
+            merged[entry.name] = result
+    return merged
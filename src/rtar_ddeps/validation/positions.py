@@ -0,0 +1,121 @@
+# 診断 (エラー/警告) の位置の索引
+#
+# YAML の読み込み時 (組み立てたノードの木を構築する前) に, 文書内のパス -> (行, 列) の索引を作る.
+# スキーマ検証やカスタムルールのエラー/警告はパス (['data', 'a', 'columns', '0'] など) で報告されるため,
+# 検証の最後にこの索引で位置を引き, Diagnostic に付加する (ファイルを再びパースしない).
+#
+# * マッピングの要素はキーの位置, シーケンスの要素は要素の位置を記録する. ルートは () に記録する.
+# * パスの要素はすべて文字列 (キーはスカラーの表記, シーケンスの位置は str(位置)).
+# * 文書にないパス (必須キーの欠落など) は, 存在する最も長い親のパスの位置になる.
+# * エイリアスはノードを持たないため, エイリアスの位置はアンカーの位置になる.
+#   エイリアスの先の要素は最初に現れた位置でのみ記録する.
+# * !include (includes.py) で取り込んだノードは, add_files で登録したファイルの位置として記録する.
+
+from typing import Dict, Iterable, List, Tuple
+
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+# 位置は (ファイル << _FILE_SHIFT) | (行 << _COLUMN_BITS) | 列 の 1 つの整数として保持する (タプルより小さいため).
+# ファイルは add_files で登録した順の番号 (1 始まり) で, 文書自身のファイルは 0
+_COLUMN_BITS = 32
+_COLUMN_MASK = (1 << _COLUMN_BITS) - 1
+_FILE_SHIFT = 64
+_LINE_MASK = (1 << (_FILE_SHIFT - _COLUMN_BITS)) - 1
+
+Position = Tuple[int, int] # (行, 列). いずれも 1 始まり
+Location = Tuple[str | None, int, int] # (ファイル, 行, 列). ファイルは文書自身の場合 None
+
+def _pack(node: Node) -> int:
+    mark = node.start_mark
+    return ((mark.line + 1) << _COLUMN_BITS) | (mark.column + 1)
+
+class PositionIndex:
+    """
+    文書内のパス -> 位置 (1 始まりの行と列) の索引.
+
+        index = PositionIndex()
+        index.add(node) # 組み立てたノード (ルート)
+        index.lookup(['data', 'a', 'columns', '0']) # (12, 9)
+    """
+    __slots__ = ('_positions', '_files', '_file_ids')
+
+    def __init__(self):
+        self._positions: Dict[Tuple[str, ...], int] = {}
+        self._files: List[str] = [] # 番号 - 1 -> ファイル名
+        self._file_ids: Dict[str, int] = {} # ファイル名 (Mark.name) -> 番号
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, node: Node, path: Tuple[str, ...] = (), max_depth: int | None = None):
+        """
+        node を path の値として, node とその下のキー/要素の位置を登録する.
+
+        Args:
+            node: 組み立てたノード.
+            path: node のパス. 既に登録されている場合 (キーの位置) は上書きしない.
+            max_depth: 指定した場合, この長さを超えるパスは登録しない.
+        """
+        positions = self._positions
+        pack = self._pack_with_file if self._file_ids else _pack
+        positions.setdefault(path, pack(node))
+        seen = set()
+        stack = [(node, path)]
+        while stack:
+            node, path = stack.pop()
+            if id(node) in seen or (max_depth is not None and len(path) >= max_depth):
+                continue
+            seen.add(id(node))
+            if isinstance(node, MappingNode):
+                children = [(key_node, value_node, path + (key_node.value,))
+                            for key_node, value_node in node.value if isinstance(key_node, ScalarNode)]
+            elif isinstance(node, SequenceNode):
+                children = [(item, item, path + (str(i),)) for i, item in enumerate(node.value)]
+            else:
+                continue
+            for mark_node, _, child in children:
+                if child not in positions:
+                    positions[child] = pack(mark_node)
+            # 文書の順に走査する (エイリアスの先は最初に現れた位置で記録するため)
+            stack.extend((value_node, child) for _, value_node, child in reversed(children) if not isinstance(value_node, ScalarNode))
+
+    def add_files(self, names: Iterable[str]):
+        """文書に取り込んだファイル (ノードの Mark.name) を登録する. add の前に呼び出す."""
+        for name in names:
+            if name not in self._file_ids:
+                self._files.append(name)
+                self._file_ids[name] = len(self._files)
+
+    def _pack_with_file(self, node: Node) -> int:
+        return (self._file_ids.get(node.start_mark.name, 0) << _FILE_SHIFT) | _pack(node)
+
+    def add_key(self, path: Tuple[str, ...], key_node: Node):
+        """キーの位置を登録する (値のノードを登録しない場合)."""
+        self._positions.setdefault(path, _pack(key_node))
+
+    def lookup(self, path: Iterable[str]) -> Position | None:
+        """
+        パスの位置を返す. パスが文書にない場合は, 存在する最も長い親のパスの位置.
+
+        Returns:
+            (行, 列). 索引が空の場合は None.
+        """
+        location = self.locate(path)
+        return location[1:] if location is not None else None
+
+    def locate(self, path: Iterable[str]) -> Location | None:
+        """
+        lookup と同じだが, 取り込んだファイル内の位置の場合はそのファイル名も返す.
+
+        Returns:
+            (ファイル, 行, 列). ファイルは文書自身の場合 None. 索引が空の場合は None.
+        """
+        positions = self._positions
+        path = tuple(path)
+        for end in range(len(path), -1, -1):
+            packed = positions.get(path[:end])
+            if packed is not None:
+                file_id = packed >> _FILE_SHIFT
+                file = self._files[file_id - 1] if file_id else None
+                return file, (packed >> _COLUMN_BITS) & _LINE_MASK, packed & _COLUMN_MASK
+        return None
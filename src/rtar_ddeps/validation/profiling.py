@@ -0,0 +1,204 @@
+# バリデーションのフェーズ/ルールごとの実行時間とメモリの計測
+#
+# BaseValidator.validate(profiler=...) に Profiler を渡すと, フェーズ (YAML 読み込み, スキーマ検証など) と
+# カスタムルールごとに, 呼び出し回数, 実行時間 (wall-clock), tracemalloc によるピークメモリを記録する.
+# 結果は表形式で出力でき, Chrome のトレースイベント形式 (chrome://tracing, Perfetto で表示できる) の
+# JSON としても書き出せる.
+#
+# Profiler を渡さない場合は NULL_PROFILER (何もしない) が使われ, 計測のコストはかからない.
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+@dataclass
+class SpanStats:
+    """同じ名前の区間の集計."""
+    category: str
+    calls: int = 0
+    total_ns: int = 0 # 実行時間の合計
+    peak_bytes: int = 0 # 区間の開始時点からのメモリ増分のピーク (全呼び出し中の最大)
+
+class _Span:
+    """Profiler.span が返すコンテキストマネージャー."""
+    __slots__ = ('profiler', 'name', 'category', 'trace', 'args', 'start_ns', 'start_bytes', 'max_bytes')
+
+    def __init__(self, profiler: 'Profiler', name: str, category: str, trace: bool, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.trace = trace
+        self.args = args
+
+    def __enter__(self):
+        profiler = self.profiler
+        if self.name not in profiler.stats:
+            # 表が外側の区間から並ぶように, 集計は区間の開始時に登録する
+            profiler.stats[self.name] = SpanStats(self.category)
+        if profiler.memory and tracemalloc.is_tracing():
+            # 区間ごとのピークを測るため tracemalloc のピークをリセットする.
+            # リセット前のピークは開いている外側の区間に反映しておく
+            current, peak = tracemalloc.get_traced_memory()
+            for span in profiler._stack:
+                span.max_bytes = max(span.max_bytes, peak)
+            tracemalloc.reset_peak()
+            self.start_bytes = self.max_bytes = current
+        else:
+            self.start_bytes = self.max_bytes = 0
+        profiler._stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end_ns = time.perf_counter_ns()
+        profiler = self.profiler
+        profiler._stack.pop()
+        if profiler.memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            self.max_bytes = max(self.max_bytes, peak)
+            for span in profiler._stack:
+                span.max_bytes = max(span.max_bytes, peak)
+        profiler._record(self, end_ns)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class NullProfiler:
+    """計測を行わないプロファイラー (デフォルト)."""
+    enabled = False
+
+    def span(self, name: str, category: str = 'phase', trace: bool = True, **args) -> _NullSpan:
+        return _NULL_SPAN
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_PROFILER = NullProfiler()
+
+class Profiler:
+    """
+    区間 (フェーズ, ルール) ごとの呼び出し回数, 実行時間, ピークメモリを記録する.
+
+    with profiler: の間 tracemalloc を有効にする (既に有効な場合はそのまま使う).
+    tracemalloc はメモリ割り当てを遅くするため, memory=False で無効にできる.
+
+        profiler = Profiler()
+        validator.validate(profiler=profiler)
+        print(profiler.format_table())
+        profiler.write_chrome_trace("trace.json")
+    """
+    enabled = True
+
+    def __init__(self, memory: bool = True):
+        """
+        Args:
+            memory: True の場合 tracemalloc でピークメモリを計測する.
+        """
+        self.memory = memory
+        self.stats: Dict[str, SpanStats] = {} # 名前 -> 集計 (最初に開始された順)
+        self.events: List[Dict[str, Any]] = [] # Chrome トレースイベント
+        self._stack: List[_Span] = []
+        self._depth = 0
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self._depth == 0 and self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return False
+
+    def __getstate__(self):
+        # プロセスプールのワーカーから結果を返すため, 計測中の状態を除いて pickle する
+        state = self.__dict__.copy()
+        state.update(_stack=[], _depth=0, _started_tracemalloc=False)
+        return state
+
+    def span(self, name: str, category: str = 'phase', trace: bool = True, **args) -> _Span:
+        """
+        計測する区間を返す (with 文で使用する).
+
+        Args:
+            name: 区間の名前. 同じ名前の区間は集計される.
+            category: 区間の種類 ('phase', 'rule' など).
+            trace: False の場合は集計のみを行い, トレースイベントを記録しない
+                (多数回呼び出される区間でトレースが大きくなりすぎないようにするため).
+            args: トレースイベントに付加する情報.
+        """
+        return _Span(self, name, category, trace, args)
+
+    def _record(self, span: _Span, end_ns: int):
+        stats = self.stats[span.name]
+        duration_ns = end_ns - span.start_ns
+        peak_bytes = span.max_bytes - span.start_bytes
+        stats.calls += 1
+        stats.total_ns += duration_ns
+        stats.peak_bytes = max(stats.peak_bytes, peak_bytes)
+        if span.trace:
+            args = dict(span.args)
+            if self.memory:
+                args['peak_bytes'] = peak_bytes
+            self.events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': span.start_ns / 1000,
+                'dur': duration_ns / 1000,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            })
+
+    def merge(self, other: 'Profiler'):
+        """別のプロファイラー (他のファイル, 他のプロセス) の結果を加える."""
+        for name, other_stats in other.stats.items():
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = SpanStats(other_stats.category)
+            stats.calls += other_stats.calls
+            stats.total_ns += other_stats.total_ns
+            stats.peak_bytes = max(stats.peak_bytes, other_stats.peak_bytes)
+        self.events.extend(other.events)
+
+    def format_table(self) -> str:
+        """集計結果を表形式の文字列にする (最初に開始された順)."""
+        width = max([len(name) for name in self.stats] + [len("name")])
+        lines = [f"{'name':<{width}} {'calls':>8} {'total[ms]':>10} {'mean[ms]':>10} {'peak[KiB]':>10}"]
+        for name, stats in self.stats.items():
+            total_ms = stats.total_ns / 1e6
+            peak = f"{stats.peak_bytes / 1024:.1f}" if self.memory else "-"
+            lines.append(f"{name:<{width}} {stats.calls:>8} {total_ms:>10.2f} {total_ms / stats.calls:>10.3f} {peak:>10}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome のトレースイベント形式 (JSON Object Format) の辞書を返す."""
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: Path | str):
+        """Chrome のトレースイベント形式の JSON をファイルに書き出す."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
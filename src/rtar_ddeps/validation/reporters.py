@@ -0,0 +1,267 @@
+# 複数ファイルの検証結果の出力 (レポーター)
+#
+# validate_files が返す FileResult を 1 件ずつ受け取り, 形式ごとに出力する.
+# 結果を集めてから出力するのではなく, 届いた順に書き出して捨てるため,
+# ファイル数が多くてもメモリ使用量は (集計の数値を除いて) 増えない.
+#
+# * text: 従来の人が読むための出力 (バリデーターの出力 + 集計行).
+# * jsonl: 1 行 1 件の JSON (JSON Lines). 診断ごとの行, ファイルごとの行, 最後に集計の行.
+#   行単位で読み込めるため, 大きな出力でも全体をパースせずに取り込める.
+# * sarif: SARIF 2.1.0 (GitHub code scanning などが取り込む形式). 1 つの JSON 文書だが,
+#   results の要素を順に書き出す.
+#
+# 出力はいずれも BufferedWriter を通して, ある程度まとめてから書き込む.
+
+import abc
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, TextIO
+
+from .batch import FileResult
+from .diagnostics import Diagnostic, as_diagnostic
+from .result_cache import package_version
+from ..settings import REPORT_FORMATS
+
+SARIF_VERSION = '2.1.0'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+TOOL_NAME = 'rtar-ddeps'
+
+# BufferedWriter が書き込みをまとめる大きさ (文字数)
+_DEFAULT_BUFFER_SIZE = 64 * 1024
+
+@dataclass
+class BatchSummary:
+    """検証したファイル数などの集計 (結果そのものは保持しない)."""
+    files: int = 0
+    failed: int = 0
+    warned: int = 0 # 成功したが警告のあるファイル数
+    cache_hits: int = 0
+
+    @property
+    def passed(self) -> int:
+        return self.files - self.failed
+
+    def add(self, result: FileResult):
+        """1 ファイル分の結果を集計に加える."""
+        self.files += 1
+        if not result.is_valid:
+            self.failed += 1
+        elif result.warnings:
+            self.warned += 1
+        if result.cache_hit:
+            self.cache_hits += 1
+
+class BufferedWriter:
+    """
+    文字列を溜めて, buffer_size 文字を超えたらまとめて stream に書き込む.
+
+    flush_each_report が True の場合 (端末への出力など) は, ファイルごとの出力の後にも書き込む.
+    """
+
+    def __init__(self, stream: TextIO, buffer_size: int = _DEFAULT_BUFFER_SIZE, flush_each_report: bool | None = None):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        if flush_each_report is None:
+            isatty = getattr(stream, 'isatty', None)
+            flush_each_report = bool(isatty and isatty())
+        self.flush_each_report = flush_each_report
+        self._parts: list[str] = []
+        self._size = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def end_report(self):
+        """1 ファイル分の出力の終わり."""
+        if self.flush_each_report:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.stream.write(''.join(self._parts))
+            self._parts.clear()
+            self._size = 0
+        self.stream.flush()
+
+class Reporter(abc.ABC):
+    """
+    レポーターの基底クラス.
+
+        reporter = JsonLinesReporter(sys.stdout)
+        reporter.start()
+        for result in validate_files(...):
+            reporter.report(result)
+        reporter.finish()
+
+    start, report (ファイルごと), finish の順に呼び出す. finish は集計を返す.
+    """
+    # True の場合, report には FileResult.output (バリデーターの出力) が必要になる
+    # (validate_files の capture_output に渡す)
+    captures_output = False
+
+    def __init__(self, stream: TextIO, buffer_size: int = _DEFAULT_BUFFER_SIZE):
+        self.out = BufferedWriter(stream, buffer_size)
+        self.summary = BatchSummary()
+
+    def start(self):
+        """最初のファイルの前に呼び出される."""
+
+    def report(self, result: FileResult):
+        """1 ファイル分の結果を出力する."""
+        self.summary.add(result)
+        self._write_result(result)
+        self.out.end_report()
+
+    def finish(self) -> BatchSummary:
+        """最後のファイルの後に呼び出される. 残りを出力して集計を返す."""
+        self._write_summary(self.summary)
+        self.out.flush()
+        return self.summary
+
+    @abc.abstractmethod
+    def _write_result(self, result: FileResult):
+        """1 ファイル分の結果を書き込む. 具象サブクラスで実装する."""
+
+    def _write_summary(self, summary: BatchSummary):
+        """集計を出力する (出力しない形式もある)."""
+
+def _diagnostics(result: FileResult) -> Iterable[Diagnostic]:
+    """ファイルのエラーと警告 (エラーが先)."""
+    for error in result.errors:
+        yield as_diagnostic(error, 'error')
+    for warning in result.warnings:
+        yield as_diagnostic(warning, 'warning')
+
+def _uri(path: Path) -> str:
+    return path.as_uri() if path.is_absolute() else path.as_posix()
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+class TextReporter(Reporter):
+    """人が読むための出力 (バリデーターの出力をファイル順に並べ, 複数ファイルの場合は集計行を付ける)."""
+    captures_output = True
+
+    def _write_result(self, result: FileResult):
+        self.out.write(f"Validating data dependencies file: {result.file_path}\n")
+        self.out.write(result.output)
+
+    def _write_summary(self, summary: BatchSummary):
+        if summary.files > 1:
+            self.out.write(
+                f"\nSummary: {summary.files} files validated, {summary.passed} passed "
+                f"({summary.warned} with warnings), {summary.failed} failed.\n"
+            )
+
+class JsonLinesReporter(Reporter):
+    """
+    JSON Lines 形式の出力. 1 行が 1 つの JSON オブジェクトで, type で種類を区別する.
+
+    * diagnostic: file, severity, rule_id, path (文字列のリスト. 文書全体は null), message, line, column,
+      source (位置が !include で取り込んだファイル内の場合はそのパス. それ以外は null).
+    * file: file, valid, errors, warnings (件数), cache_hit (キャッシュ無効時は null). ファイルの診断の後に出力する.
+    * summary: files, passed, failed, warned, cache_hits. 最後に 1 行だけ出力する.
+    """
+
+    def _write_result(self, result: FileResult):
+        file = str(result.file_path)
+        write = self.out.write
+        for diagnostic in _diagnostics(result):
+            write(_dumps({
+                'type': 'diagnostic',
+                'file': file,
+                'severity': diagnostic.severity,
+                'rule_id': diagnostic.rule_id,
+                'path': list(diagnostic.path) if diagnostic.path is not None else None,
+                'message': diagnostic.message,
+                'line': diagnostic.line,
+                'column': diagnostic.column,
+                'source': diagnostic.file,
+            }) + '\n')
+        write(_dumps({
+            'type': 'file',
+            'file': file,
+            'valid': result.is_valid,
+            'errors': len(result.errors),
+            'warnings': len(result.warnings),
+            'cache_hit': result.cache_hit,
+        }) + '\n')
+
+    def _write_summary(self, summary: BatchSummary):
+        self.out.write(_dumps({
+            'type': 'summary',
+            'files': summary.files,
+            'passed': summary.passed,
+            'failed': summary.failed,
+            'warned': summary.warned,
+            'cache_hits': summary.cache_hits,
+        }) + '\n')
+
+class SarifReporter(Reporter):
+    """
+    SARIF 2.1.0 形式の出力. 1 回の実行 (runs の要素 1 つ) に, すべてのファイルの診断を results として並べる.
+
+    文書の先頭と末尾は固定なので, results の要素のみを届いた順に書き出す.
+    ruleId は Diagnostic.rule_id, 位置は artifactLocation (ファイルの URI. !include で取り込んだファイル内の場合はそのファイル) と region (行, 列),
+    文書内のパスは logicalLocations の fullyQualifiedName ("data.a.columns.0" など) で表す.
+    """
+
+    def __init__(self, stream: TextIO, buffer_size: int = _DEFAULT_BUFFER_SIZE):
+        super().__init__(stream, buffer_size)
+        self._first = True # 最初の results の要素 (前に "," を付けない)
+
+    def start(self):
+        driver = {'name': TOOL_NAME, 'version': package_version()}
+        header = _dumps({'$schema': SARIF_SCHEMA, 'version': SARIF_VERSION, 'runs': [{'tool': {'driver': driver}, 'results': []}]})
+        # 末尾の "]}]}" (results, runs の要素, runs, 文書) を除き, results の要素を続けて書けるようにする
+        self.out.write(header[:-len(']}]}')])
+
+    def _write_result(self, result: FileResult):
+        uri = _uri(result.file_path)
+        for diagnostic in _diagnostics(result):
+            diagnostic_uri = _uri(Path(diagnostic.file)) if diagnostic.file is not None else uri
+            self.out.write(('' if self._first else ',') + _dumps(self._sarif_result(diagnostic_uri, diagnostic)))
+            self._first = False
+
+    @staticmethod
+    def _sarif_result(uri: str, diagnostic: Diagnostic) -> Dict[str, Any]:
+        physical: Dict[str, Any] = {'artifactLocation': {'uri': uri}}
+        if diagnostic.line is not None:
+            physical['region'] = {'startLine': diagnostic.line, 'startColumn': diagnostic.column}
+        location: Dict[str, Any] = {'physicalLocation': physical}
+        if diagnostic.path:
+            location['logicalLocations'] = [{'fullyQualifiedName': '.'.join(diagnostic.path)}]
+        sarif_result: Dict[str, Any] = {
+            'level': diagnostic.severity,
+            'message': {'text': diagnostic.message},
+            'locations': [location],
+        }
+        if diagnostic.rule_id is not None:
+            sarif_result = {'ruleId': diagnostic.rule_id, **sarif_result}
+        return sarif_result
+
+    def _write_summary(self, summary: BatchSummary):
+        self.out.write(']}]}\n')
+
+_REPORTERS = {
+    'text': TextReporter,
+    'jsonl': JsonLinesReporter,
+    'sarif': SarifReporter,
+}
+
+def create_reporter(report_format: str, stream: TextIO) -> Reporter:
+    """
+    形式名 (REPORT_FORMATS のいずれか) に対応するレポーターを作成する.
+
+    Raises:
+        ValueError: 未知の形式の場合.
+    """
+    try:
+        reporter_class = _REPORTERS[report_format]
+    except KeyError:
+        raise ValueError(f"Unknown report format '{report_format}'. Allowed values are: {', '.join(REPORT_FORMATS)}") from None
+    return reporter_class(stream)
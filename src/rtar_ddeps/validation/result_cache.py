@@ -0,0 +1,229 @@
+# バリデーション結果のディスクキャッシュ
+#
+# ファイル内容のハッシュ, パッケージのバージョン, スキーマ/ルール実装のフィンガープリントを
+# キーとしてエラー/警告のリスト (位置を含む) を保存する. 内容が同じファイルの再検証では
+# YAML の読み込み, スキーマ検証, カスタムルールをすべて省略できる.
+# !include で取り込んだファイルは内容のハッシュをエントリに保存し, 参照時に変更がないことを確かめる.
+# エントリの保存と LRU による削除 (DiskCache) は, コンパイル済みの仕様のキャッシュ (spec_cache.py) と共通にする.
+
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from .diagnostics import Diagnostic, as_diagnostic
+from ..settings import CACHE_DIR_ENV
+# キャッシュ全体の上限サイズ (バイト). 超えた場合は最終利用時刻の古いものから削除する
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 上限を超えたときに削除後の合計サイズをこの割合まで下げる (削除処理の頻度を抑えるため)
+_EVICT_TARGET_RATIO = 0.8
+# キャッシュエントリの形式. 保存内容を変更した場合は更新する
+_FORMAT_VERSION = 4
+
+def default_cache_dir() -> Path:
+    """
+    デフォルトのキャッシュディレクトリを返す.
+
+    環境変数 RTAR_DDEPS_CACHE_DIR, $XDG_CACHE_HOME/rtar-ddeps, ~/.cache/rtar-ddeps の順に決定する.
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "rtar-ddeps"
+
+def package_version() -> str:
+    """インストールされている rtar-ddeps のバージョンを返す (未インストール時は 'unknown')."""
+    try:
+        return metadata.version("rtar-ddeps")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+@functools.lru_cache(maxsize=None)
+def schema_fingerprint() -> str:
+    """
+    スキーマ定義とバリデーションルールの実装のフィンガープリントを返す.
+
+    パッケージ内のすべての .py ファイルの内容から計算するため,
+    バージョン番号を変えずにルールを変更した場合 (開発中など) もキャッシュが無効になる.
+    """
+    package_root = Path(__file__).resolve().parent.parent
+    digest = hashlib.sha256()
+    for source in sorted(package_root.rglob("*.py")):
+        digest.update(source.relative_to(package_root).as_posix().encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+def _file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+class DiskCache:
+    """
+    1 キー 1 ファイルのディスクキャッシュの共通部分 (ResultCache, spec_cache.SpecCache).
+
+    エントリのファイル名はキーと suffix で, キャッシュの種類ごとに suffix を分けて同じディレクトリを共有できる.
+    参照時にファイルの更新時刻を更新し, 合計サイズが max_bytes を超えた場合は
+    更新時刻の古いエントリから削除する (LRU). 合計サイズと削除の対象は同じ suffix のエントリのみとする.
+    """
+    # エントリのファイルの拡張子
+    suffix = ".json"
+    # キーに含める形式のバージョン
+    format_version = _FORMAT_VERSION
+
+    def __init__(self, cache_dir: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        キャッシュを初期化する.
+
+        Args:
+            cache_dir: キャッシュディレクトリ. None の場合は default_cache_dir().
+            max_bytes: キャッシュ全体の上限サイズ (バイト).
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes: int | None = None # キャッシュ全体のサイズ (初回の書き込み時に計算)
+
+    def make_key(self, content: bytes, namespace: str) -> str:
+        """
+        キャッシュキーを作成する.
+
+        Args:
+            content: 対象ファイルの内容.
+            namespace: バリデーターの種類や YAML バックエンドなど, 保存する内容に影響する設定を表す文字列.
+        """
+        digest = hashlib.sha256()
+        for part in (str(self.format_version), package_version(), schema_fingerprint(), namespace):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def _touch(self, path: Path):
+        """LRU 用に最終利用時刻を更新する."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, key: str, payload: bytes):
+        """
+        エントリを書き込む.
+
+        書き込みは一時ファイルからの置き換えで行うため, 並列実行中のプロセスが
+        書きかけのエントリを読むことはない. 書き込みに失敗しても例外は送出しない.
+        """
+        path = self._entry_path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_name, path)
+        except OSError:
+            return
+        if self._total_bytes is None:
+            self._total_bytes = self._scan_total_bytes()
+        else:
+            self._total_bytes += len(payload)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _scan_total_bytes(self) -> int:
+        total = 0
+        for entry in self.cache_dir.glob(f"*{self.suffix}"):
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _evict(self):
+        """最終利用時刻の古いエントリから削除し, 合計サイズを上限の一定割合以下にする."""
+        entries = []
+        for entry in self.cache_dir.glob(f"*{self.suffix}"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * _EVICT_TARGET_RATIO
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._total_bytes = total
+
+    def clear(self):
+        """キャッシュのエントリをすべて削除する."""
+        for entry in self.cache_dir.glob(f"*{self.suffix}"):
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+        self._total_bytes = 0
+
+def dependencies_unchanged(dependencies: Iterable[Tuple[str, str]]) -> bool:
+    """(パス, 内容の SHA-256) の組のファイルがすべて存在し, 内容が同じかどうか."""
+    try:
+        return all(_file_digest(dependency) == digest for dependency, digest in dependencies)
+    except OSError:
+        return False
+
+class ResultCache(DiskCache):
+    """
+    バリデーション結果 (エラー/警告のリスト) の永続キャッシュ.
+
+    エントリは 1 キー 1 ファイルの JSON として保存する.
+    """
+
+    def get(self, key: str) -> Tuple[List[Diagnostic], List[Diagnostic]] | None:
+        """
+        キャッシュされた結果を返す.
+
+        Returns:
+            (エラーのリスト, 警告のリスト). キャッシュにない場合 (読み込めない場合を含む) は None.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            errors = [Diagnostic.from_dict(value) for value in entry['errors']]
+            warnings = [Diagnostic.from_dict(value) for value in entry['warnings']]
+            fresh = dependencies_unchanged(entry['dependencies'])
+        except (OSError, ValueError, KeyError, TypeError):
+            fresh = False
+        if not fresh:
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return errors, warnings
+
+    def put(self, key: str, errors: List[str], warnings: List[str], dependencies: Iterable[Tuple[Path, str]] = ()):
+        """
+        結果をキャッシュに保存する.
+
+        dependencies は結果が依存する, キーに含まれないファイル (!include で取り込んだファイル) の
+        (パス, 内容の SHA-256) の組. 参照時にいずれかの内容が異なればキャッシュにないものとして扱う.
+        書き込みに失敗しても例外は送出しない.
+        """
+        payload = json.dumps({
+            'errors': [as_diagnostic(error, 'error').to_dict() for error in errors],
+            'warnings': [as_diagnostic(warning, 'warning').to_dict() for warning in warnings],
+            'dependencies': [[str(path), digest] for path, digest in dependencies],
+        }, ensure_ascii=False).encode('utf-8')
+        self._write(key, payload)
@@ -0,0 +1,309 @@
+# カスタムルールを文書の 1 回の走査で実行するエンジン
+#
+# ルールは Rule のサブクラスとして定義し, 必要なイベントのメソッドのみをオーバーライドする.
+# エンジンは data / parameter / metadata セクションを 1 回だけ走査し, 各イベントで
+# そのイベントを処理するすべてのルールを呼び出す. ルールを追加しても走査の回数は増えない.
+# 文書全体を対象とするルール (循環参照など) は走査の後に finish で実行する.
+#
+# エラー/警告はルールごと (エントリ単位のイベントはさらにエントリごと) に記録し,
+# 最後にルールの登録順に並べる. 同じルール内は data エントリ, parameter エントリ (いずれも定義順),
+# 文書全体 (visit_metadata, finish) の順とする. そのため, 同じ走査で実行しても
+# ルールを 1 つずつ実行した場合と出力順は変わらない.
+
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Any, Collection, Dict, Iterable, List, Sequence, Tuple
+
+from .base_validator import format_error, format_warning
+from .profiling import NULL_PROFILER, NullProfiler, Profiler
+from ..model.spec import Column, DataEntry, Key, Parameter, Spec
+
+# ルールの 1 回分 (1 エントリ分, または文書全体分) の結果: (エラーのタプル, 警告のタプル)
+RuleResult = Tuple[Tuple[str, ...], Tuple[str, ...]]
+EMPTY_RESULT: RuleResult = ((), ())
+
+# Rule のイベントメソッド
+_ENTRY_EVENTS = ('visit_data', 'visit_column', 'visit_key', 'visit_parameter')
+_DOCUMENT_EVENTS = ('visit_metadata', 'finish')
+
+class RuleContext:
+    """ルールに渡す共有状態 (モデル, 文書) とエラー/警告の記録先."""
+    __slots__ = ('spec', 'document', 'profiler', '_errors', '_warnings')
+
+    def __init__(self, spec: Spec, document: dict, profiler: Profiler | NullProfiler = NULL_PROFILER):
+        self.spec = spec
+        self.document = document # スキーマ検証に成功した文書 (生の辞書)
+        self.profiler = profiler # ルールごとの計測先 (RuleEngine が使用する)
+        self._errors: List[str] = []
+        self._warnings: List[str] = []
+
+    def error(self, message: str, path: List[str] | None = None):
+        """エラーを記録する (BaseValidator._add_error と同じ形式)."""
+        self._errors.append(format_error(message, path))
+
+    def warning(self, message: str, path: List[str] | None = None):
+        """警告を記録する (BaseValidator._add_warning と同じ形式)."""
+        self._warnings.append(format_warning(message, path))
+
+class Rule:
+    """
+    カスタムルールの基底クラス.
+
+    rule_id を定義し, 必要なイベントのメソッドをオーバーライドする.
+    オーバーライドしていないイベントでは呼び出されない.
+
+    エントリ単位のイベント (visit_data, visit_column, visit_key, visit_parameter) の結果は,
+    そのエントリと, そのエントリが参照する名前 (required_data, required_parameter, 可変長列の参照先) のみに
+    依存しなければならない (インクリメンタル検証で, 変更のないエントリの結果を再利用するため).
+    文書全体に依存する検査は finish で ctx.spec を参照して行う.
+    ストリーミング検証 (streaming.py) では, finish / visit_metadata から参照する ctx.spec.data の要素は
+    DataEntrySummary (名前, format, 参照, 列/キー名のみ) になり, ctx.spec.parameters は空になる.
+    """
+    rule_id: str = ''
+
+    def visit_data(self, ctx: RuleContext, entry: DataEntry):
+        """data エントリごとに呼び出される."""
+
+    def visit_column(self, ctx: RuleContext, entry: DataEntry, column: Column):
+        """data エントリの columns の要素ごとに呼び出される (visit_data の後)."""
+
+    def visit_key(self, ctx: RuleContext, entry: DataEntry, key: Key):
+        """data エントリの keys の要素ごとに呼び出される (visit_column の後)."""
+
+    def visit_parameter(self, ctx: RuleContext, parameter: Parameter):
+        """parameter エントリごとに呼び出される."""
+
+    def visit_metadata(self, ctx: RuleContext, metadata: dict):
+        """metadata セクションに対して一度呼び出される (エントリの走査の後)."""
+
+    def finish(self, ctx: RuleContext):
+        """走査の後に一度呼び出される. 文書全体を対象とする検査を行う."""
+
+    def handles(self, event: str) -> bool:
+        """イベントのメソッドをオーバーライドしているか."""
+        return getattr(type(self), event) is not getattr(Rule, event)
+
+@dataclass
+class RuleResults:
+    """ルールごとの結果. 空の結果は保持しない."""
+    data: Dict[str, Dict[str, RuleResult]] = field(default_factory=dict) # ルール ID -> data 名 -> 結果
+    parameter: Dict[str, Dict[str, RuleResult]] = field(default_factory=dict) # ルール ID -> parameter 名 -> 結果
+    document: Dict[str, RuleResult] = field(default_factory=dict) # ルール ID -> 文書全体の結果
+
+class RuleEngine:
+    """登録されたルールを 1 回の走査で実行する."""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = tuple(rules)
+        self.rule_ids = tuple(rule.rule_id for rule in self.rules)
+        handlers = {
+            event: [(i, getattr(rule, event)) for i, rule in enumerate(self.rules) if rule.handles(event)]
+            for event in _ENTRY_EVENTS
+        }
+        self._data_handlers = handlers['visit_data']
+        self._column_handlers = handlers['visit_column']
+        self._key_handlers = handlers['visit_key']
+        self._parameter_handlers = handlers['visit_parameter']
+        self._entry_rule_indices = sorted({i for event in ('visit_data', 'visit_column', 'visit_key') for i, _ in handlers[event]})
+        self._document_rules = [rule for rule in self.rules if any(rule.handles(event) for event in _DOCUMENT_EVENTS)]
+
+    def run(self, ctx: RuleContext) -> RuleResults:
+        """すべてのルールを実行する."""
+        data, parameter = self.visit_entries(ctx, ctx.spec.data, ctx.spec.parameters)
+        return RuleResults(data, parameter, self.visit_document(ctx))
+
+    def visit_entries(
+        self,
+        ctx: RuleContext,
+        data_entries: Iterable[DataEntry],
+        parameters: Iterable[Parameter],
+    ) -> Tuple[Dict[str, Dict[str, RuleResult]], Dict[str, Dict[str, RuleResult]]]:
+        """
+        指定されたエントリを 1 回走査し, エントリ単位のイベントを処理する.
+
+        Returns:
+            (data の結果, parameter の結果). いずれもルール ID -> エントリ名 -> 結果 (エントリの順).
+        """
+        return self.visit_stream(ctx, chain(data_entries, parameters))
+
+    def visit_stream(
+        self,
+        ctx: RuleContext,
+        entries: Iterable[DataEntry | Parameter],
+    ) -> Tuple[Dict[str, Dict[str, RuleResult]], Dict[str, Dict[str, RuleResult]]]:
+        """
+        data / parameter のエントリが混在する列を先頭から順に走査し, エントリ単位のイベントを処理する.
+
+        entries はジェネレーターでもよい (ストリーミング検証では, ファイルから読み込んだエントリを
+        1 件ずつ渡し, 処理後に破棄する).
+
+        Returns:
+            visit_entries と同じ. 結果はエントリを渡した順に並ぶ.
+        """
+        rule_ids = self.rule_ids
+        sinks = [([], []) for _ in self.rules]
+        data_results: Dict[str, Dict[str, RuleResult]] = {rule_id: {} for rule_id in rule_ids}
+        parameter_results: Dict[str, Dict[str, RuleResult]] = {rule_id: {} for rule_id in rule_ids}
+        data_handlers = self._data_handlers
+        column_handlers = self._column_handlers
+        key_handlers = self._key_handlers
+        parameter_handlers = self._parameter_handlers
+        if ctx.profiler.enabled:
+            data_handlers, column_handlers, key_handlers, parameter_handlers = (
+                self._profiled(ctx.profiler, handlers)
+                for handlers in (data_handlers, column_handlers, key_handlers, parameter_handlers)
+            )
+        entry_rule_indices = self._entry_rule_indices
+
+        for entry in entries:
+            if type(entry) is Parameter:
+                for i, visit in parameter_handlers:
+                    errors, warnings = ctx._errors, ctx._warnings = sinks[i]
+                    visit(ctx, entry)
+                    if errors or warnings:
+                        parameter_results[rule_ids[i]][entry.name] = (tuple(errors), tuple(warnings))
+                        errors.clear()
+                        warnings.clear()
+                continue
+            for i, visit in data_handlers:
+                ctx._errors, ctx._warnings = sinks[i]
+                visit(ctx, entry)
+            if column_handlers and entry.columns:
+                for column in entry.columns:
+                    for i, visit in column_handlers:
+                        ctx._errors, ctx._warnings = sinks[i]
+                        visit(ctx, entry, column)
+            if key_handlers and entry.keys:
+                for key in entry.keys:
+                    for i, visit in key_handlers:
+                        ctx._errors, ctx._warnings = sinks[i]
+                        visit(ctx, entry, key)
+            for i in entry_rule_indices:
+                errors, warnings = sinks[i]
+                if errors or warnings:
+                    data_results[rule_ids[i]][entry.name] = (tuple(errors), tuple(warnings))
+                    errors.clear()
+                    warnings.clear()
+        return data_results, parameter_results
+
+    def visit_document(self, ctx: RuleContext, rule_ids: Collection[str] | None = None) -> Dict[str, RuleResult]:
+        """
+        文書全体のイベント (visit_metadata, finish) を処理する.
+
+        Args:
+            ctx: ルールに渡すコンテキスト.
+            rule_ids: 実行するルール ID. None の場合はすべて.
+
+        Returns:
+            ルール ID -> 結果 (空の結果は含まない).
+        """
+        results: Dict[str, RuleResult] = {}
+        metadata = ctx.spec.metadata
+        for rule in self._document_rules:
+            if rule_ids is not None and rule.rule_id not in rule_ids:
+                continue
+            errors, warnings = ctx._errors, ctx._warnings = [], []
+            with ctx.profiler.span(f"rule:{rule.rule_id}", category='rule'):
+                rule.visit_metadata(ctx, metadata)
+                rule.finish(ctx)
+            if errors or warnings:
+                results[rule.rule_id] = (tuple(errors), tuple(warnings))
+        return results
+
+    def _profiled(self, profiler: Profiler, handlers: List[Tuple[int, Any]]) -> List[Tuple[int, Any]]:
+        """イベントの呼び出しごとにルールの区間を計測するハンドラーを返す (トレースイベントは記録しない)."""
+        def wrap(rule_id: str, visit):
+            name = f"rule:{rule_id}"
+            def profiled_visit(*args):
+                with profiler.span(name, category='rule', trace=False):
+                    visit(*args)
+            return profiled_visit
+        return [(i, wrap(self.rule_ids[i], visit)) for i, visit in handlers]
+
+    def has_document_events(self, rule_id: str) -> bool:
+        """ルールが文書全体のイベントを処理するか."""
+        return any(rule.rule_id == rule_id for rule in self._document_rules)
+
+    def collect(self, results: RuleResults) -> Tuple[List[str], List[str]]:
+        """
+        結果をルールの登録順に並べた (エラーのリスト, 警告のリスト) を返す.
+        各診断の rule_id には報告したルールの ID を設定する.
+        """
+        errors: List[str] = []
+        warnings: List[str] = []
+        for rule_id in self.rule_ids:
+            start_errors, start_warnings = len(errors), len(warnings)
+            for bucket in (results.data.get(rule_id, {}), results.parameter.get(rule_id, {})):
+                for rule_errors, rule_warnings in bucket.values():
+                    errors.extend(rule_errors)
+                    warnings.extend(rule_warnings)
+            rule_errors, rule_warnings = results.document.get(rule_id, EMPTY_RESULT)
+            errors.extend(rule_errors)
+            warnings.extend(rule_warnings)
+            for diagnostic in chain(islice(errors, start_errors, None), islice(warnings, start_warnings, None)):
+                diagnostic.rule_id = rule_id
+        return errors, warnings
+
+class RuleRegistry:
+    """
+    実行するルールの一覧. 登録順が出力順になる.
+
+    サードパーティのルールは register で追加する (クラスデコレーターとしても使用できる).
+
+        @default_registry.register
+        class MyRule(Rule):
+            rule_id = 'my_rule'
+            def visit_column(self, ctx, entry, column): ...
+    """
+
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self._rules: Dict[str, Rule] = {}
+        self._engine: RuleEngine | None = None
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule: Any) -> Any:
+        """
+        ルールを末尾に追加する.
+
+        Args:
+            rule: Rule のインスタンス, または引数なしで生成できる Rule のサブクラス.
+
+        Returns:
+            rule (デコレーターとして使用できるように, 引数をそのまま返す).
+        Raises:
+            ValueError: rule_id が空, または登録済みの場合.
+        """
+        instance = rule() if isinstance(rule, type) else rule
+        if not isinstance(instance, Rule):
+            raise TypeError(f"{rule!r} is not a Rule.")
+        if not instance.rule_id:
+            raise ValueError(f"{type(instance).__name__} has no rule_id.")
+        if instance.rule_id in self._rules:
+            raise ValueError(f"Rule '{instance.rule_id}' is already registered.")
+        self._rules[instance.rule_id] = instance
+        self._engine = None
+        return rule
+
+    def unregister(self, rule_id: str):
+        """ルールを削除する."""
+        del self._rules[rule_id]
+        self._engine = None
+
+    def copy(self) -> 'RuleRegistry':
+        """同じルールを持つ別のレジストリを返す."""
+        return RuleRegistry(self._rules.values())
+
+    @property
+    def rules(self) -> Tuple[Rule, ...]:
+        return tuple(self._rules.values())
+
+    def engine(self) -> RuleEngine:
+        """登録されたルールを実行するエンジン (登録内容が変わるまで再利用する)."""
+        if self._engine is None:
+            self._engine = RuleEngine(self.rules)
+        return self._engine
+
+    def fingerprint(self) -> str:
+        """登録されたルールの識別子 (キャッシュキー用)."""
+        return ",".join(f"{type(rule).__module__}.{type(rule).__qualname__}" for rule in self._rules.values())
@@ -0,0 +1,244 @@
+# DataDependenciesSchema (voluptuous) と同じ検証を行う高速版
+#
+# voluptuous はスキーマをクロージャの木にコンパイルし, 値ごとに例外の送出/捕捉と
+# パスのリスト生成を行うため, エントリ数の多い文書ではスキーマ検証が支配的になる.
+# ここでは data_dependencies_schema.py の定義を手で展開した検証関数を用意し,
+# 正常な値に対しては isinstance と辞書参照のみで検証を終える.
+#
+# 定義の正は data_dependencies_schema.py の voluptuous スキーマとし,
+# エラー (error.path, error.msg) とその順序が一致することを差分テストで確認する.
+# スキーマを変更した場合は, このファイルも合わせて変更すること.
+#
+# 再現している voluptuous の挙動:
+# * 辞書のキーは文書の順に検証し, 未指定の Required キーはその後に報告する.
+#   未指定キーの報告順は Required マーカーの集合の反復順 (ハッシュ順) になるため,
+#   同じ順序でキー名の集合を作って再現する.
+# * ALLOW_EXTRA のため, スキーマにないキーは検証しない.
+#   {NonEmptyString: ...} で文字列でない (または空の) キーも同様に無視される.
+# * All(型, Length(min=1)) は型エラーの場合 Length を評価しない.
+# * [ColumnSchema] などの辞書のリストは, 辞書でない要素のエラーを集めるが,
+#   辞書の要素で内部のエラーが見つかった時点でその要素のエラーのみを報告して打ち切る.
+
+from typing import Any, Callable, Dict, List, Tuple
+
+from voluptuous import Invalid, MultipleInvalid
+
+# 検証関数: (値, パス, エラーの追加先)
+Checker = Callable[[Any, list, List[Invalid]], None]
+
+_EXPECTED_STR = 'expected str'
+_EXPECTED_LIST = 'expected a list'
+_EXPECTED_DICT = 'expected a dictionary'
+_TOO_SHORT = 'length of value must be at least 1'
+_REQUIRED = 'required key not provided'
+
+def _required_order(*names: str) -> Tuple[str, ...]:
+    """未指定の Required キーを報告する順序 (voluptuous が作る集合と同じ反復順) を返す."""
+    return tuple(set(names).copy())
+
+def _check_str(value, path, errors):
+    if not isinstance(value, str):
+        errors.append(Invalid(_EXPECTED_STR, path))
+
+def _check_non_empty_string(value, path, errors):
+    if not isinstance(value, str):
+        errors.append(Invalid(_EXPECTED_STR, path))
+    elif not value:
+        errors.append(Invalid(_TOO_SHORT, path))
+
+def _check_list_of_strings(value, path, errors) -> bool:
+    """[str] に相当する. エラーがなければ True を返す."""
+    if not isinstance(value, list):
+        errors.append(Invalid(_EXPECTED_LIST, path))
+        return False
+    valid = True
+    for i, item in enumerate(value):
+        if not isinstance(item, str):
+            errors.append(Invalid(_EXPECTED_STR, path + [i]))
+            valid = False
+    return valid
+
+def _check_non_empty_list_of_strings(value, path, errors):
+    if _check_list_of_strings(value, path, errors) and not value:
+        errors.append(Invalid(_TOO_SHORT, path))
+
+def _check_mapping(value, path, errors, fields: Dict[str, Checker], required: Tuple[str, ...]):
+    """Schema({...}, extra=ALLOW_EXTRA) に相当する."""
+    if not isinstance(value, dict):
+        errors.append(Invalid(_EXPECTED_DICT, path))
+        return
+    for key, item in value.items():
+        check = fields.get(key)
+        if check is not None:
+            check(item, path + [key], errors)
+    for key in required:
+        if key not in value:
+            errors.append(Invalid(_REQUIRED, path + [key]))
+
+def _mapping(fields: Dict[str, Checker], required: Tuple[str, ...]) -> Checker:
+    def check(value, path, errors):
+        _check_mapping(value, path, errors, fields, required)
+    return check
+
+def _list_of_mappings(fields: Dict[str, Checker], required: Tuple[str, ...]) -> Checker:
+    """[Schema({...})] に相当する検証関数を返す."""
+    def check(value, path, errors):
+        if not isinstance(value, list):
+            errors.append(Invalid(_EXPECTED_LIST, path))
+            return
+        item_errors: List[Invalid] = []
+        for i, item in enumerate(value):
+            if not isinstance(item, dict):
+                item_errors.append(Invalid(_EXPECTED_DICT, path + [i]))
+                continue
+            nested: List[Invalid] = []
+            _check_mapping(item, path + [i], nested, fields, required)
+            if nested:
+                errors.extend(nested) # それまでの要素のエラーは報告されない
+                return
+        errors.extend(item_errors)
+    return check
+
+def _named_mappings(check_entry: Checker) -> Checker:
+    """{NonEmptyString: Schema({...})} に相当する検証関数を返す."""
+    def check(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(Invalid(_EXPECTED_DICT, path))
+            return
+        for name, entry in value.items():
+            if isinstance(name, str) and name:
+                check_entry(entry, path + [name], errors)
+    return check
+
+# --- スキーマ定義 (data_dependencies_schema.py と同じ構成) ---
+
+_check_column = _list_of_mappings(
+    {'name': _check_non_empty_string, 'description': _check_non_empty_string, 'key_source': _check_str},
+    _required_order('name', 'description'),
+)
+
+_check_key = _list_of_mappings(
+    {'name': _check_non_empty_string, 'description': _check_non_empty_string},
+    _required_order('name', 'description'),
+)
+
+_check_data_entry = _mapping(
+    {
+        'descriptions': _check_list_of_strings,
+        'format': _check_non_empty_string,
+        'unit': _check_str,
+        'columns': _check_column,
+        'keys': _check_key,
+        'process': _check_non_empty_list_of_strings,
+        'required_data': _check_list_of_strings,
+        'required_parameter': _check_list_of_strings,
+    },
+    _required_order('descriptions', 'format', 'unit'),
+)
+
+_check_parameter_entry = _mapping(
+    {'descriptions': _check_list_of_strings, 'unit': _check_str},
+    _required_order('descriptions', 'unit'),
+)
+
+_check_terms = _list_of_mappings(
+    {'name': _check_non_empty_string, 'descriptions': _check_list_of_strings},
+    _required_order('name', 'descriptions'),
+)
+
+_check_metadata = _mapping(
+    {
+        'title': _check_non_empty_string,
+        'purposes': _check_list_of_strings,
+        'terms': _check_terms,
+        'note': _check_list_of_strings,
+    },
+    _required_order('title', 'purposes'),
+)
+
+_check_data_entries = _named_mappings(_check_data_entry)
+
+def _check_data_section(value, path, errors):
+    """All({NonEmptyString: DataSchema}, Length(min=1)) に相当する."""
+    nested: List[Invalid] = []
+    _check_data_entries(value, path, nested)
+    if nested:
+        errors.extend(nested)
+    elif not value:
+        errors.append(Invalid(_TOO_SHORT, path))
+
+_TOP_LEVEL_FIELDS: Dict[str, Checker] = {
+    'metadata': _check_metadata,
+    'target': _check_non_empty_list_of_strings,
+    'data': _check_data_section,
+    'parameter': _named_mappings(_check_parameter_entry),
+}
+_TOP_LEVEL_REQUIRED = _required_order('metadata', 'target', 'data')
+
+def collect_schema_errors(data: Any) -> List[Invalid]:
+    """
+    文書をスキーマ検証し, エラーを voluptuous と同じ順序で返す.
+
+    Args:
+        data: 読み込んだ YAML 文書.
+
+    Returns:
+        voluptuous.Invalid のリスト (path, msg は DataDependenciesSchema のエラーと同じ). エラーがなければ空.
+    """
+    errors: List[Invalid] = []
+    _check_mapping(data, [], errors, _TOP_LEVEL_FIELDS, _TOP_LEVEL_REQUIRED)
+    return errors
+
+def CompiledDataDependenciesSchema(data: Any) -> Any:
+    """
+    DataDependenciesSchema(data) の代わりに使用できる検証関数.
+
+    Raises:
+        MultipleInvalid: スキーマ違反がある場合.
+    """
+    errors = collect_schema_errors(data)
+    if errors:
+        raise MultipleInvalid(errors)
+    return data
+
+# --- ストリーミング検証 (streaming.py) 用 ---
+# 文書全体を構築せずに, トップレベルの値または data / parameter のエントリ単位で検証する.
+# 文書の順に呼び出して結果を連結すると collect_schema_errors と同じになる.
+
+# エントリ単位で検証できるセクション -> エントリの検証関数
+_SECTION_ENTRY_CHECKERS: Dict[str, Checker] = {
+    'data': _check_data_entry,
+    'parameter': _check_parameter_entry,
+}
+
+def collect_field_errors(key: Any, value: Any) -> List[Invalid]:
+    """トップレベルのキー 1 つ分の値を検証する (スキーマにないキーは検証しない)."""
+    errors: List[Invalid] = []
+    check = _TOP_LEVEL_FIELDS.get(key)
+    if check is not None:
+        check(value, [key], errors)
+    return errors
+
+def collect_entry_errors(section: str, name: Any, definition: Any) -> List[Invalid]:
+    """data / parameter セクション (辞書) のエントリ 1 件を検証する."""
+    errors: List[Invalid] = []
+    if isinstance(name, str) and name:
+        _SECTION_ENTRY_CHECKERS[section](definition, [section, name], errors)
+    return errors
+
+def collect_section_errors(section: str, entry_count: int, entries_valid: bool) -> List[Invalid]:
+    """
+    data / parameter セクションのエントリをすべて検証した後に, セクション全体を検証する.
+
+    Args:
+        section: セクション名.
+        entry_count: セクションのエントリ数.
+        entries_valid: collect_entry_errors のエラーがなかったか.
+    """
+    if section == 'data' and entries_valid and not entry_count:
+        return [Invalid(_TOO_SHORT, [section])]
+    return []
+
+def collect_missing_required(keys: Any) -> List[Invalid]:
+    """トップレベルの必須キーのうち keys にないものを報告する."""
+    return [Invalid(_REQUIRED, [key]) for key in _TOP_LEVEL_REQUIRED if key not in keys]
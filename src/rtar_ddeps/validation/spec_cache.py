@@ -0,0 +1,116 @@
+# コンパイル済みの仕様 (model/compiled.py) のディスクキャッシュ
+#
+# graph, impact, plan, prune などの読み取り専用のコマンドは, 毎回ファイルを読み込んでスキーマ検証し,
+# 仕様モデルと依存関係グラフを作る. キャッシュが有効な場合は, 2 回目以降はコンパイル済みの形式から復元し,
+# YAML の読み込みとスキーマ検証を省く.
+#
+# キーはファイルの内容のハッシュ, パッケージのバージョンと実装のフィンガープリント (result_cache.py),
+# YAML バックエンド, marshal の形式 (Python のバージョン) から作るため,
+# ファイルまたはパッケージが変わると自動的に別のエントリになる (古いエントリは LRU で削除される).
+# !include で取り込んだファイルは内容のハッシュをエントリに保存し, 参照時に変更がないことを確かめる.
+
+import marshal
+import sys
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from .batch import run_validator
+from .custom_yaml_loader import INCLUDE_TAG, resolve_yaml_backend
+from .data_dependencies_validator import DataDependenciesValidator
+from .result_cache import DiskCache, dependencies_unchanged
+from .rule_engine import RuleRegistry
+from .streaming import StreamingDataDependenciesValidator
+from ..model.compiled import COMPILED_FORMAT_VERSION, CompiledSpec
+
+# キャッシュ全体の上限サイズ (バイト). エントリは data エントリ 1 件あたり約 0.8 KiB
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class SpecCache(DiskCache):
+    """
+    コンパイル済みの仕様の永続キャッシュ.
+
+    エントリは 1 キー 1 ファイル (拡張子 .spec) の marshal のバイト列として保存する.
+    検証結果のキャッシュ (ResultCache) と同じディレクトリを共有でき, 上限サイズは別に数える.
+    """
+    suffix = ".spec"
+    format_version = f"spec{COMPILED_FORMAT_VERSION}:marshal{marshal.version}:{sys.implementation.cache_tag}"
+
+    def __init__(self, cache_dir: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    def get(self, key: str) -> CompiledSpec | None:
+        """キャッシュされた仕様を返す. キャッシュにない場合 (読み込めない場合を含む) は None."""
+        path = self._entry_path(key)
+        try:
+            dependencies, payload = marshal.loads(path.read_bytes())
+            compiled = CompiledSpec.from_bytes(payload)
+            fresh = dependencies_unchanged(dependencies)
+        except (OSError, EOFError, ValueError, TypeError):
+            fresh = False
+        if not fresh:
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return compiled
+
+    def put(self, key: str, compiled: CompiledSpec, dependencies: Iterable[Tuple[Path, str]] = ()) -> bool:
+        """
+        仕様をキャッシュに保存する.
+
+        dependencies は ResultCache.put と同じ (!include で取り込んだファイルの (パス, 内容の SHA-256) の組).
+        書き込みに失敗しても例外は送出しない.
+
+        Returns:
+            保存できたかどうか. 文書に marshal で扱えない値 (YAML の日付など) が含まれる場合は False.
+        """
+        try:
+            payload = marshal.dumps((tuple((str(path), digest) for path, digest in dependencies), compiled.to_bytes()))
+        except ValueError:
+            return False
+        self._write(key, payload)
+        return True
+
+def load_spec(
+    file_path: Path,
+    yaml_backend: str | None = None,
+    cache: SpecCache | None = None,
+    streaming: bool = False,
+) -> Tuple[CompiledSpec | None, List[str]]:
+    """
+    ファイルを読み込み, スキーマ検証した文書, 仕様モデル, 依存関係グラフを返す.
+
+    カスタムルールは実行しない (未定義の名前への参照はそのまま残る).
+    cache を指定した場合, 内容が同じファイルはキャッシュから復元し, キャッシュにない場合は読み込んだ結果を保存する.
+    streaming が True の場合 (cache を指定しない場合のみ) はエントリを 1 件ずつ読み込み,
+    文書は data / parameter 以外のみ, 仕様モデルの data は DataEntrySummary になる (streaming.py 参照).
+
+    Returns:
+        (仕様, エラー). 読み込みまたはスキーマ検証に失敗した場合は (None, エラーのリスト).
+
+    Raises:
+        ValueError: yaml_backend が不正な場合.
+        FileNotFoundError: ファイルが存在しない場合 (cache を指定した場合).
+    """
+    if streaming and cache is not None:
+        raise ValueError("streaming cannot be used with a spec cache")
+    key = None
+    if cache is not None:
+        content = file_path.read_bytes()
+        namespace = resolve_yaml_backend(yaml_backend)
+        # !include のパスはこのファイルからの相対パスのため, 取り込む文書はファイルの場所もキーに含める
+        if INCLUDE_TAG.encode() in content:
+            namespace += f":{file_path.resolve()}"
+        key = cache.make_key(content, namespace)
+        compiled = cache.get(key)
+        if compiled is not None:
+            return compiled, []
+    validator_class = StreamingDataDependenciesValidator if streaming else DataDependenciesValidator
+    validator = validator_class(file_path, yaml_backend=yaml_backend, rules=RuleRegistry(), positions=False)
+    result = run_validator(validator, capture_output=False)
+    if validator.spec is None:
+        return None, result.errors
+    compiled = CompiledSpec(validator.data, validator.spec)
+    if key is not None:
+        cache.put(key, compiled, [(file.path, file.digest) for file in validator.included_files])
+    return compiled, []
@@ -0,0 +1,487 @@
+# メモリ使用量を抑えて大きな data_dependencies.yml を検証するストリーミング検証
+#
+# 通常の検証 (DataDependenciesValidator) は文書全体を辞書として構築してから検証するため,
+# ピークメモリはファイルサイズの数倍になる. ここでは PyYAML のイベント API から
+# data / parameter セクションのエントリを 1 件ずつ構築し, 検証した後に破棄する.
+#
+# ファイルは 2 回走査する.
+# 1. 索引: 各エントリを構築してキーの重複とスキーマを検証し, 他のエントリのルールや
+#    文書全体のルール (参照, 一意性, 循環参照, 可変長列) が参照する要約 (DataEntrySummary) のみを保持する.
+# 2. ルール: スキーマ検証に成功した場合のみ, 各エントリを再び構築して DataEntry とし,
+#    エントリ単位のイベントを処理して破棄する. その後, 要約の Spec で文書全体のイベントを処理する.
+#
+# エラー/警告 (内容と順序) は通常の検証と一致する.
+# ただし位置は, メモリを抑えるためエントリ内のパスでもエントリの名前の位置になる (_DocumentIndex.build).
+# * 重複キーのエラーは, 通常の読み込みでは構築の順 (ノードの深さ順, 同じ深さでは文書の順) に報告される.
+#   ここでは重複を検出したノードの深さと順位を記録し, 最後に並べ替えて同じ順序にする.
+# * 同じ名前のエントリが複数ある場合は, 辞書と同じく最初の位置に最後の定義があるものとして扱う.
+#
+# 次の場合は通常の検証に切り替える (いずれも, まれな場合か, エラーにより文書全体を見る必要がある場合).
+# * YAML の構文エラーなど, 読み込みに失敗する場合 (エラーメッセージを一致させるため).
+# * ルートがマッピングでない, 複数の文書を含む, トップレベルのキーが重複している,
+#   トップレベルやセクション直下でマージキー (<<) を使用している場合.
+# * セクション/エントリをまたぐエイリアスがあり, かつキーの重複がある場合 (重複の報告順が変わるため).
+# * !include (includes.py) を含む場合 (取り込んだファイルを含めて文書全体を組み立てる必要があるため).
+
+from typing import Any, Dict, Iterator, List, Tuple
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import AliasEvent, MappingEndEvent, MappingStartEvent, StreamEndEvent
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+from yaml.parser import Parser
+from yaml.reader import Reader
+from yaml.resolver import Resolver
+from yaml.scanner import Scanner
+from voluptuous import Invalid
+
+from .custom_yaml_loader import INCLUDE_TAG, DuplicateKeyConstructor, DuplicateKeyError, resolve_yaml_backend
+from .data_dependencies_validator import DataDependenciesValidator
+from .diagnostics import SCHEMA_RULE_ID
+from .positions import PositionIndex
+from .rule_engine import RuleContext, RuleResult, RuleResults
+from .schemas.compiled_data_dependencies_schema import (
+    collect_entry_errors,
+    collect_field_errors,
+    collect_missing_required,
+    collect_section_errors,
+)
+from ..model.spec import DataEntry, DataEntrySummary, Parameter, Spec, is_schema_entry
+
+# エントリ単位で構築するセクション
+STREAMED_SECTIONS = ('data', 'parameter')
+
+_MAP_TAG = 'tag:yaml.org,2002:map'
+# トップレベル/セクション直下にあると, 後続のキーの扱いが変わるキーのタグ
+_SPECIAL_KEY_TAGS = ('tag:yaml.org,2002:merge', 'tag:yaml.org,2002:value')
+
+class _Fallback(Exception):
+    """ストリーミングでは扱えない文書 (通常の検証に切り替える)."""
+
+class _AnchorTable(dict):
+    """アンカー -> ノード. アンカーを定義した単位も記録する."""
+
+    def __init__(self, composer: '_StreamingComposer'):
+        super().__init__()
+        self.composer = composer
+        self.units: Dict[str, int] = {}
+
+    def __setitem__(self, anchor, node):
+        super().__setitem__(anchor, node)
+        self.units[anchor] = self.composer.unit
+
+class _StreamingComposer(Composer):
+    """
+    ノードを単位 (トップレベルの値, セクションのエントリ) ごとに組み立てる Composer.
+
+    別の単位で定義されたアンカーへのエイリアスを検出する.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.anchors = _AnchorTable(self)
+        self.unit = 0
+        self.cross_unit_alias = False
+
+    def begin_unit(self):
+        """次の単位の組み立てを始める."""
+        if self.anchors and 'compose_node' not in self.__dict__:
+            # アンカーが定義されるまではエイリアスを検査しない (ノードごとの検査のコストを避ける)
+            self.compose_node = self._compose_node_checking_alias
+        self.unit += 1
+
+    def _compose_node_checking_alias(self, parent, index):
+        event = self.peek_event()
+        if isinstance(event, AliasEvent) and self.anchors.units.get(event.anchor, self.unit) != self.unit:
+            self.cross_unit_alias = True
+        return Composer.compose_node(self, parent, index)
+
+class _StreamingConstructor(DuplicateKeyConstructor):
+    """
+    重複キーを収集し, 重複を検出したノードを記録する Constructor.
+
+    check_duplicates を False にすると重複の検査を省略する (2 回目の走査で使用する).
+    """
+
+    def __init__(self):
+        super().__init__(collect_duplicates=True)
+        self.check_duplicates = True
+        self.duplicate_nodes: List[Tuple[Node, int, int]] = [] # (ノード, duplicate_key_errors の開始位置, 終了位置)
+
+    def construct_mapping(self, node, deep=False):
+        if not self.check_duplicates:
+            return SafeConstructor.construct_mapping(self, node, deep)
+        start = len(self.duplicate_key_errors)
+        mapping = super().construct_mapping(node, deep)
+        if len(self.duplicate_key_errors) > start:
+            self.duplicate_nodes.append((node, start, len(self.duplicate_key_errors)))
+        return mapping
+
+    def construct_include(self, node):
+        raise _Fallback()
+
+_StreamingConstructor.add_constructor(INCLUDE_TAG, _StreamingConstructor.construct_include)
+
+class StreamingLoader(Reader, Scanner, Parser, _StreamingComposer, _StreamingConstructor, Resolver):
+    """ストリーミング検証用のローダー (pure-Python 実装)."""
+
+    def __init__(self, stream):
+        Reader.__init__(self, stream)
+        Scanner.__init__(self)
+        Parser.__init__(self)
+        _StreamingComposer.__init__(self)
+        _StreamingConstructor.__init__(self)
+        Resolver.__init__(self)
+
+if yaml.__with_libyaml__:
+    from yaml.cyaml import CParser
+
+    class StreamingCLoader(CParser, _StreamingComposer, _StreamingConstructor, Resolver):
+        """
+        ストリーミング検証用のローダー (libyaml による C 実装).
+
+        libyaml のコンポーザーは文書全体を組み立てるため, イベントの解析のみを libyaml で行い,
+        ノードの組み立ては Composer (Python) で行う.
+        """
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            _StreamingComposer.__init__(self)
+            _StreamingConstructor.__init__(self)
+            Resolver.__init__(self)
+else:
+    StreamingCLoader = None
+
+def _make_loader(stream, backend: str | None) -> StreamingLoader:
+    if resolve_yaml_backend(backend) == "c":
+        return StreamingCLoader(stream)
+    return StreamingLoader(stream)
+
+def _is_plain_mapping(loader: StreamingLoader) -> bool:
+    """次のノードがアンカーのない通常のマッピングか."""
+    event = loader.peek_event()
+    if not isinstance(event, MappingStartEvent) or event.anchor is not None:
+        return False
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = loader.resolve(MappingNode, None, event.implicit)
+    return tag == _MAP_TAG
+
+def _construct_key(loader: StreamingLoader, key_node: Node) -> Any:
+    if key_node.tag in _SPECIAL_KEY_TAGS:
+        raise _Fallback()
+    key = loader.construct_document(key_node)
+    try:
+        hash(key)
+    except TypeError:
+        raise _Fallback() # 通常の読み込みでは ConstructorError になる
+    return key
+
+# _walk が返す要素の種類
+_FIELD = 0 # (_FIELD, キー, 値のノード, 単位, キーのノード): 全体を組み立てたトップレベルの値
+_SECTION = 1 # (_SECTION, キー, None, 単位, キーのノード): エントリ単位で組み立てるセクションの開始
+_ENTRY = 2 # (_ENTRY, セクション, 値のノード, 単位, 名前のノード): セクションのエントリ (名前は単位と共に返す)
+_SECTION_END = 3 # (_SECTION_END, キー, None, 単位, None)
+
+def _walk(loader: StreamingLoader) -> Iterator[Tuple[int, Any, Node | None, int, Node | None]]:
+    """
+    文書を先頭から走査し, トップレベルの値とセクションのエントリを 1 つずつ組み立てて返す.
+
+    返したノードは次の要素を要求した時点で参照されなくなる (アンカーを除く).
+
+    Raises:
+        _Fallback: ストリーミングで扱えない形の文書の場合.
+        yaml.YAMLError: YAML として不正な場合.
+    """
+    loader.get_event() # STREAM-START
+    if loader.check_event(StreamEndEvent):
+        raise _Fallback() # 空の文書
+    loader.get_event() # DOCUMENT-START
+    if not _is_plain_mapping(loader):
+        raise _Fallback()
+    loader.get_event() # ルートの MAPPING-START
+    keys = set()
+    while not loader.check_event(MappingEndEvent):
+        loader.begin_unit()
+        key_node = loader.compose_node(None, None)
+        key = _construct_key(loader, key_node)
+        if key in keys:
+            raise _Fallback()
+        keys.add(key)
+        if key in STREAMED_SECTIONS and _is_plain_mapping(loader):
+            loader.get_event() # セクションの MAPPING-START
+            yield _SECTION, key, None, loader.unit, key_node
+            section_unit = loader.unit
+            while not loader.check_event(MappingEndEvent):
+                loader.begin_unit()
+                name_node = loader.compose_node(None, None)
+                value_node = loader.compose_node(None, None)
+                yield _ENTRY, key, value_node, loader.unit, name_node
+            loader.get_event() # セクションの MAPPING-END
+            yield _SECTION_END, key, None, section_unit, None
+        else:
+            yield _FIELD, key, loader.compose_node(None, None), loader.unit, key_node
+    loader.get_event() # ルートの MAPPING-END
+    loader.get_event() # DOCUMENT-END
+    if not loader.check_event(StreamEndEvent):
+        raise _Fallback() # 複数の文書 (通常の読み込みでは ComposerError になる)
+
+def _construction_ranks(root: Node) -> Dict[int, Tuple[int, int]]:
+    """
+    ノードの ID -> (root からの深さ, 構築の順位).
+
+    Constructor はコンテナを幅優先の順 (深さ順, 同じ深さでは文書の順) に構築し,
+    同じノード (エイリアス) は最初に現れた位置で一度だけ構築する.
+    """
+    ranks = {id(root): (0, 0)}
+    queue = [(root, 0)]
+    for node, depth in queue:
+        if isinstance(node, MappingNode):
+            children = [value for _, value in node.value]
+        elif isinstance(node, SequenceNode):
+            children = node.value
+        else:
+            continue
+        for child in children:
+            if not isinstance(child, ScalarNode) and id(child) not in ranks:
+                ranks[id(child)] = (depth + 1, len(queue))
+                queue.append((child, depth + 1))
+    return ranks
+
+class _DocumentIndex:
+    """1 回目の走査の結果: キー重複, スキーマエラー, ルールが参照する要約."""
+
+    def __init__(self):
+        self.fields: Dict[Any, Any] = {} # エントリ単位で構築しなかったトップレベルの値
+        self.top_level_keys: List[Any] = []
+        self.schema_errors: List[Invalid] = []
+        self.data: Dict[Any, DataEntrySummary | None] = {} # data 名 -> 要約 (スキーマで検証されないエントリは None)
+        self.parameter_names: Dict[Any, None] = {} # parameter 名 (定義順)
+        self.has_parameter_section = False
+        # 同じ名前のエントリが複数ある場合の最後の定義の単位: (セクション, 名前) -> 単位
+        self.last_units: Dict[Tuple[str, Any], int] = {}
+        self._duplicates: List[Tuple[Tuple[int, int, int, int], DuplicateKeyError]] = []
+        self._cross_unit_alias = False
+
+    @property
+    def duplicate_key_errors(self) -> List[DuplicateKeyError]:
+        """キー重複のエラー (通常の読み込みと同じ順序)."""
+        return [error for _, error in sorted(self._duplicates, key=lambda item: item[0])]
+
+    def build(self, loader: StreamingLoader, positions: PositionIndex | None = None):
+        """
+        文書を走査して索引を作る.
+
+        Args:
+            loader: ストリーミング検証用のローダー.
+            positions: 指定した場合, 位置を登録する. メモリを抑えるため, セクションのエントリは
+                名前の位置のみを登録する (エントリ内のパスはエントリの位置になる).
+        """
+        section_errors: Dict[Any, List[Invalid]] = {}
+        names: Dict[Any, Any] = {}
+        section_unit = loader.unit # _ENTRY は常に _SECTION の後に現れ, そこで更新される
+        for kind, key, node, unit, key_node in _walk(loader):
+            if positions is not None and isinstance(key_node, ScalarNode):
+                if kind == _ENTRY:
+                    path = (key, key_node.value)
+                else:
+                    path = (key_node.value,)
+                    positions.add_key((), key_node) # ルート (ブロックのマッピングでは最初のキーの位置)
+                positions.add_key(path, key_node)
+                if kind == _FIELD:
+                    positions.add(node, path)
+            if kind == _ENTRY:
+                name = _construct_key(loader, key_node)
+                if name in names:
+                    line, column = key_node.start_mark.line + 1, key_node.start_mark.column + 1
+                    self._add_duplicate((1, section_unit, 0), DuplicateKeyError(
+                        f"Duplicate key '{name}' found at line {line}, column {column}", line, column
+                    ))
+                    self.last_units[key, name] = unit
+                names[name] = None
+                definition = self._construct(loader, node, unit, 2)
+                errors = collect_entry_errors(key, name, definition)
+                if errors:
+                    section_errors[name] = errors
+                else:
+                    section_errors.pop(name, None)
+                self._add_entry(key, name, definition, not errors)
+            elif kind == _FIELD:
+                self.top_level_keys.append(key)
+                value = self.fields[key] = self._construct(loader, node, unit, 1)
+                self.schema_errors.extend(collect_field_errors(key, value))
+                if key in STREAMED_SECTIONS and isinstance(value, dict):
+                    for name, definition in value.items():
+                        self._add_entry(key, name, definition, not self.schema_errors)
+                if key == 'parameter':
+                    self.has_parameter_section = isinstance(value, dict)
+            elif kind == _SECTION:
+                self.top_level_keys.append(key)
+                self.has_parameter_section |= key == 'parameter'
+                section_unit = unit
+                section_errors = {}
+                names = {}
+            else: # _SECTION_END
+                if section_errors:
+                    for name in names:
+                        self.schema_errors.extend(section_errors.get(name, ()))
+                self.schema_errors.extend(collect_section_errors(key, len(names), not section_errors))
+        self.schema_errors.extend(collect_missing_required(self.top_level_keys))
+        self._cross_unit_alias = loader.cross_unit_alias
+        if self._cross_unit_alias and self._duplicates:
+            raise _Fallback()
+
+    def _construct(self, loader: StreamingLoader, node: Node, unit: int, base_depth: int) -> Any:
+        """ノードを構築し, 検出したキー重複を構築順の位置と共に記録する."""
+        count = len(loader.duplicate_nodes)
+        value = loader.construct_document(node)
+        if len(loader.duplicate_nodes) > count:
+            ranks = _construction_ranks(node)
+            for duplicate_node, start, end in loader.duplicate_nodes[count:]:
+                depth, rank = ranks.get(id(duplicate_node), (0, 0))
+                for error in loader.duplicate_key_errors[start:end]:
+                    self._add_duplicate((base_depth + depth, unit, rank), error)
+        return value
+
+    def _add_duplicate(self, position: Tuple[int, int, int], error: DuplicateKeyError):
+        self._duplicates.append((position + (len(self._duplicates),), error))
+
+    def _add_entry(self, section: str, name: Any, definition: Any, valid: bool):
+        if section == 'data':
+            self.data[name] = DataEntrySummary(definition) if valid and is_schema_entry(name, definition) else None
+        else:
+            self.parameter_names[name] = None
+
+    def build_spec(self) -> Spec:
+        """要約から Spec を作る (build_spec と同じ順序で名前表を作る). スキーマ検証に成功した場合のみ呼び出す."""
+        spec = Spec()
+        for name in self.data:
+            spec.intern(name)
+        spec.data_count = len(spec.names)
+        spec._data_by_id = [None] * spec.data_count
+        spec.has_parameter_section = self.has_parameter_section
+        if self.has_parameter_section:
+            spec.parameter_ids = frozenset(spec.intern(name) for name in self.parameter_names)
+        spec.target = tuple(spec.intern(name) for name in self.fields['target'])
+        spec.metadata = self.fields['metadata']
+        for name_id, summary in enumerate(self.data.values()):
+            if summary is not None:
+                summary.resolve(name_id, spec)
+                spec.data.append(summary)
+                spec._data_by_id[name_id] = summary
+        return spec
+
+    def iter_entries(self, loader: StreamingLoader, spec: Spec) -> Iterator[DataEntry | Parameter]:
+        """文書を再び走査し, スキーマで検証されたエントリを 1 件ずつ構築して返す (同じ名前は最後の定義のみ)."""
+        for kind, key, node, unit, key_node in _walk(loader):
+            if kind == _ENTRY:
+                name = loader.construct_document(key_node)
+                if self.last_units.get((key, name), unit) != unit:
+                    continue
+                yield from self._make_entries(spec, key, ((name, loader.construct_document(node)),))
+            elif kind == _FIELD and key in STREAMED_SECTIONS:
+                value = self.fields[key]
+                if isinstance(value, dict):
+                    yield from self._make_entries(spec, key, value.items())
+
+    @staticmethod
+    def _make_entries(spec: Spec, section: str, items) -> Iterator[DataEntry | Parameter]:
+        for name, definition in items:
+            if is_schema_entry(name, definition):
+                name_id = spec.ids[name]
+                if section == 'data':
+                    yield DataEntry(name_id, spec.names[name_id], definition, spec)
+                else:
+                    yield Parameter(name_id, spec.names[name_id], definition)
+
+class StreamingDataDependenciesValidator(DataDependenciesValidator):
+    """
+    data / parameter のエントリを 1 件ずつ読み込んで検証するバリデーター.
+
+    結果は DataDependenciesValidator と同じ. ストリーミングで検証した場合,
+    self.data は data / parameter 以外のトップレベルの値のみを持ち,
+    カスタムルールの ctx.spec.data の要素は DataEntrySummary になる
+    (エントリ単位のイベントには通常どおり DataEntry が渡される).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.streamed = False # 直前の validate() をストリーミングで検証したか (False の場合は通常の検証)
+        self._index: _DocumentIndex | None = None
+
+    def load_yaml(self) -> dict | list | None:
+        """
+        文書を走査して索引を作る (文書全体は構築しない).
+
+        ストリーミングで扱えない文書の場合は, 通常どおり文書全体を読み込む.
+        """
+        self.errors = []
+        self.warnings = []
+        self.duplicate_key_errors = []
+        self.included_files = []
+        self.included_paths = []
+        self.streamed = False
+        self._index = None
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        index = _DocumentIndex()
+        positions = PositionIndex() if self.record_positions else None
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                loader = _make_loader(f, self.yaml_backend)
+                try:
+                    index.build(loader, positions)
+                finally:
+                    loader.dispose()
+        except Exception:
+            # エラーメッセージを通常の検証と一致させるため, 読み込みに失敗した場合も通常の読み込みに任せる
+            return super().load_yaml()
+        self.streamed = True
+        self._index = index
+        self.positions = positions
+        self.duplicate_key_errors = index.duplicate_key_errors
+        self.data = index.fields
+        return self.data
+
+    def _perform_validation(self) -> bool:
+        if not self.streamed:
+            return super()._perform_validation()
+        index = self._index
+        self.spec = None
+        # スキーマ検証は索引の作成時に済んでいる
+        for error in index.schema_errors:
+            self._add_error(f"Schema error: {error.msg}", path=list(map(str, error.path)), rule_id=SCHEMA_RULE_ID)
+        if index.schema_errors:
+            return False
+
+        with self.profiler.span("build_spec"):
+            self.spec = index.build_spec()
+        initial_error_count = len(self.errors)
+        with self.profiler.span("custom_rules"):
+            self._run_streaming_rules(index)
+        return len(self.errors) == initial_error_count
+
+    def _run_streaming_rules(self, index: _DocumentIndex):
+        """エントリを 1 件ずつ読み込みながらカスタムルールを実行する."""
+        engine = self.rules.engine()
+        spec = self.spec
+        ctx = RuleContext(spec, self.data, self.profiler)
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            loader = _make_loader(f, self.yaml_backend)
+            loader.check_duplicates = False
+            try:
+                data_results, parameter_results = engine.visit_stream(ctx, index.iter_entries(loader, spec))
+            finally:
+                loader.dispose()
+        if index.last_units:
+            # 同じ名前のエントリは最後の定義の位置で走査したため, 最初の位置 (名前 ID の順) に並べ直す
+            data_results = {rule_id: _sorted_by_id(results, spec) for rule_id, results in data_results.items()}
+            parameter_results = {rule_id: _sorted_by_id(results, spec) for rule_id, results in parameter_results.items()}
+        results = RuleResults(data_results, parameter_results, engine.visit_document(ctx))
+        errors, warnings = engine.collect(results)
+        self.errors.extend(errors)
+        self.warnings.extend(warnings)
+
+def _sorted_by_id(results: Dict[Any, RuleResult], spec: Spec) -> Dict[Any, RuleResult]:
+    return dict(sorted(results.items(), key=lambda item: spec.ids[item[0]]))
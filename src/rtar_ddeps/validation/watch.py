@@ -0,0 +1,280 @@
+# ファイルの変更を監視して再検証する (watch モード)
+#
+# プロセスを起動したままにすることで, 再検証ごとのインタプリタ起動と
+# モジュール読み込みのコストを省く. 変更の検出は Linux では inotify を,
+# それ以外の環境 (または inotify が使えない場合) ではポーリングを使用する.
+# !include で取り込んだファイルも監視し, 変更があれば取り込んだ側のファイルを再検証する
+# (変更のないファイルは includes.FragmentCache により読み込み直さない).
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from .batch import run_validator
+from .includes import FRAGMENT_SUFFIXES, FragmentCache
+from .incremental import IncrementalDataDependenciesValidator
+
+# inotify のイベントマスク (<sys/inotify.h>)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+# エディタは一時ファイルへの書き込み + rename で保存することが多いため,
+# ファイルではなく親ディレクトリを監視し, 対象ファイル名のイベントのみを拾う.
+# !include で指定したディレクトリはディレクトリ自体も監視し, その中の *.yml / *.yaml のイベントを拾う
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, len
+
+class PollingWatcher:
+    """ファイルの状態 (更新時刻, サイズ, inode) を定期的に比較して変更を検出する."""
+
+    def __init__(self, file_paths: Iterable[Path], interval: float = 0.05):
+        self.file_paths = list(file_paths)
+        self.interval = interval
+        self._signatures = {path: self._signature(path) for path in self.file_paths}
+
+    @staticmethod
+    def _signature(path: Path) -> Tuple[int, int, int] | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def wait(self, timeout: float | None) -> Set[Path]:
+        """
+        いずれかのファイルが変更されるまで待つ.
+
+        Args:
+            timeout: 最大待ち時間 (秒). None の場合は変更があるまで待つ.
+
+        Returns:
+            変更されたファイルの集合 (タイムアウト時は空).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.file_paths:
+                signature = self._signature(path)
+                if signature != self._signatures[path]:
+                    self._signatures[path] = signature
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux の inotify で変更を検出する (ctypes で libc を直接呼び出す)."""
+
+    def __init__(self, file_paths: Iterable[Path]):
+        self.file_paths = list(file_paths)
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is not available on this platform.")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # wd -> 監視しているディレクトリ, (ディレクトリ, ファイル名) -> 対象ファイル,
+        # 対象のディレクトリ (中の *.yml / *.yaml の変更をディレクトリの変更とする)
+        self._directories: Dict[int, Path] = {}
+        self._targets: Dict[Tuple[Path, str], Path] = {}
+        self._target_directories: Set[Path] = set()
+        try:
+            for path in self.file_paths:
+                self._add_watch(path.parent)
+                self._targets[(path.parent, path.name)] = path
+                if path.is_dir():
+                    self._add_watch(path)
+                    self._target_directories.add(path)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path):
+        if directory in self._directories.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._directories[wd] = directory
+
+    def wait(self, timeout: float | None) -> Set[Path]:
+        """PollingWatcher.wait と同じ."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+            # 対象外のファイルのイベントのみだった場合は待機を続ける
+
+    def _read_events(self) -> Set[Path]:
+        changed = set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, _, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            directory = self._directories.get(wd)
+            target = self._targets.get((directory, name))
+            if target is not None:
+                changed.add(target)
+            elif directory in self._target_directories and os.path.splitext(name)[1] in FRAGMENT_SUFFIXES:
+                changed.add(directory)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def create_watcher(file_paths: Iterable[Path], polling: bool = False):
+    """
+    ファイル監視オブジェクトを作成する.
+
+    polling が False の場合は inotify を試し, 利用できなければポーリングにフォールバックする.
+    """
+    file_paths = list(file_paths)
+    if not polling:
+        try:
+            return InotifyWatcher(file_paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(file_paths)
+
+def wait_for_changes(watcher, debounce: float) -> Set[Path]:
+    """
+    変更を待ち, 連続する保存 (バースト) をまとめて返す.
+
+    最初の変更を検出した後, debounce 秒間新たな変更がなくなるまで待つ.
+    """
+    changed = watcher.wait(None)
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+class WatchSession:
+    """
+    watch モードの状態 (ファイルごとの直前の検証結果) を保持し, 再検証を行う.
+
+    ファイルごとに IncrementalDataDependenciesValidator を保持し,
+    変更のあったエントリに関係するルールのみを再実行する.
+    再検証結果は, エラー/警告が直前の結果から変化した場合のみ出力する.
+    再検証にかかった時間は毎回出力する.
+    """
+
+    def __init__(self, file_paths: List[Path], yaml_backend: str | None = None, echo: Callable[[str], None] = print):
+        self.file_paths = list(file_paths)
+        self.yaml_backend = yaml_backend
+        self.echo = echo
+        self._diagnostics: Dict[Path, Tuple[List[str], List[str]] | None] = {path: None for path in self.file_paths}
+        self.fragments = FragmentCache()
+        self._validators = {
+            path: IncrementalDataDependenciesValidator(path, yaml_backend=yaml_backend, fragment_cache=self.fragments)
+            for path in self.file_paths
+        }
+
+    def watched_paths(self) -> List[Path]:
+        """監視するファイル (検証するファイルと, それらが直前の検証で !include に指定したファイル/ディレクトリ)."""
+        paths = dict.fromkeys(self.file_paths)
+        for validator in self._validators.values():
+            paths.update(dict.fromkeys(validator.included_paths))
+        return list(paths)
+
+    def validate_all(self) -> bool:
+        """すべてのファイルを検証して結果を出力する. すべて成功した場合 True."""
+        results = [self._validate(path) for path in self.file_paths]
+        return all(is_valid for is_valid, _ in results)
+
+    def revalidate(self, changed_paths: Iterable[Path]) -> List[Tuple[Path, float, bool]]:
+        """
+        変更されたファイルを再検証する.
+
+        Returns:
+            (ファイルパス, 再検証時間 [ms], 結果が変化したか) のリスト (file_paths の順).
+        """
+        changed_paths = set(changed_paths)
+        report = []
+        for path in self.file_paths:
+            if path not in changed_paths and changed_paths.isdisjoint(self._validators[path].included_paths):
+                continue
+            start = time.perf_counter()
+            diagnostics_changed = self._validate(path)[1]
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            state = "diagnostics changed" if diagnostics_changed else "no change"
+            self.echo(f"[watch] Revalidated {path} in {elapsed_ms:.1f} ms ({state})")
+            report.append((path, elapsed_ms, diagnostics_changed))
+        return report
+
+    def _validate(self, path: Path) -> Tuple[bool, bool]:
+        """1 ファイルを検証し, (成功したか, 結果が変化したか) を返す."""
+        result = run_validator(self._validators[path])
+        diagnostics = (result.errors, result.warnings)
+        changed = diagnostics != self._diagnostics[path]
+        self._diagnostics[path] = diagnostics
+        if changed:
+            self.echo(f"Validating data dependencies file: {path}")
+            self.echo(result.output.rstrip("\n"))
+        return result.is_valid, changed
+
+def run_watch(
+    file_paths: List[Path],
+    yaml_backend: str | None = None,
+    debounce: float = 0.1,
+    polling: bool = False,
+    echo: Callable[[str], None] = print,
+):
+    """
+    ファイルを監視し, 変更のたびに再検証する. KeyboardInterrupt (Ctrl+C) で終了する.
+
+    Args:
+        file_paths: 監視/検証するファイル.
+        yaml_backend: YAML ローダーのバックエンド (BaseValidator 参照).
+        debounce: 連続する変更をまとめる待ち時間 (秒).
+        polling: True の場合は inotify を使わずポーリングで監視する.
+        echo: 出力関数.
+    """
+    session = WatchSession(file_paths, yaml_backend=yaml_backend, echo=echo)
+    session.validate_all()
+    watched = session.watched_paths()
+    watcher = create_watcher(watched, polling=polling)
+    echo(f"[watch] Watching {len(watched)} file(s) using {type(watcher).__name__}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            session.revalidate(wait_for_changes(watcher, debounce))
+            if session.watched_paths() != watched:
+                # !include で指定するファイルが変わった
+                watcher.close()
+                watched = session.watched_paths()
+                watcher = create_watcher(watched, polling=polling)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
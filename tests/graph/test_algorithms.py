@@ -0,0 +1,36 @@
+from rtar_ddeps.graph.algorithms import find_cycles, reachable, strongly_connected_components
+
+def test_deep_chain_does_not_recurse():
+    """再帰の深さ制限を大きく超える一直線の依存関係でも処理できる"""
+    n = 100_000
+    nodes = [f"d{i}" for i in range(n)]
+    successors = {f"d{i}": [f"d{i - 1}"] for i in range(1, n)}
+    assert find_cycles(nodes, successors) == []
+    assert len(strongly_connected_components(nodes, successors)) == n
+
+def test_deep_cycle_is_reported_once_with_full_members():
+    n = 5_000
+    nodes = [f"d{i}" for i in range(n)]
+    successors = {f"d{i}": [f"d{(i + 1) % n}"] for i in range(n)}
+    cycles = find_cycles(nodes, successors)
+    assert len(cycles) == 1
+    assert cycles[0].members == nodes
+    assert cycles[0].path == nodes + ["d0"]
+
+def test_every_cycle_is_reported():
+    nodes = ["a", "b", "c", "d", "e", "f", "g"]
+    successors = {
+        "a": ["b"], "b": ["c", "a"], "c": ["a"], # a, b, c の循環 (最短経路は a -> b -> a)
+        "d": ["e"], "e": ["d", "a"], # d, e の循環 (a への辺は循環ではない)
+        "f": ["f"], # 自己ループ
+        "g": ["undefined"], # 未定義ノードへの辺は無視する
+    }
+    cycles = find_cycles(nodes, successors)
+    assert [cycle.members for cycle in cycles] == [["a", "b", "c"], ["d", "e"], ["f"]]
+    assert [cycle.path for cycle in cycles] == [["a", "b", "a"], ["d", "e", "d"], ["f", "f"]]
+
+def test_reachable():
+    successors = {"a": ["b"], "b": ["c", "a"], "d": ["a"], "e": []}
+    assert reachable(["a"], successors) == {"a", "b", "c"}
+    assert reachable(["d", "e"], successors) == {"a", "b", "c", "d", "e"}
+    assert reachable([], successors) == set()
@@ -0,0 +1,184 @@
+import random
+from pathlib import Path
+
+import pytest
+import yaml
+
+from rtar_ddeps.graph.dependency_graph import CyclicGraphError, DependencyGraph
+from rtar_ddeps.model.spec import build_spec
+from rtar_ddeps.validation.spec_cache import load_spec
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _graph(edges):
+    """{名前: [上流の名前]} からグラフを作る (名前の順序がノード ID)."""
+    names = list(edges)
+    ids = {name: i for i, name in enumerate(names)}
+    return DependencyGraph(names, [[ids[u] for u in edges[name]] for name in names])
+
+def _names(graph, nodes):
+    return [graph.names[node] for node in nodes]
+
+def _brute_force_upstream(graph, node):
+    seen = set()
+    stack = list(graph.predecessors[node])
+    while stack:
+        u = stack.pop()
+        if u not in seen:
+            seen.add(u)
+            stack.extend(graph.predecessors[u])
+    return seen
+
+def test_from_spec_matches_normal_file():
+    with open(TEST_DATA_DIR / "normal.yml", encoding="utf-8") as f:
+        graph = DependencyGraph.from_spec(build_spec(yaml.safe_load(f)))
+    report = graph.id("analysis_report")
+    assert _names(graph, graph.predecessors[report]) == ["statistics_summary", "user_specific_summary", "processed_image"]
+    assert _names(graph, graph.upstream(report)) == [
+        "raw_sensor_data", "processed_data", "filtered_data", "statistics_summary",
+        "user_ids", "user_specific_summary", "raw_image", "processed_image",
+    ]
+    assert _names(graph, graph.downstream(graph.id("filtered_data"))) == [
+        "statistics_summary", "user_specific_summary", "calculated_threshold", "analysis_report",
+    ]
+    assert graph.upstream_count(report) == 8
+    assert graph.downstream_count(graph.id("raw_image")) == 2
+
+def test_topological_order_keeps_definition_order_when_unconstrained():
+    graph = _graph({"c": ["b"], "a": [], "b": ["a"], "d": []})
+    assert _names(graph, graph.topological_order()) == ["a", "b", "c", "d"]
+
+def test_undefined_references_and_duplicates_are_ignored():
+    graph = DependencyGraph(["a", "b"], [None, [0, 0, 5]])
+    assert graph.predecessors == [(), (0,)]
+    assert graph.successors == [(1,), ()]
+
+def test_reaches_and_path():
+    graph = _graph({"a": [], "b": ["a"], "c": ["b"], "d": ["a", "c"], "e": []})
+    a, b, c, d, e = range(5)
+    assert graph.reaches(a, d) and graph.reaches(b, d)
+    assert not graph.reaches(d, a)
+    assert not graph.reaches(a, a)
+    assert not graph.reaches(e, d)
+    assert graph.path(a, d) == [a, d] # 最短の経路
+    assert graph.path(b, d) == [b, c, d]
+    assert graph.path(e, d) is None
+    assert graph.path(a, a) == [a]
+
+def test_cycles():
+    graph = _graph({"x": ["b"], "a": ["b"], "b": ["a"], "s": ["s"], "y": ["x"]})
+    x, a, b, s, y = range(5)
+    assert graph.has_cycles
+    assert graph.cycles() == [[a, b], [s]]
+    with pytest.raises(CyclicGraphError) as excinfo:
+        graph.topological_order()
+    assert excinfo.value.cycles == [[a, b], [s]]
+    assert "'a', 'b'; 's'" in str(excinfo.value)
+    # 循環に含まれるノードは自身の上流/下流になる
+    assert graph.upstream(a) == [a, b]
+    assert graph.upstream(y) == [a, b, x]
+    assert graph.downstream(b) == [a, b, x, y]
+    assert graph.reaches(s, s) and graph.reaches(a, a)
+    assert graph.path(b, y) == [b, x, y]
+
+def test_acyclic_graph_has_no_cycles():
+    graph = _graph({"a": [], "b": ["a"]})
+    assert not graph.has_cycles
+    assert graph.cycles() == []
+
+def test_unknown_name():
+    graph = _graph({"a": []})
+    with pytest.raises(KeyError, match="'b' is not defined in the 'data' section."):
+        graph.id("b")
+
+def test_closure_matches_brute_force():
+    rng = random.Random(0)
+    n = 300
+    required = [rng.sample(range(n), rng.randint(0, 3)) for _ in range(n)] # 循環を含む
+    graph = DependencyGraph([f"d{i}" for i in range(n)], required)
+    position = {node: i for i, node in enumerate(graph._order)}
+    for node in range(n):
+        upstream = _brute_force_upstream(graph, node)
+        assert set(graph.upstream(node)) == upstream
+        assert [position[u] for u in graph.upstream(node)] == sorted(position[u] for u in upstream)
+        assert graph.upstream_count(node) == len(upstream)
+        for other in range(0, n, 7):
+            assert graph.reaches(other, node) == (other in upstream)
+            assert (node in graph.downstream(other)) == (other in upstream)
+            path = graph.path(other, node)
+            if other != node:
+                assert (path is not None) == (other in upstream)
+            if path is not None and len(path) > 1:
+                assert all(u in graph.predecessors[v] for u, v in zip(path, path[1:]))
+
+def test_deep_chain():
+    """再帰の深さ制限を大きく超える一直線の依存関係でも処理できる"""
+    n = 50_000
+    graph = DependencyGraph([f"d{i}" for i in range(n)], [[i - 1] if i else None for i in range(n)])
+    assert graph.topological_order() == list(range(n))
+    assert graph.upstream_count(n - 1) == n - 1
+    assert graph.reaches(0, n - 1)
+    assert graph.downstream(n - 2) == [n - 1]
+
+def test_from_spec_targets_and_parameter_consumers():
+    with open(TEST_DATA_DIR / "normal.yml", encoding="utf-8") as f:
+        graph = DependencyGraph.from_spec(build_spec(yaml.safe_load(f)))
+    assert _names(graph, graph.targets) == [
+        "statistics_summary", "user_specific_summary", "analysis_report", "processed_image", "calculated_threshold",
+    ]
+    assert _names(graph, graph.parameter_consumers["filter_threshold"]) == ["filtered_data"]
+    assert graph.parameter_consumers["roi_top"] == (graph.id("processed_image"),)
+
+def test_from_spec_follows_variable_columns():
+    with open(TEST_DATA_DIR / "warning_variable_columns.yml", encoding="utf-8") as f:
+        graph = DependencyGraph.from_spec(build_spec(yaml.safe_load(f)))
+    assert _names(graph, graph.predecessors[graph.id("table_warning1")]) == ["ref_single"]
+    assert _names(graph, graph.impact([graph.id("ref_single")])) == ["ref_single", "table_warning1"]
+    streaming, _ = load_spec(TEST_DATA_DIR / "warning_variable_columns.yml", streaming=True)
+    assert streaming.graph.predecessors == graph.predecessors
+
+def test_impact_is_downstream_that_reaches_a_target():
+    # t1, t2 が target. side は target に到達しないため再計算しない
+    graph = DependencyGraph(
+        ["a", "b", "side", "t1", "c", "t2"],
+        [None, [0], [1], [1], None, [4, 3]],
+        targets=[3, 5],
+        parameter_consumers={"p": [1], "unused": []},
+    )
+    a, b, side, t1, c, t2 = range(6)
+    assert graph.impact([a]) == [a, b, t1, t2]
+    assert graph.impact(graph.parameter_consumers["p"]) == [b, t1, t2]
+    assert graph.impact([side]) == []
+    assert graph.impact([c, t1]) == [t1, c, t2]
+    assert graph.impact(graph.parameter_consumers["unused"]) == []
+
+def test_impact_matches_closure_intersection():
+    rng = random.Random(1)
+    n = 200
+    required = [rng.sample(range(i), min(i, rng.randint(0, 2))) for i in range(n)]
+    targets = rng.sample(range(n), 10)
+    graph = DependencyGraph([f"d{i}" for i in range(n)], required, targets=targets)
+    reaches_target = set(targets).union(*(graph.upstream(t) for t in targets))
+    for changed in ([0], [5, 17], [n - 1]):
+        expected = set(changed).union(*(graph.downstream(v) for v in changed)) & reaches_target
+        assert graph.impact(changed) == [v for v in graph.topological_order() if v in expected]
+
+def test_condensation_is_lazy():
+    """隣接リストのみを使う処理 (出力など) では, 構築時にトポロジカル順を求めない"""
+    graph = _graph({"a": [], "b": ["a"]})
+    order_slot = DependencyGraph._order # __getattr__ を経由しない参照
+    with pytest.raises(AttributeError):
+        order_slot.__get__(graph)
+    assert graph.topological_order() == [0, 1]
+    assert order_slot.__get__(graph) == [0, 1]
+
+def test_state_round_trip_keeps_condensation():
+    graph = _graph({"a": ["c"], "b": ["a"], "c": ["b"], "d": ["c", "c"]})
+    graph.parameter_consumers = {"p": (3,)}
+    restored = DependencyGraph.from_state(graph.state())
+    order_slot = DependencyGraph._order
+    assert order_slot.__get__(restored) == order_slot.__get__(graph)
+    assert restored.ids == graph.ids and restored.parameter_consumers == {"p": (3,)}
+    assert restored.cycles() == [[0, 1, 2]]
+    assert restored.upstream(3) == graph.upstream(3)
+    assert restored.path(0, 3) == graph.path(0, 3)
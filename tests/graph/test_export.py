@@ -0,0 +1,87 @@
+import io
+from pathlib import Path
+
+import pytest
+import yaml
+
+from rtar_ddeps.graph.dependency_graph import DependencyGraph
+from rtar_ddeps.graph.export import export_graph, formats_from_spec, select_nodes
+from rtar_ddeps.model.spec import build_spec
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _graph():
+    # a -> b -> d (target), c -> d, e は独立
+    return DependencyGraph(["a", "b", "c", "d", "e"], [None, [0], None, [1, 2], None], targets=[3])
+
+def test_select_nodes():
+    graph = _graph()
+    assert select_nodes(graph) == [0, 1, 2, 3, 4]
+    assert select_nodes(graph, roots=[1]) == [0, 1]
+    assert select_nodes(graph, depth=0) == [3]
+    assert select_nodes(graph, depth=1) == [1, 2, 3] # target から 1 段
+    assert select_nodes(graph, roots=[3, 4], depth=5) == [0, 1, 2, 3, 4]
+
+def test_export_dot_clusters_by_format():
+    stream = io.StringIO()
+    edges = export_graph(_graph(), stream, 'dot', formats=["table", "list", "table", "single", None])
+    assert edges == 3
+    assert stream.getvalue() == (
+        "digraph data_dependencies {\n"
+        "  rankdir=LR;\n"
+        "  node [shape=box];\n"
+        "  subgraph \"cluster_table\" {\n"
+        "    label=\"table\";\n"
+        "    \"a\";\n"
+        "    \"c\";\n"
+        "  }\n"
+        "  subgraph \"cluster_list\" {\n"
+        "    label=\"list\";\n"
+        "    \"b\";\n"
+        "  }\n"
+        "  subgraph \"cluster_single\" {\n"
+        "    label=\"single\";\n"
+        "    \"d\" [peripheries=2];\n"
+        "  }\n"
+        "  \"e\";\n"
+        "  \"a\" -> \"b\";\n"
+        "  \"b\" -> \"d\";\n"
+        "  \"c\" -> \"d\";\n"
+        "}\n"
+    )
+
+def test_export_mermaid_only_selected_nodes():
+    graph = _graph()
+    stream = io.StringIO()
+    edges = export_graph(graph, stream, 'mermaid', nodes=select_nodes(graph, depth=1))
+    # 対象外のノード (a) への辺は出力しない
+    assert edges == 2
+    assert stream.getvalue() == (
+        "flowchart LR\n"
+        "  classDef target stroke-width:3px;\n"
+        "  d1[\"b\"]\n"
+        "  d2[\"c\"]\n"
+        "  d3[\"d\"]:::target\n"
+        "  d1 --> d3\n"
+        "  d2 --> d3\n"
+    )
+
+def test_labels_are_escaped():
+    graph = DependencyGraph(['say "hi"', 'back\\slash'], [None, [0]])
+    dot = io.StringIO()
+    export_graph(graph, dot, 'dot')
+    assert '"say \\"hi\\"" -> "back\\\\slash";' in dot.getvalue()
+    mermaid = io.StringIO()
+    export_graph(graph, mermaid, 'mermaid')
+    assert 'd0["say #quot;hi#quot;"]' in mermaid.getvalue()
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unknown export format 'svg'"):
+        export_graph(_graph(), io.StringIO(), 'svg')
+
+def test_formats_from_spec():
+    with open(TEST_DATA_DIR / "normal.yml", encoding="utf-8") as f:
+        spec = build_spec(yaml.safe_load(f))
+    formats = formats_from_spec(spec)
+    assert formats[spec.ids["raw_sensor_data"]] == "table"
+    assert formats[spec.ids["analysis_report"]] == "document"
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import yaml
+
+from rtar_ddeps.graph.pruning import needed_by_targets, prune_document
+from rtar_ddeps.model.spec import build_spec
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _load(name):
+    with open(TEST_DATA_DIR / name, encoding="utf-8") as f:
+        document = yaml.safe_load(f)
+    return document, build_spec(document)
+
+def _names(spec, ids):
+    return sorted(spec.names[i] for i in ids)
+
+def test_needed_by_targets_follows_required_data_and_variable_columns():
+    _, spec = _load("warning_unreachable.yml")
+    needed = needed_by_targets(spec)
+    assert _names(spec, needed.data) == ["raw", "result", "subjects"]
+    assert _names(spec, needed.parameters) == ["threshold"]
+
+def test_everything_is_needed_in_normal_file():
+    document, spec = _load("normal.yml")
+    needed = needed_by_targets(spec)
+    assert len(needed.data) == len(document['data'])
+    assert len(needed.parameters) == len(document['parameter'])
+    assert prune_document(document, spec) == document
+
+def test_prune_document_keeps_order_and_other_sections():
+    document, spec = _load("warning_unreachable.yml")
+    pruned = prune_document(document, spec)
+    assert list(pruned) == list(document)
+    assert list(pruned['data']) == ["raw", "subjects", "result"]
+    assert list(pruned['parameter']) == ["threshold"]
+    assert pruned['metadata'] is document['metadata']
+    # 元の文書は変更しない
+    assert "debug_dump" in document['data']
+
+def test_prune_document_removes_empty_parameter_section():
+    document = {
+        'metadata': {'title': 't'},
+        'target': ['a', 'undefined'],
+        'data': {
+            'a': {'descriptions': ['a'], 'format': 'single', 'unit': '-'},
+            'b': {'descriptions': ['b'], 'format': 'single', 'unit': '-', 'required_parameter': ['p']},
+        },
+        'parameter': {'p': {'descriptions': ['p'], 'unit': '-'}},
+    }
+    pruned = prune_document(document, build_spec(document))
+    assert list(pruned['data']) == ['a']
+    assert 'parameter' not in pruned
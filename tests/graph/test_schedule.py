@@ -0,0 +1,116 @@
+import pytest
+
+from rtar_ddeps.graph.dependency_graph import CyclicGraphError, DependencyGraph
+from rtar_ddeps.graph.schedule import PLAN_FORMAT_VERSION, costs_from_spec, format_plan, plan_schedule
+from rtar_ddeps.model.spec import build_spec
+
+def _graph(edges):
+    """{名前: [上流の名前]} からグラフを作る (名前の順序がノード ID)."""
+    names = list(edges)
+    ids = {name: i for i, name in enumerate(names)}
+    return DependencyGraph(names, [[ids[u] for u in edges[name]] for name in names])
+
+def _document(costs):
+    """{名前: cost} (None は cost なし) の data を一直線に依存させた文書."""
+    data = {}
+    previous = None
+    for name, cost in costs.items():
+        definition = {'descriptions': [name], 'format': 'single', 'unit': '-'}
+        if previous is not None:
+            definition['required_data'] = [previous]
+        if cost is not None:
+            definition['cost'] = cost
+        data[name] = definition
+        previous = name
+    return {'metadata': {'title': 't'}, 'target': [previous], 'data': data}
+
+def _check_schedule(plan, costs):
+    """上流の完了後に開始し, 同じワーカーの処理が重ならないことを確かめる."""
+    finish = {step.node: step.finish for step in plan.steps}
+    assert sorted(finish) == list(range(len(plan.graph)))
+    for step in plan.steps:
+        assert step.finish - step.start == costs[step.node]
+        assert all(finish[u] <= step.start for u in plan.graph.predecessors[step.node])
+        assert 0 <= step.worker < plan.jobs
+    by_worker = {}
+    for step in plan.steps:
+        by_worker.setdefault(step.worker, []).append(step)
+    for steps in by_worker.values():
+        assert all(a.finish <= b.start for a, b in zip(steps, steps[1:]))
+
+def test_levels_and_critical_path():
+    graph = _graph({"a": [], "b": ["a"], "c": [], "d": ["b", "c"], "e": ["c"]})
+    a, b, c, d, e = range(5)
+    plan = plan_schedule(graph, 2)
+    assert plan.levels == [[a, c], [b, e], [d]]
+    assert plan.critical_path == [a, b, d]
+    assert plan.total_cost == 5
+    assert plan.critical_path_cost == 3
+    assert plan.makespan == 3
+    assert plan.speedup == pytest.approx(5 / 3)
+    assert plan.max_speedup == pytest.approx(5 / 3)
+    _check_schedule(plan, [1] * 5)
+
+def test_one_worker_runs_everything_in_sequence():
+    graph = _graph({"a": [], "b": ["a"], "c": []})
+    plan = plan_schedule(graph, 1, [2, 3, 4])
+    assert plan.makespan == plan.total_cost == 9
+    assert plan.speedup == 1.0
+    assert plan.max_speedup == pytest.approx(9 / 5)
+    _check_schedule(plan, [2, 3, 4])
+
+def test_longest_remaining_work_is_scheduled_first():
+    # x は長い後続を持つため, 定義順が後でも先に割り当てる
+    graph = _graph({"short": [], "x": [], "y": ["x"], "z": ["y"]})
+    short, x, y, z = range(4)
+    plan = plan_schedule(graph, 1)
+    assert [step.node for step in plan.steps][0] == x
+    plan = plan_schedule(graph, 2, [5, 1, 1, 1])
+    assert plan.makespan == 5
+    assert plan.critical_path == [short]
+
+def test_many_workers_reach_the_critical_path():
+    edges = {f"n{i}": ([f"n{i - 1}"] if i % 10 else []) for i in range(100)} # 長さ 10 の鎖が 10 本
+    plan = plan_schedule(_graph(edges), 10)
+    assert plan.makespan == plan.critical_path_cost == 10
+    assert plan.speedup == plan.max_speedup == 10
+    _check_schedule(plan, [1] * 100)
+
+def test_to_dict():
+    graph = _graph({"a": [], "b": ["a"]})
+    result = plan_schedule(graph, 2, [1, 2.5]).to_dict()
+    assert result['version'] == PLAN_FORMAT_VERSION
+    assert result['critical_path'] == ["a", "b"]
+    assert result['levels'] == [["a"], ["b"]]
+    assert result['steps'] == [
+        {'name': "a", 'worker': 0, 'start': 0, 'finish': 1, 'cost': 1, 'level': 0, 'requires': []},
+        {'name': "b", 'worker': 0, 'start': 1, 'finish': 3.5, 'cost': 2.5, 'level': 1, 'requires': ["a"]},
+    ]
+    assert result['makespan'] == 3.5
+
+def test_format_plan():
+    text = format_plan(plan_schedule(_graph({"a": [], "b": ["a"], "c": []}), 2))
+    assert "Critical path (cost 2): a -> b" in text
+    assert "Total cost 3, makespan 2 on 2 workers: speedup 1.50x (at most 1.50x with unlimited workers)" in text
+
+def test_cycles_and_invalid_jobs():
+    with pytest.raises(CyclicGraphError):
+        plan_schedule(_graph({"a": ["b"], "b": ["a"]}), 2)
+    with pytest.raises(ValueError, match="jobs must be at least 1"):
+        plan_schedule(_graph({"a": []}), 0)
+
+def test_empty_graph():
+    plan = plan_schedule(DependencyGraph([], []), 4)
+    assert plan.steps == [] and plan.levels == [] and plan.critical_path == []
+    assert plan.makespan == 0 and plan.speedup == 1.0
+
+def test_costs_from_spec():
+    spec = build_spec(_document({"a": 3, "b": None, "c": 0.5}))
+    graph = DependencyGraph.from_spec(spec)
+    assert costs_from_spec(spec, graph) == [3, 1, 0.5]
+
+@pytest.mark.parametrize("cost", [-1, "slow", True, float("inf")])
+def test_invalid_cost(cost):
+    spec = build_spec(_document({"a": cost}))
+    with pytest.raises(ValueError, match="Invalid cost for data 'a'"):
+        costs_from_spec(spec, DependencyGraph.from_spec(spec))
@@ -0,0 +1,65 @@
+import datetime
+import marshal
+from pathlib import Path
+
+import pytest
+import yaml
+
+from rtar_ddeps.graph.pruning import needed_by_targets
+from rtar_ddeps.model.compiled import CompiledSpec
+from rtar_ddeps.model.spec import build_spec
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _compiled(name="normal.yml") -> CompiledSpec:
+    with open(TEST_DATA_DIR / name, encoding="utf-8") as f:
+        document = yaml.safe_load(f)
+    return CompiledSpec(document, build_spec(document))
+
+def _entries(spec):
+    return [
+        (
+            entry.id, entry.name, entry.descriptions, entry.format, entry.unit, entry.process,
+            entry.required_data, entry.required_parameter, entry.cost,
+            [(c.index, c.name, c.description, c.key_source, c.ref_id) for c in entry.columns or ()] if entry.columns is not None else None,
+            [(k.index, k.name, k.description) for k in entry.keys] if entry.keys is not None else None,
+            entry.column_names, entry.key_names,
+        )
+        for entry in spec.data
+    ]
+
+def test_round_trip():
+    original = _compiled()
+    restored = CompiledSpec.from_bytes(original.to_bytes())
+    spec, expected = restored.spec, original.spec
+    assert (spec.names, spec.ids, spec.data_count, spec.target, spec.metadata) == (
+        expected.names, expected.ids, expected.data_count, expected.target, expected.metadata,
+    )
+    assert (spec.parameter_ids, spec.has_parameter_section) == (expected.parameter_ids, expected.has_parameter_section)
+    assert _entries(spec) == _entries(expected)
+    assert [(p.id, p.name, p.descriptions, p.unit) for p in spec.parameters] == [
+        (p.id, p.name, p.descriptions, p.unit) for p in expected.parameters
+    ]
+    assert all(spec.data_entry(entry.id) is entry for entry in spec.data)
+    assert needed_by_targets(spec) == needed_by_targets(expected)
+    assert restored.document == original.document
+    assert restored.graph.topological_order() == original.graph.topological_order()
+    assert restored.graph.parameter_consumers == original.graph.parameter_consumers
+
+def test_spec_and_document_are_restored_on_first_use():
+    restored = CompiledSpec.from_bytes(_compiled().to_bytes())
+    assert restored.graph.topological_order()
+    assert restored._spec is None and restored._document is None
+    # 復元せずに再度直列化できる
+    assert CompiledSpec.from_bytes(restored.to_bytes()).document == _compiled().document
+
+def test_values_marshal_cannot_store():
+    compiled = _compiled()
+    compiled.document['metadata']['created'] = datetime.date(2024, 1, 1)
+    with pytest.raises(ValueError):
+        compiled.to_bytes()
+
+@pytest.mark.parametrize("data", [b"", b"not marshal", marshal.dumps((0, None, None, None)), marshal.dumps([1])])
+def test_invalid_bytes(data):
+    with pytest.raises(ValueError):
+        CompiledSpec.from_bytes(data)
@@ -0,0 +1,68 @@
+import yaml
+from pathlib import Path
+
+from rtar_ddeps.model.spec import build_spec
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+DOC = """
+metadata: {title: t, purposes: [p]}
+target: [b, missing_target]
+data:
+  a:
+    descriptions: [x]
+    format: table
+    unit: '-'
+    columns:
+      - {name: id, description: d}
+      - {name: b*, description: d, key_source: k}
+  b:
+    descriptions: []
+    format: dictionary
+    unit: '-'
+    keys:
+      - {name: k, description: d}
+    required_data: [a, undefined_data]
+    required_parameter: [p1]
+  '':
+    format: 1
+parameter:
+  p1: {descriptions: [x], unit: m}
+  a: {descriptions: [], unit: '-'}
+"""
+
+def test_build_spec_interns_names_and_ids():
+    spec = build_spec(yaml.safe_load(DOC))
+    # data のキー (スキーマで検証されないものを含む) が先頭の名前 ID になる
+    assert spec.data_count == 3
+    assert spec.names[:3] == ['a', 'b', '']
+    assert [entry.name for entry in spec.data] == ['a', 'b']
+    assert spec.data_entry(spec.ids['']) is None
+    assert [p.name for p in spec.parameters] == ['p1', 'a']
+    assert spec.parameter_ids == {spec.ids['p1'], spec.ids['a']}
+    assert [spec.names[i] for i in spec.target] == ['b', 'missing_target']
+    assert not spec.is_data(spec.ids['missing_target'])
+
+    a, b = spec.data
+    assert a.keys is None and b.columns is None
+    assert [(c.index, c.name, c.key_source, c.is_variable) for c in a.columns] == [(0, 'id', None, False), (1, 'b*', 'k', True)]
+    assert spec.data_entry(a.columns[1].ref_id) is b
+    assert a.column_names == {'id', 'b*'} and b.key_names == {'k'}
+    assert b.descriptions == () and a.required_data is None
+    assert [spec.names[i] for i in b.required_data] == ['a', 'undefined_data']
+    assert spec.names[b.required_parameter[0]] == 'p1'
+    # 同じ名前は同じ ID, 同じ文字列オブジェクトを共有する
+    assert b.required_data[0] == a.id
+    assert spec.names[a.id] is a.name
+
+def test_model_objects_have_no_instance_dict():
+    spec = build_spec(yaml.safe_load(DOC))
+    for obj in (spec, spec.data[0], spec.data[0].columns[0], spec.data[1].keys[0], spec.parameters[0]):
+        assert not hasattr(obj, '__dict__')
+
+def test_build_spec_normal_file():
+    doc = yaml.safe_load((TEST_DATA_DIR / "normal.yml").read_text(encoding='utf-8'))
+    spec = build_spec(doc)
+    assert [entry.name for entry in spec.data] == list(doc['data'])
+    for entry in spec.data:
+        assert entry.format == doc['data'][entry.name]['format']
@@ -0,0 +1,208 @@
+import io
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from rtar_ddeps.cli import cli
+from rtar_ddeps.server.client import ServerClient, connect
+from rtar_ddeps.server.protocol import (
+    INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, SOCKET_ENV, RpcError, default_socket_path,
+)
+from rtar_ddeps.server.server import Server, ValidationSession, serve_unix
+from rtar_ddeps.settings import CACHE_DIR_ENV
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _call(server: Server, method: str, params=None):
+    response = server.handle({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}})
+    if "error" in response:
+        raise RpcError(response["error"]["code"], response["error"]["message"])
+    return response["result"]
+
+def test_validate_returns_structured_diagnostics():
+    server = Server()
+    result = _call(server, "validate", {"paths": ["error_reference.yml", "normal.yml"], "cwd": str(TEST_DATA_DIR)})
+    assert result["summary"] == {"files": 2, "passed": 1, "failed": 1, "warned": 0}
+    first = result["files"][0]
+    assert first["file"] == str(TEST_DATA_DIR / "error_reference.yml")
+    assert not first["valid"]
+    assert {e["rule_id"] for e in first["errors"]} >= {"references"}
+    assert all(e["line"] is not None for e in first["errors"] if e["path"])
+
+def test_validate_report_matches_cli_output():
+    path = str(TEST_DATA_DIR / "error_reference.yml")
+    local = CliRunner().invoke(cli, ["validate", "data-dependencies", "--no-server", path])
+    result = _call(Server(), "validate", {"paths": [path], "format": "text"})
+    assert result["report"] == local.output
+    assert "files" not in result
+
+def test_unchanged_files_are_reused(tmp_path):
+    path = tmp_path / "data_dependencies.yml"
+    shutil.copy(TEST_DATA_DIR / "normal.yml", path)
+    server = Server()
+    params = {"paths": [str(path)]}
+    assert not _call(server, "validate", params)["files"][0]["reused"]
+    assert _call(server, "validate", params)["files"][0]["reused"]
+
+    shutil.copy(TEST_DATA_DIR / "error_reference.yml", path)
+    changed = _call(server, "validate", params)["files"][0]
+    assert not changed["reused"]
+    assert not changed["valid"]
+    assert _call(server, "stats") | {"uptime": 0} == {"documents": 1, "reused": 1, "validated": 2, "uptime": 0}
+
+def test_session_evicts_least_recently_used():
+    session = ValidationSession(max_documents=1)
+    session.validate(TEST_DATA_DIR / "normal.yml")
+    session.validate(TEST_DATA_DIR / "error_reference.yml")
+    assert len(session) == 1
+    assert not session.validate(TEST_DATA_DIR / "normal.yml")[1]
+
+def test_errors_are_json_rpc_errors():
+    server = Server()
+    with pytest.raises(RpcError) as e:
+        _call(server, "query")
+    assert e.value.code == METHOD_NOT_FOUND
+    with pytest.raises(RpcError) as e:
+        _call(server, "validate", {"paths": ["missing.yml"], "cwd": str(TEST_DATA_DIR)})
+    assert (e.value.code, e.value.message) == (INVALID_PARAMS, "No data dependencies file matches 'missing.yml'.")
+    assert json.loads(server.handle_line(b"{not json\n"))["error"]["code"] == PARSE_ERROR
+    # 通知 (id なし) には応答しない
+    assert server.handle({"jsonrpc": "2.0", "method": "ping"}) is None
+
+def test_register_adds_methods():
+    server = Server()
+    server.register("echo", lambda params: params)
+    assert _call(server, "echo", {"a": 1}) == {"a": 1}
+
+def test_stdio_stream_until_shutdown():
+    requests = b"".join(
+        json.dumps({"jsonrpc": "2.0", "id": i, "method": method}).encode() + b"\n"
+        for i, method in enumerate(["ping", "shutdown", "ping"])
+    )
+    output = io.BytesIO()
+    Server().serve_stream(io.BytesIO(requests), output)
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["id"] for r in responses] == [0, 1]
+    assert responses[0]["result"]["protocol"] == 1
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    path = tmp_path / "s.sock"
+    ready = threading.Event()
+    thread = threading.Thread(target=serve_unix, args=(Server(), path, ready.set), daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    monkeypatch.setenv(SOCKET_ENV, str(path))
+    yield path
+    with ServerClient(path) as client:
+        client.call("shutdown")
+    thread.join(5)
+    assert not path.exists()
+
+def test_unix_socket_server(socket_path):
+    with connect() as client:
+        assert client.call("ping")["name"] == "rtar-ddeps"
+        result = client.call("validate", {"paths": [str(TEST_DATA_DIR / "normal.yml")]})
+        assert result["summary"]["passed"] == 1
+    with pytest.raises(FileExistsError):
+        serve_unix(Server(), socket_path)
+
+def test_cli_forwards_to_running_server(socket_path):
+    paths = [str(TEST_DATA_DIR / "normal.yml"), str(TEST_DATA_DIR / "error_reference.yml")]
+    local = CliRunner().invoke(cli, ["validate", "data-dependencies", "--no-server", "--format", "jsonl", *paths])
+    remote = CliRunner().invoke(cli, ["validate", "data-dependencies", "--format", "jsonl", *paths])
+    assert (remote.exit_code, remote.output) == (local.exit_code, local.output)
+    with connect() as client:
+        assert client.call("stats")["validated"] == 2
+
+    missing = CliRunner().invoke(cli, ["validate", "data-dependencies", "--server", str(TEST_DATA_DIR / "missing.yml")])
+    assert missing.exit_code == 2
+    assert "No data dependencies file matches" in missing.output
+
+def test_cli_server_flag_requires_running_server(tmp_path, monkeypatch):
+    monkeypatch.setenv(SOCKET_ENV, str(tmp_path / "none.sock"))
+    assert connect() is None
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--server", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 2
+    assert "No validation server is running" in result.output
+    # サーバーがなければこのプロセスで検証する
+    assert CliRunner().invoke(cli, ["validate", "data-dependencies", str(TEST_DATA_DIR / "normal.yml")]).exit_code == 0
+
+def test_default_socket_is_in_a_per_user_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv(SOCKET_ENV, raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    path = default_socket_path()
+    assert path.parent == tmp_path / f"rtar-ddeps-{os.getuid()}"
+
+def test_socket_directory_and_socket_are_private(socket_path, tmp_path):
+    assert socket_path.stat().st_mode & 0o777 == 0o600
+    nested = tmp_path / "run" / "s.sock"
+    ready = threading.Event()
+    thread = threading.Thread(target=serve_unix, args=(Server(), nested, ready.set), daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    assert nested.parent.stat().st_mode & 0o777 == 0o700
+    with ServerClient(nested) as client:
+        client.call("shutdown")
+    thread.join(5)
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        serve_unix(Server(), shared / "s.sock")
+
+def test_client_ignores_sockets_others_can_use(tmp_path):
+    path = tmp_path / "open.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen()
+    try:
+        path.chmod(0o666)
+        assert connect(path) is None
+    finally:
+        listener.close()
+
+def test_cli_with_cache_dir_env_validates_locally(socket_path, tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+    path = str(TEST_DATA_DIR / "normal.yml")
+    assert CliRunner().invoke(cli, ["validate", "data-dependencies", path]).exit_code == 0
+    assert list((tmp_path / "cache").iterdir())
+    with connect() as client:
+        assert client.call("stats")["validated"] == 0
+    assert CliRunner().invoke(cli, ["validate", "data-dependencies", "--server", path]).exit_code == 2
+    assert CliRunner().invoke(cli, ["validate", "data-dependencies", "--no-cache", path]).exit_code == 0
+    with connect() as client:
+        assert client.call("stats")["validated"] == 1
+
+def test_regular_file_at_socket_path_is_kept(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me", encoding="utf-8")
+    with pytest.raises(FileExistsError, match="not a socket"):
+        serve_unix(Server(), path)
+    assert path.read_text(encoding="utf-8") == "keep me"
+
+def test_sigterm_removes_socket(tmp_path):
+    path = tmp_path / "s.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-c", "from rtar_ddeps.cli import cli; cli(prog_name='rtar-ddeps')", "serve", "--socket", str(path)],
+        stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        assert process.stderr.readline().startswith("Listening on")
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(10) == 0
+    finally:
+        process.kill()
+        process.stderr.close()
+    assert not path.exists()
@@ -0,0 +1,216 @@
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from rtar_ddeps.cli import cli
+
+TEST_DATA_DIR = Path(__file__).parent / "data" / "data_dependencies"
+
+def test_validate_single_file_success():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 0
+    assert "Validation successful" in result.output
+    assert "Summary:" not in result.output
+
+def test_validate_multiple_files_aggregates_exit_code():
+    paths = [str(TEST_DATA_DIR / "normal.yml"), str(TEST_DATA_DIR / "error_reference.yml")]
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--jobs", "2", *paths])
+    assert result.exit_code == 1
+    # ファイルごとの結果は指定順に出力される
+    assert result.output.index("normal.yml") < result.output.index("error_reference.yml")
+    assert "Summary: 2 files validated, 1 passed (0 with warnings), 1 failed." in result.output
+
+def test_validate_unmatched_path_is_usage_error():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", str(TEST_DATA_DIR / "missing.yml")])
+    assert result.exit_code == 2
+    assert "No data dependencies file matches" in result.output
+
+def test_validate_yaml_backend_option():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--yaml-backend", "python", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 0
+
+def test_validate_with_cache_reports_hits(tmp_path):
+    args = ["validate", "data-dependencies", "--cache-dir", str(tmp_path), str(TEST_DATA_DIR / "normal.yml")]
+    first = CliRunner().invoke(cli, args)
+    assert "Cache: 0 hits, 1 misses" in first.output
+    second = CliRunner().invoke(cli, args)
+    assert second.exit_code == 0
+    assert "Cache: 1 hits, 0 misses" in second.output
+    # --no-cache は --cache-dir より優先される
+    third = CliRunner().invoke(cli, [*args[:2], "--no-cache", *args[2:]])
+    assert "Cache:" not in third.output
+
+def test_validate_profile_prints_table_and_writes_trace(tmp_path):
+    trace_path = tmp_path / "trace.json"
+    result = CliRunner().invoke(cli, [
+        "validate", "data-dependencies", "--profile-trace", str(trace_path), str(TEST_DATA_DIR / "normal.yml"),
+    ])
+    assert result.exit_code == 0
+    assert "rule:circular_dependencies" in result.stderr
+    events = json.loads(trace_path.read_text(encoding='utf-8'))["traceEvents"]
+    assert {"validate", "load_yaml", "schema", "custom_rules"} <= {e["name"] for e in events}
+
+def test_validate_profile_with_watch_is_usage_error():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--watch", "--profile", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 2
+
+def test_validate_streaming_matches_default_output():
+    paths = [str(TEST_DATA_DIR / "normal.yml"), str(TEST_DATA_DIR / "error_reference.yml")]
+    default = CliRunner().invoke(cli, ["validate", "data-dependencies", *paths])
+    streaming = CliRunner().invoke(cli, ["validate", "data-dependencies", "--streaming", *paths])
+    assert streaming.exit_code == default.exit_code == 1
+    assert streaming.output == default.output
+
+def test_validate_streaming_with_watch_is_usage_error():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--watch", "--streaming", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 2
+
+def test_validate_jsonl_format_writes_only_records(tmp_path):
+    paths = [str(TEST_DATA_DIR / "normal.yml"), str(TEST_DATA_DIR / "error_reference.yml")]
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--format", "jsonl", "--cache-dir", str(tmp_path), *paths])
+    assert result.exit_code == 1
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert records[-1]["type"] == "summary"
+    assert any(r["type"] == "diagnostic" and r["rule_id"] == "references" for r in records)
+    # キャッシュの集計行は標準エラー出力
+    assert "Cache: 0 hits, 2 misses" in result.stderr
+
+def test_validate_sarif_format():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--format", "sarif", str(TEST_DATA_DIR / "error_reference.yml")])
+    assert result.exit_code == 1
+    assert json.loads(result.stdout)["runs"][0]["results"]
+
+def test_validate_format_with_watch_is_usage_error():
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--watch", "--format", "jsonl", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 2
+
+def test_graph_upstream_and_downstream():
+    path = str(TEST_DATA_DIR / "normal.yml")
+    result = CliRunner().invoke(cli, ["graph", "upstream", path, "calculated_threshold"])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ["raw_sensor_data", "processed_data", "filtered_data", "statistics_summary"]
+    result = CliRunner().invoke(cli, ["graph", "downstream", path, "raw_image"])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ["processed_image", "analysis_report"]
+
+def test_graph_topo_and_path():
+    path = str(TEST_DATA_DIR / "normal.yml")
+    result = CliRunner().invoke(cli, ["graph", "topo", path])
+    assert result.exit_code == 0
+    assert result.output.splitlines()[:3] == ["raw_sensor_data", "processed_data", "filtered_data"]
+    result = CliRunner().invoke(cli, ["graph", "path", path, "raw_sensor_data", "analysis_report"])
+    assert result.exit_code == 0
+    assert result.output == "raw_sensor_data -> processed_data -> filtered_data -> statistics_summary -> analysis_report\n"
+    result = CliRunner().invoke(cli, ["graph", "path", path, "raw_image", "calculated_threshold"])
+    assert result.exit_code == 1
+    assert "'calculated_threshold' does not depend on 'raw_image'." in result.output
+
+def test_graph_errors():
+    result = CliRunner().invoke(cli, ["graph", "upstream", str(TEST_DATA_DIR / "normal.yml"), "missing"])
+    assert result.exit_code == 2
+    assert "'missing' is not defined in the 'data' section." in result.output
+    result = CliRunner().invoke(cli, ["graph", "topo", str(TEST_DATA_DIR / "error_circular_dependency.yml")])
+    assert result.exit_code == 1
+    assert "circular dependencies: 'data_a', 'data_b'" in result.output
+    result = CliRunner().invoke(cli, ["graph", "topo", str(TEST_DATA_DIR / "error_missing_required.yml")])
+    assert result.exit_code == 1
+    assert "Schema error" in result.output
+
+def test_impact_lists_data_to_recompute():
+    path = str(TEST_DATA_DIR / "normal.yml")
+    result = CliRunner().invoke(cli, ["impact", path, "--changed", "filter_threshold"])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == [
+        "filtered_data", "statistics_summary", "user_specific_summary", "calculated_threshold", "analysis_report",
+    ]
+    assert "5 of 10 data entries need to be recomputed." in result.stderr
+    result = CliRunner().invoke(cli, ["impact", path, "--changed", "user_ids,raw_image", "--changed", "roi_top"])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["user_ids", "user_specific_summary", "raw_image", "processed_image", "analysis_report"]
+
+def test_impact_follows_variable_columns_like_prune():
+    path = str(TEST_DATA_DIR / "warning_variable_columns.yml")
+    result = CliRunner().invoke(cli, ["impact", path, "--changed", "ref_single"])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["ref_single", "table_warning1"]
+    assert "2 of 6 data entries need to be recomputed." in result.stderr
+
+def test_impact_unknown_name_is_usage_error():
+    result = CliRunner().invoke(cli, ["impact", str(TEST_DATA_DIR / "normal.yml"), "--changed", "missing"])
+    assert result.exit_code == 2
+    assert "'missing' is not defined in the 'data' or 'parameter' section." in result.output
+
+def test_plan_text_and_json():
+    path = str(TEST_DATA_DIR / "normal.yml")
+    result = CliRunner().invoke(cli, ["plan", path, "--jobs", "2"])
+    assert result.exit_code == 0
+    assert "Total cost 10, makespan 5 on 2 workers: speedup 2.00x" in result.output
+    result = CliRunner().invoke(cli, ["plan", path, "--jobs", "3", "--format", "json"])
+    assert result.exit_code == 0
+    plan = json.loads(result.output)
+    assert plan['jobs'] == 3
+    assert plan['levels'][0] == ["raw_sensor_data", "user_ids", "raw_image"]
+    assert {step['name'] for step in plan['steps']} >= {"analysis_report", "calculated_threshold"}
+
+def test_plan_with_cycles_is_error():
+    result = CliRunner().invoke(cli, ["plan", str(TEST_DATA_DIR / "error_circular_dependency.yml")])
+    assert result.exit_code == 1
+    assert "circular dependencies" in result.output
+
+def test_prune_writes_valid_minimal_spec(tmp_path):
+    output = tmp_path / "pruned.yml"
+    result = CliRunner().invoke(cli, ["prune", str(TEST_DATA_DIR / "warning_unreachable.yml"), "--output", str(output)])
+    assert result.exit_code == 0
+    assert "Removed 1 data entries and 2 parameters." in result.stderr
+    pruned = output.read_text(encoding="utf-8")
+    assert "debug_dump" not in pruned and "legacy_factor" not in pruned
+    result = CliRunner().invoke(cli, ["validate", "data-dependencies", "--no-server", str(output)])
+    assert result.exit_code == 0
+    assert "Validation successful for" in result.output
+
+def test_prune_to_stdout():
+    result = CliRunner().invoke(cli, ["prune", str(TEST_DATA_DIR / "normal.yml")])
+    assert result.exit_code == 0
+    assert result.stdout.startswith("metadata:")
+    assert "Removed 0 data entries and 0 parameters." in result.stderr
+
+def test_graph_export(tmp_path):
+    path = str(TEST_DATA_DIR / "normal.yml")
+    result = CliRunner().invoke(cli, ["graph", "export", path])
+    assert result.exit_code == 0
+    assert result.output.startswith("digraph data_dependencies {")
+    assert 'subgraph "cluster_table" {' in result.output
+    assert '"raw_image" -> "processed_image";' in result.output
+    output = tmp_path / "graph.mmd"
+    result = CliRunner().invoke(cli, [
+        "graph", "export", path, "--format", "mermaid", "--target", "processed_image", "--no-cluster", "-o", str(output),
+    ])
+    assert result.exit_code == 0
+    assert output.read_text(encoding="utf-8") == (
+        "flowchart LR\n"
+        "  classDef target stroke-width:3px;\n"
+        "  d7[\"raw_image\"]\n"
+        "  d8[\"processed_image\"]:::target\n"
+        "  d7 --> d8\n"
+    )
+
+def test_read_only_commands_reuse_compiled_specs(tmp_path, monkeypatch):
+    from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+    path = str(TEST_DATA_DIR / "warning_unreachable.yml")
+    commands = [
+        ["graph", "topo", path], ["graph", "export", path], ["impact", path, "--changed", "raw_sensor_data"],
+        ["plan", path, "--format", "json"], ["prune", path],
+    ]
+    expected = [CliRunner().invoke(cli, command).output for command in commands]
+    assert CliRunner().invoke(cli, [*commands[0], "--cache-dir", str(tmp_path)]).exit_code == 0
+    assert len(list(tmp_path.glob("*.spec"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("must not be called on a cache hit")
+    monkeypatch.setattr(DataDependenciesValidator, "load_yaml", fail)
+    monkeypatch.setenv("RTAR_DDEPS_CACHE_DIR", str(tmp_path))
+    assert [CliRunner().invoke(cli, command).output for command in commands] == expected
+    # --no-cache は環境変数より優先される
+    result = CliRunner().invoke(cli, ["graph", "topo", path, "--no-cache"])
+    assert isinstance(result.exception, AssertionError)
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# CLI の起動 (--help, シェル補完) で読み込んではならないモジュール (前方一致).
+# コマンドの実装で使うモジュールは, コマンドの関数内でインポートする (cli.py 参照)
+HEAVY_MODULES = (
+    "yaml",
+    "voluptuous",
+    "concurrent.futures",
+    "multiprocessing",
+    "importlib.metadata",
+    "rtar_ddeps.validation",
+    "rtar_ddeps.server",
+    "rtar_ddeps.model",
+    "rtar_ddeps.graph",
+)
+# rtar_ddeps.cli の import 時間 (click とその依存を除く) の上限 [マイクロ秒].
+# 計測時は約 20 ms (大半は pathlib). 実装のモジュール (validation.batch 以下) を読み込むと約 100 ms 増える
+IMPORT_BUDGET_US = 40_000
+
+def _importtime(code: str, env: dict | None = None):
+    """
+    python -X importtime でコードを実行し, (読み込んだモジュール -> 累積 import 時間 [マイクロ秒], 標準出力) を返す.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env={**os.environ, **(env or {})},
+    )
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(total)
+    return cumulative, completed.stdout
+
+def _heavy(modules):
+    return sorted(name for name in modules if name.startswith(HEAVY_MODULES))
+
+def test_import_does_not_load_command_implementations():
+    modules, _ = _importtime("import rtar_ddeps.cli")
+    assert "rtar_ddeps.cli" in modules
+    assert _heavy(modules) == []
+
+@pytest.mark.parametrize("args", [["--help"], ["validate", "data-dependencies", "--help"], ["serve", "--help"], ["graph", "upstream", "--help"], ["impact", "--help"], ["plan", "--help"], ["prune", "--help"], ["graph", "export", "--help"]])
+def test_help_does_not_load_command_implementations(args):
+    modules, stdout = _importtime(f"from rtar_ddeps.cli import cli; cli({args!r}, prog_name='rtar-ddeps')")
+    assert "Usage:" in stdout
+    assert _heavy(modules) == []
+
+def test_shell_completion_does_not_load_command_implementations():
+    env = {
+        "_RTAR_DDEPS_COMPLETE": "bash_complete",
+        "COMP_WORDS": "rtar-ddeps validate data-dependencies --for",
+        "COMP_CWORD": "3",
+    }
+    modules, stdout = _importtime("from rtar_ddeps.cli import cli; cli(prog_name='rtar-ddeps')", env)
+    assert "--format" in stdout
+    assert _heavy(modules) == []
+
+def test_import_time_budget():
+    # 計測のばらつきを抑えるため, 数回のうち最小の値で判定する
+    own = min(
+        modules["rtar_ddeps.cli"] - modules["click"]
+        for modules, _ in (_importtime("import rtar_ddeps.cli") for _ in range(3))
+    )
+    assert own <= IMPORT_BUDGET_US, f"importing rtar_ddeps.cli took {own} us on top of click (budget {IMPORT_BUDGET_US} us)"
@@ -0,0 +1,92 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+import yaml
+
+from rtar_ddeps.model.spec import build_spec
+from rtar_ddeps.testing.synthetic_spec import BROKEN_FAULTS, FAULT_KINDS, SpecShape, SyntheticSpec
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+
+def validate(spec: SyntheticSpec, tmp_path) -> DataDependenciesValidator:
+    path = tmp_path / "data_dependencies.yml"
+    spec.write(path)
+    validator = DataDependenciesValidator(path)
+    with redirect_stdout(io.StringIO()):
+        validator.validate()
+    return validator
+
+def longest_chain(doc: dict) -> int:
+    """依存経路に含まれるエントリ数の最大値 (DAG 前提)."""
+    depth = {}
+    def visit(name):
+        if name not in depth:
+            depth[name] = 1 + max((visit(dep) for dep in doc['data'][name].get('required_data', [])), default=0)
+        return depth[name]
+    return max(visit(name) for name in doc['data'])
+
+def test_same_shape_and_seed_is_deterministic():
+    shape = SpecShape(entries=200, seed=3)
+    assert SyntheticSpec(shape, BROKEN_FAULTS).text() == SyntheticSpec(shape, BROKEN_FAULTS).text()
+    assert SyntheticSpec(shape).text() != SyntheticSpec(SpecShape(entries=200, seed=4)).text()
+
+@pytest.mark.parametrize("shape", [
+    SpecShape(entries=1),
+    SpecShape(entries=300, fan_in=1, chain_depth=300, parameters=0),
+    SpecShape(entries=500, fan_in=4, chain_depth=7, columns=3, variable_column_density=1.0, parameters=600),
+])
+def test_valid_spec_has_no_errors_or_warnings(shape, tmp_path):
+    validator = validate(SyntheticSpec(shape), tmp_path)
+    assert (validator.errors, validator.warnings) == ([], [])
+
+def test_shape_parameters(tmp_path):
+    shape = SpecShape(entries=400, fan_in=3, chain_depth=8, columns=5, variable_column_density=0.5, parameters=50)
+    spec = SyntheticSpec(shape)
+    doc = yaml.safe_load(spec.text())
+    assert len(doc['data']) == 400
+    assert len(doc['parameter']) == 50
+    assert longest_chain(doc) == 8
+    # 最初の層以外のエントリは fan_in 個以上の依存先を持つ
+    fan_ins = [len(d.get('required_data', [])) for d in doc['data'].values()]
+    assert fan_ins.count(0) == 400 // 8
+    assert min(n for n in fan_ins if n) >= 3
+    # すべてのパラメータが参照される
+    used = {p for d in doc['data'].values() for p in d.get('required_parameter', [])}
+    assert used == set(doc['parameter'])
+    model = build_spec(doc)
+    tables = [entry for entry in model.data if entry.format == 'table']
+    assert all(len(entry.columns) == 5 for entry in tables)
+    assert any(column.is_variable for entry in tables for column in entry.columns)
+
+# 不正な定義の種類 -> 期待するエラーに含まれる文字列 ({name} は InjectedFault.name)
+EXPECTED_ERRORS = {
+    'unknown_reference': "Error at data.{name}.required_data: Required data 'missing_data_",
+    'unknown_parameter': "Error at data.{name}.required_parameter: Required parameter 'missing_param_",
+    'unknown_target': "Target data '{name}' is not defined",
+    'cycle': "Circular dependency detected involving",
+    'invalid_format': "Error at data.{name}.format: Invalid 'format' value",
+    'duplicate_key': "Duplicate key '{name}'",
+    'missing_key_source': "Error at data.{name}.columns.",
+    'bad_key_source': "'no_such_column' specified by 'key_source'",
+}
+
+def test_broken_spec_reports_every_fault(tmp_path):
+    spec = SyntheticSpec(SpecShape(entries=300), BROKEN_FAULTS)
+    validator = validate(spec, tmp_path)
+    assert [fault.kind for fault in spec.faults] == list(BROKEN_FAULTS)
+    assert len(validator.errors) == len(BROKEN_FAULTS)
+    for fault in spec.faults:
+        expected = EXPECTED_ERRORS[fault.kind].format(name=fault.name)
+        assert any(expected in error for error in validator.errors), fault
+
+def test_missing_field_is_schema_error(tmp_path):
+    spec = SyntheticSpec(SpecShape(entries=50), ['missing_field'])
+    validator = validate(spec, tmp_path)
+    assert validator.errors == [f"Error at data.{spec.faults[0].name}.unit: Schema error: required key not provided"]
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError, match="Unknown fault kinds: nope"):
+        SyntheticSpec(SpecShape(entries=10), ['nope'])
+    with pytest.raises(ValueError, match="Invalid spec shape"):
+        SyntheticSpec(SpecShape(entries=0))
+    assert set(BROKEN_FAULTS) < set(FAULT_KINDS)
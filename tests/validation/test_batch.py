@@ -0,0 +1,52 @@
+import pytest
+from pathlib import Path
+
+from rtar_ddeps.validation.batch import collect_spec_files, validate_files
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+@pytest.fixture
+def spec_tree(tmp_path):
+    """ディレクトリ構成を持つ検証対象ファイル群"""
+    normal = (TEST_DATA_DIR / "normal.yml").read_text(encoding='utf-8')
+    broken = (TEST_DATA_DIR / "error_reference.yml").read_text(encoding='utf-8')
+    for sub, content in [("a", normal), ("b/nested", broken), ("c", normal)]:
+        directory = tmp_path / sub
+        directory.mkdir(parents=True)
+        (directory / "data_dependencies.yml").write_text(content, encoding='utf-8')
+    (tmp_path / "a" / "other.yml").write_text(normal, encoding='utf-8')
+    return tmp_path
+
+def test_collect_directory_finds_spec_files_only(spec_tree):
+    files = collect_spec_files([str(spec_tree)])
+    assert [f.relative_to(spec_tree).as_posix() for f in files] == [
+        "a/data_dependencies.yml",
+        "b/nested/data_dependencies.yml",
+        "c/data_dependencies.yml",
+    ]
+
+def test_collect_keeps_argument_order_and_removes_duplicates(spec_tree):
+    files = collect_spec_files([
+        str(spec_tree / "c" / "data_dependencies.yml"),
+        str(spec_tree / "a" / "*.yml"),
+        str(spec_tree / "**" / "data_dependencies.yml"),
+    ])
+    assert [f.relative_to(spec_tree).as_posix() for f in files] == [
+        "c/data_dependencies.yml",
+        "a/data_dependencies.yml",
+        "a/other.yml",
+        "b/nested/data_dependencies.yml",
+    ]
+
+def test_collect_unmatched_pattern(spec_tree):
+    with pytest.raises(FileNotFoundError, match="No data dependencies file matches"):
+        collect_spec_files([str(spec_tree / "missing" / "*.yml")])
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_validate_files_keeps_order(spec_tree, jobs):
+    files = collect_spec_files([str(spec_tree)])
+    results = list(validate_files(files, jobs=jobs))
+    assert [r.file_path for r in results] == files
+    assert [r.is_valid for r in results] == [True, False, True]
+    assert "Validation failed." in results[1].output
+    assert results[1].errors
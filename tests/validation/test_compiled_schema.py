@@ -0,0 +1,142 @@
+import random
+import pytest
+import yaml
+from pathlib import Path
+from voluptuous import MultipleInvalid
+
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.schemas.compiled_data_dependencies_schema import (
+    CompiledDataDependenciesSchema,
+    collect_schema_errors,
+)
+from rtar_ddeps.validation.schemas.data_dependencies_schema import DataDependenciesSchema
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _reference_errors(doc):
+    """voluptuous のスキーマによるエラー (パス, メッセージ) のリスト"""
+    try:
+        DataDependenciesSchema(doc)
+    except MultipleInvalid as e:
+        return [(list(map(str, error.path)), error.msg) for error in e.errors]
+    return []
+
+def _compiled_errors(doc):
+    return [(list(map(str, error.path)), error.msg) for error in collect_schema_errors(doc)]
+
+# --- ランダムな文書の生成 ---
+
+# 不正な値の候補 (型違い, 空の値など)
+_JUNK = [None, "", "x", 0, 1.5, True, [], ["a"], [1, "b"], [None, 2], {}, {"a": 1}, [{}], [{"name": ""}]]
+
+def _maybe(rng: random.Random, value, p: float = 0.1):
+    """確率 p で value を不正な値に置き換える"""
+    return rng.choice(_JUNK) if rng.random() < p else value
+
+def _random_mapping(rng: random.Random, fields: dict):
+    """fields の各キーをランダムに欠落/破損させた辞書を作る. 余分なキーも混ぜる."""
+    keys = list(fields)
+    rng.shuffle(keys)
+    out = {}
+    for key in keys:
+        if rng.random() < 0.1:
+            continue # キーの欠落
+        out[key] = _maybe(rng, fields[key]())
+    if rng.random() < 0.1:
+        out[rng.choice(["extra", 1, "note2"])] = rng.choice(_JUNK)
+    return out
+
+def _random_list(rng: random.Random, make_item, max_len: int = 3):
+    return [_maybe(rng, make_item(), 0.05) for _ in range(rng.randrange(max_len + 1))]
+
+def _random_string(rng: random.Random):
+    return _maybe(rng, rng.choice(["a", "b", "col*", "-"]))
+
+def _random_column(rng: random.Random):
+    return _random_mapping(rng, {
+        'name': lambda: _random_string(rng),
+        'description': lambda: _random_string(rng),
+        'key_source': lambda: _random_string(rng),
+    })
+
+def _random_data_entry(rng: random.Random):
+    strings = lambda: _random_list(rng, lambda: _random_string(rng))
+    return _random_mapping(rng, {
+        'descriptions': strings,
+        'format': lambda: rng.choice(["table", "dictionary", "single", ""]),
+        'unit': lambda: _random_string(rng),
+        'columns': lambda: _random_list(rng, lambda: _random_column(rng)),
+        'keys': lambda: _random_list(rng, lambda: _random_column(rng)),
+        'process': strings,
+        'required_data': strings,
+        'required_parameter': strings,
+    })
+
+def _random_document(rng: random.Random):
+    strings = lambda: _random_list(rng, lambda: _random_string(rng))
+    names = lambda: [rng.choice(["d1", "d2", "", 3, None]) for _ in range(rng.randrange(4))]
+    return _random_mapping(rng, {
+        'metadata': lambda: _random_mapping(rng, {
+            'title': lambda: _random_string(rng),
+            'purposes': strings,
+            'terms': lambda: _random_list(rng, lambda: _random_mapping(rng, {
+                'name': lambda: _random_string(rng),
+                'descriptions': strings,
+            })),
+            'note': strings,
+        }),
+        'target': strings,
+        'data': lambda: {name: _random_data_entry(rng) for name in names()},
+        'parameter': lambda: {name: _random_mapping(rng, {
+            'descriptions': strings,
+            'unit': lambda: _random_string(rng),
+        }) for name in names()},
+    })
+
+# --- テスト関数 ---
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_schema_matches_voluptuous_on_random_documents(seed):
+    """ランダムに破損させた文書で, エラーのパス/メッセージ/順序が voluptuous と一致する"""
+    rng = random.Random(seed)
+    for _ in range(100):
+        doc = _random_document(rng)
+        assert _compiled_errors(doc) == _reference_errors(doc), doc
+
+@pytest.mark.parametrize("file_name", sorted(p.name for p in TEST_DATA_DIR.glob("*.yml")))
+def test_compiled_schema_matches_voluptuous_on_test_files(file_name):
+    doc = yaml.safe_load((TEST_DATA_DIR / file_name).read_text(encoding='utf-8'))
+    assert _compiled_errors(doc) == _reference_errors(doc)
+
+@pytest.mark.parametrize("doc", [None, [], "text", 1])
+def test_compiled_schema_non_mapping_document(doc):
+    assert _compiled_errors(doc) == _reference_errors(doc) == [([], 'expected a dictionary')]
+
+def test_compiled_schema_stops_at_first_invalid_column():
+    """辞書のリストは, 内部にエラーのある要素が見つかった時点で打ち切る (voluptuous と同じ)"""
+    doc = yaml.safe_load((TEST_DATA_DIR / "normal.yml").read_text(encoding='utf-8'))
+    entry = next(d for d in doc['data'].values() if d.get('format') == 'table')
+    entry['columns'] = ["not a dict", {'name': 'a'}, {'description': 'b'}]
+    errors = _compiled_errors(doc)
+    assert errors == _reference_errors(doc)
+    assert [msg for _, msg in errors] == ['required key not provided']
+
+def test_compiled_schema_raises_multiple_invalid():
+    with pytest.raises(MultipleInvalid) as excinfo:
+        CompiledDataDependenciesSchema({'metadata': {'title': '', 'purposes': []}, 'target': [], 'data': {}})
+    assert [e.msg for e in excinfo.value.errors] == [
+        'length of value must be at least 1',
+        'length of value must be at least 1',
+        'length of value must be at least 1',
+    ]
+
+def test_validator_results_unchanged_with_voluptuous_schema(monkeypatch):
+    """バリデーターのスキーマを voluptuous に差し替えても結果が変わらない"""
+    for path in sorted(TEST_DATA_DIR.glob("*.yml")):
+        compiled = DataDependenciesValidator(path)
+        compiled.validate()
+        with monkeypatch.context() as m:
+            m.setattr(DataDependenciesValidator, 'SCHEMA', DataDependenciesSchema)
+            reference = DataDependenciesValidator(path)
+            reference.validate()
+        assert (compiled.errors, compiled.warnings) == (reference.errors, reference.warnings), path.name
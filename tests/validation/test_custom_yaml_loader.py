@@ -0,0 +1,77 @@
+import gc
+import pytest
+import yaml
+
+from rtar_ddeps.validation.custom_yaml_loader import (
+    YAML_BACKEND_ENV,
+    CustomDuplicateKeyLoader,
+    DuplicateKeyError,
+    get_loader_class,
+    load_with_duplicate_check,
+    resolve_yaml_backend,
+)
+
+def test_loader_raises_on_first_duplicate_by_default():
+    with pytest.raises(DuplicateKeyError, match="Duplicate key 'a' found at line 2, column 1"):
+        yaml.load("a: 1\na: 2\n", Loader=CustomDuplicateKeyLoader)
+
+def test_single_pass_collects_all_duplicates():
+    content = "a: 1\nb:\n  c: 1\n  c: 2\na: 3\n"
+    data, errors = load_with_duplicate_check(content)
+    # yaml.safe_load と同じく後勝ちで構築される
+    assert data == yaml.safe_load(content) == {'a': 3, 'b': {'c': 2}}
+    messages = [str(e) for e in errors]
+    assert sorted(messages) == [
+        "Duplicate key 'a' found at line 5, column 1",
+        "Duplicate key 'c' found at line 4, column 3",
+    ]
+
+def test_merge_keys_are_not_reported_as_duplicates():
+    content = "base: &base\n  x: 1\n  y: 2\nderived:\n  <<: *base\n  y: 3\n"
+    data, errors = load_with_duplicate_check(content)
+    assert data == yaml.safe_load(content)
+    assert data['derived'] == {'x': 1, 'y': 3}
+    assert errors == []
+
+# --- バックエンド選択 ---
+
+def test_resolve_backend_python_always_available():
+    assert resolve_yaml_backend("python") == "python"
+    assert get_loader_class("python") is CustomDuplicateKeyLoader
+
+def test_resolve_backend_auto_prefers_libyaml():
+    expected = "c" if yaml.__with_libyaml__ else "python"
+    assert resolve_yaml_backend("auto") == expected
+
+def test_resolve_backend_env_override(monkeypatch):
+    monkeypatch.setenv(YAML_BACKEND_ENV, "python")
+    assert resolve_yaml_backend() == "python"
+    # 引数での指定は環境変数より優先される
+    assert resolve_yaml_backend("auto") == ("c" if yaml.__with_libyaml__ else "python")
+
+def test_resolve_backend_unknown():
+    with pytest.raises(ValueError, match="Unknown YAML backend"):
+        resolve_yaml_backend("rust")
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML is not built with libyaml")
+def test_backends_produce_same_data_and_duplicates():
+    content = "a: 1\nb:\n  c: [1, 2]\n  c: {x: y}\na: 3\nbase: &b {k: v}\nd:\n  <<: *b\n  k: w\n"
+    py_data, py_errors = load_with_duplicate_check(content, backend="python")
+    c_data, c_errors = load_with_duplicate_check(content, backend="c")
+    assert py_data == c_data
+    assert [str(e) for e in py_errors] == [str(e) for e in c_errors]
+
+def test_single_pass_restores_gc_state():
+    # 読み込み中は循環 GC を止め, 終了後 (エラー時も) 元の状態に戻す
+    assert gc.isenabled()
+    load_with_duplicate_check("a: 1\n")
+    assert gc.isenabled()
+    with pytest.raises(yaml.YAMLError):
+        load_with_duplicate_check("a: [1\n")
+    assert gc.isenabled()
+    gc.disable()
+    try:
+        load_with_duplicate_check("a: 1\n")
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
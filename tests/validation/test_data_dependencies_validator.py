@@ -1,4 +1,5 @@
 import pytest
+import yaml
 from pathlib import Path
 
 from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
@@ -36,6 +37,7 @@ def error_file(request):
     "warning_empty_recommended.yml",
     "warning_empty_recommended_more.yml",
     "warning_variable_columns.yml",
+    "warning_unreachable.yml",
 ])
 def warning_file(request):
     return TEST_DATA_DIR / request.param
@@ -292,3 +294,96 @@ def test_warning_variable_columns_details():
     assert "Warning at data.table_warning1.columns.1.name: Variable column 'ref_single*' references data 'ref_single' with format 'single', which might be inappropriate for key-based referencing." in warnings
     assert "Warning at data.table_warning2.columns.1.name: Variable column 'ref_binary*' references data 'ref_binary' with format 'binary', which might be inappropriate for key-based referencing." in warnings
     assert "Warning at data.table_warning3.columns.1.name: Variable column 'ref_document*' references data 'ref_document' with format 'document', which might be inappropriate for key-based referencing." in warnings
+
+def test_warning_unreachable_details():
+    """target に寄与しない data / parameter の警告の詳細チェック"""
+    file_path = TEST_DATA_DIR / "warning_unreachable.yml"
+    validator = DataDependenciesValidator(file_path)
+    assert validator.validate() is True
+    assert not validator.errors
+    # 可変長列の参照先 (subjects) は target に寄与する
+    assert [w.split(":")[0] for w in validator.warnings] == [
+        "Warning at data.debug_dump", "Warning at parameter.debug_level", "Warning at parameter.legacy_factor",
+    ]
+    assert validator.warnings[0].rule_id == 'unreachable'
+    warnings = "\n".join(validator.warnings)
+    assert "Warning at data.debug_dump: Data 'debug_dump' does not contribute to any target. Consider removing it (see 'rtar-ddeps prune')." in warnings
+    assert "Warning at parameter.debug_level: Parameter 'debug_level' is only required by data that do not contribute to any target." in warnings
+    assert "Warning at parameter.legacy_factor: Parameter 'legacy_factor' is not required by any data." in warnings
+
+# --- YAML バックエンド間の一致 ---
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML is not built with libyaml")
+@pytest.mark.parametrize("file_name", sorted(p.name for p in TEST_DATA_DIR.glob("*.yml")))
+def test_yaml_backends_report_same_results(file_name):
+    """libyaml と pure-Python のどちらのバックエンドでも同じエラー/警告になる"""
+    results = []
+    for backend in ("c", "python"):
+        validator = DataDependenciesValidator(TEST_DATA_DIR / file_name, yaml_backend=backend)
+        is_valid = validator.validate()
+        results.append((is_valid, validator.errors, validator.warnings))
+    assert results[0] == results[1]
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML is not built with libyaml")
+@pytest.mark.parametrize("text", [
+    "metadata:\n  title: t\n  - purposes\n",
+    "metadata: { title: t\n",
+    "metadata:\n\ttitle: t\n",
+    "metadata: title: t\n",
+    "metadata: *undefined\n",
+])
+def test_yaml_backends_report_syntax_errors_at_same_position(tmp_path, text):
+    """構文エラーは文言がバックエンドによって異なるが, いずれも失敗し, 行と列は同じになる"""
+    file_path = tmp_path / "malformed.yml"
+    file_path.write_text(text, encoding='utf-8')
+    results = []
+    for backend in ("c", "python"):
+        validator = DataDependenciesValidator(file_path, yaml_backend=backend)
+        assert validator.validate() is False
+        results.append([(e.rule_id, e.line, e.column) for e in validator.errors])
+    assert results[0] == results[1]
+    assert results[0][0][0] == 'yaml_syntax' and results[0][0][1] is not None
+
+def test_error_multiple_circular_dependencies(tmp_path):
+    """独立した循環参照はそれぞれ個別のエラーとして報告される"""
+    entries = {"a": ["b"], "b": ["a"], "c": ["d"], "d": ["e"], "e": ["c"], "f": []}
+    lines = ["metadata:", "  title: t", "  purposes: []", "target:", "  - f", "data:"]
+    for name, required in entries.items():
+        lines += [f"  {name}:", "    descriptions: [x]", "    format: single", "    unit: '-'"]
+        if required:
+            lines += [f"    required_data: [{', '.join(required)}]"]
+    file_path = tmp_path / "cycles.yml"
+    file_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    validator = DataDependenciesValidator(file_path)
+    assert validator.validate() is False
+    cycle_errors = [e for e in validator.errors if "Circular dependency" in e]
+    assert cycle_errors == [
+        "Error at data: Circular dependency detected involving 'a', 'b': a -> b -> a.",
+        "Error at data: Circular dependency detected involving 'c', 'd', 'e': c -> d -> e -> c.",
+    ]
+
+def test_data_index_built_after_schema_check(tmp_path):
+    """可変長列の参照先解決に使う data の索引 (format, 列名, キー名)"""
+    lines = [
+        "metadata:", "  title: t", "  purposes: [p]", "target:", "  - wide", "data:",
+        "  dict:", "    descriptions: [x]", "    format: dictionary", "    unit: '-'",
+        "    keys:", "      - {name: k1, description: d}",
+        "  wide:", "    descriptions: [x]", "    format: table", "    unit: '-'",
+        "    required_data: [dict]",
+        "    columns:",
+    ]
+    lines += [f"      - {{name: c{i}, description: d}}" for i in range(200)]
+    lines += [f"      - {{name: wide*, key_source: c{i}, description: d}}" for i in (0, 199, 200)]
+    file_path = tmp_path / "index.yml"
+    file_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    validator = DataDependenciesValidator(file_path)
+    assert validator.validate() is False
+    spec = validator.spec
+    dict_entry = spec.data_entry(spec.ids['dict'])
+    assert dict_entry.format == 'dictionary'
+    assert dict_entry.key_names == {'k1'} and not dict_entry.column_names
+    assert spec.data_entry(spec.ids['wide']).column_names == {f"c{i}" for i in range(200)} | {"wide*"}
+    # key_source が存在しない列を指すもののみエラーになる
+    assert [e for e in validator.errors if "key_source" in e] == [
+        "Error at data.wide.columns.202.key_source: The column 'c200' specified by 'key_source' for variable column 'wide*' does not exist in the referenced data 'wide'.",
+    ]
@@ -0,0 +1,183 @@
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+from rtar_ddeps.server.server import ValidationSession
+from rtar_ddeps.validation.custom_yaml_loader import load_with_duplicate_check
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.includes import FragmentCache, IncludeResolver
+from rtar_ddeps.validation.result_cache import ResultCache
+from rtar_ddeps.validation.streaming import StreamingDataDependenciesValidator
+from rtar_ddeps.validation.watch import WatchSession
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def _split(tmp_path: Path, source: str) -> Path:
+    """
+    テストデータを分割する: data はエントリごとに data/<名前>.yml, parameter は parameters.yml,
+    metadata は同じ内容のまま残す.
+    """
+    with open(TEST_DATA_DIR / source, encoding="utf-8") as f:
+        document = yaml.safe_load(f)
+    (tmp_path / "data").mkdir()
+    for i, (name, definition) in enumerate(document["data"].items()):
+        _dump(tmp_path / "data" / f"{i:02d}_{name}.yml", {name: definition})
+    lines = [yaml.safe_dump({"metadata": document["metadata"]}, allow_unicode=True, sort_keys=False)]
+    lines.append(yaml.safe_dump({"target": document["target"]}, allow_unicode=True))
+    lines.append("data: !include data/\n")
+    if "parameter" in document:
+        _dump(tmp_path / "parameters.yml", document["parameter"])
+        lines.append("parameter: !include parameters.yml\n")
+    path = tmp_path / "data_dependencies.yml"
+    path.write_text("".join(lines), encoding="utf-8")
+    return path
+
+def _dump(path: Path, value):
+    path.write_text(yaml.safe_dump(value, allow_unicode=True, sort_keys=False), encoding="utf-8")
+
+def _validate(path: Path, validator_class=DataDependenciesValidator, **kwargs):
+    validator = validator_class(path, **kwargs)
+    validator.validate()
+    return validator
+
+@pytest.mark.parametrize("source", ["normal.yml", "error_reference.yml", "error_circular_dependency.yml"])
+def test_split_document_matches_original(tmp_path, source):
+    original = _validate(TEST_DATA_DIR / source)
+    split = _validate(_split(tmp_path, source))
+    assert split.data == original.data
+    assert [(e.message, e.path) for e in split.errors] == [(e.message, e.path) for e in original.errors]
+    assert [(w.message, w.path) for w in split.warnings] == [(w.message, w.path) for w in original.warnings]
+    names = [file.name for file in split.included_files]
+    assert names[0] == os.path.join(str(tmp_path), "data", f"00_{next(iter(original.data['data']))}.yml")
+
+def test_errors_report_the_included_file_and_line(tmp_path):
+    path = _split(tmp_path, "error_reference.yml")
+    [error] = [e for e in _validate(path).errors if e.path == ('data', 'processed_data', 'required_data')]
+    fragment = next((tmp_path / "data").glob("*_processed_data.yml"))
+    lines = fragment.read_text(encoding="utf-8").splitlines()
+    assert error.file == str(fragment)
+    assert lines[error.line - 1].strip() == "required_data:"
+    assert str(error).endswith(f" (in {fragment})")
+
+def test_duplicate_keys_across_fragments(tmp_path):
+    path = _split(tmp_path, "normal.yml")
+    (tmp_path / "data" / "99_copy.yml").write_text("raw_image:\n  format: binary\n", encoding="utf-8")
+    for validator_class in (DataDependenciesValidator, StreamingDataDependenciesValidator):
+        [error] = [e for e in _validate(path, validator_class).errors if e.rule_id == 'duplicate_key']
+        assert error.message == "YAML parsing error: Duplicate key 'raw_image' found at line 1, column 1"
+        assert (error.file, error.line, error.column) == (os.path.join(str(tmp_path), "data", "99_copy.yml"), 1, 1)
+
+def test_nested_include_is_relative_to_the_including_file(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "outer.yml").write_text("inner: !include inner.yml\n", encoding="utf-8")
+    (tmp_path / "sub" / "inner.yml").write_text("[1, 2]\n", encoding="utf-8")
+    path = tmp_path / "main.yml"
+    path.write_text("value: !include sub/outer.yml\nempty: !include sub/empty.yml\n", encoding="utf-8")
+    (tmp_path / "sub" / "empty.yml").write_text("", encoding="utf-8")
+    resolver = IncludeResolver(path)
+    with open(path, encoding="utf-8") as f:
+        data, duplicates = load_with_duplicate_check(f, includes=resolver)
+    assert data == {"value": {"inner": [1, 2]}, "empty": None}
+    assert duplicates == []
+    assert [file.path for file in resolver.files] == [
+        (tmp_path / "sub" / name).resolve() for name in ("outer.yml", "inner.yml", "empty.yml")
+    ]
+
+@pytest.mark.parametrize("files, message, line", [
+    ({"main.yml": "a: 1\nb: !include missing.yml\n"}, "Included file not found: ", 2),
+    ({"main.yml": "a: !include x.yml\n", "x.yml": "b: !include main.yml\n"}, "Circular !include: ", 1),
+    ({"main.yml": "a: !include d/\n", "d/x.yml": "[1]\n"}, "expected a mapping, but found sequence", 1),
+])
+def test_include_errors(tmp_path, files, message, line):
+    for name, content in files.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(content, encoding="utf-8")
+    validator = _validate(tmp_path / "main.yml")
+    [error] = validator.errors
+    assert error.rule_id == 'include'
+    assert message in str(error)
+    assert validator.included_paths[0] == (tmp_path / files["main.yml"].split("!include ")[1].split()[0]).resolve()
+    if "Circular" in message:
+        assert f"{tmp_path / 'main.yml'} -> {tmp_path / 'x.yml'} -> {tmp_path / 'main.yml'}" in str(error)
+    else:
+        assert error.line == line
+
+def test_unresolved_include_without_a_file():
+    with pytest.raises(yaml.constructor.ConstructorError, match="unresolved !include"):
+        load_with_duplicate_check("a: !include x.yml\n")
+
+def test_fragment_cache_reparses_only_changed_fragments(tmp_path):
+    path = _split(tmp_path, "normal.yml")
+    cache = FragmentCache()
+    validator = DataDependenciesValidator(path, fragment_cache=cache)
+    assert validator.validate()
+    fragments = len(validator.included_files)
+    assert (cache.misses, cache.hits) == (fragments, 0)
+
+    assert validator.validate()
+    assert (cache.misses, cache.hits) == (fragments, fragments)
+
+    # 内容が同じで更新時刻のみが変わったファイルはハッシュで再利用する
+    touched = validator.included_files[0].path
+    os.utime(touched, ns=(0, 0))
+    changed = validator.included_files[1].path
+    changed.write_text(changed.read_text(encoding="utf-8").replace("format: table", "format: tabel", 1), encoding="utf-8")
+    assert not validator.validate()
+    assert (cache.misses, cache.hits) == (fragments + 1, 2 * fragments - 1)
+    assert any(e.file == str(changed) for e in validator.errors)
+
+def test_result_cache_checks_included_files(tmp_path):
+    path = _split(tmp_path, "normal.yml")
+    cache = ResultCache(tmp_path / "cache")
+    assert _validate(path, cache=cache).validate()
+    assert _validate(path, cache=cache).cache_hit
+
+    fragment = next((tmp_path / "data").glob("*_raw_sensor_data.yml"))
+    fragment.write_text(fragment.read_text(encoding="utf-8").replace("format: table", "format: tabel"), encoding="utf-8")
+    validator = _validate(path, cache=cache)
+    assert not validator.cache_hit
+    assert validator.errors
+
+def test_result_cache_keys_including_files_by_location(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    fragment = "a:\n  descriptions: [a]\n  format: single\n  unit: '-'\n  required_data: [missing]\n  process: [p]\n"
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "data.yml").write_text(fragment, encoding="utf-8")
+        (tmp_path / name / "main.yml").write_text(
+            "metadata:\n  title: t\n  purposes: [p]\ntarget: [a]\ndata: !include data.yml\n", encoding="utf-8"
+        )
+    assert _validate(tmp_path / "a" / "main.yml", cache=cache).errors[0].file == str(tmp_path / "a" / "data.yml")
+    # 内容が同じでも取り込むファイルが異なるため, 別のキーになる
+    validator = _validate(tmp_path / "b" / "main.yml", cache=cache)
+    assert not validator.cache_hit
+    assert validator.errors[0].file == str(tmp_path / "b" / "data.yml")
+    assert _validate(tmp_path / "b" / "main.yml", cache=cache).cache_hit
+
+def test_server_session_revalidates_when_a_fragment_changes(tmp_path):
+    path = _split(tmp_path, "normal.yml")
+    session = ValidationSession()
+    assert not session.validate(path)[1]
+    # 初回は取り込むファイルが検証前に分からないため, 2 回目も検証する
+    assert not session.validate(path)[1]
+    assert session.validate(path)[1]
+    fragment = next((tmp_path / "data").glob("*_raw_sensor_data.yml"))
+    fragment.write_text(fragment.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    result, reused = session.validate(path)
+    assert not reused and result.is_valid
+    assert session.fragments.misses == len(list((tmp_path / "data").iterdir())) + 2 # parameters.yml と変更したファイル
+    assert session.fragments.hits == session.fragments.misses + len(list((tmp_path / "data").iterdir())) - 1
+
+def test_watch_session_watches_included_files(tmp_path):
+    path = _split(tmp_path, "normal.yml")
+    session = WatchSession([path], echo=lambda line: None)
+    assert session.validate_all()
+    fragment = next((tmp_path / "data").glob("*_raw_sensor_data.yml")).resolve()
+    assert path in session.watched_paths() and fragment in session.watched_paths()
+    assert (tmp_path / "data").resolve() in session.watched_paths()
+    fragment.write_text(fragment.read_text(encoding="utf-8").replace("format: table", "format: tabel"), encoding="utf-8")
+    [(revalidated, _, changed)] = session.revalidate({fragment})
+    assert revalidated == path and changed
+    assert session.revalidate({tmp_path / "unrelated.yml"}) == []
@@ -0,0 +1,125 @@
+import copy
+import random
+import pytest
+import yaml
+from pathlib import Path
+
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.incremental import IncrementalDataDependenciesValidator
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+FORMATS = ["table", "dictionary", "list", "single", "binary", "document", "timeseries"]
+
+def _load_normal() -> dict:
+    return yaml.safe_load((TEST_DATA_DIR / "normal.yml").read_text(encoding='utf-8'))
+
+def _write(path: Path, doc: dict):
+    path.write_text(yaml.safe_dump(doc, sort_keys=False, allow_unicode=True), encoding='utf-8')
+
+def _full_result(path: Path):
+    validator = DataDependenciesValidator(path)
+    is_valid = validator.validate()
+    return is_valid, validator.errors, validator.warnings
+
+# --- ランダムな編集操作 (いずれも文書をその場で変更する) ---
+
+def _mutate(doc: dict, rng: random.Random):
+    data = doc['data']
+    names = list(data)
+    params = doc.get('parameter')
+    candidates = names + list(params or {}) + ["undefined_x"]
+    op = rng.randrange(14)
+    name = rng.choice(names)
+    entry = data[name]
+    if op == 0:
+        entry['format'] = rng.choice(FORMATS)
+    elif op == 1 and len(names) > 1:
+        del data[name]
+    elif op == 2:
+        new = f"new_{rng.randrange(1000)}"
+        data[new] = {'descriptions': ['x'], 'format': 'single', 'unit': '-',
+                     'required_data': rng.sample(candidates, 2)}
+    elif op == 3:
+        # 循環参照を作る (または既存の依存を置き換える)
+        entry['required_data'] = [rng.choice(names)]
+    elif op == 4:
+        entry.setdefault('columns', []).append({
+            'name': rng.choice(candidates) + "*",
+            'description': 'variable',
+            **({'key_source': rng.choice(['timestamp', 'value', 'missing'])} if rng.random() < 0.5 else {}),
+        })
+    elif op == 5 and isinstance(entry.get('columns'), list) and entry['columns']:
+        entry['columns'][0]['name'] = rng.choice(['timestamp', 'value', 'renamed'])
+    elif op == 6 and params:
+        del params[rng.choice(list(params))]
+        if not params:
+            del doc['parameter']
+    elif op == 7:
+        doc.setdefault('parameter', {})[rng.choice(names + ["p_new"])] = {'descriptions': [], 'unit': '-'}
+    elif op == 8:
+        doc['metadata']['purposes'] = [] if doc['metadata']['purposes'] else ['restored']
+    elif op == 9:
+        doc['target'] = rng.sample(candidates, 2)
+    elif op == 10:
+        entry['descriptions'] = [] if entry['descriptions'] else ['restored']
+    elif op == 11 and isinstance(entry.get('required_data'), list):
+        entry['required_data'] = list(reversed(entry['required_data']))
+    elif op == 12:
+        entry['required_parameter'] = rng.sample(candidates, 1) if rng.random() < 0.8 else []
+    elif op == 13:
+        entry['keys'] = [] if rng.random() < 0.5 else [{'name': 'k', 'description': 'd'}]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_full_run(tmp_path, seed):
+    """ランダムな編集の列に対して, インクリメンタル実行の結果が全体実行と一致する"""
+    rng = random.Random(seed)
+    path = tmp_path / "data_dependencies.yml"
+    doc = _load_normal()
+    _write(path, doc)
+    incremental = IncrementalDataDependenciesValidator(path)
+    for step in range(40):
+        if step:
+            if rng.random() < 0.1:
+                # スキーマエラーになる編集 (この回はカスタムルールが実行されない)
+                broken = copy.deepcopy(doc)
+                broken['data'][rng.choice(list(broken['data']))]['unit'] = 123
+                _write(path, broken)
+            else:
+                _mutate(doc, rng)
+                _write(path, doc)
+        expected = _full_result(path)
+        actual = (incremental.validate(), incremental.errors, incremental.warnings)
+        assert actual == expected, f"seed={seed}, step={step}"
+
+def test_only_affected_entries_are_rerun(tmp_path):
+    path = tmp_path / "data_dependencies.yml"
+    doc = _load_normal()
+    _write(path, doc)
+    validator = IncrementalDataDependenciesValidator(path)
+    assert validator.validate() is True
+    assert validator.stats.full_run is True
+
+    # 説明文の変更: そのエントリと, それを参照するエントリのみ再実行する. 辺集合は変わらない
+    doc['data']['filtered_data']['descriptions'] = []
+    _write(path, doc)
+    assert validator.validate() is True
+    assert validator.stats.full_run is False
+    assert validator.stats.rerun_data == {'filtered_data', 'statistics_summary', 'user_specific_summary'}
+    assert validator.stats.rerun_parameters == set()
+    assert 'circular_dependencies' not in validator.stats.rerun_global_rules
+    assert 'uniqueness' not in validator.stats.rerun_global_rules
+    assert validator.warnings == _full_result(path)[2]
+
+    # パラメータの変更: そのパラメータを参照するエントリのみ再実行する
+    doc['parameter']['roi_top']['unit'] = "mm"
+    _write(path, doc)
+    validator.validate()
+    assert validator.stats.rerun_data == {'processed_image'}
+    assert validator.stats.rerun_parameters == {'roi_top'}
+
+    # 依存関係の変更: 循環参照チェックを再実行する
+    doc['data']['raw_sensor_data']['required_data'] = ['statistics_summary']
+    _write(path, doc)
+    assert validator.validate() is False
+    assert 'circular_dependencies' in validator.stats.rerun_global_rules
+    assert validator.errors == _full_result(path)[1]
@@ -0,0 +1,116 @@
+import io
+import pickle
+import shutil
+import yaml
+from pathlib import Path
+
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.diagnostics import Diagnostic
+from rtar_ddeps.validation.positions import PositionIndex
+from rtar_ddeps.validation.result_cache import ResultCache
+from rtar_ddeps.validation.streaming import StreamingDataDependenciesValidator
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+DOCUMENT = """\
+metadata:
+  title: t
+data:
+  a:
+    columns:
+      - name: x
+      - &c {name: y}
+  b:
+    columns:
+      - *c
+"""
+
+def _index(text: str) -> PositionIndex:
+    index = PositionIndex()
+    index.add(yaml.compose(text))
+    return index
+
+def test_lookup_records_keys_and_sequence_items():
+    index = _index(DOCUMENT)
+    assert index.lookup([]) == (1, 1)
+    assert index.lookup(['metadata', 'title']) == (2, 3)
+    assert index.lookup(['data', 'a']) == (4, 3)
+    assert index.lookup(['data', 'a', 'columns', '0']) == (6, 9)
+    assert index.lookup(['data', 'a', 'columns', '1', 'name']) == (7, 13)
+
+def test_lookup_falls_back_to_longest_existing_parent():
+    index = _index(DOCUMENT)
+    assert index.lookup(['data', 'a', 'unit']) == (4, 3)
+    assert index.lookup(['missing']) == (1, 1)
+    assert PositionIndex().lookup(['data']) is None
+
+def test_alias_points_to_its_anchor():
+    index = _index(DOCUMENT)
+    assert index.lookup(['data', 'b', 'columns', '0']) == (7, 9)
+    # エイリアスの先の要素は最初に現れた位置でのみ記録する
+    assert index.lookup(['data', 'b', 'columns', '0', 'name']) == (7, 9)
+
+def _validate(validator_class=DataDependenciesValidator, path: Path = TEST_DATA_DIR / "error_variable_columns.yml", **kwargs):
+    validator = validator_class(path, **kwargs)
+    validator.validate()
+    return validator
+
+def test_rule_and_schema_diagnostics_carry_positions():
+    validator = _validate()
+    first = validator.errors[0]
+    assert isinstance(first, Diagnostic)
+    assert (first.severity, first.path) == ('error', ('data', 'table_error1', 'columns', '1', 'name'))
+    assert (first.line, first.column) == (36, 9)
+    assert first.message.startswith("Referenced data 'non_existent_data'")
+
+    validator = _validate(path=TEST_DATA_DIR / "error_missing_required.yml")
+    assert [(e.path, e.line) for e in validator.errors][-1] == (('metadata',), 5) # 欠落したキーはルートの位置
+
+def test_duplicate_key_and_parse_errors_carry_positions(tmp_path):
+    validator = _validate(path=TEST_DATA_DIR / "error_duplicate_key.yml")
+    assert [(e.line, e.column) for e in validator.errors[:2]] == [(14, 3), (25, 3)]
+
+    path = tmp_path / "invalid.yml"
+    path.write_text("metadata:\n  title: [a\n", encoding='utf-8')
+    (error,) = _validate(path=path).errors
+    assert error.line == 3
+
+def test_positions_can_be_disabled():
+    validator = _validate(positions=False)
+    assert validator.positions is None
+    assert validator.errors == _validate().errors
+    assert all(error.line is None for error in validator.errors)
+
+def test_streaming_positions_stop_at_entries():
+    streaming = _validate(StreamingDataDependenciesValidator)
+    assert streaming.streamed
+    first = streaming.errors[0]
+    assert first.path == ('data', 'table_error1', 'columns', '1', 'name')
+    assert (first.line, first.column) == (29, 3) # エントリの名前の位置
+
+def test_cached_diagnostics_keep_positions(tmp_path):
+    path = tmp_path / "spec.yml"
+    shutil.copy(TEST_DATA_DIR / "error_variable_columns.yml", path)
+    cache = ResultCache(tmp_path / "cache")
+    first = _validate(path=path, cache=cache)
+    second = _validate(path=path, cache=cache)
+    assert second.cache_hit
+    assert [e.to_dict() for e in second.errors] == [e.to_dict() for e in first.errors]
+
+def test_diagnostic_is_a_string_and_survives_pickle():
+    diagnostic = Diagnostic("Error at a: m", 'error', "m", ['a'], 3, 4)
+    assert diagnostic == "Error at a: m"
+    restored = pickle.loads(pickle.dumps(diagnostic))
+    assert restored.to_dict() == diagnostic.to_dict()
+
+def test_locate_reports_included_files():
+    main = yaml.compose("a:\n  b: 1\n")
+    fragment = yaml.compose(io.StringIO("x:\n  - y\n"), Loader=yaml.SafeLoader)
+    key_node = yaml.ScalarNode('tag:yaml.org,2002:str', 'c', main.value[0][1].start_mark)
+    main.value[0][1].value.append((key_node, fragment))
+    index = PositionIndex()
+    index.add_files([fragment.start_mark.name])
+    index.add(main)
+    assert index.locate(['a', 'b']) == (None, 2, 3)
+    assert index.locate(['a', 'c', 'x', '0']) == ("<file>", 2, 5)
+    assert index.lookup(['a', 'c', 'x', '0']) == (2, 5)
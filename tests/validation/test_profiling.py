@@ -0,0 +1,64 @@
+import pickle
+import tracemalloc
+from pathlib import Path
+
+from rtar_ddeps.validation.builtin_rules import BUILTIN_RULES
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.profiling import NULL_PROFILER, Profiler
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+def test_span_records_calls_and_nested_peak():
+    profiler = Profiler()
+    with profiler:
+        with profiler.span("outer"):
+            for _ in range(3):
+                with profiler.span("inner", category='rule', trace=False):
+                    block = bytearray(1 << 20)
+                    del block
+    outer, inner = profiler.stats["outer"], profiler.stats["inner"]
+    assert list(profiler.stats) == ["outer", "inner"]
+    assert (outer.calls, inner.calls) == (1, 3)
+    assert inner.peak_bytes >= 1 << 20
+    # 内側の区間のピークは外側の区間にも反映される
+    assert outer.peak_bytes >= inner.peak_bytes
+    assert outer.total_ns >= inner.total_ns
+    # trace=False の区間はトレースイベントに含めない
+    assert [e["name"] for e in profiler.events] == ["outer"]
+    assert profiler.events[0]["ph"] == "X"
+    assert not tracemalloc.is_tracing()
+
+def test_memory_disabled_does_not_start_tracemalloc():
+    profiler = Profiler(memory=False)
+    with profiler, profiler.span("phase"):
+        assert not tracemalloc.is_tracing()
+    assert profiler.stats["phase"].peak_bytes == 0
+    assert "peak_bytes" not in profiler.events[0]["args"]
+
+def test_validator_records_phases_and_rules():
+    validator = DataDependenciesValidator(TEST_DATA_DIR / "normal.yml")
+    profiler = Profiler()
+    assert validator.validate(profiler=profiler)
+    assert validator.profiler is NULL_PROFILER
+    for phase in ("validate", "load_yaml", "check_duplicate_keys", "perform_validation", "schema", "build_spec", "custom_rules"):
+        assert profiler.stats[phase].calls == 1
+    for rule in BUILTIN_RULES:
+        assert profiler.stats[f"rule:{rule.rule_id}"].category == 'rule'
+    table = profiler.format_table()
+    assert table.splitlines()[1].startswith("validate")
+    assert "rule:references" in table
+
+def test_profiling_does_not_change_results():
+    path = TEST_DATA_DIR / "error_variable_columns.yml"
+    plain = DataDependenciesValidator(path)
+    profiled = DataDependenciesValidator(path)
+    assert plain.validate() == profiled.validate(profiler=Profiler())
+    assert (plain.errors, plain.warnings) == (profiled.errors, profiled.warnings)
+
+def test_merge_and_pickle():
+    first, second = Profiler(), Profiler()
+    for profiler in (first, second):
+        DataDependenciesValidator(TEST_DATA_DIR / "normal.yml").validate(profiler=profiler)
+    first.merge(pickle.loads(pickle.dumps(second)))
+    assert first.stats["validate"].calls == 2
+    assert len(first.chrome_trace()["traceEvents"]) == 2 * len(second.events)
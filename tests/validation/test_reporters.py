@@ -0,0 +1,139 @@
+import io
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from rtar_ddeps.validation.batch import FileResult, validate_file, validate_files
+from rtar_ddeps.validation.reporters import (
+    BufferedWriter, JsonLinesReporter, Reporter, SarifReporter, TextReporter, create_reporter,
+)
+from rtar_ddeps.validation.result_cache import ResultCache
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+FILES = [TEST_DATA_DIR / name for name in ("normal.yml", "error_reference.yml", "error_missing_required.yml", "error_duplicate_key.yml")]
+
+def _report(reporter_class, files=FILES, **kwargs):
+    stream = io.StringIO()
+    reporter = reporter_class(stream)
+    reporter.start()
+    for result in validate_files(files, capture_output=reporter.captures_output, **kwargs):
+        reporter.report(result)
+    summary = reporter.finish()
+    return stream.getvalue(), summary
+
+def test_diagnostics_carry_rule_ids():
+    ids = {name: {e.rule_id for e in validate_file(TEST_DATA_DIR / name).errors}
+           for name in ("error_reference.yml", "error_missing_required.yml", "error_duplicate_key.yml")}
+    assert {"references", "target_references"} <= ids["error_reference.yml"]
+    assert ids["error_missing_required.yml"] == {"schema"}
+    assert ids["error_duplicate_key.yml"] == {"duplicate_key"}
+
+    result = validate_file(TEST_DATA_DIR / "error_reference.yml", streaming=True)
+    assert {e.rule_id for e in result.errors} == ids["error_reference.yml"]
+
+def test_cached_diagnostics_keep_rule_ids(tmp_path):
+    path = tmp_path / "spec.yml"
+    shutil.copy(TEST_DATA_DIR / "error_reference.yml", path)
+    cache = ResultCache(tmp_path / "cache")
+    first = validate_file(path, cache=cache)
+    second = validate_file(path, cache=cache)
+    assert second.cache_hit
+    assert [e.rule_id for e in second.errors] == [e.rule_id for e in first.errors]
+
+def test_jsonl_reports_every_diagnostic():
+    text, summary = _report(JsonLinesReporter)
+    records = [json.loads(line) for line in text.splitlines()]
+    assert [r["type"] for r in records].count("file") == len(FILES)
+    assert records[-1] == {"type": "summary", "files": 4, "passed": 1, "failed": 3, "warned": 0, "cache_hits": 0}
+    assert (summary.files, summary.failed) == (4, 3)
+
+    expected = validate_file(FILES[1])
+    diagnostics = [r for r in records if r["type"] == "diagnostic" and r["file"] == str(FILES[1])]
+    assert len(diagnostics) == len(expected.errors) + len(expected.warnings)
+    first = diagnostics[0]
+    assert (first["severity"], first["rule_id"], first["path"], first["line"]) == (
+        "error", "format_specific_fields", ["data", "processed_data", "format"], 24)
+    assert first["message"] == expected.errors[0].message
+    assert first["source"] is None
+
+def test_sarif_is_a_valid_document():
+    text, _ = _report(SarifReporter, jobs=2)
+    document = json.loads(text)
+    assert document["version"] == "2.1.0"
+    (run,) = document["runs"]
+    assert run["tool"]["driver"]["name"] == "rtar-ddeps"
+    results = run["results"]
+    assert {r["ruleId"] for r in results} >= {"schema", "duplicate_key", "references"}
+    located = next(r for r in results if r["ruleId"] == "references")
+    (location,) = located["locations"]
+    assert location["physicalLocation"]["artifactLocation"]["uri"] == FILES[1].as_uri()
+    assert location["physicalLocation"]["region"]["startLine"] > 0
+    assert location["logicalLocations"][0]["fullyQualifiedName"].startswith("data.")
+
+def test_diagnostics_in_included_files(tmp_path):
+    fragment = tmp_path / "data.yml"
+    fragment.write_text(
+        "a:\n  descriptions: [a]\n  format: single\n  unit: '-'\n  required_data: [missing]\n  process: [p]\n",
+        encoding="utf-8",
+    )
+    spec = tmp_path / "spec.yml"
+    spec.write_text("metadata:\n  title: t\n  purposes: [p]\ntarget: [a]\ndata: !include data.yml\n", encoding="utf-8")
+    jsonl, _ = _report(JsonLinesReporter, files=[spec])
+    [diagnostic] = [r for r in map(json.loads, jsonl.splitlines()) if r["type"] == "diagnostic"]
+    assert (diagnostic["file"], diagnostic["source"], diagnostic["line"]) == (str(spec), str(fragment), 5)
+    sarif, _ = _report(SarifReporter, files=[spec])
+    [result] = json.loads(sarif)["runs"][0]["results"]
+    assert result["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] == fragment.as_uri()
+
+def test_sarif_without_results():
+    text, _ = _report(SarifReporter, files=FILES[:1])
+    assert json.loads(text)["runs"][0]["results"] == []
+
+def test_text_reporter_matches_validator_output():
+    text, _ = _report(TextReporter, files=FILES[:2])
+    assert text.startswith(f"Validating data dependencies file: {FILES[0]}\nValidation successful")
+    assert text.endswith("\nSummary: 2 files validated, 1 passed (0 with warnings), 1 failed.\n")
+
+def test_machine_readable_formats_do_not_capture_output():
+    result = validate_file(FILES[1], capture_output=False)
+    assert result.output == ""
+    assert result.errors == validate_file(FILES[1]).errors
+
+def test_buffered_writer_flushes_when_full():
+    stream = io.StringIO()
+    writer = BufferedWriter(stream, buffer_size=10, flush_each_report=False)
+    writer.write("12345")
+    assert stream.getvalue() == ""
+    writer.write("67890")
+    assert stream.getvalue() == "1234567890"
+    writer.write("x")
+    writer.end_report()
+    assert stream.getvalue() == "1234567890"
+    writer.flush()
+    assert stream.getvalue() == "1234567890x"
+
+def test_parallel_results_keep_input_order(tmp_path):
+    files = []
+    for i in range(40):
+        path = tmp_path / f"{i:02d}" / "data_dependencies.yml"
+        path.parent.mkdir()
+        shutil.copy(FILES[i % 2], path)
+        files.append(path)
+    assert [r.file_path for r in validate_files(files, jobs=3, capture_output=False)] == files
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unknown report format"):
+        create_reporter("xml", io.StringIO())
+    assert isinstance(create_reporter("jsonl", io.StringIO()), JsonLinesReporter)
+    # FileResult を直接渡すこともできる (バリデーターを使わない呼び出し元向け)
+    reporter = create_reporter("jsonl", io.StringIO())
+    reporter.report(FileResult(Path("x.yml"), True))
+    assert reporter.finish().passed == 1
+
+def test_reporter_without_write_result_cannot_be_created():
+    class IncompleteReporter(Reporter):
+        pass
+    with pytest.raises(TypeError):
+        IncompleteReporter(io.StringIO())
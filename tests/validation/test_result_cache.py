@@ -0,0 +1,83 @@
+import shutil
+import pytest
+from pathlib import Path
+
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.result_cache import ResultCache
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "cache")
+
+def test_cache_hit_skips_loading_and_validation(tmp_path, cache, monkeypatch):
+    file_path = tmp_path / "spec.yml"
+    shutil.copy(TEST_DATA_DIR / "error_reference.yml", file_path)
+
+    first = DataDependenciesValidator(file_path, cache=cache)
+    assert first.validate() is False
+    assert first.cache_hit is False
+
+    def fail(*args, **kwargs):
+        raise AssertionError("must not be called on a cache hit")
+    monkeypatch.setattr(DataDependenciesValidator, "load_yaml", fail)
+    monkeypatch.setattr(DataDependenciesValidator, "_perform_validation", fail)
+
+    second = DataDependenciesValidator(file_path, cache=cache)
+    assert second.validate() is False
+    assert second.cache_hit is True
+    assert second.errors == first.errors
+    assert second.warnings == first.warnings
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_is_keyed_by_content(tmp_path, cache):
+    file_path = tmp_path / "spec.yml"
+    shutil.copy(TEST_DATA_DIR / "warning_empty_recommended.yml", file_path)
+    assert DataDependenciesValidator(file_path, cache=cache).validate() is True
+
+    # 内容を変更すると再検証される
+    shutil.copy(TEST_DATA_DIR / "error_reference.yml", file_path)
+    validator = DataDependenciesValidator(file_path, cache=cache)
+    assert validator.validate() is False
+    assert validator.cache_hit is False
+
+    # 同じ内容であれば別のファイルでもキャッシュを使用する
+    other = tmp_path / "other.yml"
+    shutil.copy(TEST_DATA_DIR / "warning_empty_recommended.yml", other)
+    validator = DataDependenciesValidator(other, cache=cache)
+    assert validator.validate() is True
+    assert validator.cache_hit is True
+    assert validator.warnings
+
+def test_cache_is_keyed_by_positions_setting(cache):
+    file_path = TEST_DATA_DIR / "error_reference.yml"
+    without = DataDependenciesValidator(file_path, cache=cache, positions=False)
+    assert without.validate() is False
+    assert all(error.line is None for error in without.errors if error.path)
+
+    # 位置を付加する設定では位置のない結果を使用しない
+    validator = DataDependenciesValidator(file_path, cache=cache)
+    assert validator.validate() is False
+    assert validator.cache_hit is False
+    assert all(error.line is not None for error in validator.errors if error.path)
+    assert DataDependenciesValidator(file_path, cache=cache).validate() is False and cache.hits == 1
+
+def test_yaml_parse_errors_are_not_cached(tmp_path, cache):
+    file_path = tmp_path / "invalid.yml"
+    file_path.write_text("metadata: { title: Test\n", encoding='utf-8')
+    assert DataDependenciesValidator(file_path, cache=cache).validate() is False
+    validator = DataDependenciesValidator(file_path, cache=cache)
+    assert validator.validate() is False
+    assert validator.cache_hit is False
+
+def test_eviction_keeps_total_size_bounded(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=2000)
+    keys = [cache.make_key(str(i).encode(), "test") for i in range(50)]
+    for key in keys:
+        cache.put(key, ["x" * 100], [])
+    total = sum(p.stat().st_size for p in (tmp_path / "cache").iterdir())
+    assert total <= 2000
+    # 最後に書き込んだエントリは残り, 最初のエントリは削除されている
+    assert cache.get(keys[-1]) == (["x" * 100], [])
+    assert cache.get(keys[0]) is None
@@ -0,0 +1,134 @@
+import pytest
+from pathlib import Path
+
+from rtar_ddeps.validation.builtin_rules import BUILTIN_RULES, default_registry
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.incremental import IncrementalDataDependenciesValidator
+from rtar_ddeps.validation.result_cache import ResultCache
+from rtar_ddeps.validation.rule_engine import Rule, RuleRegistry
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+class ColumnCountRule(Rule):
+    """列数が多すぎる table を警告する (テスト用のサードパーティルール)"""
+    rule_id = 'column_count'
+    calls = []
+
+    def visit_data(self, ctx, entry):
+        self.calls.append(('data', entry.name))
+
+    def visit_column(self, ctx, entry, column):
+        self.calls.append(('column', entry.name, column.index))
+        if column.index == 2:
+            ctx.warning(f"Table '{entry.name}' has more than 2 columns.", ['data', entry.name, 'columns'])
+
+class UpperCaseNameRule(Rule):
+    rule_id = 'upper_case_name'
+
+    def visit_data(self, ctx, entry):
+        if entry.name != entry.name.lower():
+            ctx.error("Data names must be lower case.", ['data', entry.name])
+
+    def finish(self, ctx):
+        ctx.warning(f"{len(ctx.spec.data)} data entries.")
+
+def _write(tmp_path: Path, text: str) -> Path:
+    path = tmp_path / "data_dependencies.yml"
+    path.write_text(text, encoding='utf-8')
+    return path
+
+DOC = """
+metadata: {title: t, purposes: [p]}
+target: [Wide]
+data:
+  Wide:
+    descriptions: [x]
+    format: table
+    unit: '-'
+    columns:
+      - {name: a, description: d}
+      - {name: b, description: d}
+      - {name: c, description: d}
+  narrow:
+    descriptions: []
+    format: table
+    unit: '-'
+    columns:
+      - {name: a, description: d}
+"""
+
+def test_registry_rejects_duplicate_and_anonymous_rules():
+    registry = RuleRegistry(BUILTIN_RULES)
+    with pytest.raises(ValueError):
+        registry.register(type(BUILTIN_RULES[0])())
+    with pytest.raises(ValueError):
+        registry.register(Rule())
+    with pytest.raises(TypeError):
+        registry.register(object())
+    # クラスデコレーターとして使用でき, クラスをそのまま返す
+    assert registry.register(ColumnCountRule) is ColumnCountRule
+    assert registry.rules[-1].rule_id == 'column_count'
+    registry.unregister('column_count')
+    assert [rule.rule_id for rule in registry.rules] == [rule.rule_id for rule in BUILTIN_RULES]
+
+def test_third_party_rules_run_in_the_same_traversal(tmp_path):
+    registry = default_registry.copy()
+    registry.register(ColumnCountRule)
+    registry.register(UpperCaseNameRule)
+    ColumnCountRule.calls = []
+    validator = DataDependenciesValidator(_write(tmp_path, DOC), rules=registry)
+    assert validator.validate() is False
+    # 各エントリ/列に対して一度ずつ, エントリの中では data -> columns の順に呼び出される
+    assert ColumnCountRule.calls == [
+        ('data', 'Wide'), ('column', 'Wide', 0), ('column', 'Wide', 1), ('column', 'Wide', 2),
+        ('data', 'narrow'), ('column', 'narrow', 0),
+    ]
+    # 出力は組み込みルールの後に, ルールの登録順に並ぶ
+    assert validator.errors == ["Error at data.Wide: Data names must be lower case."]
+    assert validator.warnings == [
+        "Warning at data.narrow.descriptions: `descriptions` list is empty. Consider adding a description.",
+        "Warning at data.narrow: Data 'narrow' does not contribute to any target. Consider removing it (see 'rtar-ddeps prune').",
+        "Warning at data.Wide.columns: Table 'Wide' has more than 2 columns.",
+        "Warning: 2 data entries.",
+    ]
+    # デフォルトのレジストリは変更されない
+    default_validator = DataDependenciesValidator(validator.file_path)
+    assert default_validator.validate() is True
+
+def test_builtin_rules_match_rule_by_rule_execution():
+    """同じ走査で実行しても, ルールを 1 つずつ実行した場合と出力順が一致する"""
+    for path in sorted(TEST_DATA_DIR.glob("*.yml")):
+        combined = DataDependenciesValidator(path)
+        combined.validate()
+        errors, warnings = [], []
+        for rule in BUILTIN_RULES:
+            single = DataDependenciesValidator(path, rules=RuleRegistry([rule]))
+            single.validate()
+            # スキーマエラーなどルール以外の結果はすべての実行に含まれる
+            errors += [e for e in single.errors if e not in errors]
+            warnings += [w for w in single.warnings if w not in warnings]
+        assert (combined.errors, combined.warnings) == (errors, warnings), path.name
+
+def test_incremental_validator_with_third_party_rule(tmp_path):
+    registry = default_registry.copy()
+    registry.register(UpperCaseNameRule)
+    path = _write(tmp_path, DOC)
+    incremental = IncrementalDataDependenciesValidator(path, rules=registry)
+    incremental.validate()
+    path.write_text(DOC.replace("Wide", "WIDE"), encoding='utf-8')
+    incremental.validate()
+    full = DataDependenciesValidator(path, rules=registry)
+    full.validate()
+    assert (incremental.errors, incremental.warnings) == (full.errors, full.warnings)
+    # 入力の定義されていない文書全体のルールは毎回実行する
+    assert 'upper_case_name' in incremental.stats.rerun_global_rules
+
+def test_cache_key_depends_on_registered_rules(tmp_path):
+    path = _write(tmp_path, DOC)
+    cache = ResultCache(tmp_path / "cache")
+    assert DataDependenciesValidator(path, cache=cache).validate() is True
+    registry = default_registry.copy()
+    registry.register(UpperCaseNameRule)
+    validator = DataDependenciesValidator(path, cache=cache, rules=registry)
+    assert validator.validate() is False
+    assert validator.cache_hit is False
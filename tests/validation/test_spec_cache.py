@@ -0,0 +1,89 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.result_cache import ResultCache
+from rtar_ddeps.validation.spec_cache import SpecCache, load_spec
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+@pytest.fixture
+def cache(tmp_path):
+    return SpecCache(tmp_path / "cache")
+
+def test_cache_hit_skips_loading(tmp_path, cache, monkeypatch):
+    file_path = tmp_path / "spec.yml"
+    shutil.copy(TEST_DATA_DIR / "normal.yml", file_path)
+    first, errors = load_spec(file_path, cache=cache)
+    assert errors == []
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("must not be called on a cache hit")
+    monkeypatch.setattr(DataDependenciesValidator, "load_yaml", fail)
+    second, _ = load_spec(file_path, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.graph.topological_order() == first.graph.topological_order()
+    assert second.document == first.document
+
+def test_changed_file_is_reloaded(tmp_path, cache):
+    file_path = tmp_path / "spec.yml"
+    shutil.copy(TEST_DATA_DIR / "normal.yml", file_path)
+    load_spec(file_path, cache=cache)
+    file_path.write_text(file_path.read_text(encoding="utf-8").replace("raw_image", "raw_picture"), encoding="utf-8")
+    compiled, _ = load_spec(file_path, cache=cache)
+    assert cache.misses == 2
+    assert "raw_picture" in compiled.graph.ids
+
+def test_changed_included_file_is_reloaded(tmp_path, cache):
+    (tmp_path / "data.yml").write_text(
+        "a:\n  descriptions: [a]\n  format: single\n  unit: '-'\n", encoding="utf-8"
+    )
+    file_path = tmp_path / "spec.yml"
+    file_path.write_text("metadata:\n  title: t\n  purposes: [p]\ntarget: [a]\ndata: !include data.yml\n", encoding="utf-8")
+    assert load_spec(file_path, cache=cache)[0].spec.data[0].format == 'single'
+    assert load_spec(file_path, cache=cache)[0].spec.data[0].format == 'single'
+    (tmp_path / "data.yml").write_text(
+        "a:\n  descriptions: [a]\n  format: list\n  unit: '-'\n", encoding="utf-8"
+    )
+    assert load_spec(file_path, cache=cache)[0].spec.data[0].format == 'list'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_schema_errors_are_not_cached(tmp_path, cache):
+    compiled, errors = load_spec(TEST_DATA_DIR / "error_missing_required.yml", cache=cache)
+    assert compiled is None and errors
+    assert not list(cache.cache_dir.glob("*.spec"))
+
+def test_documents_marshal_cannot_store_are_loaded_without_caching(tmp_path, cache):
+    file_path = tmp_path / "spec.yml"
+    text = (TEST_DATA_DIR / "normal.yml").read_text(encoding="utf-8")
+    file_path.write_text(text.replace("metadata:\n", "metadata:\n  created: 2024-01-01\n", 1), encoding="utf-8")
+    compiled, _ = load_spec(file_path, cache=cache)
+    assert compiled.graph.topological_order()
+    assert load_spec(file_path, cache=cache)[0] is not None
+    assert cache.hits == 0
+
+def test_shares_directory_with_result_cache(tmp_path, cache):
+    results = ResultCache(cache.cache_dir)
+    DataDependenciesValidator(TEST_DATA_DIR / "normal.yml", cache=results).validate()
+    load_spec(TEST_DATA_DIR / "normal.yml", cache=cache)
+    cache.clear()
+    assert len(list(cache.cache_dir.iterdir())) == 1
+    assert DataDependenciesValidator(TEST_DATA_DIR / "normal.yml", cache=results).validate() and results.hits == 1
+
+def test_corrupt_entry_is_a_miss(tmp_path, cache):
+    load_spec(TEST_DATA_DIR / "normal.yml", cache=cache)
+    [entry] = cache.cache_dir.glob("*.spec")
+    entry.write_bytes(entry.read_bytes()[:100])
+    assert load_spec(TEST_DATA_DIR / "normal.yml", cache=cache)[0] is not None
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert load_spec(TEST_DATA_DIR / "normal.yml", cache=cache)[0] is not None
+    assert cache.hits == 1
+
+def test_streaming_without_cache():
+    compiled, _ = load_spec(TEST_DATA_DIR / "normal.yml", streaming=True)
+    assert compiled.graph.topological_order()
+    with pytest.raises(ValueError):
+        load_spec(TEST_DATA_DIR / "normal.yml", cache=SpecCache(), streaming=True)
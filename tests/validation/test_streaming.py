@@ -0,0 +1,181 @@
+import tracemalloc
+import pytest
+import yaml
+from pathlib import Path
+
+from rtar_ddeps.testing.synthetic_spec import BROKEN_FAULTS, SpecShape, SyntheticSpec
+from rtar_ddeps.validation.data_dependencies_validator import DataDependenciesValidator
+from rtar_ddeps.validation.rule_engine import Rule, RuleRegistry
+from rtar_ddeps.validation.builtin_rules import BUILTIN_RULES
+from rtar_ddeps.validation.streaming import StreamingDataDependenciesValidator
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+BACKENDS = ["python"] + (["c"] if yaml.__with_libyaml__ else [])
+
+HEADER = """\
+metadata:
+  title: "t"
+  purposes: []
+target:
+  - a
+"""
+
+ENTRY_A = """\
+  a:
+    descriptions: ["a"]
+    format: table
+    unit: "-"
+    required_data: [b]
+    columns:
+      - name: b*
+        description: "x"
+"""
+
+ENTRY_B = """\
+  b:
+    descriptions: []
+    format: table
+    unit: "-"
+    columns:
+      - name: id
+        description: "id"
+"""
+
+# 通常の検証と結果が一致すべき, 扱いに注意が必要な文書
+TRICKY_DOCUMENTS = {
+    'valid': HEADER + "data:\n" + ENTRY_A + ENTRY_B,
+    'duplicate_entry': HEADER + "data:\n" + ENTRY_A + ENTRY_B + ENTRY_A.replace("[b]", "[c]"),
+    'duplicate_entry_first_invalid': HEADER + "data:\n" + ENTRY_A.replace("    format: table\n", "") + ENTRY_B + ENTRY_A,
+    'duplicate_entry_last_invalid': HEADER + "data:\n" + ENTRY_A + ENTRY_B + ENTRY_A.replace("    unit: \"-\"\n", ""),
+    'nested_duplicates': HEADER.replace("  title: \"t\"\n", "  title: \"t\"\n  title: \"u\"\n") + "data:\n" + ENTRY_A.replace(
+        "        description: \"x\"\n", "        description: \"x\"\n        description: \"y\"\n"
+    ) + ENTRY_B.replace("    unit: \"-\"\n", "    unit: \"-\"\n    unit: \"-\"\n") + "parameter:\n  p:\n    descriptions: []\n    unit: a\n    unit: b\n",
+    'parameter_first': "parameter:\n  b:\n    descriptions: []\n    unit: \"-\"\n" + HEADER + "data:\n" + ENTRY_A + ENTRY_B,
+    'anchors_within_entry': HEADER + "data:\n" + ENTRY_A + ENTRY_B.replace(
+        "    columns:\n", "    keys: &k\n      - name: k\n        description: \"k\"\n    keys2: *k\n    columns:\n"
+    ),
+    'alias_across_entries': HEADER + "data:\n" + ENTRY_A.replace("descriptions: [\"a\"]", "descriptions: &d [\"a\"]")
+        + ENTRY_B.replace("descriptions: []", "descriptions: *d"),
+    'alias_across_entries_with_duplicates': HEADER + "data:\n" + ENTRY_A.replace("    unit: \"-\"\n", "    unit: &u \"-\"\n    unit: \"-\"\n")
+        + ENTRY_B.replace("unit: \"-\"", "unit: *u\n    unit: *u"),
+    'merge_key': HEADER + "base: &base\n  descriptions: [\"m\"]\n  format: single\n  unit: \"-\"\ndata:\n" + ENTRY_A + ENTRY_B + "  c:\n    <<: *base\n    format: list\n",
+    'anchored_section': HEADER + "data: &data\n" + ENTRY_A + ENTRY_B,
+    'duplicate_top_level': HEADER + "data:\n" + ENTRY_A + ENTRY_B + "data:\n" + ENTRY_B,
+    'missing_data': HEADER,
+    'empty_data': HEADER + "data: {}\n",
+    'data_is_list': HEADER + "data:\n  - a\n",
+    'non_str_entry_name': HEADER + "data:\n" + ENTRY_A + ENTRY_B + "  1:\n    descriptions: []\n",
+    'non_dict_entry': HEADER + "data:\n" + ENTRY_A + ENTRY_B + "  c: 1\n",
+    'parse_error': HEADER + "data:\n" + ENTRY_A + "  b: [\n",
+    'empty_document': "",
+    'list_root': "- a\n- b\n",
+    'multiple_documents': HEADER + "data:\n" + ENTRY_A + ENTRY_B + "---\nfoo: 1\n",
+    'flow_section': HEADER + "data: {a: {descriptions: [x], format: single, unit: '-'}}\n",
+}
+
+def _run(validator_class, path: Path, **kwargs):
+    validator = validator_class(path, **kwargs)
+    is_valid = validator.validate()
+    return validator, (is_valid, validator.errors, validator.warnings)
+
+def _assert_parity(path: Path, **kwargs):
+    _, expected = _run(DataDependenciesValidator, path, **kwargs)
+    validator, actual = _run(StreamingDataDependenciesValidator, path, **kwargs)
+    assert actual == expected
+    return validator
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("path", sorted(TEST_DATA_DIR.glob("*.yml")), ids=lambda p: p.name)
+def test_parity_with_test_data(path, backend):
+    validator = _assert_parity(path, yaml_backend=backend)
+    assert validator.streamed
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("name", TRICKY_DOCUMENTS)
+def test_parity_with_tricky_documents(tmp_path, name, backend):
+    path = tmp_path / f"{name}.yml"
+    path.write_text(TRICKY_DOCUMENTS[name], encoding='utf-8')
+    _assert_parity(path, yaml_backend=backend)
+
+@pytest.mark.parametrize("name,streamed", [
+    ('duplicate_entry', True),
+    ('nested_duplicates', True),
+    ('alias_across_entries', True),
+    ('merge_key', True),
+    ('anchored_section', True), # セクション全体を 1 単位として読み込む
+    ('alias_across_entries_with_duplicates', False),
+    ('duplicate_top_level', False),
+    ('parse_error', False),
+    ('empty_document', False),
+    ('list_root', False),
+    ('multiple_documents', False),
+])
+def test_fallback_to_in_memory_validation(tmp_path, name, streamed):
+    path = tmp_path / f"{name}.yml"
+    path.write_text(TRICKY_DOCUMENTS[name], encoding='utf-8')
+    validator, _ = _run(StreamingDataDependenciesValidator, path)
+    assert validator.streamed is streamed
+
+@pytest.mark.parametrize("faults", [(), BROKEN_FAULTS, ('missing_field', 'duplicate_key')], ids=["valid", "broken", "schema_error"])
+def test_parity_with_synthetic_specs(tmp_path, faults):
+    path = tmp_path / "data_dependencies.yml"
+    SyntheticSpec(SpecShape(entries=300, chain_depth=6, variable_column_density=0.3, seed=3), faults=faults).write(path)
+    validator = _assert_parity(path)
+    assert validator.streamed
+
+def test_positions_inside_entries_are_entry_names():
+    """ストリーミング検証では, エントリ内のパスの位置はエントリの名前の位置になる (README 参照)"""
+    path = TEST_DATA_DIR / "error_reference.yml"
+    in_memory, _ = _run(DataDependenciesValidator, path)
+    streaming, _ = _run(StreamingDataDependenciesValidator, path)
+    assert streaming.streamed
+    for expected, actual in zip(in_memory.errors, streaming.errors, strict=True):
+        assert actual.path == expected.path
+        if expected.path[0] == 'data' and len(expected.path) > 2:
+            assert (actual.line, actual.column) == in_memory.positions.lookup(expected.path[:2])
+            assert (actual.line, actual.column) != (expected.line, expected.column)
+        else:
+            assert (actual.line, actual.column) == (expected.line, expected.column)
+
+def test_streaming_does_not_keep_entries(tmp_path):
+    path = tmp_path / "data_dependencies.yml"
+    SyntheticSpec(SpecShape(entries=300)).write(path)
+    validator, (is_valid, _, _) = _run(StreamingDataDependenciesValidator, path)
+    assert is_valid
+    # 文書全体は構築せず, 要約のみを保持する
+    assert set(validator.data) == {'metadata', 'target'}
+    assert validator.spec.data_count == 300
+
+def test_custom_rules_receive_entries_and_summaries(tmp_path):
+    seen = {}
+
+    class RecordingRule(Rule):
+        rule_id = 'recording'
+
+        def visit_data(self, ctx, entry):
+            seen.setdefault('descriptions', []).append(entry.descriptions)
+
+        def finish(self, ctx):
+            seen['formats'] = [entry.format for entry in ctx.spec.data]
+
+    path = tmp_path / "data_dependencies.yml"
+    path.write_text(TRICKY_DOCUMENTS['valid'], encoding='utf-8')
+    registry = RuleRegistry(BUILTIN_RULES + (RecordingRule(),))
+    validator, _ = _run(StreamingDataDependenciesValidator, path, rules=registry)
+    assert validator.streamed
+    assert seen == {'descriptions': [("a",), ()], 'formats': ['table', 'table']}
+
+def _peak_bytes(validator_class, path: Path) -> int:
+    tracemalloc.start()
+    try:
+        validator_class(path).validate()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_peak_memory_is_lower_than_in_memory_validation(tmp_path):
+    path = tmp_path / "data_dependencies.yml"
+    SyntheticSpec(SpecShape(entries=400, columns=12)).write(path)
+    streaming_peak = _peak_bytes(StreamingDataDependenciesValidator, path)
+    in_memory_peak = _peak_bytes(DataDependenciesValidator, path)
+    assert streaming_peak < in_memory_peak / 2
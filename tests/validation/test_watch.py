@@ -0,0 +1,90 @@
+import shutil
+import sys
+import threading
+import time
+import pytest
+from pathlib import Path
+
+from rtar_ddeps.validation.watch import InotifyWatcher, PollingWatcher, WatchSession, wait_for_changes
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "data" / "data_dependencies"
+
+@pytest.fixture
+def spec_file(tmp_path):
+    file_path = tmp_path / "data_dependencies.yml"
+    shutil.copy(TEST_DATA_DIR / "normal.yml", file_path)
+    return file_path
+
+def _write_later(path: Path, contents: list, delay: float = 0.05):
+    """別スレッドで delay 秒おきにファイルを書き換える (連続保存の再現)"""
+    def run():
+        for content in contents:
+            time.sleep(delay)
+            path.write_text(content, encoding='utf-8')
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+@pytest.mark.parametrize("watcher_class", [
+    PollingWatcher,
+    pytest.param(InotifyWatcher, marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")),
+])
+def test_burst_of_saves_is_debounced(spec_file, watcher_class):
+    watcher = watcher_class([spec_file])
+    try:
+        original = spec_file.read_text(encoding='utf-8')
+        thread = _write_later(spec_file, [original + "\n", original + "\n\n", original])
+        changed = wait_for_changes(watcher, debounce=0.3)
+        thread.join()
+        assert changed == {spec_file}
+        # バースト全体が 1 回の変更としてまとめられ, 残りのイベントはない
+        assert watcher.wait(0.1) == set()
+    finally:
+        watcher.close()
+
+def test_session_reports_only_changed_diagnostics(spec_file):
+    lines = []
+    session = WatchSession([spec_file], echo=lines.append)
+    assert session.validate_all() is True
+    assert any("Validation successful" in line for line in lines)
+
+    # 結果が変わらない変更では検証結果を再出力しない
+    lines.clear()
+    spec_file.write_text(spec_file.read_text(encoding='utf-8') + "\n# comment\n", encoding='utf-8')
+    [(path, elapsed_ms, changed)] = session.revalidate({spec_file})
+    assert (path, changed) == (spec_file, False)
+    assert elapsed_ms >= 0
+    assert len(lines) == 1 and lines[0].startswith(f"[watch] Revalidated {spec_file} in ")
+
+    # エラーが発生する変更では結果を出力する
+    lines.clear()
+    spec_file.write_text(spec_file.read_text(encoding='utf-8').replace("  - statistics_summary #", "  - missing_data #"), encoding='utf-8')
+    [(_, _, changed)] = session.revalidate({spec_file})
+    assert changed is True
+    assert any("Target data 'missing_data' is not defined" in line for line in lines)
+
+@pytest.mark.parametrize("watcher_class", [
+    PollingWatcher,
+    pytest.param(InotifyWatcher, marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")),
+])
+def test_new_fragment_in_included_directory_is_revalidated(tmp_path, watcher_class):
+    fragment = "a:\n  descriptions: [a]\n  format: single\n  unit: '-'\n"
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.yml").write_text(fragment, encoding='utf-8')
+    spec_file = tmp_path / "data_dependencies.yml"
+    spec_file.write_text("metadata:\n  title: t\n  purposes: [p]\ntarget: [a]\ndata: !include data/\n", encoding='utf-8')
+    session = WatchSession([spec_file], echo=lambda line: None)
+    assert session.validate_all() is True
+    watcher = watcher_class(session.watched_paths())
+    try:
+        # ディレクトリに追加したファイルのキーが重複する
+        thread = _write_later(tmp_path / "data" / "b.yml", [fragment])
+        changed = watcher.wait(5.0)
+        thread.join()
+        while more := watcher.wait(0.2):
+            changed |= more
+        assert changed == {(tmp_path / "data").resolve()}
+        [(path, _, diagnostics_changed)] = session.revalidate(changed)
+        assert path == spec_file and diagnostics_changed
+    finally:
+        watcher.close()